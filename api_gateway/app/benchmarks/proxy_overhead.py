@@ -0,0 +1,121 @@
+# api-gateway/app/benchmarks/proxy_overhead.py
+# ============================================
+# BENCHMARK: GATEWAY OVERHEAD vs DIRECT CALL
+# ============================================
+#
+#   python -m api_gateway.app.benchmarks.proxy_overhead
+#   python -m api_gateway.app.benchmarks.proxy_overhead --requests 5000 --body-size 4096
+#
+# Stub upstream (xom ASGI) va gateway alohida uvicorn processlarda
+# ishga tushiriladi; bitta keep-alive client so'rovlarni navbatma-navbat
+# to'g'ridan-to'g'ri va gateway orqali yuboradi - farq gateway narxi.
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import List
+
+import httpx
+
+PATH = "/api/v1/payments/bench"
+
+
+async def upstream_app(scope, receive, send):
+    """Stub upstream: body ni o'qiydi, belgilangan hajmdagi JSON qaytaradi"""
+    if scope["type"] != "http":
+        return
+    more_body = True
+    while more_body:
+        message = await receive()
+        more_body = message.get("more_body", False)
+    size = int(os.getenv("BENCH_RESPONSE_SIZE", "512"))
+    body = b'{"data":"' + b"x" * max(size - 11, 0) + b'"}'
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(app: str, port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        env={**os.environ, **env}
+    )
+
+
+def wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not start")
+
+
+def percentile(samples: List[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="API gateway proxy overhead benchmark")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--warmup", type=int, default=300)
+    parser.add_argument("--body-size", type=int, default=0, help="POST body (0 - GET)")
+    parser.add_argument("--response-size", type=int, default=512)
+    args = parser.parse_args()
+
+    upstream_port, gateway_port = free_port(), free_port()
+    env = {"BENCH_RESPONSE_SIZE": str(args.response_size), "LOG_LEVEL": "WARNING"}
+    processes = [
+        serve("api_gateway.app.benchmarks.proxy_overhead:upstream_app", upstream_port, env),
+        serve("api_gateway.app.main:app", gateway_port, {**env, "PAYMENT_SERVICE_URL": f"http://127.0.0.1:{upstream_port}"}),
+    ]
+    try:
+        direct_url = f"http://127.0.0.1:{upstream_port}{PATH}"
+        gateway_url = f"http://127.0.0.1:{gateway_port}{PATH}"
+        wait_ready(direct_url)
+        wait_ready(gateway_url)
+
+        method = "POST" if args.body_size else "GET"
+        body = b"x" * args.body_size if args.body_size else None
+        samples = {"direct": [], "gateway": []}
+        with httpx.Client(trust_env=False) as client:
+            for i in range(args.warmup + args.requests):
+                # Navbatma-navbat - fon shovqini ikkala tomonga teng tushadi
+                for name, url in (("direct", direct_url), ("gateway", gateway_url)):
+                    started = time.perf_counter()
+                    response = client.request(method, url, content=body)
+                    elapsed = time.perf_counter() - started
+                    assert response.status_code == 200, response.text
+                    if i >= args.warmup:
+                        samples[name].append(elapsed * 1000)
+
+        print(f"{method} {PATH}, {args.requests} requests, response {args.response_size} B")
+        print(f"{'':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}")
+        for name, values in samples.items():
+            print(f"{name:>8} {percentile(values, 0.5):>8.3f} {percentile(values, 0.9):>8.3f} {percentile(values, 0.99):>8.3f}")
+        overhead = percentile(samples["gateway"], 0.5) - percentile(samples["direct"], 0.5)
+        print(f"gateway overhead p50: {overhead:.3f} ms")
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# api-gateway/app/main.py
+# ============================================
+# API GATEWAY - FastAPI Application
+# ============================================
+
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from shared.config import get_settings
+from shared.logger import setup_logger
+from api_gateway.app.routers import chat_routes, health_routes, payment_routes
+from api_gateway.app.services.chat_service_client import chat_service_client
+from api_gateway.app.services.payment_service_client import payment_service_client
+from api_gateway.app.services.upstream import UpstreamException
+
+settings = get_settings()
+logger = setup_logger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup va shutdown - upstream connection poollari butun process
+    davomida bitta (har requestda yangi client ochilmaydi)
+    """
+    logger.info("API Gateway starting ..")
+    await payment_service_client.start()
+    await chat_service_client.start()
+
+    yield
+
+    logger.info("API Gateway shutting down ..")
+    await payment_service_client.close()
+    await chat_service_client.close()
+
+
+app = FastAPI(
+    title="API Gateway",
+    description="Payment va Chat servicelar uchun reverse proxy",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+
+# ===== EXCEPTION HANDLERS =====
+
+@app.exception_handler(UpstreamException)
+async def upstream_exception_handler(request: Request, exc: UpstreamException):
+    """Upstream ishlamayapti (502) yoki javob bermadi (504)"""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={
+            "error": exc.code,
+            "message": exc.message,
+            "service": exc.service,
+            "request_id": request.headers.get("x-request-id")
+        }
+    )
+
+
+# ===== ROUTES =====
+
+app.include_router(health_routes.router)
+app.include_router(payment_routes.router)
+app.include_router(chat_routes.router)
+
+
+@app.get("/", tags=["root"])
+async def root():
+    """Root endpoint"""
+    return {
+        "service": "API Gateway",
+        "version": "1.0.0",
+        "docs": "/docs",
+        "health": "/health"
+    }
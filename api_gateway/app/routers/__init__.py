@@ -0,0 +1,3 @@
+from . import chat_routes, health_routes, payment_routes
+
+__all__ = ["chat_routes", "health_routes", "payment_routes"]
@@ -0,0 +1,24 @@
+# api-gateway/app/routers/chat_routes.py
+# ============================================
+# CHAT SERVICE ROUTES (PROXY)
+# ============================================
+
+from fastapi import APIRouter, Request
+
+from api_gateway.app.services.upstream import PROXY_METHODS
+from api_gateway.app.services.chat_service_client import chat_service_client
+
+router = APIRouter(prefix="/api/v1", tags=["chat"])
+
+# Chat service public routerlari. /admin (room telemetry) ichki - gateway
+# orqali tashqariga chiqarilmaydi
+PREFIXES = ("messages",)
+
+
+async def proxy(request: Request):
+    return await chat_service_client.forward(request)
+
+
+for prefix in PREFIXES:
+    router.add_api_route(f"/{prefix}", proxy, methods=PROXY_METHODS, include_in_schema=False)
+    router.add_api_route(f"/{prefix}/{{path:path}}", proxy, methods=PROXY_METHODS, include_in_schema=False)
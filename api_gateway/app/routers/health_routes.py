@@ -0,0 +1,35 @@
+# api-gateway/app/routers/health_routes.py
+# ============================================
+# GATEWAY HEALTH / METRICS
+# ============================================
+
+import asyncio
+
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from api_gateway.app.services.chat_service_client import chat_service_client
+from api_gateway.app.services.payment_service_client import payment_service_client
+
+router = APIRouter(tags=["health"])
+
+UPSTREAMS = (payment_service_client, chat_service_client)
+
+
+@router.get("/health")
+async def health_check():
+    """Gateway va upstreamlar holati"""
+    results = await asyncio.gather(*[upstream.health() for upstream in UPSTREAMS])
+    upstreams = {upstream.name: result for upstream, result in zip(UPSTREAMS, results)}
+    return {
+        "status": "healthy" if all(r["status"] == "healthy" for r in results) else "degraded",
+        "service": "api-gateway",
+        "version": "1.0.0",
+        "upstreams": upstreams
+    }
+
+
+@router.get("/metrics")
+async def metrics():
+    """Prometheus metrics"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
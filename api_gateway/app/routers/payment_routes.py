@@ -0,0 +1,24 @@
+# api-gateway/app/routers/payment_routes.py
+# ============================================
+# PAYMENT SERVICE ROUTES (PROXY)
+# ============================================
+
+from fastapi import APIRouter, Request
+
+from api_gateway.app.services.upstream import PROXY_METHODS
+from api_gateway.app.services.payment_service_client import payment_service_client
+
+router = APIRouter(prefix="/api/v1", tags=["payments"])
+
+# Payment service public routerlari. /reports (platforma bo'yicha hisobot)
+# ichki - gateway orqali tashqariga chiqarilmaydi
+PREFIXES = ("payments", "providers")
+
+
+async def proxy(request: Request):
+    return await payment_service_client.forward(request)
+
+
+for prefix in PREFIXES:
+    router.add_api_route(f"/{prefix}", proxy, methods=PROXY_METHODS, include_in_schema=False)
+    router.add_api_route(f"/{prefix}/{{path:path}}", proxy, methods=PROXY_METHODS, include_in_schema=False)
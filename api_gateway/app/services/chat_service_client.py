@@ -0,0 +1,11 @@
+# api-gateway/app/services/chat_service_client.py
+# ============================================
+# CHAT SERVICE UPSTREAM
+# ============================================
+
+from shared.config import get_settings
+from api_gateway.app.services.upstream import UpstreamClient
+
+settings = get_settings()
+
+chat_service_client = UpstreamClient("chat-service", settings.CHAT_SERVICE_URL)
@@ -0,0 +1,11 @@
+# api-gateway/app/services/payment_service_client.py
+# ============================================
+# PAYMENT SERVICE UPSTREAM
+# ============================================
+
+from shared.config import get_settings
+from api_gateway.app.services.upstream import UpstreamClient
+
+settings = get_settings()
+
+payment_service_client = UpstreamClient("payment-service", settings.PAYMENT_SERVICE_URL)
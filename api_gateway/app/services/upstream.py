@@ -0,0 +1,208 @@
+# api-gateway/app/services/upstream.py
+# ============================================
+# POOLED STREAMING UPSTREAM CLIENT (REVERSE PROXY)
+# ============================================
+
+import time
+import uuid
+from typing import AsyncIterator, List, Optional, Tuple
+
+import httpx
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from prometheus_client import Counter, Histogram
+
+from shared.config import get_settings
+from shared.exceptions import ServiceUnavailableException
+from shared.logger import setup_logger
+
+settings = get_settings()
+logger = setup_logger(__name__)
+
+# RFC 7230 6.1 - faqat shu ulanishga tegishli, forward qilinmaydi
+HOP_BY_HOP = frozenset({
+    b"connection", b"keep-alive", b"proxy-authenticate", b"proxy-authorization",
+    b"te", b"trailer", b"transfer-encoding", b"upgrade",
+})
+
+PROXY_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"]
+
+UPSTREAM_REQUESTS = Counter(
+    "gateway_upstream_requests_total",
+    "Requests proxied to upstream services",
+    ["upstream", "status"]
+)
+UPSTREAM_LATENCY = Histogram(
+    "gateway_upstream_response_seconds",
+    "Time until upstream response headers",
+    ["upstream"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+class UpstreamException(ServiceUnavailableException):
+    """Upstream ga ulanib / javob olib bo'lmadi (502 yoki timeout - 504)"""
+
+    def __init__(self, message: str, service: str, status_code: int = 502):
+        super().__init__(message, service)
+        self.status_code = status_code
+        self.code = "GATEWAY_TIMEOUT" if status_code == 504 else "BAD_GATEWAY"
+
+
+def _strip_hop_by_hop(raw: Headers, extra: frozenset = frozenset()) -> Headers:
+    # Connection: <token> bilan e'lon qilingan headerlar ham hop-by-hop
+    dropped = set(HOP_BY_HOP) | extra
+    for name, value in raw:
+        if name.lower() == b"connection":
+            dropped.update(token.strip().lower() for token in value.split(b","))
+    return [(name, value) for name, value in raw if name.lower() not in dropped]
+
+
+def request_headers(request: Request, request_id: bytes) -> Headers:
+    """Client headerlari -> upstream: hop-by-hop va Host olib tashlanadi, X-Forwarded-* qo'shiladi"""
+    headers = _strip_hop_by_hop(
+        request.headers.raw,
+        frozenset({b"host", b"x-forwarded-for", b"x-forwarded-proto", b"x-forwarded-host", b"x-request-id"})
+    )
+    client = request.client.host if request.client else ""
+    forwarded_for = request.headers.get("x-forwarded-for")
+    headers.append((b"x-forwarded-for", f"{forwarded_for}, {client}".encode() if forwarded_for else client.encode()))
+    headers.append((b"x-forwarded-proto", request.url.scheme.encode()))
+    host = request.headers.get("host")
+    if host:
+        headers.append((b"x-forwarded-host", host.encode()))
+    headers.append((b"x-request-id", request_id))
+    return headers
+
+
+class ProxyResponse(StreamingResponse):
+    """
+    Upstream javobi. Content-Length ma'lum bo'lsa body to'g'ridan-to'g'ri
+    yuboriladi (har requestga disconnect kuzatuvchi task group kerak emas);
+    chunked / SSE kabi cheksiz oqimlarda client uzilishi kuzatiladi.
+    """
+
+    def __init__(self, upstream: httpx.Response, raw_headers: Headers):
+        super().__init__(_body(upstream), status_code=upstream.status_code)
+        self.raw_headers = raw_headers
+        self.bounded = "content-length" in upstream.headers
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            if self.bounded:
+                await self.stream_response(send)
+            else:
+                await super().__call__(scope, receive, send)
+        finally:
+            # Client uzilsa ham upstream connection pool ga qaytadi / yopiladi
+            await self.body_iterator.aclose()
+
+
+async def _body(response: httpx.Response) -> AsyncIterator[bytes]:
+    try:
+        async for chunk in response.aiter_raw():
+            yield chunk
+    finally:
+        await response.aclose()
+
+
+class UpstreamClient:
+    """
+    Bitta upstream uchun bitta uzoq yashaydigan httpx.AsyncClient - keep-alive
+    connection pool, ixtiyoriy HTTP/2. Request va response body buffer
+    qilinmaydi: ikkala tomonga ham chunk-ma-chunk oqadi.
+    """
+
+    def __init__(self, name: str, base_url: str, http2: bool = None):
+        self.name = name
+        self.base_url = httpx.URL(base_url)
+        self.http2 = settings.GATEWAY_HTTP2 if http2 is None else http2
+        self.client: Optional[httpx.AsyncClient] = None
+        self.timeout = httpx.Timeout(
+            connect=settings.GATEWAY_CONNECT_TIMEOUT,
+            read=settings.GATEWAY_READ_TIMEOUT,
+            write=settings.GATEWAY_WRITE_TIMEOUT,
+            pool=settings.GATEWAY_POOL_TIMEOUT
+        )
+
+    async def start(self) -> None:
+        if self.client is not None:
+            return
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning(f"{self.name}: GATEWAY_HTTP2 requires the 'h2' package, using HTTP/1.1")
+                http2 = False
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=http2,
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=settings.GATEWAY_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.GATEWAY_MAX_KEEPALIVE,
+                keepalive_expiry=settings.GATEWAY_KEEPALIVE_EXPIRY
+            ),
+            follow_redirects=False,
+            # Ichki servislar - HTTP_PROXY env orqali yubormaslik
+            trust_env=False
+        )
+        logger.info(f"Upstream {self.name} -> {self.base_url} (http2={http2})")
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def forward(self, request: Request) -> ProxyResponse:
+        """Requestni path va query o'zgarmagan holda upstream ga uzatish"""
+        request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+        raw_path = request.scope.get("raw_path") or request.url.path.encode()
+        query = request.scope.get("query_string")
+        url = self.base_url.copy_with(raw_path=raw_path + b"?" + query if query else raw_path)
+
+        # Body faqat e'lon qilingan bo'lsa - aks holda GET ham chunked bo'lib ketadi
+        has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
+        # build_request emas - client default headerlari (Accept-Encoding: gzip,
+        # User-Agent ...) client yubormagan bo'lsa qo'shilmasin
+        upstream_request = httpx.Request(
+            request.method,
+            url,
+            headers=request_headers(request, request_id.encode()),
+            content=request.stream() if has_body else None,
+            extensions={"timeout": self.timeout.as_dict()}
+        )
+
+        started = time.perf_counter()
+        try:
+            response = await self.client.send(upstream_request, stream=True)
+        except httpx.TimeoutException as e:
+            UPSTREAM_REQUESTS.labels(self.name, "timeout").inc()
+            logger.warning(f"Upstream {self.name} timeout: {request.method} {request.url.path} ({type(e).__name__})")
+            raise UpstreamException(f"{self.name} timed out", self.name, status_code=504)
+        except httpx.TransportError as e:
+            UPSTREAM_REQUESTS.labels(self.name, "error").inc()
+            logger.warning(f"Upstream {self.name} unavailable: {request.method} {request.url.path} ({str(e)})")
+            raise UpstreamException(f"{self.name} is unavailable", self.name)
+        UPSTREAM_LATENCY.labels(self.name).observe(time.perf_counter() - started)
+        UPSTREAM_REQUESTS.labels(self.name, str(response.status_code)).inc()
+
+        # raw headers - Set-Cookie kabi takrorlanuvchi headerlar saqlanadi;
+        # aiter_raw() siqilgan baytlarni o'zgartirmaydi, Content-Length ham to'g'ri
+        headers = _strip_hop_by_hop(response.headers.raw)
+        if "x-request-id" not in response.headers:
+            headers.append((b"x-request-id", request_id.encode()))
+        return ProxyResponse(response, headers)
+
+    async def health(self) -> dict:
+        """Upstream /health - gateway health endpoint uchun"""
+        started = time.perf_counter()
+        try:
+            response = await self.client.get("/health", timeout=settings.GATEWAY_CONNECT_TIMEOUT)
+            status = "healthy" if response.status_code == 200 else f"unhealthy ({response.status_code})"
+        except httpx.HTTPError as e:
+            status = f"unreachable ({type(e).__name__})"
+        return {"status": status, "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
@@ -0,0 +1,185 @@
+# chat-service/app/database/reshard.py
+# ============================================
+# ROOMNI BOSHQA SHARDGA KO'CHIRISH (ONLINE)
+# ============================================
+#
+# Ishlatish tartibi:
+#   1. python -m chat_service.app.database.reshard copy ROOM_ID --to shard1
+#      (batchlab nusxalaydi, yangi yozuvlar qolmaguncha catch-up qiladi)
+#   2. CHAT_SHARD_OVERRIDES ga {"ROOM_ID": "shard1"} qo'shib deploy qilish
+#   3. copy ROOM_ID --from shard0 --to shard1 ni yana ishlatish
+#      (deploy paytida eski shardga yozilganlar)
+#   4. python -m chat_service.app.database.reshard cleanup ROOM_ID --from shard0
+#
+# Room ko'chirilayotganda eski shard yozishda davom etadi - downtime yo'q.
+
+import argparse
+import asyncio
+from typing import Dict, List
+
+from sqlalchemy import Table, delete, insert, select, tuple_, update
+
+from shared.logger import setup_logger
+from chat_service.app.database.sharding import ShardRouter
+from chat_service.app.models.message import ChatMessage, ChatRoom, ChatRoomMember
+
+logger = setup_logger(__name__)
+
+messages_table: Table = ChatMessage.__table__
+rooms_table: Table = ChatRoom.__table__
+members_table: Table = ChatRoomMember.__table__
+
+
+async def _copy_missing(target, table: Table, rows: List[Dict]) -> int:
+    """
+    Target shardda yo'q yoki eskirgan qatorlarni yozish, yozilganlar sonini qaytaradi
+    """
+    if not rows:
+        return 0
+
+    ids = [row["id"] for row in rows]
+    has_updated_at = "updated_at" in table.c
+    columns = [table.c.id, table.c.updated_at] if has_updated_at else [table.c.id]
+    existing = {
+        r[0]: (r[1] if has_updated_at else None)
+        for r in (await target.execute(select(*columns).where(table.c.id.in_(ids)))).all()
+    }
+
+    missing = [row for row in rows if row["id"] not in existing]
+    stale = [
+        row for row in rows
+        if has_updated_at and row["id"] in existing
+        and existing[row["id"]] is not None and row["updated_at"] is not None
+        and row["updated_at"] > existing[row["id"]]
+    ]
+
+    if missing:
+        await target.execute(insert(table), missing)
+    for row in stale:
+        await target.execute(update(table).where(table.c.id == row["id"]).values(**row))
+    return len(missing) + len(stale)
+
+
+async def copy_room(router: ShardRouter, room_id: str, source: str, target: str, batch_size: int = 1000) -> int:
+    """
+    Room, a'zolar va xabarlarni source -> target ga nusxalash.
+    Idempotent - qayta ishlatish faqat farqni yozadi.
+    """
+    if source == target:
+        raise ValueError("Source and target shards are the same")
+
+    copied = 0
+    async with router.shard_session(source) as src, router.shard_session(target) as dst:
+        for table in (rooms_table, members_table):
+            rows = [dict(r._mapping) for r in (await src.execute(
+                select(table).where(table.c.room_id == room_id)
+            )).all()]
+            copied += await _copy_missing(dst, table, rows)
+        await dst.commit()
+
+        # Xabarlar - (created_at, id) keyset bo'yicha batchlab
+        last = None
+        while True:
+            query = (
+                select(messages_table)
+                .where(messages_table.c.room_id == room_id)
+                .order_by(messages_table.c.created_at, messages_table.c.id)
+                .limit(batch_size)
+            )
+            if last is not None:
+                query = query.where(
+                    tuple_(messages_table.c.created_at, messages_table.c.id) > last
+                )
+            rows = [dict(r._mapping) for r in (await src.execute(query)).all()]
+            if not rows:
+                break
+
+            copied += await _copy_missing(dst, messages_table, rows)
+            await dst.commit()
+            # source da uzun transaction ushlab turmaslik uchun
+            await src.commit()
+            last = (rows[-1]["created_at"], rows[-1]["id"])
+
+    logger.info(f"Room {room_id}: {copied} rows copied {source} -> {target}")
+    return copied
+
+
+async def copy_until_caught_up(
+        router: ShardRouter,
+        room_id: str,
+        source: str,
+        target: str,
+        batch_size: int = 1000,
+        max_passes: int = 5
+) -> int:
+    """Yangi qatorlar qolmaguncha copy ni takrorlash"""
+    total = 0
+    for _ in range(max_passes):
+        copied = await copy_room(router, room_id, source, target, batch_size)
+        total += copied
+        if copied == 0:
+            break
+    return total
+
+
+async def cleanup_room(router: ShardRouter, room_id: str, source: str, batch_size: int = 1000) -> int:
+    """
+    Routing o'zgargandan keyin eski sharddagi qatorlarni o'chirish
+    """
+    if router.shard_for(room_id) == source:
+        raise ValueError(f"Room {room_id} is still routed to {source}, refusing to delete")
+
+    deleted = 0
+    async with router.shard_session(source) as src:
+        while True:
+            ids = (await src.execute(
+                select(messages_table.c.id)
+                .where(messages_table.c.room_id == room_id)
+                .limit(batch_size)
+            )).scalars().all()
+            if not ids:
+                break
+            await src.execute(delete(messages_table).where(messages_table.c.id.in_(ids)))
+            await src.commit()
+            deleted += len(ids)
+
+        for table in (members_table, rooms_table):
+            result = await src.execute(delete(table).where(table.c.room_id == room_id))
+            deleted += result.rowcount or 0
+        await src.commit()
+
+    logger.info(f"Room {room_id}: {deleted} rows deleted from {source}")
+    return deleted
+
+
+async def _main(args: argparse.Namespace) -> None:
+    from chat_service.app.database.session import shard_router as router
+
+    try:
+        if args.command == "copy":
+            source = args.source or router.shard_for(args.room_id)
+            copied = await copy_until_caught_up(router, args.room_id, source, args.to, args.batch_size)
+            print(f"copied {copied} rows {source} -> {args.to}")
+        else:
+            deleted = await cleanup_room(router, args.room_id, args.source, args.batch_size)
+            print(f"deleted {deleted} rows from {args.source}")
+    finally:
+        await router.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move a chat room between shards")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    copy_parser = sub.add_parser("copy", help="copy room rows to target shard")
+    copy_parser.add_argument("room_id")
+    copy_parser.add_argument("--to", required=True)
+    copy_parser.add_argument("--from", dest="source", default=None)
+    copy_parser.add_argument("--batch-size", type=int, default=1000)
+
+    cleanup_parser = sub.add_parser("cleanup", help="delete room rows from old shard")
+    cleanup_parser.add_argument("room_id")
+    cleanup_parser.add_argument("--from", dest="source", required=True)
+    cleanup_parser.add_argument("--batch-size", type=int, default=1000)
+
+    asyncio.run(_main(parser.parse_args()))
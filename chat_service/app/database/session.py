@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from shared.config import get_settings
 from chat_service.app.database.base import Base
+from chat_service.app.database.sharding import ShardRouter
 from contextlib import asynccontextmanager
 
 settings = get_settings()
@@ -22,6 +23,9 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# room_id -> shard routing (CHAT_SHARDS bo'sh bo'lsa faqat async_engine)
+shard_router = ShardRouter.from_settings(settings, async_engine)
+
 async def get_db() -> AsyncSession:
     """Dependency - har requestda DB session"""
     async with AsyncSessionLocal() as session:
@@ -31,4 +35,8 @@ async def get_db() -> AsyncSession:
 async def get_db_context():
     """Context manager - standalone code uchun"""
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+def get_shard_router() -> ShardRouter:
+    """Dependency - shard router"""
+    return shard_router
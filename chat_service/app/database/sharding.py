@@ -0,0 +1,148 @@
+# chat-service/app/database/sharding.py
+# ============================================
+# ROOM_ID BO'YICHA HASH SHARDING
+# ============================================
+
+import bisect
+import hashlib
+import json
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from shared.config import Settings
+from shared.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_SHARD = "default"
+
+
+def make_async_engine(url: str, settings: Settings) -> AsyncEngine:
+    """
+    URL dan async engine yaratish (postgres uchun pool sozlamalari bilan)
+    """
+    if url.startswith("postgresql://"):
+        url = url.replace("postgresql", "postgresql+asyncpg", 1)
+
+    if url.startswith("sqlite"):
+        # Local/test shardlar uchun pool sozlamalari kerak emas
+        return create_async_engine(url, echo=settings.DB_ECHO)
+
+    return create_async_engine(
+        url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=10,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        echo=settings.DB_ECHO,
+    )
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Consistent hashing ring - shard qo'shilganda faqat ~1/N roomlar ko'chadi
+    """
+
+    def __init__(self, nodes: Iterable[str], vnodes: int = 128):
+        points: List[Tuple[int, str]] = []
+        for node in nodes:
+            for i in range(vnodes):
+                points.append((_hash(f"{node}#{i}"), node))
+        if not points:
+            raise ValueError("Hash ring needs at least one node")
+        points.sort()
+        self._keys = [p[0] for p in points]
+        self._nodes = [p[1] for p in points]
+
+    def get_node(self, key: str) -> str:
+        idx = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._nodes[idx]
+
+
+class ShardRouter:
+    """
+    room_id -> shard engine. Overrides ring natijasidan ustun turadi.
+    """
+
+    def __init__(
+            self,
+            engines: Dict[str, AsyncEngine],
+            overrides: Optional[Dict[str, str]] = None,
+            vnodes: int = 128
+    ):
+        self.engines = engines
+        self.overrides = dict(overrides or {})
+        unknown = set(self.overrides.values()) - set(engines)
+        if unknown:
+            raise ValueError(f"Shard overrides reference unknown shards: {sorted(unknown)}")
+
+        self.ring = HashRing(sorted(engines), vnodes)
+        self.sessionmakers = {
+            name: async_sessionmaker(
+                engine,
+                class_=AsyncSession,
+                expire_on_commit=False,
+                autoflush=False,
+            )
+            for name, engine in engines.items()
+        }
+
+    @classmethod
+    def from_urls(
+            cls,
+            shard_urls: Dict[str, str],
+            settings: Settings,
+            overrides: Optional[Dict[str, str]] = None,
+            vnodes: int = 128
+    ) -> "ShardRouter":
+        engines = {name: make_async_engine(url, settings) for name, url in shard_urls.items()}
+        return cls(engines, overrides, vnodes)
+
+    @classmethod
+    def from_settings(cls, settings: Settings, default_engine: AsyncEngine) -> "ShardRouter":
+        """
+        CHAT_SHARDS bo'sh bo'lsa bitta default shard (mavjud engine) ishlatiladi
+        """
+        overrides = json.loads(settings.CHAT_SHARD_OVERRIDES) if settings.CHAT_SHARD_OVERRIDES else {}
+        if not settings.CHAT_SHARDS:
+            return cls({DEFAULT_SHARD: default_engine}, overrides, settings.CHAT_SHARD_VNODES)
+
+        shard_urls = json.loads(settings.CHAT_SHARDS)
+        logger.info(f"Chat sharding enabled: {sorted(shard_urls)}")
+        return cls.from_urls(shard_urls, settings, overrides, settings.CHAT_SHARD_VNODES)
+
+    @property
+    def shard_names(self) -> List[str]:
+        return sorted(self.engines)
+
+    def shard_for(self, room_id: str) -> str:
+        """Room qaysi shardda turishi"""
+        return self.overrides.get(room_id) or self.ring.get_node(room_id)
+
+    def session(self, room_id: str) -> AsyncSession:
+        """Room shardiga session ochish"""
+        return self.sessionmakers[self.shard_for(room_id)]()
+
+    def shard_session(self, shard: str) -> AsyncSession:
+        """Aniq shardga session ochish"""
+        return self.sessionmakers[shard]()
+
+    @asynccontextmanager
+    async def all_sessions(self):
+        """Barcha shardlarga session (scatter-gather querylar uchun)"""
+        sessions = [self.shard_session(name) for name in self.shard_names]
+        try:
+            yield sessions
+        finally:
+            for session in sessions:
+                await session.close()
+
+    async def dispose(self) -> None:
+        for engine in self.engines.values():
+            await engine.dispose()
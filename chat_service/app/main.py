@@ -7,10 +7,12 @@ from time import process_time
 
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.exception_handlers import RequestValidationError
 from contextlib import asynccontextmanager
 import redis.asyncio as redis
+import aio_pika
+from prometheus_client import REGISTRY, generate_latest, CONTENT_TYPE_LATEST
 import time
 import json
 from typing import Optional
@@ -20,12 +22,17 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from shared.config import get_settings
 from shared.logger import setup_logger
 from shared.exceptions import (
-    BaseException, NotFoundException, UnauthorizedException, ServiceUnavailableException
+    BaseException, NotFoundException, UnauthorizedException, ForbiddenException,
+    ServiceUnavailableException
 )
-from chat_service.app.routers import message
-from chat_service.app.websocket.manager import ConnectionManager
+from chat_service.app.routers import message, admin
+from chat_service.app.websocket.manager import connection_manager
+from chat_service.app.websocket.room_stats import HotRoomsCollector
 from chat_service.app.services.message import MessageService
-from chat_service.app.database.session import get_db_context, get_db, async_engine
+from chat_service.app.services.notification import (
+    OfflineNotificationPublisher, NotificationDigestConsumer
+)
+from chat_service.app.database.session import get_db_context, get_db, async_engine, shard_router
 from chat_service.app.schemas.message import MessageCreate
 
 settings = get_settings()
@@ -33,7 +40,9 @@ logger = setup_logger(__name__)
 
 # Global variables
 redis_client: Optional[redis.Redis] = None
-connection_manager = ConnectionManager()
+rabbitmq_connection = None
+notification_publisher = OfflineNotificationPublisher()
+digest_consumer: Optional[NotificationDigestConsumer] = None
 
 
 
@@ -54,6 +63,23 @@ async def lifespan(app:FastAPI):
         logger.error(f"redis connection fieled: {str(e)}")
         redis_client = None
 
+    #2 rabbitmq connection - offline notificationlar uchun
+    global rabbitmq_connection, digest_consumer
+    try:
+        rabbitmq_connection = await aio_pika.connect_robust(settings.RABBITMQ_URL)
+        notification_publisher.channel = await rabbitmq_connection.channel()
+        await notification_publisher.setup()
+
+        if settings.CHAT_DIGEST_CONSUMER_ENABLED:
+            digest_consumer = NotificationDigestConsumer(
+                await rabbitmq_connection.channel()
+            )
+            await digest_consumer.start()
+        logger.info("✅ RabbitMQ connection established")
+    except Exception as e:
+        logger.error(f"⚠️  RabbitMQ connection failed: {str(e)}")
+        logger.warning("Offline notifications disabled")
+
 
     logger.info(f"✅ Chat Service running on {settings.SERVICE_HOST}:{settings.SERVICE_PORT}")
 
@@ -65,6 +91,15 @@ async def lifespan(app:FastAPI):
         await redis_client.close()
         logger.info("redis connection closed")
 
+    if digest_consumer:
+        await digest_consumer.stop()
+
+    if rabbitmq_connection:
+        await rabbitmq_connection.close()
+        logger.info("RabbitMQ connection closed")
+
+    await shard_router.dispose()
+
     logger.info(f" Chat service stopped")
 
 
@@ -138,6 +173,18 @@ async def unauthorized_exception_handler(request: Request, exc: UnauthorizedExce
     )
 
 
+@app.exception_handler(ForbiddenException)
+async def forbidden_exception_handler(request: Request, exc: ForbiddenException):
+    """Ruxsat xatolarini handle qilish"""
+    return JSONResponse(
+        status_code=403,
+        content={
+            "error": exc.code,
+            "message": exc.message
+        }
+    )
+
+
 @app.exception_handler(RequestValidationError)
 async def validation_error_handler(request: Request, exc: RequestValidationError):
     """Pydantic validation xatolarini handle qilish"""
@@ -184,7 +231,8 @@ async def websocket_endpoint(
     # connection accept qilish
 
     await connection_manager.connect(websocket, room_id, user_id)
-    message_service =MessageService(db, redis_client)
+    message_service =MessageService(db, redis_client, shard_router)
+    await message_service.add_member(room_id, user_id)
 
     try:
         while True:
@@ -207,17 +255,24 @@ async def websocket_endpoint(
                     room_id, user_id, message_create
                 )
                 # Barcha clientlarga broadcast qilish
-                await connection_manager.broadcast(
+                outgoing = {
+                    "type": "message",
+                    "id": str(saved_message.id),
+                    "user_id": saved_message.user_id,
+                    "message": saved_message.message,
+                    "message_type": saved_message.message_type,
+                    "created_at": saved_message.created_at.isoformat(),
+                    "room_id": room_id
+                }
+                await connection_manager.broadcast(room_id, outgoing)
+
+                # socketi yo'q a'zolarga notification
+                online = connection_manager.get_online_users(room_id)
+                members = await message_service.get_room_member_ids(room_id)
+                await notification_publisher.publish(
                     room_id,
-                    {
-                        "type": "message",
-                        "id": str(saved_message.id),
-                        "user_id": saved_message.user_id,
-                        "message": saved_message.message,
-                        "message_type": saved_message.message_type,
-                        "created_at": saved_message.created_at.isoformat(),
-                        "room_id": room_id
-                    }
+                    outgoing,
+                    [m for m in members if m not in online and m != user_id]
                 )
 
                 logger.info(f"Message sent in room {room_id} by user {user_id}")
@@ -252,6 +307,16 @@ async def websocket_endpoint(
 
 
 app.include_router(message.router, prefix="/api/v1")
+app.include_router(admin.router, prefix="/api/v1")
+
+# Prometheus - top-K hot roomlar
+REGISTRY.register(HotRoomsCollector(connection_manager))
+
+
+@app.get("/metrics", tags=["health"])
+async def metrics():
+    """Prometheus metrics"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 # Health Check
 
@@ -0,0 +1,86 @@
+# chat-service/alembic/env.py
+# ============================================
+# ALEMBIC MIGRATION SETUP (HAR BIR SHARD UCHUN)
+# ============================================
+
+
+import sys
+import os
+import json
+
+# Project root-ni topish (env.py joyi: chat_service/app/migrations/env.py)
+BASE_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "../../../")
+)
+sys.path.append(BASE_DIR)
+from shared.config import get_settings
+from chat_service.app.database.base import Base
+from chat_service.app.models.message import ChatMessage, ChatRoom, ChatRoomMember
+
+from logging.config import fileConfig
+from sqlalchemy import engine_from_config
+from sqlalchemy import pool
+from alembic import context
+config = context.config
+fileConfig(config.config_file_name)
+
+# Migration target metadata
+target_metadata = Base.metadata
+
+
+def shard_urls() -> dict:
+    """
+    CHAT_SHARDS bo'sh bo'lsa faqat DATABASE_URL; aks holda har bir shard
+    o'z alembic_version jadvali bilan alohida migrate qilinadi.
+    `-x shard=shard1` - faqat bitta shard.
+    """
+    settings = get_settings()
+    urls = json.loads(settings.CHAT_SHARDS) if settings.CHAT_SHARDS else {"default": settings.DATABASE_URL}
+    only = context.get_x_argument(as_dictionary=True).get("shard")
+    if only:
+        urls = {only: urls[only]}
+    return urls
+
+
+def run_migrations_offline() -> None:
+    """Offline migration"""
+    for name, url in shard_urls().items():
+        context.configure(
+            url=url,
+            target_metadata=target_metadata,
+            literal_binds=True,
+            dialect_opts={"paramstyle": "named"},
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Online migration"""
+    for name, url in shard_urls().items():
+        configuration = config.get_section(config.config_ini_section)
+        configuration["sqlalchemy.url"] = url
+
+        connectable = engine_from_config(
+            configuration,
+            prefix="sqlalchemy.",
+            poolclass=pool.NullPool,
+        )
+
+        with connectable.connect() as connection:
+            context.config.print_stdout(f"Migrating chat shard {name}")
+            context.configure(
+                connection=connection,
+                target_metadata=target_metadata
+            )
+
+            with context.begin_transaction():
+                context.run_migrations()
+        connectable.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
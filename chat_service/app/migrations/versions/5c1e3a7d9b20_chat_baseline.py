@@ -0,0 +1,78 @@
+"""chat baseline
+
+Revision ID: 5c1e3a7d9b20
+Revises:
+Create Date: 2025-03-06 10:00:00.000000
+
+Mavjud shardlarda jadvallar allaqachon bor - faqat yo'qlari yaratiladi,
+keyin `alembic upgrade head` odatdagidek.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "5c1e3a7d9b20"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    existing = set() if op.get_context().as_sql else set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "chat_messages" not in existing:
+        op.create_table(
+            "chat_messages",
+            sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+            sa.Column("room_id", sa.String(50), nullable=False),
+            sa.Column("user_id", sa.String(50), nullable=False),
+            sa.Column("message", sa.Text(), nullable=False),
+            sa.Column("message_type", sa.String(20), nullable=True),
+            sa.Column("is_read", sa.String(), nullable=True),
+            sa.Column("is_edited", sa.String(), nullable=True),
+            sa.Column("file_url", sa.String(500), nullable=True),
+            sa.Column("file_type", sa.String(50), nullable=True),
+            sa.Column("metadata", postgresql.JSON(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.Column("edited_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_chat_messages_room_id", "chat_messages", ["room_id"])
+        op.create_index("ix_chat_messages_user_id", "chat_messages", ["user_id"])
+        op.create_index("ix_chat_messages_created_at", "chat_messages", ["created_at"])
+        op.create_index("ix_chat_messages_room_created", "chat_messages", ["room_id", "created_at"])
+        op.create_index("ix_chat_messages_room_user", "chat_messages", ["room_id", "user_id"])
+
+    if "chat_rooms" not in existing:
+        op.create_table(
+            "chat_rooms",
+            sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+            sa.Column("room_id", sa.String(50), nullable=False),
+            sa.Column("name", sa.String(200), nullable=True),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("room_type", sa.String(20), nullable=True),
+            sa.Column("created_by", sa.String(50), nullable=False),
+            sa.Column("members_count", sa.Integer(), nullable=True),
+            sa.Column("is_active", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_chat_rooms_room_id", "chat_rooms", ["room_id"], unique=True)
+
+    if "chat_room_members" not in existing:
+        op.create_table(
+            "chat_room_members",
+            sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+            sa.Column("room_id", sa.String(50), nullable=False),
+            sa.Column("user_id", sa.String(50), nullable=False),
+            sa.Column("joined_at", sa.DateTime(), nullable=True),
+            sa.UniqueConstraint("room_id", "user_id", name="uq_chat_room_members_room_user"),
+        )
+        op.create_index("ix_chat_room_members_user_id", "chat_room_members", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("chat_room_members")
+    op.drop_table("chat_rooms")
+    op.drop_table("chat_messages")
@@ -0,0 +1,73 @@
+"""chat is_read / is_edited / is_active -> boolean (expand)
+
+Revision ID: 8e2a4c6f1d35
+Revises: 5c1e3a7d9b20
+Create Date: 2025-03-06 10:30:00.000000
+
+Online: *_bool shadow ustunlar, eski kod yozgan stringlarni trigger
+sinxronlaydi, batchlab backfill, NOT NULL (CHECK NOT VALID -> VALIDATE).
+Eski kod ishlayotganda xavfsiz.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from shared.migrations import (
+    backfill, create_sync_trigger, drop_sync_trigger, report_sizes, set_not_null, table_sizes
+)
+
+# revision identifiers, used by Alembic.
+revision = "8e2a4c6f1d35"
+down_revision = "5c1e3a7d9b20"
+branch_labels = None
+depends_on = None
+
+TRUE_VALUES = "('true', 't', '1', 'yes', 'y')"
+
+
+def as_bool(column: str, default: bool) -> str:
+    """'True' / 'false' / 't' / NULL ... -> boolean SQL ifoda"""
+    return (
+        f"CASE WHEN {column} IS NULL THEN {str(default).lower()} "
+        f"ELSE lower(trim({column})) IN {TRUE_VALUES} END"
+    )
+
+
+# table -> (trigger, [(eski ustun, default)])
+FLAGS = {
+    "chat_messages": ("chat_messages_sync_flags", [("is_read", False), ("is_edited", False)]),
+    "chat_rooms": ("chat_rooms_sync_flags", [("is_active", True)]),
+}
+
+
+def sync_body(columns) -> str:
+    return "\n".join(
+        f"    IF TG_OP = 'INSERT' OR NEW.{column} IS DISTINCT FROM OLD.{column} THEN\n"
+        f"        NEW.{column}_bool := {as_bool('NEW.' + column, default)};\n"
+        f"    END IF;"
+        for column, default in columns
+    )
+
+
+def upgrade() -> None:
+    for table, (trigger, columns) in FLAGS.items():
+        before = table_sizes(table)
+
+        for column, default in columns:
+            op.add_column(table, sa.Column(f"{column}_bool", sa.Boolean(), nullable=True))
+        create_sync_trigger(table, trigger, sync_body(columns))
+        backfill(
+            table,
+            ", ".join(f"{column}_bool = {as_bool(column, default)}" for column, default in columns),
+            " OR ".join(f"{column}_bool IS NULL" for column, _ in columns)
+        )
+        for column, default in columns:
+            set_not_null(table, f"{column}_bool")
+
+        report_sizes(table, before, "(expand)")
+
+
+def downgrade() -> None:
+    for table, (trigger, columns) in FLAGS.items():
+        drop_sync_trigger(table, trigger)
+        for column, _ in columns:
+            op.drop_column(table, f"{column}_bool")
@@ -0,0 +1,95 @@
+"""chat is_read / is_edited / is_active -> boolean (contract)
+
+Revision ID: 9f3b5d7e2a46
+Revises: 8e2a4c6f1d35
+Create Date: 2025-03-06 11:00:00.000000
+
+Boolean model hamma replicalarda ishlayotganidan KEYIN: trigger va string
+ustunlar o'chiriladi, *_bool ustunlar asl nomga o'tadi (faqat catalog
+o'zgarishi, millisekundlar). Keyin partial indexlar CREATE INDEX
+CONCURRENTLY bilan.
+
+Deploy tartibi:
+    alembic upgrade 8e2a4c6f1d35            # expand
+    # boolean model hamma replicalarda
+    alembic -x contract=true upgrade head   # contract
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from shared.migrations import (
+    backfill, create_index_concurrently, create_sync_trigger, drop_index_concurrently,
+    drop_sync_trigger, report_sizes, require_contract, table_sizes
+)
+
+# revision identifiers, used by Alembic.
+revision = "9f3b5d7e2a46"
+down_revision = "8e2a4c6f1d35"
+branch_labels = None
+depends_on = None
+
+FLAGS = {
+    "chat_messages": ("chat_messages_sync_flags", [("is_read", False), ("is_edited", False)]),
+    "chat_rooms": ("chat_rooms_sync_flags", [("is_active", True)]),
+}
+
+# Downgrade - eski (string) kod qaytsa, expand holatidagi trigger
+TRUE_VALUES = "('true', 't', '1', 'yes', 'y')"
+
+
+def as_bool(column: str, default: bool) -> str:
+    return (
+        f"CASE WHEN {column} IS NULL THEN {str(default).lower()} "
+        f"ELSE lower(trim({column})) IN {TRUE_VALUES} END"
+    )
+
+
+def sync_body(columns) -> str:
+    return "\n".join(
+        f"    IF TG_OP = 'INSERT' OR NEW.{column} IS DISTINCT FROM OLD.{column} THEN\n"
+        f"        NEW.{column}_bool := {as_bool('NEW.' + column, default)};\n"
+        f"    END IF;"
+        for column, default in columns
+    )
+
+
+def upgrade() -> None:
+    require_contract(down_revision)
+    before = {table: table_sizes(table) for table in FLAGS}
+
+    # Bitta transaction da - o'qiyotganlar hech qachon yarim holatni ko'rmaydi
+    for table, (trigger, columns) in FLAGS.items():
+        drop_sync_trigger(table, trigger)
+        for column, default in columns:
+            op.drop_column(table, column)
+            op.alter_column(
+                table, f"{column}_bool",
+                new_column_name=column,
+                server_default=sa.true() if default else sa.false()
+            )
+
+    create_index_concurrently(
+        "ix_chat_messages_unread", "chat_messages", ["room_id", "user_id"], where="NOT is_read"
+    )
+    create_index_concurrently(
+        "ix_chat_rooms_active_type_created", "chat_rooms", ["room_type", "created_at"], where="is_active"
+    )
+
+    for table in FLAGS:
+        report_sizes(table, before[table], "(contract)")
+
+
+def downgrade() -> None:
+    drop_index_concurrently("ix_chat_rooms_active_type_created", "chat_rooms")
+    drop_index_concurrently("ix_chat_messages_unread", "chat_messages")
+
+    for table, (trigger, columns) in FLAGS.items():
+        for column, _ in columns:
+            op.alter_column(table, column, new_column_name=f"{column}_bool", server_default=None)
+            op.add_column(table, sa.Column(column, sa.String(), nullable=True))
+        create_sync_trigger(table, trigger, sync_body(columns))
+        backfill(
+            table,
+            ", ".join(f"{column} = CASE WHEN {column}_bool THEN 'True' ELSE 'False' END" for column, _ in columns),
+            " OR ".join(f"{column} IS NULL" for column, _ in columns)
+        )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, Index, ForeignKey, Integer
+from sqlalchemy import Column, String, Text, DateTime, Index, ForeignKey, Integer, UniqueConstraint, Boolean, false, true
 from sqlalchemy.dialects.postgresql import UUID, JSON
 from datetime import datetime
 import uuid
@@ -23,15 +23,15 @@ class ChatMessage(Base):
     message_type = Column(String(20), default="text")  # text, image, file, etc
 
     # Status
-    is_read = Column(String, default=False)  # Boolean qisqacha o'z ichiga olish uchun
-    is_edited = Column(String, default=False)
+    is_read = Column(Boolean, nullable=False, default=False, server_default=false())
+    is_edited = Column(Boolean, nullable=False, default=False, server_default=false())
 
     # Media
     file_url = Column(String(500), nullable=True)
     file_type = Column(String(50), nullable=True)
 
-    # Metadata
-    metadata = Column(JSON, nullable=True)  # Additional data
+    # Metadata ("metadata" nomi Declarative da band - ustun nomi saqlanadi)
+    message_metadata = Column("metadata", JSON, nullable=True)  # Additional data
 
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -43,6 +43,13 @@ class ChatMessage(Base):
         Index("ix_chat_messages_room_created", "room_id", "created_at"),
         Index("ix_chat_messages_user_id", "user_id"),
         Index("ix_chat_messages_room_user", "room_id", "user_id"),
+        # Faqat o'qilmaganlar - unread count / ro'yxat kichik index bo'yicha
+        Index(
+            "ix_chat_messages_unread",
+            "room_id",
+            "user_id",
+            postgresql_where=is_read.is_(False)
+        ),
     )
 
     def __repr__(self) -> str:
@@ -76,12 +83,22 @@ class ChatRoom(Base):
     members_count = Column(Integer, default=0)
 
     # Status
-    is_active = Column(String, default=True)
+    is_active = Column(Boolean, nullable=False, default=True, server_default=true())
 
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Faqat faol roomlar
+        Index(
+            "ix_chat_rooms_active_type_created",
+            "room_type",
+            "created_at",
+            postgresql_where=is_active.is_(True)
+        ),
+    )
+
     def __repr__(self) -> str:
         return (
             f"<ChatRoom("
@@ -92,7 +109,29 @@ class ChatRoom(Base):
         )
 
 
+class ChatRoomMember(Base):
+    """
+    Room a'zolari - offline userlarga notification yuborish uchun
+    """
+    __tablename__ = "chat_room_members"
 
+    # Primary Key
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
+    room_id = Column(String(50), nullable=False)
+    user_id = Column(String(50), nullable=False, index=True)
 
+    # Timestamps
+    joined_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        UniqueConstraint("room_id", "user_id", name="uq_chat_room_members_room_user"),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<ChatRoomMember("
+            f"room_id={self.room_id}, "
+            f"user_id={self.user_id}"
+            f")>"
+        )
@@ -1,4 +1,4 @@
-from . import message
+from . import message, admin
 
-__all__ = ["message"]
+__all__ = ["message", "admin"]
 
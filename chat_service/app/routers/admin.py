@@ -0,0 +1,43 @@
+# chat-service/app/routers/admin.py
+# ============================================
+# ADMIN ENDPOINTS - ROOM TELEMETRY
+# ============================================
+# Faqat ADMIN_ROLE li tokenlar uchun - room nomlari va trafik boshqa
+# foydalanuvchilarga ko'rinmasligi kerak
+
+from fastapi import APIRouter, Depends, Query
+
+from shared.dependencies import get_admin_user_id
+from chat_service.app.websocket.manager import connection_manager
+from chat_service.app.websocket.room_stats import HotRoomSortKey
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/rooms/hot")
+async def get_hot_rooms(
+        k: int = Query(10, ge=1, le=100),
+        sort_by: HotRoomSortKey = Query("messages_per_second"),
+        admin_id: str = Depends(get_admin_user_id)
+):
+    """
+    Eng ko'p yuklama beradigan roomlar (top-K)
+    """
+    return {
+        "sort_by": sort_by,
+        "items": connection_manager.get_hot_rooms(k, sort_by)
+    }
+
+
+@router.get("/rooms/{room_id}/stats")
+async def get_room_stats(
+        room_id: str,
+        admin_id: str = Depends(get_admin_user_id)
+):
+    """
+    Bitta room traffic statistikasi
+    """
+    return {
+        "room_id": room_id,
+        **connection_manager.get_room_stats(room_id)
+    }
@@ -3,8 +3,7 @@
 # CHAT MESSAGE ENDPOINTS
 # ============================================
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from six import reraise
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
@@ -13,7 +12,8 @@ from watchfiles import awatch
 from shared.dependencies import get_user_id
 from shared.logger import setup_logger
 from shared.exceptions import NotFoundException, ValidationException
-from chat_service.app.database.session import get_db
+from chat_service.app.database.session import get_db, get_shard_router
+from chat_service.app.database.sharding import ShardRouter
 from chat_service.app.services.message import MessageService
 from chat_service.app.schemas.message import (
     MessageCreate, MessageResponse, MessageUpdate, MessageListResponse
@@ -28,14 +28,15 @@ async def create_message(
         room_id:str = Query(..., min_length=1),
         message_data:MessageCreate = None,
         user_id: str = Depends(get_user_id),
-        db:AsyncSession = Depends(get_db)
+        db:AsyncSession = Depends(get_db),
+        shards: ShardRouter = Depends(get_shard_router)
 ):
     """
     Yangi habar yaratish
 
     """
     try:
-        service = MessageService(db)
+        service = MessageService(db, shards=shards)
         return await service.create_message(room_id, user_id, message_data)
     except (NotFoundException, ValidationException) as e:
         raise HTTPException(status_code=400, datail=str(e.message))
@@ -48,14 +49,15 @@ async def create_message(
 async def get_message(
         message_id:UUID,
         user_id:str = Depends(get_user_id),
-        db:AsyncSession = Depends(get_db)
+        db:AsyncSession = Depends(get_db),
+        shards: ShardRouter = Depends(get_shard_router)
 ):
     """
     Xabarni olish
 
     """
     try:
-        service = MessageService(db)
+        service = MessageService(db, shards=shards)
         return await service.get_message(message_id)
     except NotFoundException as e:
         raise HTTPException(status_code=404, detail=str(e.message))
@@ -69,14 +71,15 @@ async def update_message(
         message_id: UUID,
         update_data: MessageUpdate,
         user_id:str = Depends(get_user_id),
-        db:AsyncSession = Depends(get_db)
+        db:AsyncSession = Depends(get_db),
+        shards: ShardRouter = Depends(get_shard_router)
 ):
     """
     Xabarni yangilash
     """
 
     try:
-        service = MessageService(db)
+        service = MessageService(db, shards=shards)
         return await service.update_message(message_id, user_id, update_data)
     except (NotFoundException, ValidationException) as e:
         raise HTTPException(status_code=400, detail=str(e.message))
@@ -88,16 +91,17 @@ async def update_message(
 
 @router.get("/room/{room_id}", response_model=MessageResponse)
 async def get_room_message(
-        room_id:str = Query(..., min_length=1),
+        room_id:str = Path(..., min_length=1),
         page:int = Query(1,ge=1),
         page_size = Depends(get_user_id),
-        db:AsyncSession = Depends(get_db)
+        db:AsyncSession = Depends(get_db),
+        shards: ShardRouter = Depends(get_shard_router)
 ):
     """
         room dagi habarlar
     """
     try:
-        service = MessageService(db)
+        service = MessageService(db, shards=shards)
         result = await service.get_room_message(room_id, page, page_size)
         return result
 
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import AliasChoices, BaseModel, Field, validator
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from uuid import UUID
@@ -42,7 +42,9 @@ class MessageResponse(BaseModel):
     is_edited: bool
     file_url: Optional[str] = None
     file_type: Optional[str] = None
-    metadata: Optional[Dict[str, Any]] = None
+    metadata: Optional[Dict[str, Any]] = Field(
+        None, validation_alias=AliasChoices("message_metadata", "metadata")
+    )
     created_at: datetime
     updated_at: datetime
     edited_at: Optional[datetime] = None
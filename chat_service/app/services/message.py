@@ -2,19 +2,69 @@ from doctest import master
 
 from pyexpat.errors import messages
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, and_
+from sqlalchemy import select, desc, and_, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from contextlib import asynccontextmanager
 from datetime import datetime
 from uuid import UUID
+from typing import Dict, List, Optional, Tuple
+import time
 import redis.asyncio as redis
 from sqlalchemy.testing.suite.test_reflection import metadata
 
 from shared import NotFoundException, ValidationException
+from shared.config import get_settings
 from shared.logger import setup_logger
-from chat_service.app.models.message import ChatMessage, ChatRoom
+from chat_service.app.models.message import ChatMessage, ChatRoom, ChatRoomMember
 from chat_service.app.schemas.message import  MessageResponse, MessageCreate, MessageUpdate
+from chat_service.app.database.sharding import ShardRouter
 
 
 logger = setup_logger(__name__)
+settings = get_settings()
+
+
+class RoomMembersCache:
+    """
+    Room a'zolari uchun qisqa TTL li process cache.
+
+    Har bir chat xabari offline recipientlarni hisoblash uchun a'zolar
+    ro'yxatini so'raydi - cache bo'lmasa har xabar bitta DB query.
+    Yangi a'zo odatda shu payt socket ochgan (online) bo'ladi, shuning uchun
+    TTL davomidagi eskirgan ro'yxat notificationga ta'sir qilmaydi.
+    """
+
+    def __init__(self, ttl: float = None):
+        self.ttl = ttl if ttl is not None else settings.CHAT_ROOM_MEMBERS_CACHE_TTL
+        self._entries: Dict[str, Tuple[float, List[str]]] = {}
+
+    def get(self, room_id: str) -> Optional[List[str]]:
+        entry = self._entries.get(room_id)
+        if entry is None:
+            return None
+        expires_at, members = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[room_id]
+            return None
+        return members
+
+    def set(self, room_id: str, members: List[str]) -> None:
+        if self.ttl <= 0:
+            return
+        now = time.monotonic()
+        # muddati o'tganlarni vaqti-vaqti bilan tozalash (xotira o'smasligi uchun)
+        if len(self._entries) >= 10000:
+            self._entries = {
+                key: entry for key, entry in self._entries.items() if entry[0] > now
+            }
+        self._entries[room_id] = (now + self.ttl, members)
+
+    def invalidate(self, room_id: str) -> None:
+        self._entries.pop(room_id, None)
+
+
+room_members_cache = RoomMembersCache()
 
 
 class MessageService:
@@ -22,9 +72,56 @@ class MessageService:
     chat habarlarning besnes logikasi
     """
 
-    def __init__(self, db:AsyncSession, redis_client:redis.Redis = None):
+    def __init__(
+            self,
+            db:AsyncSession = None,
+            redis_client:redis.Redis = None,
+            shards: ShardRouter = None,
+            members_cache: RoomMembersCache = None
+    ):
         self.db = db
         self.redis_client = redis_client
+        self.shards = shards
+        self.members_cache = members_cache or room_members_cache
+
+    @asynccontextmanager
+    async def _room_session(self, room_id: str):
+        """
+        Room joylashgan shard sessioni (sharding bo'lmasa - self.db)
+        """
+        if self.shards is None:
+            yield self.db
+            return
+        async with self.shards.session(room_id) as session:
+            yield session
+
+    @asynccontextmanager
+    async def _find_message(self, message_id: UUID):
+        """
+        Xabarni id bo'yicha barcha shardlardan qidirish.
+        (session, message) qaytaradi - o'zgartirish shu sessionda qilinadi.
+
+        Reshard paytida xabar eski shardda ham bo'ladi - faqat room hozir
+        route qilingan sharddagi nusxa qabul qilinadi (aks holda o'zgarish
+        cleanup da o'chib ketadigan nusxaga yozilardi)
+        """
+        if self.shards is None:
+            result = await self.db.execute(
+                select(ChatMessage).where(ChatMessage.id == message_id)
+            )
+            yield self.db, result.scalars().first()
+            return
+
+        async with self.shards.all_sessions() as sessions:
+            for shard, session in zip(self.shards.shard_names, sessions):
+                result = await session.execute(
+                    select(ChatMessage).where(ChatMessage.id == message_id)
+                )
+                message = result.scalars().first()
+                if message and self.shards.shard_for(message.room_id) == shard:
+                    yield session, message
+                    return
+            yield None, None
 
     async def create_message(
             self,
@@ -37,29 +134,30 @@ class MessageService:
         """
         logger.info(f"creating message in room{room_id} from user {user_id}")
 
-        # Room mavjudligini tekshirish
-        room_result = await self.db.execute(
-            select(ChatRoom).where(ChatRoom.room_id == room_id)
-        )
-        room = room_result.scalars().first()
-
-        if not room:
-            raise NotFoundException(f"Room {room_id} not found", "room")
-
-        # xabar yaratish
-
-        message = ChatMessage(
-            room_id=room_id,
-            user_id=user_id,
-            message=message_data.message,
-            message_type=message_data.message_type,
-            file_url=message_data.file_url,
-            file_type=message_data.file_type,
-            metadata=message_data.metadata
-        )
-        self.db.add(message)
-        await self.db.commit()
-        await self.db.refresh(message)
+        async with self._room_session(room_id) as db:
+            # Room mavjudligini tekshirish
+            room_result = await db.execute(
+                select(ChatRoom).where(ChatRoom.room_id == room_id)
+            )
+            room = room_result.scalars().first()
+
+            if not room:
+                raise NotFoundException(f"Room {room_id} not found", "room")
+
+            # xabar yaratish
+
+            message = ChatMessage(
+                room_id=room_id,
+                user_id=user_id,
+                message=message_data.message,
+                message_type=message_data.message_type,
+                file_url=message_data.file_url,
+                file_type=message_data.file_type,
+                message_metadata=message_data.metadata
+            )
+            db.add(message)
+            await db.commit()
+            await db.refresh(message)
         # redis cache ga saqlash qo'shimch tezlik uchun
         if self.redis_client:
             cache_key = f"messages:{room_id}:latest"
@@ -76,14 +174,10 @@ class MessageService:
         """
        Xabarni id bilan olish
         """
-        result = await self.db.execute(
-            select(ChatMessage).where(ChatMessage.id == message_id)
-        )
-
-        message = result.scalars().first()
-        if not message:
-            raise NotFoundException(f"Message {message_id} not found ", "message")
-        return MessageResponse.from_orm(message)
+        async with self._find_message(message_id) as (_, message):
+            if not message:
+                raise NotFoundException(f"Message {message_id} not found ", "message")
+            return MessageResponse.from_orm(message)
 
 
     async def update_message(
@@ -96,31 +190,27 @@ class MessageService:
         xabarni yangilash
 
         """
-        logger.info(f"updating message ", {message_id})
-        result = await self.db.execute(
-            select(ChatMessage).where(ChatMessage.id == message_id)
-        )
+        logger.info(f"updating message {message_id}")
+        async with self._find_message(message_id) as (db, message):
+            if not message:
+                raise NotFoundException(f"Message {message_id} not found ", "message")
 
-        message = result.scalars().first()
-        if not message:
-            raise NotFoundException(f"Message {message_id} not found ", "message")
+            # faqat habar egasiga o'zgartirishga ruxsat
 
-        # faqat habar egasiga o'zgartirishga ruxsat
+            if message.user_id != user_id:
+                raise ValidationException("You can only your own messages")
 
-        if message.user_id != user_id:
-            raise ValidationException("You can only your own messages")
+            if update_data.message:
+                message.message = update_data.message
+                message.is_edited = True
+                message.edited_at = datetime.utcnow()
 
-        if update_data.message:
-            message.message = update_data.message
-            message.is_edited = True
-            message.edited_at = datetime.utcnow()
+            if update_data.is_read is not None:
+                message.is_read = update_data.is_read
 
-        if update_data.is_read is not None:
-            message.is_read = str(update_data.is_read)
 
-
-        await self.db.commit()
-        await self.db.refresh(message)
+            await db.commit()
+            await db.refresh(message)
 
         logger.info(f"message updated:{message.id}")
         return MessageResponse.from_orm(message)
@@ -134,20 +224,15 @@ class MessageService:
         :param user_id:
         :return:
         """
-        result = await self.db.execute(
-            select(ChatMessage).where(ChatMessage.id == message_id)
-        )
-
-        message= result.scalars().first()
+        async with self._find_message(message_id) as (db, message):
+            if not message:
+                raise NotFoundException(f"Message {message_id} not found ", "message")
 
-        if not message:
-            raise NotFoundException(f"Message {message_id} not found ", "message")
+            if message.user_id != user_id:
+                raise ValidationException("you can only your own messagess")
 
-        if message.user_id != user_id:
-            raise ValidationException("you can only your own messagess")
-
-        await self.db.delete(message)
-        await self.db.commit()
+            await db.delete(message)
+            await db.commit()
 
         logger.info(f"Message deleted: {message_id}")
 
@@ -163,22 +248,21 @@ class MessageService:
         """
         offset = (page-1)*page_size
 
-        # total_count
-
-        count_result = await self.db.excute(
-            select(ChatMessage).where(ChatMessage.room_id == room_id)
-        )
-        total = len(count_result.scalars().all())
+        async with self._room_session(room_id) as db:
+            # total_count
+            total = await db.scalar(
+                select(func.count()).select_from(ChatMessage).where(ChatMessage.room_id == room_id)
+            )
 
-        # pagination result
-        result = await self.db.execute(
-            select(ChatMessage)
-            .where(ChatMessage.room_id == room_id)
-            .order_by(desc(ChatMessage.created_at))
-            .offset(offset)
-            .limit(page_size)
-        )
-        messages = result.scalars().all()
+            # pagination result
+            result = await db.execute(
+                select(ChatMessage)
+                .where(ChatMessage.room_id == room_id)
+                .order_by(desc(ChatMessage.created_at))
+                .offset(offset)
+                .limit(page_size)
+            )
+            messages = result.scalars().all()
 
         return {
             "total": total,
@@ -187,39 +271,31 @@ class MessageService:
             "items": [MessageResponse.from_orm(m) for m in messages]
         }
 
+    async def add_member(self, room_id: str, user_id: str) -> None:
+        """
+        Userni room a'zosi qilish (allaqachon a'zo bo'lsa hech narsa qilmaydi)
+        """
+        async with self._room_session(room_id) as db:
+            insert = sqlite_insert if db.bind.dialect.name == "sqlite" else pg_insert
+            await db.execute(
+                insert(ChatRoomMember)
+                .values(room_id=room_id, user_id=user_id)
+                .on_conflict_do_nothing(index_elements=["room_id", "user_id"])
+            )
+            await db.commit()
+        self.members_cache.invalidate(room_id)
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+    async def get_room_member_ids(self, room_id: str) -> List[str]:
+        """
+        Room a'zolarining user_id lari (RoomMembersCache orqali)
+        """
+        members = self.members_cache.get(room_id)
+        if members is not None:
+            return list(members)
+        async with self._room_session(room_id) as db:
+            result = await db.execute(
+                select(ChatRoomMember.user_id).where(ChatRoomMember.room_id == room_id)
+            )
+            members = list(result.scalars().all())
+        self.members_cache.set(room_id, members)
+        return list(members)
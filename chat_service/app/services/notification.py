@@ -0,0 +1,257 @@
+# chat-service/app/services/notification.py
+# ============================================
+# OFFLINE NOTIFICATIONS (RabbitMQ + DIGEST)
+# ============================================
+
+import asyncio
+import json
+import time
+import zlib
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+import aio_pika
+
+from shared.config import get_settings
+from shared.logger import setup_logger
+
+settings = get_settings()
+logger = setup_logger(__name__)
+
+OFFLINE_ROUTING_KEY = "chat.message.offline"
+
+DigestSender = Callable[[str, dict], Awaitable[None]]
+
+
+def digest_shard(user_id: str, shards: int) -> int:
+    """
+    User ning digest shardi. crc32 - barcha replicalarda bir xil natija
+    (hash() har process da boshqacha)
+    """
+    return zlib.crc32(user_id.encode()) % shards
+
+
+def shard_routing_key(shard: int) -> str:
+    return f"{OFFLINE_ROUTING_KEY}.{shard}"
+
+
+class OfflineNotificationPublisher:
+    """
+    Socketi yo'q room a'zolari uchun notification eventlarini yuborish.
+
+    Recipientlar digest_shard bo'yicha guruhlanadi va har shard uchun bitta
+    AMQP message "chat.message.offline.<shard>" routing key bilan yuboriladi -
+    bitta userning barcha eventlari bitta queue ga tushadi.
+    """
+
+    def __init__(self, channel: aio_pika.abc.AbstractChannel = None, shards: int = None):
+        self.channel = channel
+        self.shards = shards or settings.CHAT_DIGEST_SHARDS
+        self.exchange: Optional[aio_pika.abc.AbstractExchange] = None
+
+    async def setup(self) -> None:
+        """Exchange ni bir marta declare qilish"""
+        if not self.channel:
+            return
+        self.exchange = await self.channel.declare_exchange(
+            settings.CHAT_NOTIFICATION_EXCHANGE,
+            aio_pika.ExchangeType.TOPIC,
+            durable=True
+        )
+
+    async def publish(self, room_id: str, message: dict, recipients: Iterable[str]) -> None:
+        """
+        Offline userlarga notification eventini yuborish
+        """
+        recipients = sorted(set(recipients))
+        if not recipients:
+            return
+
+        if not self.exchange:
+            logger.warning("RabbitMQ exchange not available, offline notification dropped")
+            return
+
+        by_shard: Dict[int, List[str]] = {}
+        for user_id in recipients:
+            by_shard.setdefault(digest_shard(user_id, self.shards), []).append(user_id)
+
+        for shard, users in sorted(by_shard.items()):
+            body = json.dumps({
+                "room_id": room_id,
+                "recipients": users,
+                "message_id": message.get("id"),
+                "sender_id": message.get("user_id"),
+                "preview": (message.get("message") or "")[:100],
+                "created_at": message.get("created_at"),
+            }, default=str).encode()
+
+            try:
+                await self.exchange.publish(
+                    aio_pika.Message(
+                        body=body,
+                        content_type="application/json",
+                        delivery_mode=aio_pika.DeliveryMode.PERSISTENT
+                    ),
+                    routing_key=shard_routing_key(shard)
+                )
+            except Exception as e:
+                logger.error(f"Failed to publish offline notification: {str(e)}")
+
+
+class _PendingDigest:
+    """Bitta user uchun yig'ilayotgan digest"""
+
+    __slots__ = ("first_at", "count", "rooms", "last_preview")
+
+    def __init__(self, first_at: float):
+        self.first_at = first_at
+        self.count = 0
+        self.rooms: Set[str] = set()
+        self.last_preview: Optional[str] = None
+
+
+class NotificationDigestConsumer:
+    """
+    Offline notification eventlarini user bo'yicha vaqt oynasida yig'ib,
+    har bir user uchun bitta digest yuboradi ("12 new messages in 3 rooms").
+
+    Digestlar soni aktiv userlar soniga bog'liq, xabarlar soniga emas.
+    Notificationlar best-effort: event buferga olingandan keyin ack qilinadi.
+
+    Har shard o'z queue siga ega (x-single-active-consumer): barcha replicalar
+    hamma shard queue larga subscribe bo'ladi, lekin RabbitMQ har queue ni
+    bitta replicaga beradi. Shu sabab bitta userning buferi faqat bitta
+    replicada bo'ladi va replica lar qo'shilsa ham digest ikkiga bo'linmaydi.
+    Replica to'xtaganda queue keyingi consumer ga o'tadi; crash bo'lsa
+    buferdagi (ack qilingan) eventlar yo'qoladi.
+    """
+
+    def __init__(
+            self,
+            channel: aio_pika.abc.AbstractChannel,
+            sender: DigestSender = None,
+            window: int = None,
+            concurrency: int = None,
+            shards: int = None
+    ):
+        self.channel = channel
+        self.shards = shards or settings.CHAT_DIGEST_SHARDS
+        self.window = window if window is not None else settings.CHAT_DIGEST_WINDOW
+        self.semaphore = asyncio.Semaphore(concurrency or settings.CHAT_DIGEST_CONCURRENCY)
+        self.sender = sender or self._publish_digest
+        self.pending: Dict[str, _PendingDigest] = {}
+        self.digest_exchange: Optional[aio_pika.abc.AbstractExchange] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._send_tasks: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        """Shard queue larni bind qilish va consume boshlash"""
+        await self.channel.set_qos(prefetch_count=100)
+        exchange = await self.channel.declare_exchange(
+            settings.CHAT_NOTIFICATION_EXCHANGE,
+            aio_pika.ExchangeType.TOPIC,
+            durable=True
+        )
+        self.digest_exchange = await self.channel.declare_exchange(
+            settings.CHAT_DIGEST_EXCHANGE,
+            aio_pika.ExchangeType.TOPIC,
+            durable=True
+        )
+        for shard in range(self.shards):
+            queue = await self.channel.declare_queue(
+                f"{settings.CHAT_NOTIFICATION_QUEUE}.{shard}",
+                durable=True,
+                arguments={"x-single-active-consumer": True}
+            )
+            await queue.bind(exchange, routing_key=shard_routing_key(shard))
+            await queue.consume(self.on_message)
+
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        logger.info(
+            f"Notification digest consumer started "
+            f"(window={self.window}s, shards={self.shards})"
+        )
+
+    async def stop(self) -> None:
+        """Qolgan digestlarni yuborib to'xtatish"""
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        self.flush(force=True)
+        if self._send_tasks:
+            await asyncio.gather(*self._send_tasks, return_exceptions=True)
+
+    async def on_message(self, message: aio_pika.abc.AbstractIncomingMessage) -> None:
+        async with message.process():
+            try:
+                event = json.loads(message.body)
+            except json.JSONDecodeError:
+                logger.error("Invalid offline notification payload, dropped")
+                return
+            self.add(event)
+
+    def add(self, event: dict) -> None:
+        """Eventni har bir recipient buferiga qo'shish"""
+        now = time.monotonic()
+        room_id = event.get("room_id")
+        for user_id in event.get("recipients", ()):
+            digest = self.pending.get(user_id)
+            if digest is None:
+                digest = self.pending[user_id] = _PendingDigest(now)
+            digest.count += 1
+            digest.rooms.add(room_id)
+            digest.last_preview = event.get("preview")
+
+    def flush(self, force: bool = False) -> int:
+        """
+        Oynasi tugagan digestlarni yuborish, yuborilganlar sonini qaytaradi
+        """
+        now = time.monotonic()
+        due = [
+            user_id for user_id, digest in self.pending.items()
+            if force or now - digest.first_at >= self.window
+        ]
+        for user_id in due:
+            digest = self.pending.pop(user_id)
+            payload = {
+                "user_id": user_id,
+                "messages_count": digest.count,
+                "rooms_count": len(digest.rooms),
+                "rooms": sorted(digest.rooms),
+                "last_preview": digest.last_preview,
+                "text": f"{digest.count} new messages in {len(digest.rooms)} rooms",
+                "timestamp": datetime.utcnow().isoformat(),
+            }
+            task = asyncio.create_task(self._send(user_id, payload))
+            self._send_tasks.add(task)
+            task.add_done_callback(self._send_tasks.discard)
+        return len(due)
+
+    async def _flush_loop(self) -> None:
+        tick = max(1.0, self.window / 10)
+        while True:
+            await asyncio.sleep(tick)
+            sent = self.flush()
+            if sent:
+                logger.info(f"Flushed {sent} notification digests")
+
+    async def _send(self, user_id: str, payload: dict) -> None:
+        async with self.semaphore:
+            try:
+                await self.sender(user_id, payload)
+            except Exception as e:
+                logger.error(f"Failed to deliver digest to user {user_id}: {str(e)}")
+
+    async def _publish_digest(self, user_id: str, payload: dict) -> None:
+        """Default sender - digestni push service uchun exchange ga yuborish"""
+        await self.digest_exchange.publish(
+            aio_pika.Message(
+                body=json.dumps(payload).encode(),
+                content_type="application/json",
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT
+            ),
+            routing_key=f"digest.{user_id}"
+        )
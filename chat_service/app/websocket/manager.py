@@ -1,9 +1,11 @@
 from datetime import datetime
+import time
 
 from fastapi import WebSocket
 from typing import Dict, Set, List
 
 from shared.logger import setup_logger
+from chat_service.app.websocket.room_stats import RoomStats, top_rooms
 
 import json
 
@@ -17,6 +19,10 @@ class ConnectionManager:
     def __init__(self):
         self.active_connections:Dict[str,Set[WebSocket]] = {}
         self.user_rooms: Dict[str, Set[str]] = {}
+        # room_id -> {user_id: ochiq socketlar soni}
+        self.room_users: Dict[str, Dict[str, int]] = {}
+        # room_id -> rolling traffic counterlar
+        self.room_stats: Dict[str, RoomStats] = {}
 
 
     async def connect(self, websocket:WebSocket, room_id: str, user_id:str):
@@ -34,6 +40,9 @@ class ConnectionManager:
 
         self.user_rooms[user_id].add(room_id)
 
+        room_users = self.room_users.setdefault(room_id, {})
+        room_users[user_id] = room_users.get(user_id, 0) + 1
+
         logger.info(f"user {user_id} connection to room {room_id}")
 
         # connection natifaction
@@ -57,11 +66,20 @@ class ConnectionManager:
             self.active_connections[room_id].discard(websocket)
             if not self.active_connections[room_id]:
                 del self.active_connections[room_id]
+                self.room_stats.pop(room_id, None)
 
 
         if user_id in self.user_rooms:
             self.user_rooms[user_id].discard(room_id)
 
+        room_users = self.room_users.get(room_id)
+        if room_users and user_id in room_users:
+            room_users[user_id] -= 1
+            if room_users[user_id] <= 0:
+                del room_users[user_id]
+            if not room_users:
+                del self.room_users[room_id]
+
         logger.info(f"user {user_id} disconnected form room {room_id}")
 
         # Disconnection notifaction
@@ -89,12 +107,20 @@ class ConnectionManager:
             return
 
         message_json = json.dumps(message, default=str)
+        connections = list(self.active_connections[room_id])
+
+        stats = self.room_stats.get(room_id)
+        if stats is None:
+            stats = self.room_stats[room_id] = RoomStats()
+        stats.record_message(len(message_json.encode()) * len(connections))
 
-        for connection in self.active_connections[room_id]:
+        for connection in connections:
+            started = time.perf_counter()
             try:
                 await connection.send_text(message_json)
             except Exception as e:
                 logger.error(f"error sending message: {str(e)}")
+            stats.record_latency(time.perf_counter() - started)
 
 
     async def send_personal_message(
@@ -119,6 +145,29 @@ class ConnectionManager:
 
         return len(self.active_connections[room_id])
 
+    def get_online_users(self, room_id: str) -> Set[str]:
+        """
+        roomda hozir socket ochiq bo'lgan userlar
+        """
+        return set(self.room_users.get(room_id, ()))
+
+    def get_room_stats(self, room_id: str) -> dict:
+        """
+        Bitta room traffic statistikasi
+        """
+        stats = self.room_stats.get(room_id) or RoomStats()
+        return stats.snapshot(self.get_room_users_count(room_id))
 
+    def get_hot_rooms(self, k: int = 10, sort_by: str = "messages_per_second") -> List[dict]:
+        """
+        Eng ko'p yuklama beradigan top-K roomlar
+        """
+        now = time.time()
+        snapshots = {
+            room_id: stats.snapshot(self.get_room_users_count(room_id), now)
+            for room_id, stats in list(self.room_stats.items())
+        }
+        return top_rooms(snapshots, k, sort_by)
 
 
+connection_manager = ConnectionManager()
@@ -0,0 +1,144 @@
+# chat-service/app/websocket/room_stats.py
+# ============================================
+# PER-ROOM TRAFFIC TELEMETRY (RING BUFFERS)
+# ============================================
+
+import heapq
+import time
+from array import array
+from typing import Dict, List, Literal, Optional, get_args
+
+from prometheus_client.core import GaugeMetricFamily
+
+
+class RoomStats:
+    """
+    Bitta room uchun rolling counterlar.
+
+    Xotira fiksirlangan: sekundlik bucketlar (window ta) va oxirgi
+    latency_samples ta send latency. Har bir yozish O(1).
+    """
+
+    __slots__ = ("window", "_seconds", "_messages", "_bytes", "_latencies", "_lat_idx", "_lat_count")
+
+    def __init__(self, window: int = 60, latency_samples: int = 1024):
+        self.window = window
+        self._seconds = array("q", [0] * window)
+        self._messages = array("q", [0] * window)
+        self._bytes = array("q", [0] * window)
+        self._latencies = array("d", [0.0] * latency_samples)
+        self._lat_idx = 0
+        self._lat_count = 0
+
+    def _slot(self, now: int) -> int:
+        slot = now % self.window
+        if self._seconds[slot] != now:
+            # eski sekund - bucketni qayta ishlatish
+            self._seconds[slot] = now
+            self._messages[slot] = 0
+            self._bytes[slot] = 0
+        return slot
+
+    def record_message(self, fanout_bytes: int, now: Optional[float] = None) -> None:
+        slot = self._slot(int(now if now is not None else time.time()))
+        self._messages[slot] += 1
+        self._bytes[slot] += fanout_bytes
+
+    def record_latency(self, seconds: float) -> None:
+        self._latencies[self._lat_idx] = seconds
+        self._lat_idx = (self._lat_idx + 1) % len(self._latencies)
+        if self._lat_count < len(self._latencies):
+            self._lat_count += 1
+
+    def _window_sum(self, buckets: array, now: int) -> int:
+        oldest = now - self.window
+        return sum(
+            value for second, value in zip(self._seconds, buckets)
+            if second > oldest
+        )
+
+    def messages_per_second(self, now: Optional[float] = None) -> float:
+        now = int(now if now is not None else time.time())
+        return self._window_sum(self._messages, now) / self.window
+
+    def fanout_bytes_per_second(self, now: Optional[float] = None) -> float:
+        now = int(now if now is not None else time.time())
+        return self._window_sum(self._bytes, now) / self.window
+
+    def p99_send_latency(self) -> float:
+        if not self._lat_count:
+            return 0.0
+        samples = sorted(self._latencies[:self._lat_count])
+        return samples[int(0.99 * (len(samples) - 1))]
+
+    def snapshot(self, subscribers: int, now: Optional[float] = None) -> dict:
+        now = now if now is not None else time.time()
+        return {
+            "messages_per_second": round(self.messages_per_second(now), 3),
+            "fanout_bytes_per_second": round(self.fanout_bytes_per_second(now), 1),
+            "subscribers": subscribers,
+            "p99_send_latency_ms": round(self.p99_send_latency() * 1000, 3),
+        }
+
+
+HotRoomSortKey = Literal[
+    "messages_per_second",
+    "fanout_bytes_per_second",
+    "subscribers",
+    "p99_send_latency_ms",
+]
+HOT_ROOM_SORT_KEYS = get_args(HotRoomSortKey)
+
+
+class HotRoomsCollector:
+    """
+    Prometheus collector - faqat top-K roomlarni export qiladi
+    (room_id label cardinality cheklangan bo'lishi uchun)
+    """
+
+    def __init__(self, manager, k: int = 20):
+        self.manager = manager
+        self.k = k
+
+    def collect(self):
+        hot = self.manager.get_hot_rooms(self.k)
+        families = {
+            "messages_per_second": GaugeMetricFamily(
+                "chat_room_messages_per_second",
+                "Messages per second over the rolling window (top-K rooms)",
+                labels=["room_id"]
+            ),
+            "fanout_bytes_per_second": GaugeMetricFamily(
+                "chat_room_fanout_bytes_per_second",
+                "Broadcast bytes per second over the rolling window (top-K rooms)",
+                labels=["room_id"]
+            ),
+            "subscribers": GaugeMetricFamily(
+                "chat_room_subscribers",
+                "Open websocket connections (top-K rooms)",
+                labels=["room_id"]
+            ),
+            "p99_send_latency_ms": GaugeMetricFamily(
+                "chat_room_p99_send_latency_ms",
+                "p99 websocket send latency in milliseconds (top-K rooms)",
+                labels=["room_id"]
+            ),
+        }
+        for room in hot:
+            for key, family in families.items():
+                family.add_metric([room["room_id"]], room[key])
+
+        total_rooms = GaugeMetricFamily("chat_active_rooms", "Rooms with open websocket connections")
+        total_rooms.add_metric([], len(self.manager.active_connections))
+
+        yield from families.values()
+        yield total_rooms
+
+
+def top_rooms(stats: Dict[str, dict], k: int, sort_by: str) -> List[dict]:
+    """Snapshotlardan top-K ni tanlash"""
+    return heapq.nlargest(
+        k,
+        ({"room_id": room_id, **snapshot} for room_id, snapshot in stats.items()),
+        key=lambda item: item[sort_by]
+    )
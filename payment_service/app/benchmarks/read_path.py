@@ -0,0 +1,130 @@
+# payment-service/app/benchmarks/read_path.py
+# ============================================
+# BENCHMARK: ORM HYDRATION vs COLUMN PROJECTION
+# ============================================
+#
+#   python -m payment_service.app.benchmarks.read_path
+#   python -m payment_service.app.benchmarks.read_path --url postgresql://... --rows 5000
+#
+# Default - in-memory SQLite (qo'shimcha dependency kerak emas). Ikkala yo'l
+# ham bir xil query + JSON serialize qiladi; farq faqat hydration va encoder da.
+
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import orjson
+from sqlalchemy import create_engine, desc, event, select
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+
+from payment_service.app.database.base import Base
+from payment_service.app.models.payment import Payment, PaymentStatus
+from payment_service.app.schemas.payment import PaymentResponse
+from payment_service.app.services.payment import RESPONSE_COLUMNS, row_to_response
+
+USER_ID = "bench-user"
+
+
+@compiles(UUID, "sqlite")
+def _uuid_sqlite(element, compiler, **kw):
+    return "CHAR(32)"
+
+
+def seed(engine, rows: int) -> None:
+    Payment.__table__.create(engine, checkfirst=True)
+    started = datetime.utcnow()
+    with Session(engine) as session:
+        session.execute(Payment.__table__.delete().where(Payment.user_id == USER_ID))
+        session.execute(
+            Payment.__table__.insert(),
+            [
+                {
+                    "id": uuid.uuid4(),
+                    "user_id": USER_ID,
+                    "order_id": f"order-{i}",
+                    "amount_minor": (10 + i % 1000) * 100,
+                    "currency": "USD",
+                    "status": PaymentStatus.COMPLETED,
+                    "payment_method": "card",
+                    "provider_transaction_id": f"txn-{uuid.uuid4().hex}",
+                    "description": "benchmark payment",
+                    "created_at": started - timedelta(seconds=i),
+                    "updated_at": started,
+                    "retry_count": 0,
+                    "version": 1,
+                }
+                for i in range(rows)
+            ]
+        )
+        session.commit()
+
+
+def orm_path(engine, page_size: int) -> bytes:
+    """Oldingi yo'l: ORM object -> from_orm -> pydantic -> json"""
+    with Session(engine) as session:
+        payments = session.execute(
+            select(Payment)
+            .where(Payment.user_id == USER_ID)
+            .order_by(desc(Payment.created_at), desc(Payment.id))
+            .limit(page_size)
+        ).scalars().all()
+        items = [PaymentResponse.from_orm(p).model_dump(mode="json") for p in payments]
+    return json.dumps({"items": items}).encode()
+
+
+def projection_path(engine, page_size: int) -> bytes:
+    """Yangi yo'l: Row tuple -> dict -> orjson"""
+    with Session(engine) as session:
+        rows = session.execute(
+            select(*RESPONSE_COLUMNS)
+            .where(Payment.user_id == USER_ID)
+            .order_by(desc(Payment.created_at), desc(Payment.id))
+            .limit(page_size)
+        ).all()
+        items = [row_to_response(row) for row in rows]
+    return orjson.dumps({"items": items})
+
+
+def measure(fn, engine, page_size: int, seconds: float) -> float:
+    """rows/sekund"""
+    fn(engine, page_size)  # warmup
+    rows = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        fn(engine, page_size)
+        rows += page_size
+    return rows / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Payment read path benchmark")
+    parser.add_argument("--url", default="sqlite://", help="SQLAlchemy sync URL")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--seconds", type=float, default=2.0, help="har bir o'lchov davomiyligi")
+    parser.add_argument("--page-sizes", default="20,50,100")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _collation_c(connection, _):
+            # ix_payments_provider_transaction_id_c uchun
+            connection.create_collation("C", lambda a, b: (a > b) - (a < b))
+
+    seed(engine, args.rows)
+
+    print(f"{'page_size':>9} {'orm rows/s':>12} {'projection rows/s':>18} {'speedup':>8}")
+    for page_size in (int(size) for size in args.page_sizes.split(",")):
+        orm = measure(orm_path, engine, page_size, args.seconds)
+        projection = measure(projection_path, engine, page_size, args.seconds)
+        print(f"{page_size:>9} {orm:>12,.0f} {projection:>18,.0f} {projection / orm:>7.2f}x")
+
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
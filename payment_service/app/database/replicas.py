@@ -0,0 +1,152 @@
+# payment-service/app/database/replicas.py
+# ============================================
+# READ REPLICA ROUTING
+# ============================================
+
+import asyncio
+import hashlib
+import hmac
+import itertools
+import json
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from shared.config import Settings
+from shared.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Read-your-writes token - client da (cookie yoki header), har qanday pod tekshiradi
+STICKY_COOKIE = "read_your_writes"
+STICKY_HEADER = "X-Read-Your-Writes"
+
+# Replica da bo'lmasa (primary) NULL qaytaradi
+LAG_QUERY = text(
+    "SELECT CASE "
+    "WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+@dataclass
+class Replica:
+    name: str
+    engine: AsyncEngine
+    healthy: bool = False
+    lag: Optional[float] = None
+
+
+class ReplicaRouter:
+    """
+    Read-only querylarni sog'lom replicaga yo'naltirish.
+
+    - health loop har bir replica lagini o'lchaydi, REPLICA_MAX_LAG_SECONDS
+      dan oshsa yoki ulanib bo'lmasa replica chetlatiladi
+    - sog'lom replica bo'lmasa primary ishlatiladi
+    - read-your-writes: user yozgandan keyin READ_YOUR_WRITES_SECONDS
+      davomida uning o'qishlari primary ga boradi. Holat process da emas -
+      client imzolangan token (user_id + muddat, HMAC) ni qaytarib yuboradi,
+      shuning uchun boshqa replica (pod) ham uni taniydi
+    """
+
+    def __init__(
+            self,
+            primary: AsyncEngine,
+            replicas: Dict[str, AsyncEngine] = None,
+            max_lag: float = 5.0,
+            sticky_seconds: float = 10.0,
+            secret: str = ""
+    ):
+        self.primary = primary
+        self.replicas = [Replica(name, engine) for name, engine in (replicas or {}).items()]
+        self.max_lag = max_lag
+        self.sticky_seconds = sticky_seconds
+        self._secret = secret.encode()
+        self._round_robin = itertools.count()
+
+    @classmethod
+    def from_settings(cls, settings: Settings, primary: AsyncEngine) -> "ReplicaRouter":
+        urls: List[str] = json.loads(settings.DATABASE_REPLICA_URLS) if settings.DATABASE_REPLICA_URLS else []
+        replicas = {
+            f"replica{i}": create_async_engine(
+                url.replace("postgresql://", "postgresql+asyncpg://", 1),
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=10,
+                pool_recycle=settings.DB_POOL_RECYCLE,
+                pool_pre_ping=settings.DB_POOL_PRE_PING,
+                echo=settings.DB_ECHO,
+            )
+            for i, url in enumerate(urls)
+        }
+        if replicas:
+            logger.info(f"Read replicas configured: {sorted(replicas)}")
+        return cls(
+            primary,
+            replicas,
+            max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+            sticky_seconds=settings.READ_YOUR_WRITES_SECONDS,
+            secret=settings.SECRET_KEY
+        )
+
+    def _signature(self, user_id: str, until: int) -> str:
+        return hmac.new(self._secret, f"{user_id}:{until}".encode(), hashlib.sha256).hexdigest()
+
+    def sticky_token(self, user_id: str) -> str:
+        """User yozdi - READ_YOUR_WRITES_SECONDS gacha amal qiladigan token"""
+        until = int((time.time() + self.sticky_seconds) * 1000)
+        return f"{until}.{self._signature(user_id, until)}"
+
+    def is_sticky(self, user_id: str, token: Optional[str]) -> bool:
+        if not token:
+            return False
+        until, _, signature = token.partition(".")
+        if not until.isdigit() or int(until) < time.time() * 1000:
+            return False
+        return hmac.compare_digest(signature, self._signature(user_id, int(until)))
+
+    def read_engine(self, user_id: Optional[str] = None, token: Optional[str] = None) -> AsyncEngine:
+        """O'qish uchun engine - replica yoki (fallback / sticky) primary"""
+        if user_id is not None and self.is_sticky(user_id, token):
+            return self.primary
+
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return self.primary
+        return healthy[next(self._round_robin) % len(healthy)].engine
+
+    async def check(self) -> None:
+        """Barcha replicalarning lagini o'lchash"""
+        async def probe(replica: Replica) -> None:
+            try:
+                async with replica.engine.connect() as conn:
+                    lag = float((await conn.execute(LAG_QUERY)).scalar() or 0)
+                replica.lag = lag
+                healthy = lag <= self.max_lag
+            except Exception as e:
+                replica.lag = None
+                healthy = False
+                logger.warning(f"Replica {replica.name} health check failed: {str(e)}")
+            if healthy != replica.healthy:
+                logger.info(f"Replica {replica.name} {'healthy' if healthy else 'unhealthy'} (lag={replica.lag})")
+            replica.healthy = healthy
+
+        await asyncio.gather(*[probe(replica) for replica in self.replicas])
+
+    async def run_health_loop(self, interval: float) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(interval)
+
+    def status(self) -> Dict[str, dict]:
+        return {
+            replica.name: {"healthy": replica.healthy, "lag": replica.lag}
+            for replica in self.replicas
+        }
+
+    async def dispose(self) -> None:
+        await asyncio.gather(*[replica.engine.dispose() for replica in self.replicas])
@@ -3,10 +3,16 @@
 # DATABASE SESSION MANAGEMENT
 # ============================================
 
+import math
+
+from sqlalchemy import event
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from fastapi import Depends, Request, Response
 from shared.config import get_settings
+from shared.dependencies import get_user_id
 from payment_service.app.database.base import Base
+from payment_service.app.database.replicas import STICKY_COOKIE, STICKY_HEADER, ReplicaRouter
 from contextlib import asynccontextmanager
 
 settings = get_settings()
@@ -28,6 +34,10 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# Read-only querylar uchun replica routing (replica yo'q bo'lsa primary)
+replica_router = ReplicaRouter.from_settings(settings, async_engine)
+
+
 async def get_db() -> AsyncSession:
     """
     Dependency - har requestda DB session
@@ -35,6 +45,40 @@ async def get_db() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         yield session
 
+
+async def get_read_db(request: Request, user_id: str = Depends(get_user_id)) -> AsyncSession:
+    """
+    Dependency - read-only session (sog'lom replica, yoki user yaqinda
+    yozgan bo'lsa / replica yo'q bo'lsa primary)
+    """
+    token = request.headers.get(STICKY_HEADER) or request.cookies.get(STICKY_COOKIE)
+    async with AsyncSessionLocal(bind=replica_router.read_engine(user_id, token)) as session:
+        yield session
+
+
+def mark_write(response: Response, user_id: str) -> None:
+    """Read-your-writes token ni javobga qo'shish (cookie + header)"""
+    token = replica_router.sticky_token(user_id)
+    response.set_cookie(
+        STICKY_COOKIE,
+        token,
+        max_age=math.ceil(replica_router.sticky_seconds),
+        httponly=True,
+        samesite="lax"
+    )
+    response.headers[STICKY_HEADER] = token
+
+
+async def get_write_db(response: Response, user_id: str = Depends(get_user_id)) -> AsyncSession:
+    """
+    Dependency - primary session; keyingi o'qishlar qisqa vaqt primary dan
+    (read-your-writes). Token birinchi commit da javobga qo'shiladi - client
+    keyingi so'rovda uni qaytaradi va istalgan replica primary dan o'qiydi
+    """
+    async with AsyncSessionLocal() as session:
+        event.listen(session.sync_session, "after_commit", lambda _: mark_write(response, user_id), once=True)
+        yield session
+
 @asynccontextmanager
 async def get_db_context():
     """Context manager - standalone code uchun"""
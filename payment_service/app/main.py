@@ -4,12 +4,13 @@
 # ============================================
 
 
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Request, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.exception_handlers import RequestValidationError
 from contextlib import asynccontextmanager
-import aio_pika
+import asyncio
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 import time
 
 from sqlalchemy.event import listens_for
@@ -18,18 +19,25 @@ from shared.config import get_settings
 from shared.logger import setup_logger
 from shared.exceptions import (
     BaseException, ValidationException, NotFoundException,
-    UnauthorizedException, ServiceUnavailableException
+    UnauthorizedException, ForbiddenException, ServiceUnavailableException
 )
-from payment_service.app.routers import payment
-from payment_service.app.database.session import get_db_context
+from payment_service.app.routers import payment, providers, reports, stream
+from payment_service.app.database.session import get_db_context, AsyncSessionLocal, replica_router
+from payment_service.app.services.idempotency import run_cleanup_loop
+from payment_service.app.services.outbox import OutboxRelay
+from payment_service.app.services.rollups import run_reconcile_loop
+from payment_service.app.services.expiry import ExpirySweeper
+from payment_service.app.services import inbox, retry_scheduler
+from payment_service.app.services.rabbitmq import rabbitmq_client, get_rabbitmq, RabbitMQClient
+from payment_service.app.services.webhooks import start_webhook_consumer
+from payment_service.app.services.velocity import velocity_limiter
+from payment_service.app.services.status_hub import status_hub
+from payment_service.app.providers import close_providers, configure_providers
 from payment_service.app.database.base import Base, get_engine
 
 settings = get_settings()
 logger = setup_logger(__name__)
 
-rabbitmq_connection = None
-rabbitmq_channel = None
-
 
 @asynccontextmanager
 async def lifespan(app:FastAPI):
@@ -47,31 +55,77 @@ async def lifespan(app:FastAPI):
         logger.error(f" Database connection failed: {str(e)}")
         raise
     # 2. RabbitMQ connection
-    global  rabbitmq_connection, rabbitmq_channel
     try:
-        rabbitmq_connection = await aio_pika.connect_robust(
-            settings.RABBITMQ_URL
-        )
-        rabbitmq_channel = await rabbitmq_connection.channel()
-    # Exchange declare
-
-        exchange = await rabbitmq_channel.declare_exchange(
-            'payment_events',
-            aio_pika.ExchangeType.TOPIC,
-            durable=True
-        )
+        await rabbitmq_client.connect()
         logger.info("✅ RabbitMQ connection established")
     except Exception as e:
         logger.error(f"⚠️  RabbitMQ connection failed: {str(e)}")
         logger.warning("Service will work without RabbitMQ")
+    # 3. Provider adapterlari (PROVIDERS config)
+    configure_providers(settings.PROVIDERS)
+    # 4. Velocity limiter (Redis yo'q bo'lsa in-process counters)
+    if settings.VELOCITY_ENABLED:
+        await velocity_limiter.connect()
+    # 5. Background tasks
+    cleanup_task = asyncio.create_task(run_cleanup_loop(AsyncSessionLocal))
+    relay_task = None
+    if settings.OUTBOX_RELAY_ENABLED:
+        relay = OutboxRelay(AsyncSessionLocal, rabbitmq_client)
+        relay_task = asyncio.create_task(relay.run())
+    inbox_tasks = inbox.start_workers(AsyncSessionLocal) if settings.INBOX_ENABLED else []
+    retry_tasks = retry_scheduler.start_workers(AsyncSessionLocal) if settings.RETRY_SCHEDULER_ENABLED else []
+    replica_task = None
+    if replica_router.replicas:
+        replica_task = asyncio.create_task(
+            replica_router.run_health_loop(settings.REPLICA_HEALTH_INTERVAL)
+        )
+    sweeper_task = None
+    if settings.EXPIRY_SWEEP_ENABLED:
+        sweeper_task = asyncio.create_task(ExpirySweeper(AsyncSessionLocal).run())
+    reconcile_task = None
+    if settings.ROLLUP_RECONCILE_ENABLED:
+        reconcile_task = asyncio.create_task(run_reconcile_loop(AsyncSessionLocal))
+    webhook_consumer = webhook_dispatcher = None
+    if settings.WEBHOOKS_ENABLED and rabbitmq_client.is_connected:
+        try:
+            channel = await rabbitmq_client.connection.channel()
+            webhook_consumer, webhook_dispatcher = await start_webhook_consumer(channel, AsyncSessionLocal)
+        except Exception as e:
+            logger.error(f"Webhook consumer failed to start: {str(e)}")
+    if settings.SSE_ENABLED and rabbitmq_client.is_connected:
+        try:
+            await status_hub.start(await rabbitmq_client.connection.channel())
+        except Exception as e:
+            logger.error(f"Payment status hub failed to start: {str(e)}")
+
     logger.info(f"✅ Payment Service running on {settings.SERVICE_HOST}:{settings.SERVICE_PORT}")
 
     yield
 
+    cleanup_task.cancel()
+    if relay_task:
+        relay_task.cancel()
+    if reconcile_task:
+        reconcile_task.cancel()
+    if sweeper_task:
+        sweeper_task.cancel()
+    if replica_task:
+        replica_task.cancel()
+    await replica_router.dispose()
+    await velocity_limiter.close()
+    for task in inbox_tasks + retry_tasks:
+        task.cancel()
+    await close_providers()
+    if status_hub.running:
+        await status_hub.stop()
+    if webhook_consumer:
+        await webhook_consumer.stop()
+    if webhook_dispatcher:
+        await webhook_dispatcher.close()
 
     logger.info("payment service shutting down")
-    if rabbitmq_connection:
-        await rabbitmq_connection.close()
+    if rabbitmq_client.is_connected:
+        await rabbitmq_client.close()
         logger.info("RabmitMQ connection closed")
 
     logger.info("payment service stopped")
@@ -168,6 +222,21 @@ async def unauthorized_exception_handler(request: Request, exc: UnauthorizedExce
             "request_id": getattr(request.state, "request_id", None)
         }
     )
+
+
+@app.exception_handler(ForbiddenException)
+async def forbidden_exception_handler(request: Request, exc: ForbiddenException):
+    """Ruxsat xatolarini handle qilish"""
+    return JSONResponse(
+        status_code=403,
+        content={
+            "error": exc.code,
+            "message": exc.message,
+            "request_id": getattr(request.state, "request_id", None)
+        }
+    )
+
+
 @app.exception_handler(ServiceUnavailableException)
 async def service_unavailable_handler(request: Request, exc: ServiceUnavailableException):
     """Service unavailable"""
@@ -200,18 +269,29 @@ async def validation_error_handler(request: Request, exc: RequestValidationError
 # ===== ROUTES =====
 
 # Routers
+# /payments/events - /payments/{payment_id} dan oldin
+app.include_router(stream.router, prefix="/api/v1")
 app.include_router(payment.router, prefix="/api/v1")
+app.include_router(reports.router, prefix="/api/v1")
+app.include_router(providers.router, prefix="/api/v1")
 
 # Health Check
 @app.get("/health", tags=["health"])
-async def health_check():
+async def health_check(rabbitmq: RabbitMQClient = Depends(get_rabbitmq)):
     """Service health check"""
     return {
         "status": "healthy",
         "service": "payment-service",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "rabbitmq": "connected" if rabbitmq.is_connected else "disconnected",
+        "replicas": replica_router.status()
     }
 
+@app.get("/metrics", tags=["health"])
+async def metrics():
+    """Prometheus metrics"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 # Root endpoint
 @app.get("/", tags=["root"])
 async def root():
@@ -15,6 +15,11 @@ sys.path.append(BASE_DIR)
 from shared.config import get_settings
 from payment_service.app.database.base import Base
 from payment_service.app.models.payment import Payment
+from payment_service.app.models.idempotency import IdempotencyKey
+from payment_service.app.models.outbox import OutboxEvent
+from payment_service.app.models.webhook import WebhookEndpoint
+from payment_service.app.models.rollup import PaymentRollup
+from payment_service.app.models.inbox import ProviderWebhookEvent
 
 from logging.config import fileConfig
 from sqlalchemy import engine_from_config
@@ -0,0 +1,54 @@
+"""first migration
+
+Revision ID: 08b309e4b968
+Revises:
+Create Date: 2025-01-10 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "08b309e4b968"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+payment_status = sa.Enum(
+    "PENDING", "PROCESSING", "COMPLETED", "FAILED", "CANCELLED", "REFUNDED",
+    name="paymentstatus"
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "payments",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", sa.String(50), nullable=False),
+        sa.Column("order_id", sa.String(50), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("currency", sa.String(3), nullable=True),
+        sa.Column("status", payment_status, nullable=True),
+        sa.Column("payment_method", sa.String(50), nullable=True),
+        sa.Column("provider_transaction_id", sa.String(100), nullable=True, unique=True),
+        sa.Column("description", sa.String(500), nullable=True),
+        sa.Column("metadata_info", sa.String(1000), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+        sa.Column("error_message", sa.String(500), nullable=True),
+        sa.Column("retry_count", sa.String(), nullable=True),
+    )
+    op.create_index("ix_payments_user_id", "payments", ["user_id"])
+    op.create_index("ix_payments_order_id", "payments", ["order_id"])
+    op.create_index("ix_payments_created_at", "payments", ["created_at"])
+    op.create_index("ix_payments_user_id_created_at", "payments", ["user_id", "created_at"])
+    op.create_index("ix_payments_order_id_status", "payments", ["order_id", "status"])
+    op.create_index("ix_payments_provider_transaction_id", "payments", ["provider_transaction_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("payments")
+    payment_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,77 @@
+"""payment retry schedule (retry_count -> retry_attempts expand)
+
+Revision ID: 0c3e5a7b9d16
+Revises: f2b4d6e8a057
+Create Date: 2025-03-03 10:00:00.000000
+
+Online: retry_count (VARCHAR) ni joyida INTEGER ga o'tkazish butun jadvalni
+ACCESS EXCLUSIVE ostida qayta yozadi. O'rniga shadow INTEGER ustun
+(retry_attempts, model da Payment.retry_count), ikki tomonlama sync trigger
+va batchlab backfill; eski ustun contract revisionda (1f3b5d7a9c62) o'chadi.
+next_attempt_at index CONCURRENTLY.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from shared.migrations import (
+    backfill, create_index_concurrently, create_sync_trigger, drop_index_concurrently, drop_sync_trigger,
+    report_sizes, set_not_null, table_sizes
+)
+
+# revision identifiers, used by Alembic.
+revision = "0c3e5a7b9d16"
+down_revision = "f2b4d6e8a057"
+branch_labels = None
+depends_on = None
+
+TRIGGER = "payments_sync_retry_attempts"
+
+# Eski kod retry_count (matn) ga, yangi kod retry_attempts ga yozadi
+SYNC_BODY = """
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.retry_count IS NOT NULL AND NEW.retry_count <> '' THEN
+            NEW.retry_attempts := NEW.retry_count::integer;
+        ELSIF NEW.retry_count IS NULL AND NEW.retry_attempts IS NOT NULL THEN
+            NEW.retry_count := NEW.retry_attempts::text;
+        ELSE
+            -- backfill paytida ham NULL qolmasin (set_not_null)
+            NEW.retry_attempts := COALESCE(NEW.retry_attempts, 0);
+        END IF;
+    ELSIF NEW.retry_count IS DISTINCT FROM OLD.retry_count
+            AND NEW.retry_attempts IS NOT DISTINCT FROM OLD.retry_attempts THEN
+        NEW.retry_attempts := COALESCE(NULLIF(NEW.retry_count, '')::integer, 0);
+    ELSIF NEW.retry_attempts IS DISTINCT FROM OLD.retry_attempts
+            AND NEW.retry_count IS NOT DISTINCT FROM OLD.retry_count
+            AND OLD.retry_attempts IS NOT NULL THEN
+        -- OLD.retry_attempts NULL - backfill, retry_count o'zgarmaydi
+        NEW.retry_count := NEW.retry_attempts::text;
+    END IF;"""
+
+
+def upgrade() -> None:
+    before = table_sizes("payments")
+
+    op.add_column("payments", sa.Column("retry_attempts", sa.Integer(), nullable=True))
+    create_sync_trigger("payments", TRIGGER, SYNC_BODY)
+    backfill(
+        "payments",
+        "retry_attempts = COALESCE(NULLIF(retry_count, '')::integer, 0)",
+        "retry_attempts IS NULL"
+    )
+    set_not_null("payments", "retry_attempts")
+    # Faqat catalog - mavjud qatorlar o'zgarmaydi
+    op.alter_column("payments", "retry_attempts", server_default="0")
+
+    op.add_column("payments", sa.Column("next_attempt_at", sa.DateTime(), nullable=True))
+    create_index_concurrently(
+        "ix_payments_next_attempt_at", "payments", ["next_attempt_at"], where="next_attempt_at IS NOT NULL"
+    )
+
+    report_sizes("payments", before, "(retry expand)")
+
+
+def downgrade() -> None:
+    drop_index_concurrently("ix_payments_next_attempt_at", "payments")
+    op.drop_column("payments", "next_attempt_at")
+    drop_sync_trigger("payments", TRIGGER)
+    op.drop_column("payments", "retry_attempts")
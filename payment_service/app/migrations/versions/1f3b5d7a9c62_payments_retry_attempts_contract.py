@@ -0,0 +1,62 @@
+"""payments.retry_count -> retry_attempts (contract)
+
+Revision ID: 1f3b5d7a9c62
+Revises: 6b8d0f2a4c71
+Create Date: 2025-03-06 10:00:00.000000
+
+Yangi kod hamma replicalarda ishlayotganidan KEYIN: sync trigger va eski
+VARCHAR retry_count ustuni o'chiriladi. Expand (0c3e5a7b9d16) 4a6c8e0b2d59
+dan oldin - ikkala contract bitta deploy tartibida qo'llanadi:
+    alembic upgrade 4a6c8e0b2d59
+    # yangi kod hamma replicalarda
+    alembic -x contract=true upgrade head
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from shared.migrations import (
+    backfill, create_sync_trigger, drop_sync_trigger, report_sizes, require_contract, table_sizes
+)
+
+# revision identifiers, used by Alembic.
+revision = "1f3b5d7a9c62"
+down_revision = "6b8d0f2a4c71"
+branch_labels = None
+depends_on = None
+
+EXPAND_REVISION = "4a6c8e0b2d59"
+TRIGGER = "payments_sync_retry_attempts"
+
+# Downgrade - eski kod qaytsa, ikkala ustun yana sinxron
+SYNC_BODY = """
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.retry_count IS NULL AND NEW.retry_attempts IS NOT NULL THEN
+            NEW.retry_count := NEW.retry_attempts::text;
+        ELSIF NEW.retry_count IS NOT NULL THEN
+            NEW.retry_attempts := COALESCE(NULLIF(NEW.retry_count, '')::integer, 0);
+        END IF;
+    ELSIF NEW.retry_attempts IS DISTINCT FROM OLD.retry_attempts
+            AND NEW.retry_count IS NOT DISTINCT FROM OLD.retry_count THEN
+        NEW.retry_count := NEW.retry_attempts::text;
+    ELSIF NEW.retry_count IS DISTINCT FROM OLD.retry_count
+            AND NEW.retry_attempts IS NOT DISTINCT FROM OLD.retry_attempts
+            AND OLD.retry_count IS NOT NULL THEN
+        -- OLD.retry_count NULL - backfill, retry_attempts o'zgarmaydi
+        NEW.retry_attempts := COALESCE(NULLIF(NEW.retry_count, '')::integer, 0);
+    END IF;"""
+
+
+def upgrade() -> None:
+    require_contract(EXPAND_REVISION)
+    before = table_sizes("payments")
+
+    drop_sync_trigger("payments", TRIGGER)
+    op.drop_column("payments", "retry_count")
+
+    report_sizes("payments", before, "(retry contract)")
+
+
+def downgrade() -> None:
+    op.add_column("payments", sa.Column("retry_count", sa.String(), nullable=True))
+    create_sync_trigger("payments", TRIGGER, SYNC_BODY)
+    backfill("payments", "retry_count = retry_attempts::text", "retry_count IS NULL")
@@ -0,0 +1,35 @@
+"""pending payment partial indexes
+
+Revision ID: 2e4a6c8f0b37
+Revises: 0c3e5a7b9d16
+Create Date: 2025-03-04 09:00:00.000000
+
+CONCURRENTLY - payments ga yozishlar index qurilayotganda to'xtamaydi.
+"""
+from shared.migrations import create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision = "2e4a6c8f0b37"
+down_revision = "0c3e5a7b9d16"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    create_index_concurrently(
+        "ix_payments_open_order",
+        "payments",
+        ["order_id", "user_id"],
+        where="status IN ('PENDING', 'PROCESSING')"
+    )
+    create_index_concurrently(
+        "ix_payments_pending_created_at",
+        "payments",
+        ["created_at", "id"],
+        where="status = 'PENDING'"
+    )
+
+
+def downgrade() -> None:
+    drop_index_concurrently("ix_payments_pending_created_at", "payments")
+    drop_index_concurrently("ix_payments_open_order", "payments")
@@ -0,0 +1,27 @@
+"""payment version column
+
+Revision ID: 3f1a9c2d7e45
+Revises: 08b309e4b968
+Create Date: 2025-02-03 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "3f1a9c2d7e45"
+down_revision = "08b309e4b968"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # server_default bilan - mavjud qatorlar rewrite qilinmaydi (PG 11+)
+    op.add_column(
+        "payments",
+        sa.Column("version", sa.Integer(), nullable=False, server_default="1")
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("payments", "version")
@@ -0,0 +1,63 @@
+"""payments.amount -> amount_minor (expand)
+
+Revision ID: 4a6c8e0b2d59
+Revises: 9e2a4c6b8d31
+Create Date: 2025-03-06 09:00:00.000000
+
+Online: shadow BIGINT ustun, ikki tomonlama sync trigger (eski kod
+`amount` ga, yangi kod `amount_minor` ga yozadi), batchlab backfill.
+Bu revisionni yangi kod deploy qilinishidan OLDIN ishlatish kerak. Yangi kod
+kerak qiladigan boshqa sxema o'zgarishlari ham shu revisiongacha bo'lishi
+shart - undan keyingilari contract bilan birga, deploydan keyin qo'llanadi.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from shared.migrations import (
+    backfill, create_sync_trigger, drop_sync_trigger, report_sizes, set_not_null, table_sizes
+)
+
+# revision identifiers, used by Alembic.
+revision = "4a6c8e0b2d59"
+down_revision = "9e2a4c6b8d31"
+branch_labels = None
+depends_on = None
+
+TRIGGER = "payments_sync_amount_minor"
+
+SYNC_BODY = """
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.amount_minor IS NULL AND NEW.amount IS NOT NULL THEN
+            NEW.amount_minor := round(NEW.amount * 100)::bigint;
+        ELSIF NEW.amount IS NULL AND NEW.amount_minor IS NOT NULL THEN
+            NEW.amount := NEW.amount_minor / 100.0;
+        END IF;
+    ELSIF NEW.amount IS DISTINCT FROM OLD.amount
+            AND NEW.amount_minor IS NOT DISTINCT FROM OLD.amount_minor THEN
+        NEW.amount_minor := round(NEW.amount * 100)::bigint;
+    ELSIF NEW.amount_minor IS DISTINCT FROM OLD.amount_minor
+            AND NEW.amount IS NOT DISTINCT FROM OLD.amount
+            AND OLD.amount_minor IS NOT NULL THEN
+        -- OLD.amount_minor NULL - backfill, amount o'zgarmaydi
+        NEW.amount := NEW.amount_minor / 100.0;
+    END IF;"""
+
+
+def upgrade() -> None:
+    before = table_sizes("payments")
+
+    op.add_column("payments", sa.Column("amount_minor", sa.BigInteger(), nullable=True))
+    create_sync_trigger("payments", TRIGGER, SYNC_BODY)
+    backfill(
+        "payments",
+        "amount_minor = round(amount * 100)::bigint",
+        "amount_minor IS NULL"
+    )
+    set_not_null("payments", "amount_minor")
+
+    report_sizes("payments", before, "(expand)")
+
+
+def downgrade() -> None:
+    drop_sync_trigger("payments", TRIGGER)
+    op.drop_column("payments", "amount_minor")
@@ -0,0 +1,63 @@
+"""payments.amount -> amount_minor (contract)
+
+Revision ID: 6b8d0f2a4c71
+Revises: 4a6c8e0b2d59
+Create Date: 2025-03-06 09:30:00.000000
+
+Yangi kod hamma replicalarda ishlayotganidan KEYIN: sync trigger va eski
+FLOAT ustun o'chiriladi. DROP COLUMN faqat catalog o'zgarishi - joy
+keyingi VACUUM FULL / pg_repack da bo'shaydi.
+
+Deploy tartibi:
+    alembic upgrade 4a6c8e0b2d59            # expand
+    # yangi kod hamma replicalarda
+    alembic -x contract=true upgrade head   # contract
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from shared.migrations import (
+    backfill, create_sync_trigger, drop_sync_trigger, report_sizes, require_contract, set_not_null,
+    table_sizes
+)
+
+# revision identifiers, used by Alembic.
+revision = "6b8d0f2a4c71"
+down_revision = "4a6c8e0b2d59"
+branch_labels = None
+depends_on = None
+
+TRIGGER = "payments_sync_amount_minor"
+
+# Downgrade - eski kod qaytsa, ikkala ustun yana sinxron
+SYNC_BODY = """
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.amount IS NULL AND NEW.amount_minor IS NOT NULL THEN
+            NEW.amount := NEW.amount_minor / 100.0;
+        ELSIF NEW.amount_minor IS NULL AND NEW.amount IS NOT NULL THEN
+            NEW.amount_minor := round(NEW.amount * 100)::bigint;
+        END IF;
+    ELSIF NEW.amount_minor IS DISTINCT FROM OLD.amount_minor
+            AND NEW.amount IS NOT DISTINCT FROM OLD.amount THEN
+        NEW.amount := NEW.amount_minor / 100.0;
+    ELSIF NEW.amount IS DISTINCT FROM OLD.amount
+            AND NEW.amount_minor IS NOT DISTINCT FROM OLD.amount_minor THEN
+        NEW.amount_minor := round(NEW.amount * 100)::bigint;
+    END IF;"""
+
+
+def upgrade() -> None:
+    require_contract(down_revision)
+    before = table_sizes("payments")
+
+    drop_sync_trigger("payments", TRIGGER)
+    op.drop_column("payments", "amount")
+
+    report_sizes("payments", before, "(contract)")
+
+
+def downgrade() -> None:
+    op.add_column("payments", sa.Column("amount", sa.Float(), nullable=True))
+    create_sync_trigger("payments", TRIGGER, SYNC_BODY)
+    backfill("payments", "amount = amount_minor / 100.0", "amount IS NULL")
+    set_not_null("payments", "amount")
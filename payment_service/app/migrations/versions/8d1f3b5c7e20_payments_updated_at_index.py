@@ -0,0 +1,24 @@
+"""payments (updated_at, id) index for incremental export
+
+Revision ID: 8d1f3b5c7e20
+Revises: 2e4a6c8f0b37
+Create Date: 2025-03-05 09:00:00.000000
+
+Analytics export updated_at watermark dan keyingi qatorlarni shu index
+bo'yicha range scan qiladi. CONCURRENTLY - yozishlar to'xtamaydi.
+"""
+from shared.migrations import create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision = "8d1f3b5c7e20"
+down_revision = "2e4a6c8f0b37"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    create_index_concurrently("ix_payments_updated_at_id", "payments", ["updated_at", "id"])
+
+
+def downgrade() -> None:
+    drop_index_concurrently("ix_payments_updated_at_id", "payments")
@@ -0,0 +1,25 @@
+"""provider webhook inbox next_attempt_at (retry backoff)
+
+Revision ID: 9e2a4c6b8d31
+Revises: 8d1f3b5c7e20
+Create Date: 2025-03-05 10:00:00.000000
+
+Nullable ustun, default yo'q - jadval qayta yozilmaydi (faqat katalog
+o'zgarishi). NULL - event darhol olinadi.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "9e2a4c6b8d31"
+down_revision = "8d1f3b5c7e20"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("provider_webhook_inbox", sa.Column("next_attempt_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("provider_webhook_inbox", "next_attempt_at")
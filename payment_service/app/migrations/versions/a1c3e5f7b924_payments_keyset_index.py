@@ -0,0 +1,27 @@
+"""payments keyset index
+
+Revision ID: a1c3e5f7b924
+Revises: e5a7b9c1d382
+Create Date: 2025-02-25 10:00:00.000000
+
+id qo'shildi - (created_at, id) cursor bir xil created_at da ham aniq.
+Yangi index CONCURRENTLY va eskisidan oldin yaratiladi - list_payments
+hech qachon indexsiz qolmaydi va yozishlar to'xtamaydi.
+"""
+from shared.migrations import create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision = "a1c3e5f7b924"
+down_revision = "e5a7b9c1d382"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    create_index_concurrently("ix_payments_user_id_created_at_id", "payments", ["user_id", "created_at", "id"])
+    drop_index_concurrently("ix_payments_user_id_created_at", "payments")
+
+
+def downgrade() -> None:
+    create_index_concurrently("ix_payments_user_id_created_at", "payments", ["user_id", "created_at"])
+    drop_index_concurrently("ix_payments_user_id_created_at_id", "payments")
@@ -0,0 +1,40 @@
+"""payment rollups
+
+Revision ID: b6d2f4a8c135
+Revises: a1c3e5f7b924
+Create Date: 2025-02-26 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "b6d2f4a8c135"
+down_revision = "a1c3e5f7b924"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "payment_rollups",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("currency", sa.String(3), nullable=False),
+        sa.Column(
+            "status",
+            postgresql.ENUM(name="paymentstatus", create_type=False),
+            nullable=False
+        ),
+        sa.Column("payment_method", sa.String(50), nullable=False),
+        sa.Column("slot", sa.SmallInteger(), nullable=False, server_default="0"),
+        sa.Column("payment_count", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("amount_sum", sa.Numeric(20, 2), nullable=False, server_default="0"),
+        sa.Column("amount_min", sa.Numeric(20, 2), nullable=True),
+        sa.Column("amount_max", sa.Numeric(20, 2), nullable=True),
+        sa.PrimaryKeyConstraint("day", "currency", "status", "payment_method", "slot"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("payment_rollups")
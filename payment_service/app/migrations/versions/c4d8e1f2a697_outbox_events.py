@@ -0,0 +1,40 @@
+"""outbox events
+
+Revision ID: c4d8e1f2a697
+Revises: 7b2e4d6f8a13
+Create Date: 2025-02-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "c4d8e1f2a697"
+down_revision = "7b2e4d6f8a13"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "outbox_events",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("event_type", sa.String(100), nullable=False),
+        sa.Column("routing_key", sa.String(100), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_error", sa.String(500), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("published_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index(
+        "ix_outbox_events_unpublished",
+        "outbox_events",
+        ["id"],
+        postgresql_where=sa.text("published_at IS NULL")
+    )
+    op.create_index("ix_outbox_events_published_at", "outbox_events", ["published_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("outbox_events")
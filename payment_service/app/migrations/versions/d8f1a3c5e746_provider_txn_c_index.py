@@ -0,0 +1,31 @@
+"""provider transaction id C-collation index
+
+Revision ID: d8f1a3c5e746
+Revises: b6d2f4a8c135
+Create Date: 2025-02-27 11:00:00.000000
+
+"""
+import sqlalchemy as sa
+
+from shared.migrations import create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision = "d8f1a3c5e746"
+down_revision = "b6d2f4a8c135"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Settlement reconciliation ORDER BY ... COLLATE "C" shu index bo'yicha o'qiydi.
+    # CONCURRENTLY - qurilish davomida payments ga yozishlar to'xtamaydi
+    create_index_concurrently(
+        "ix_payments_provider_transaction_id_c",
+        "payments",
+        [sa.text('provider_transaction_id COLLATE "C"')],
+        where="provider_transaction_id IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    drop_index_concurrently("ix_payments_provider_transaction_id_c", "payments")
@@ -0,0 +1,34 @@
+"""webhook endpoints
+
+Revision ID: e5a7b9c1d382
+Revises: c4d8e1f2a697
+Create Date: 2025-02-24 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "e5a7b9c1d382"
+down_revision = "c4d8e1f2a697"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "webhook_endpoints",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", sa.String(50), nullable=False),
+        sa.Column("url", sa.String(500), nullable=False),
+        sa.Column("secret", sa.String(128), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False, server_default="true"),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_webhook_endpoints_user_id", "webhook_endpoints", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("webhook_endpoints")
@@ -0,0 +1,46 @@
+"""provider webhook inbox
+
+Revision ID: f2b4d6e8a057
+Revises: d8f1a3c5e746
+Create Date: 2025-02-28 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "f2b4d6e8a057"
+down_revision = "d8f1a3c5e746"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "provider_webhook_inbox",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("provider", sa.String(50), nullable=False),
+        sa.Column("provider_transaction_id", sa.String(100), nullable=False),
+        sa.Column("status", sa.String(30), nullable=False),
+        sa.Column("payment_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_error", sa.String(500), nullable=True),
+        sa.Column("received_at", sa.DateTime(), nullable=False),
+        sa.Column("processed_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint(
+            "provider", "provider_transaction_id", "status",
+            name="uq_provider_webhook_inbox_event"
+        ),
+    )
+    op.create_index(
+        "ix_provider_webhook_inbox_pending",
+        "provider_webhook_inbox",
+        ["id"],
+        postgresql_where=sa.text("processed_at IS NULL")
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("provider_webhook_inbox")
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, String, Text, DateTime, Integer, Index
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+from payment_service.app.database.base import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Idempotency-Key header bo'yicha saqlangan javoblar
+    """
+    __tablename__ = "idempotency_keys"
+
+    # Primary Key - (user_id, key) unique index
+    user_id = Column(String(50), primary_key=True)
+    key = Column(String(255), primary_key=True)
+
+    # Bir xil key boshqa body bilan kelsa - xato
+    request_hash = Column(String(64), nullable=False)
+
+    # Saqlangan javob (NULL - request hali bajarilmoqda)
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    payment_id = Column(UUID(as_uuid=True), nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<IdempotencyKey("
+            f"user_id={self.user_id}, "
+            f"key={self.key}, "
+            f"status_code={self.status_code}"
+            f")>"
+        )
@@ -0,0 +1,55 @@
+from sqlalchemy import Column, String, Text, DateTime, Integer, BigInteger, Index, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+from payment_service.app.database.base import Base
+
+
+class ProviderWebhookEvent(Base):
+    """
+    Provider callback inbox - request darhol shu yerga yoziladi (202),
+    status o'zgarishini worker batch holida qo'llaydi
+    """
+    __tablename__ = "provider_webhook_inbox"
+
+    # Primary Key - kelish tartibi
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+
+    # Event
+    provider = Column(String(50), nullable=False)
+    provider_transaction_id = Column(String(100), nullable=False)
+    status = Column(String(30), nullable=False)  # provider statusi (xom)
+    payment_id = Column(UUID(as_uuid=True), nullable=True)
+    payload = Column(Text, nullable=False)  # JSON string
+
+    # Worker holati
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(String(500), nullable=True)
+    next_attempt_at = Column(DateTime, nullable=True)  # NULL - darhol; xatodan keyin backoff
+
+    # Timestamps
+    received_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    processed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Provider retry lari - bir xil transaction + status ikkinchi marta yozilmaydi
+        UniqueConstraint(
+            "provider", "provider_transaction_id", "status",
+            name="uq_provider_webhook_inbox_event"
+        ),
+        # Faqat qayta ishlanmaganlar - worker shu kichik index bo'yicha o'qiydi
+        Index(
+            "ix_provider_webhook_inbox_pending",
+            "id",
+            postgresql_where=text("processed_at IS NULL")
+        ),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<ProviderWebhookEvent("
+            f"id={self.id}, "
+            f"provider={self.provider}, "
+            f"provider_transaction_id={self.provider_transaction_id}, "
+            f"status={self.status}"
+            f")>"
+        )
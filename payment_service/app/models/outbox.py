@@ -0,0 +1,46 @@
+from sqlalchemy import Column, String, Text, DateTime, Integer, BigInteger, Index, text
+from datetime import datetime
+from payment_service.app.database.base import Base
+
+
+class OutboxEvent(Base):
+    """
+    Transactional outbox - event to'lov o'zgarishi bilan bitta transactionda yoziladi,
+    RabbitMQ ga relay yuboradi
+    """
+    __tablename__ = "outbox_events"
+
+    # Primary Key - yozilish tartibi
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+
+    # Event
+    event_type = Column(String(100), nullable=False)
+    routing_key = Column(String(100), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON string
+
+    # Relay holati
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(String(500), nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    published_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Faqat yuborilmaganlar - relay shu kichik index bo'yicha o'qiydi
+        Index(
+            "ix_outbox_events_unpublished",
+            "id",
+            postgresql_where=text("published_at IS NULL")
+        ),
+        Index("ix_outbox_events_published_at", "published_at"),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<OutboxEvent("
+            f"id={self.id}, "
+            f"event_type={self.event_type}, "
+            f"published_at={self.published_at}"
+            f")>"
+        )
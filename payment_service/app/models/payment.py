@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, Float, DateTime, Enum, Index, ForeignKey
+from sqlalchemy import Column, String, Float, DateTime, Enum, Index, ForeignKey, Integer, BigInteger, cast
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.hybrid import hybrid_property
 from datetime import datetime
 import uuid
 import enum
@@ -16,6 +17,11 @@ class PaymentStatus(str, enum.Enum):
     REFUNDED = "refunded"  # Qaytarildi
 
 
+def to_minor(amount) -> int:
+    """12.34 -> 1234 (float/Decimal/str) - summa butun sonlarda (minor units)"""
+    return int(round(float(amount) * 100))
+
+
 class Payment(Base):
     """
     To'lov modeli
@@ -29,8 +35,8 @@ class Payment(Base):
     user_id = Column(String(50), nullable=False, index=True)
     order_id = Column(String(50), nullable=False, index=True)
 
-    # Payment Info
-    amount = Column(Float, nullable=False)
+    # Payment Info - summa minor units da (12.34 USD -> 1234), float xatolarisiz
+    amount_minor = Column(BigInteger, nullable=False)
     currency = Column(String(3), default="USD")
     status = Column(Enum(PaymentStatus), default=PaymentStatus.PENDING)
 
@@ -49,15 +55,65 @@ class Payment(Base):
 
     # Error tracking
     error_message = Column(String(500), nullable=True)
-    retry_count = Column(String, default=0)
+    # DB ustuni retry_attempts (VARCHAR retry_count dan online migratsiya)
+    retry_count = Column("retry_attempts", Integer, nullable=False, default=0, server_default="0")
+
+    # Retry scheduler - qachon qayta urinish / provider dan so'rash kerak
+    next_attempt_at = Column(DateTime, nullable=True)
+
+    # Optimistic concurrency - har bir status o'zgarishida +1
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     # Indexes - Query performance
     __table_args__ = (
-        Index("ix_payments_user_id_created_at", "user_id", "created_at"),
+        # Keyset pagination: (created_at, id) < cursor
+        Index("ix_payments_user_id_created_at_id", "user_id", "created_at", "id"),
         Index("ix_payments_order_id_status", "order_id", "status"),
         Index("ix_payments_provider_transaction_id", "provider_transaction_id"),
+        # Settlement reconciliation - byte tartibida (COLLATE "C") streaming
+        Index(
+            "ix_payments_provider_transaction_id_c",
+            provider_transaction_id.collate("C"),
+            postgresql_where=provider_transaction_id.isnot(None)
+        ),
+        # Faqat ochiq to'lovlar - dublikat tekshiruvi kichik index bo'yicha
+        Index(
+            "ix_payments_open_order",
+            "order_id",
+            "user_id",
+            postgresql_where=status.in_([PaymentStatus.PENDING, PaymentStatus.PROCESSING])
+        ),
+        # Expiry sweeper - faqat PENDING lar, (created_at, id) keyset tartibida
+        Index(
+            "ix_payments_pending_created_at",
+            "created_at",
+            "id",
+            postgresql_where=status == PaymentStatus.PENDING
+        ),
+        # Analytics export - updated_at watermark dan keyingi o'zgarishlar
+        Index("ix_payments_updated_at_id", "updated_at", "id"),
+        # Faqat navbatdagi to'lovlar - scheduler shu kichik index bo'yicha claim qiladi
+        Index(
+            "ix_payments_next_attempt_at",
+            "next_attempt_at",
+            postgresql_where=next_attempt_at.isnot(None)
+        ),
     )
 
+    @hybrid_property
+    def amount(self) -> float:
+        """API dagi summa (valyuta birligida)"""
+        return self.amount_minor / 100 if self.amount_minor is not None else None
+
+    @amount.inplace.setter
+    def _amount_setter(self, value) -> None:
+        self.amount_minor = to_minor(value)
+
+    @amount.inplace.expression
+    @classmethod
+    def _amount_expression(cls):
+        return cast(cls.amount_minor / 100.0, Float).label("amount")
+
     def __repr__(self) -> str:
         return (
             f"<Payment("
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, String, Date, Enum, SmallInteger, BigInteger, Numeric
+from payment_service.app.database.base import Base
+from payment_service.app.models.payment import PaymentStatus
+
+
+class PaymentRollup(Base):
+    """
+    Kunlik agregat - (kun, valyuta, status, to'lov usuli) bo'yicha.
+
+    Har bir status o'zgarishi bilan bitta transactionda yangilanadi.
+    slot - bitta kalit uchun bir nechta qator, parallel yozuvlar bitta
+    qatorning lockida navbatga turmasligi uchun (o'qishda yig'iladi).
+    """
+    __tablename__ = "payment_rollups"
+
+    # Composite Primary Key
+    day = Column(Date, primary_key=True)
+    currency = Column(String(3), primary_key=True)
+    status = Column(Enum(PaymentStatus), primary_key=True)
+    payment_method = Column(String(50), primary_key=True)
+    slot = Column(SmallInteger, primary_key=True, default=0)
+
+    # Agregatlar
+    payment_count = Column(BigInteger, nullable=False, default=0)
+    amount_sum = Column(Numeric(20, 2), nullable=False, default=0)
+    # Chiqib ketgan to'lovlar min/max ni kamaytirmaydi - reconciliation aniqlaydi
+    amount_min = Column(Numeric(20, 2), nullable=True)
+    amount_max = Column(Numeric(20, 2), nullable=True)
+
+    def __repr__(self) -> str:
+        return (
+            f"<PaymentRollup("
+            f"day={self.day}, "
+            f"currency={self.currency}, "
+            f"status={self.status}, "
+            f"count={self.payment_count}"
+            f")>"
+        )
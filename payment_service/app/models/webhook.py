@@ -0,0 +1,35 @@
+from sqlalchemy import Column, String, DateTime, Boolean
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+import uuid
+from payment_service.app.database.base import Base
+
+
+class WebhookEndpoint(Base):
+    """
+    Merchant callback URL - to'lov status o'zgarishlari shu yerga yuboriladi
+    """
+    __tablename__ = "webhook_endpoints"
+
+    # Primary Key
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    # Egasi (payments.user_id)
+    user_id = Column(String(50), nullable=False, index=True)
+
+    url = Column(String(500), nullable=False)
+    secret = Column(String(128), nullable=False)  # HMAC imzo uchun
+    is_active = Column(Boolean, nullable=False, default=True, server_default="true")
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return (
+            f"<WebhookEndpoint("
+            f"id={self.id}, "
+            f"user_id={self.user_id}, "
+            f"url={self.url}"
+            f")>"
+        )
@@ -0,0 +1,77 @@
+# payment-service/app/providers/__init__.py
+# ============================================
+# PROVIDER REGISTRY
+# ============================================
+
+import asyncio
+import json
+from typing import Callable, Dict, Optional
+
+from shared.exceptions import NotFoundException, ValidationException
+from shared.logger import setup_logger
+from payment_service.app.providers.base import (
+    PROVIDER_STATUS_MAP, PaymentProvider, ProviderError, ProviderResult
+)
+from payment_service.app.providers.http import HttpProvider
+from payment_service.app.providers.mock import MockProvider
+
+logger = setup_logger(__name__)
+
+_registry: Dict[str, PaymentProvider] = {}
+
+# Config dagi "type" -> adapter factory (name, config) -> PaymentProvider
+_factories: Dict[str, Callable[[str, dict], PaymentProvider]] = {
+    "http": HttpProvider.from_config,
+    "mock": MockProvider.from_config,
+}
+
+
+def register(payment_method: str, provider: PaymentProvider) -> None:
+    """payment_method uchun adapterni ro'yxatdan o'tkazish"""
+    _registry[payment_method] = provider
+
+
+def register_type(kind: str, factory: Callable[[str, dict], PaymentProvider]) -> None:
+    """Yangi adapter turini qo'shish (PROVIDERS config dagi "type")"""
+    _factories[kind] = factory
+
+
+def get_provider(payment_method: Optional[str]) -> PaymentProvider:
+    provider = _registry.get(payment_method or "")
+    if provider is None:
+        raise NotFoundException(f"No provider adapter for {payment_method}", "provider")
+    return provider
+
+
+def has_provider(payment_method: Optional[str]) -> bool:
+    return (payment_method or "") in _registry
+
+
+def configure_providers(config: str) -> None:
+    """
+    PROVIDERS (JSON) dan adapterlarni yaratish:
+    {"card": {"type": "http", "base_url": "...", "api_key": "..."},
+     "test": {"type": "mock", "latency_ms": 50, "decline_rate": 0.1}}
+    """
+    if not config:
+        return
+    for payment_method, options in json.loads(config).items():
+        kind = options.get("type", "http")
+        factory = _factories.get(kind)
+        if factory is None:
+            raise ValidationException(f"Unknown provider type {kind} for {payment_method}", "type")
+        register(payment_method, factory(options.get("name", payment_method), options))
+        logger.info(f"Provider adapter registered: {payment_method} ({kind})")
+
+
+async def close_providers() -> None:
+    await asyncio.gather(*[provider.close() for provider in set(_registry.values())])
+    _registry.clear()
+
+
+__all__ = [
+    "PROVIDER_STATUS_MAP", "PaymentProvider", "ProviderError", "ProviderResult",
+    "HttpProvider", "MockProvider",
+    "register", "register_type", "get_provider", "has_provider",
+    "configure_providers", "close_providers",
+]
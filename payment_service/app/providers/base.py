@@ -0,0 +1,72 @@
+# payment-service/app/providers/base.py
+# ============================================
+# PAYMENT PROVIDER ADAPTER INTERFACE
+# ============================================
+
+import asyncio
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+from payment_service.app.models.payment import Payment, PaymentStatus
+
+# Provider statusi -> bizdagi status
+PROVIDER_STATUS_MAP: Dict[str, PaymentStatus] = {
+    "processing": PaymentStatus.PROCESSING,
+    "pending": PaymentStatus.PROCESSING,
+    "succeeded": PaymentStatus.COMPLETED,
+    "completed": PaymentStatus.COMPLETED,
+    "captured": PaymentStatus.COMPLETED,
+    "failed": PaymentStatus.FAILED,
+    "declined": PaymentStatus.FAILED,
+    "cancelled": PaymentStatus.CANCELLED,
+    "canceled": PaymentStatus.CANCELLED,
+    "refunded": PaymentStatus.REFUNDED,
+}
+
+
+class ProviderError(Exception):
+    """Provider bilan aloqa xatosi (timeout, 5xx) - keyinroq qayta urinish mumkin"""
+
+
+@dataclass
+class ProviderResult:
+    """Provider javobi - status None bo'lsa hali aniq emas (processing)"""
+    status: Optional[PaymentStatus]
+    provider_transaction_id: Optional[str] = None
+    error_message: Optional[str] = None
+    # Transaction qaysi to'lovga tegishli (bizning payment.id) va summasi
+    reference: Optional[str] = None
+    amount_minor: Optional[int] = None
+    currency: Optional[str] = None
+
+
+class PaymentProvider(ABC):
+    """
+    Provider adapter - har bir to'lov usuli (payment_method) uchun bitta
+    """
+    name: str = "base"
+
+    @abstractmethod
+    async def submit(self, payment: Payment) -> ProviderResult:
+        """To'lovni providerga (qayta) yuborish"""
+
+    @abstractmethod
+    async def get_status(self, payment: Payment) -> ProviderResult:
+        """Provider dagi joriy holatni so'rash"""
+
+    async def get_statuses(self, transaction_ids: Iterable[str]) -> Dict[str, ProviderResult]:
+        """
+        Ko'p transaction statusini olish. Default - bittalab parallel;
+        batch API si bor adapterlar buni bitta so'rov bilan almashtiradi.
+        Javobda yo'q id - provider uni tanimaydi.
+        """
+        transaction_ids = list(transaction_ids)
+        results = await asyncio.gather(*[
+            self.get_status(Payment(provider_transaction_id=transaction_id))
+            for transaction_id in transaction_ids
+        ])
+        return dict(zip(transaction_ids, results))
+
+    async def close(self) -> None:
+        """Connection pool va boshqa resurslarni yopish"""
@@ -0,0 +1,148 @@
+# payment-service/app/providers/http.py
+# ============================================
+# HTTP PROVIDER ADAPTER (POOLED CLIENT + BATCH STATUS)
+# ============================================
+
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+
+from shared.config import get_settings
+from shared.logger import setup_logger
+from payment_service.app.models.payment import Payment, PaymentStatus, to_minor
+from payment_service.app.providers.base import (
+    PROVIDER_STATUS_MAP, PaymentProvider, ProviderError, ProviderResult
+)
+
+settings = get_settings()
+logger = setup_logger(__name__)
+
+
+class HttpProvider(PaymentProvider):
+    """
+    JSON/HTTP provider API uchun adapter. Bitta uzoq yashaydigan
+    httpx.AsyncClient (keep-alive pool) - har so'rovda yangi TCP/TLS yo'q.
+
+    API:
+        POST {base_url}/payments                  - yuborish
+        GET  {base_url}/payments/{transaction_id} - bitta status
+        POST {base_url}/payments/status           - {"transaction_ids": [...]} batch status
+    """
+
+    def __init__(
+            self,
+            name: str,
+            base_url: str,
+            api_key: Optional[str] = None,
+            timeout: float = None,
+            max_connections: int = None,
+            status_batch_size: int = None
+    ):
+        self.name = name
+        self.status_batch_size = status_batch_size or settings.PROVIDER_STATUS_BATCH_SIZE
+        max_connections = max_connections or settings.PROVIDER_MAX_CONNECTIONS
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            headers=headers,
+            timeout=timeout or settings.PROVIDER_HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            )
+        )
+
+    @classmethod
+    def from_config(cls, name: str, config: dict) -> "HttpProvider":
+        return cls(
+            name,
+            config["base_url"],
+            api_key=config.get("api_key"),
+            timeout=config.get("timeout"),
+            max_connections=config.get("max_connections"),
+            status_batch_size=config.get("status_batch_size")
+        )
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        try:
+            response = await self.client.request(method, path, **kwargs)
+        except httpx.HTTPError as e:
+            raise ProviderError(f"{self.name}: {e.__class__.__name__}: {str(e)}")
+        # 429 / 5xx - vaqtinchalik, keyinroq qayta urinish
+        if response.status_code == 429 or response.status_code >= 500:
+            raise ProviderError(f"{self.name}: HTTP {response.status_code}")
+        return response
+
+    @staticmethod
+    def _parse(data: dict) -> ProviderResult:
+        status = PROVIDER_STATUS_MAP.get(str(data.get("status", "")).lower())
+        if status == PaymentStatus.PROCESSING:
+            status = None
+        amount_minor = data.get("amount_minor")
+        if amount_minor is None and data.get("amount") is not None:
+            amount_minor = to_minor(data["amount"])
+        return ProviderResult(
+            status=status,
+            provider_transaction_id=data.get("provider_transaction_id") or data.get("transaction_id"),
+            error_message=data.get("error"),
+            reference=data.get("reference"),
+            amount_minor=int(amount_minor) if amount_minor is not None else None,
+            currency=data.get("currency")
+        )
+
+    async def submit(self, payment: Payment) -> ProviderResult:
+        response = await self._request(
+            "POST",
+            "/payments",
+            json={
+                "reference": str(payment.id),
+                "order_id": payment.order_id,
+                "amount": payment.amount,
+                "currency": payment.currency,
+                "payment_method": payment.payment_method,
+            },
+            # Qayta yuborishda provider dublikat yaratmasligi uchun
+            headers={"Idempotency-Key": str(payment.id)}
+        )
+        if response.status_code >= 400:
+            return ProviderResult(status=PaymentStatus.FAILED, error_message=response.text[:500])
+        return self._parse(response.json())
+
+    async def get_status(self, payment: Payment) -> ProviderResult:
+        if not payment.provider_transaction_id:
+            # Provider da hali transaction yo'q - reference bo'yicha qidirish
+            response = await self._request("GET", "/payments", params={"reference": str(payment.id)})
+        else:
+            response = await self._request("GET", f"/payments/{payment.provider_transaction_id}")
+        if response.status_code == 404:
+            return ProviderResult(status=None, error_message="unknown to provider")
+        if response.status_code >= 400:
+            raise ProviderError(f"{self.name}: HTTP {response.status_code}")
+        return self._parse(response.json())
+
+    async def _status_chunk(self, transaction_ids: List[str]) -> Dict[str, ProviderResult]:
+        response = await self._request("POST", "/payments/status", json={"transaction_ids": transaction_ids})
+        if response.status_code >= 400:
+            raise ProviderError(f"{self.name}: HTTP {response.status_code}")
+        results = {}
+        for item in response.json().get("results", []):
+            result = self._parse(item)
+            if result.provider_transaction_id:
+                results[result.provider_transaction_id] = result
+        return results
+
+    async def get_statuses(self, transaction_ids: Iterable[str]) -> Dict[str, ProviderResult]:
+        """N ta id -> ceil(N / status_batch_size) ta parallel so'rov"""
+        transaction_ids = list(transaction_ids)
+        chunks = [
+            transaction_ids[start:start + self.status_batch_size]
+            for start in range(0, len(transaction_ids), self.status_batch_size)
+        ]
+        results: Dict[str, ProviderResult] = {}
+        for chunk_result in await asyncio.gather(*[self._status_chunk(chunk) for chunk in chunks]):
+            results.update(chunk_result)
+        return results
+
+    async def close(self) -> None:
+        await self.client.aclose()
@@ -0,0 +1,97 @@
+# payment-service/app/providers/mock.py
+# ============================================
+# DETERMINISTIC IN-PROCESS MOCK PROVIDER
+# ============================================
+
+import asyncio
+import hashlib
+from typing import Dict, Iterable, Tuple
+
+from payment_service.app.models.payment import Payment, PaymentStatus
+from payment_service.app.providers.base import PaymentProvider, ProviderError, ProviderResult
+
+
+class MockProvider(PaymentProvider):
+    """
+    Test va benchmarklar uchun provider - tarmoqsiz, natija deterministik:
+    bir xil seed + payment/transaction id -> har doim bir xil javob.
+
+    - latency_ms: har bir so'rov (batch ham bitta so'rov) kechikishi
+    - error_rate: ProviderError (timeout / 5xx) ulushi
+    - decline_rate: FAILED ulushi
+    - processing_rate: hali aniq emas (status None) ulushi
+    """
+
+    def __init__(
+            self,
+            name: str = "mock",
+            latency_ms: float = 0.0,
+            error_rate: float = 0.0,
+            decline_rate: float = 0.0,
+            processing_rate: float = 0.0,
+            seed: str = "mock"
+    ):
+        self.name = name
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.decline_rate = decline_rate
+        self.processing_rate = processing_rate
+        self.seed = seed
+        self.requests = 0
+        # transaction_id -> (reference, amount_minor, currency) - submit / get_status da ko'rilgan
+        self._payments: Dict[str, Tuple[str, int, str]] = {}
+
+    @classmethod
+    def from_config(cls, name: str, config: dict) -> "MockProvider":
+        return cls(
+            name,
+            latency_ms=float(config.get("latency_ms", 0)),
+            error_rate=float(config.get("error_rate", 0)),
+            decline_rate=float(config.get("decline_rate", 0)),
+            processing_rate=float(config.get("processing_rate", 0)),
+            seed=str(config.get("seed", name))
+        )
+
+    def _roll(self, key: str, purpose: str) -> float:
+        """key uchun [0, 1) dagi deterministik son"""
+        digest = hashlib.blake2b(f"{self.seed}:{purpose}:{key}".encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big") / 2 ** 64
+
+    def transaction_id(self, payment: Payment) -> str:
+        transaction_id = payment.provider_transaction_id or f"mock_{str(payment.id).replace('-', '')}"
+        if payment.id is not None:
+            self._payments[transaction_id] = (str(payment.id), payment.amount_minor, payment.currency)
+        return transaction_id
+
+    def _outcome(self, transaction_id: str) -> ProviderResult:
+        roll = self._roll(transaction_id, "outcome")
+        reference, amount_minor, currency = self._payments.get(transaction_id, (None, None, None))
+        if roll < self.decline_rate:
+            status, error = PaymentStatus.FAILED, "card_declined"
+        elif roll < self.decline_rate + self.processing_rate:
+            status, error = None, None
+        else:
+            status, error = PaymentStatus.COMPLETED, None
+        return ProviderResult(status, transaction_id, error, reference, amount_minor, currency)
+
+    async def _call(self, key: str) -> None:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self._roll(key, f"error:{self.requests}") < self.error_rate:
+            raise ProviderError(f"{self.name}: simulated provider error")
+
+    async def submit(self, payment: Payment) -> ProviderResult:
+        transaction_id = self.transaction_id(payment)
+        await self._call(transaction_id)
+        return self._outcome(transaction_id)
+
+    async def get_status(self, payment: Payment) -> ProviderResult:
+        transaction_id = self.transaction_id(payment)
+        await self._call(transaction_id)
+        return self._outcome(transaction_id)
+
+    async def get_statuses(self, transaction_ids: Iterable[str]) -> Dict[str, ProviderResult]:
+        transaction_ids = list(transaction_ids)
+        await self._call(",".join(transaction_ids))
+        return {transaction_id: self._outcome(transaction_id) for transaction_id in transaction_ids}
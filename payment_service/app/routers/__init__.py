@@ -1,5 +1,3 @@
-from . import payment
-
-__all__ = ["payment"]
-
+from . import payment, providers, reports, stream
 
+__all__ = ["payment", "providers", "reports", "stream"]
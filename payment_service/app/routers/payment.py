@@ -3,18 +3,28 @@
 # PAYMENT ENDPOINTS
 # ============================================
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Response
+from fastapi.responses import ORJSONResponse
+from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
+from datetime import datetime
+from shared.config import get_settings
 from shared.dependencies import get_user_id
 from shared.logger import setup_logger
-from shared.exceptions import NotFoundException, ValidationException
-from payment_service.app.database.session import get_db
+from shared.exceptions import NotFoundException, ServiceUnavailableException, ValidationException
+from payment_service.app.services.state_machine import PaymentStateConflict
+from payment_service.app.services.idempotency import IdempotencyConflict
+from payment_service.app.services.velocity import VelocityLimitExceeded
+from payment_service.app.database.session import get_read_db, get_write_db
 from payment_service.app.services.payment import PaymentService
 from payment_service.app.schemas.payment import (
-    PaymentCreate, PaymentResponse, PaymentConfirmRequest, PaymentListResponse
+    PaymentCreate, PaymentResponse, PaymentConfirmRequest, PaymentListResponse, PaymentStatus,
+    PaymentBatchCreate, PaymentBatchResponse
 )
+from payment_service.app.models.payment import PaymentStatus as ModelPaymentStatus
 
+settings = get_settings()
 logger = setup_logger(__name__)
 router = APIRouter(prefix="/payments", tags=["payments"])
 
@@ -22,8 +32,10 @@ router = APIRouter(prefix="/payments", tags=["payments"])
 @router.post("", response_model=PaymentResponse, status_code=201)
 async def create_payment(
         payment_data: PaymentCreate,
+        response: Response,
+        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
         user_id: str = Depends(get_user_id),
-        db: AsyncSession = Depends(get_db)
+        db: AsyncSession = Depends(get_write_db)
 ):
     """
     ✅ Yangi to'lov yaratish
@@ -32,10 +44,31 @@ async def create_payment(
     - **amount**: To'lov miqdori (> 0)
     - **currency**: Valyuta kodi (USD, EUR, GBP, JPY, UZS)
     - **payment_method**: To'lov usuli
+    - **Idempotency-Key** (header): retry da bir xil javob qaytariladi, dublikat yaratilmaydi
+    - Velocity limit (daqiqa / soat, son va summa) oshsa - 429 + Retry-After
     """
     try:
         service = PaymentService(db)
-        return await service.create_payment(user_id, payment_data)
+        if not idempotency_key:
+            return await service.create_payment(user_id, payment_data)
+
+        result, replayed = await service.create_payment_idempotent(
+            user_id, payment_data, idempotency_key
+        )
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+        return result
+    except IdempotencyConflict as e:
+        raise HTTPException(
+            status_code=409 if e.in_progress else 422,
+            detail={"error": e.code, "message": e.message}
+        )
+    except VelocityLimitExceeded as e:
+        raise HTTPException(
+            status_code=429,
+            detail=e.to_dict(),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except ValidationException as e:
         raise HTTPException(status_code=400, detail=str(e.message))
     except Exception as e:
@@ -43,18 +76,40 @@ async def create_payment(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@router.get("/{payment_id}", response_model=PaymentResponse)
+@router.post("/batch", response_model=PaymentBatchResponse)
+async def create_payments_batch(
+        batch: PaymentBatchCreate,
+        user_id: str = Depends(get_user_id),
+        db: AsyncSession = Depends(get_write_db)
+):
+    """
+    ✅ Bir nechta to'lovni bitta requestda yaratish (bitta transaction)
+
+    - **items**: PaymentCreate ro'yxati (max 500)
+    - Javob har bir element uchun: `created` yoki `rejected` + sabab
+    - Velocity limitdan oshgan valyuta elementlari `rejected`
+    """
+    try:
+        service = PaymentService(db)
+        return await service.create_payments_batch(user_id, batch.items)
+    except Exception as e:
+        logger.error(f"Error creating payment batch: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/{payment_id}", response_model=PaymentResponse, response_class=ORJSONResponse)
 async def get_payment(
         payment_id: UUID,
         user_id: str = Depends(get_user_id),
-        db: AsyncSession = Depends(get_db)
+        db: AsyncSession = Depends(get_read_db)
 ):
     """
     ✅ To'lov ma'lumotlarini olish
     """
     try:
         service = PaymentService(db)
-        return await service.get_payment(payment_id, user_id)
+        # Projection dict - response_model validatsiyasisiz to'g'ridan-to'g'ri orjson
+        return ORJSONResponse(await service.get_payment(payment_id, user_id))
     except NotFoundException as e:
         raise HTTPException(status_code=404, detail=str(e.message))
     except Exception as e:
@@ -67,38 +122,87 @@ async def confirm_payment(
         payment_id: UUID,
         confirm_data: PaymentConfirmRequest,
         user_id: str = Depends(get_user_id),
-        db: AsyncSession = Depends(get_db)
+        db: AsyncSession = Depends(get_write_db)
 ):
     """
     ✅ To'lovni tasdiqlash
 
     - **provider_transaction_id**: Provider transaksiya ID
-    - **status**: To'lov holati
+    - **status**: To'lov holati (provider adapteri bo'lsa, provider dagi holat bilan tekshiriladi)
     """
     try:
         service = PaymentService(db)
         return await service.confirm_payment(payment_id, user_id, confirm_data)
+    except PaymentStateConflict as e:
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "error": e.code,
+                "message": e.message,
+                "current_status": e.current.value if e.current else None,
+                "version": e.version
+            }
+        )
     except (NotFoundException, ValidationException) as e:
         raise HTTPException(status_code=400, detail=str(e.message))
+    except ServiceUnavailableException as e:
+        raise HTTPException(status_code=503, detail=str(e.message))
     except Exception as e:
         logger.error(f"Error confirming payment: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@router.get("", response_model=PaymentListResponse)
+def _parse_ids(values: List[str]) -> List[UUID]:
+    """?ids=a,b&ids=c -> [UUID]"""
+    raw = [value.strip() for item in values for value in item.split(",") if value.strip()]
+    if len(raw) > settings.MAX_PAGE_SIZE:
+        raise ValidationException(f"At most {settings.MAX_PAGE_SIZE} ids per request", "ids")
+    try:
+        return [UUID(value) for value in raw]
+    except ValueError:
+        raise ValidationException("Invalid payment id", "ids")
+
+
+@router.get("", response_model=PaymentListResponse, response_class=ORJSONResponse)
 async def list_payments(
         page: int = Query(1, ge=1),
         page_size: int = Query(20, ge=1, le=100),
+        cursor: Optional[str] = Query(None, max_length=200),
+        status: Optional[PaymentStatus] = Query(None),
+        currency: Optional[str] = Query(None, min_length=3, max_length=3),
+        created_from: Optional[datetime] = Query(None),
+        created_to: Optional[datetime] = Query(None),
+        include_total: bool = Query(False),
+        ids: Optional[List[str]] = Query(None),
         user_id: str = Depends(get_user_id),
-        db: AsyncSession = Depends(get_db)
+        db: AsyncSession = Depends(get_read_db)
 ):
     """
-    ✅ To'lovlar ro'yxati (Pagination)
+    ✅ To'lovlar ro'yxati (Cursor pagination)
+
+    - **cursor**: oldingi javobdagi `next_cursor` (bo'lmasa `page` ishlatiladi)
+    - **status / currency / created_from / created_to**: filterlar
+    - **include_total**: `total` ni COUNT(*) bilan hisoblash
+    - **ids**: `?ids=a,b,c` - aynan shu to'lovlar (max 100), topilmaganlari `missing` da
     """
     try:
         service = PaymentService(db)
-        result = await service.list_payments(user_id, page, page_size)
-        return result
+        if ids:
+            return ORJSONResponse(await service.get_payments_by_ids(user_id, _parse_ids(ids)))
+        result = await service.list_payments(
+            user_id,
+            page,
+            page_size,
+            cursor=cursor,
+            status=ModelPaymentStatus(status.value) if status else None,
+            currency=currency,
+            created_from=created_from,
+            created_to=created_to,
+            include_total=include_total
+        )
+        return ORJSONResponse(result)
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e.message))
     except Exception as e:
         logger.error(f"Error listing payments: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
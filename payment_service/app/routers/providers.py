@@ -0,0 +1,46 @@
+# payment-service/app/routers/providers.py
+# ============================================
+# PROVIDER CALLBACK ENDPOINTS
+# ============================================
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.exceptions import NotFoundException, UnauthorizedException, ValidationException
+from shared.logger import setup_logger
+from payment_service.app.database.session import get_db
+from payment_service.app.services import inbox
+
+logger = setup_logger(__name__)
+router = APIRouter(prefix="/providers", tags=["providers"])
+
+
+@router.post("/{provider}/webhooks", status_code=202)
+async def provider_webhook(
+        provider: str,
+        request: Request,
+        signature: Optional[str] = Header(None, alias=inbox.SIGNATURE_HEADER),
+        db: AsyncSession = Depends(get_db)
+):
+    """
+    ✅ Provider callback - imzo tekshiriladi, event inbox ga yoziladi va
+    darhol 202 qaytadi. Status o'zgarishini background worker qo'llaydi.
+
+    Bir xil event qayta kelsa (provider retry) ham 202, duplicate=true.
+    """
+    body = await request.body()
+    try:
+        inbox.verify_signature(provider, body, signature)
+        created = await inbox.accept(db, provider, body)
+        return {"accepted": True, "duplicate": not created}
+    except UnauthorizedException as e:
+        raise HTTPException(status_code=401, detail=str(e.message))
+    except NotFoundException as e:
+        raise HTTPException(status_code=404, detail=str(e.message))
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e.message))
+    except Exception as e:
+        logger.error(f"Error accepting provider webhook: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
@@ -0,0 +1,49 @@
+# payment-service/app/routers/reports.py
+# ============================================
+# REPORTING ENDPOINTS (ROLLUPS)
+# ============================================
+
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.dependencies import get_admin_user_id
+from shared.logger import setup_logger
+from payment_service.app.database.session import get_read_db
+from payment_service.app.services import rollups
+
+logger = setup_logger(__name__)
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+
+@router.get("/payments/daily")
+async def daily_payments_report(
+        date_from: date = Query(...),
+        date_to: Optional[date] = Query(None),
+        currency: Optional[str] = Query(None, min_length=3, max_length=3),
+        admin_id: str = Depends(get_admin_user_id),
+        db: AsyncSession = Depends(get_read_db)
+):
+    """
+    ✅ Kunlik hajm (valyuta / status / to'lov usuli bo'yicha) va success rate
+
+    payment_rollups dan o'qiladi - payments jadvali skan qilinmaydi.
+    Platforma bo'yicha (barcha merchantlar) - faqat admin / ops token.
+    """
+    date_to = date_to or date_from
+    if date_to < date_from or date_to - date_from > timedelta(days=366):
+        raise HTTPException(status_code=400, detail="Invalid date range (max 366 days)")
+
+    try:
+        items = await rollups.get_daily_report(db, date_from, date_to, currency)
+        return {
+            "date_from": date_from,
+            "date_to": date_to,
+            "items": items,
+            "success_rates": rollups.success_rates(items)
+        }
+    except Exception as e:
+        logger.error(f"Error building payments report: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
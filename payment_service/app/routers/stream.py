@@ -0,0 +1,162 @@
+# payment-service/app/routers/stream.py
+# ============================================
+# PAYMENT STATUS STREAM (SERVER-SENT EVENTS)
+# ============================================
+
+import asyncio
+import time
+from typing import AsyncIterator, Dict, Optional
+from uuid import UUID
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from shared.config import get_settings
+from shared.dependencies import get_user_id
+from shared.exceptions import NotFoundException
+from shared.logger import setup_logger
+from payment_service.app.database.session import AsyncSessionLocal
+from payment_service.app.services.payment import PaymentService
+from payment_service.app.services.status_hub import FINAL_STATUSES, Subscription, status_hub
+
+settings = get_settings()
+logger = setup_logger(__name__)
+router = APIRouter(prefix="/payments", tags=["payments"])
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # nginx buffer qilmasin
+}
+
+
+def sse_event(update: dict) -> bytes:
+    payload = {
+        "payment_id": str(update.get("payment_id") or update.get("id")),
+        "status": update["status"],
+        "version": update.get("version"),
+    }
+    return (
+        f"id: {payload['payment_id']}:{payload['version']}\n"
+        f"event: status\n"
+    ).encode() + b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+def sse_retry() -> bytes:
+    return f"retry: {settings.SSE_RETRY_MS}\n\n".encode()
+
+
+async def _next_update(queue: asyncio.Queue, deadline: float) -> Optional[dict]:
+    """Keyingi update, yoki heartbeat vaqti kelsa None"""
+    timeout = min(settings.SSE_HEARTBEAT_SECONDS, max(deadline - time.monotonic(), 0))
+    try:
+        return await asyncio.wait_for(queue.get(), timeout)
+    except asyncio.TimeoutError:
+        return None
+
+
+async def _stream(
+        request: Request,
+        subscription: Subscription,
+        versions: Dict[str, int],
+        initial: list,
+        close_on_final: bool
+) -> AsyncIterator[bytes]:
+    """
+    Boshlang'ich holat, keyin hub dan kelgan yangiroq versiyalar.
+    Hub ishlamasa (RabbitMQ yo'q) - faqat snapshot, client retry bilan qayta so'raydi.
+    """
+    try:
+        yield sse_retry()
+        for update in initial:
+            yield sse_event(update)
+        if (close_on_final and initial and initial[0]["status"] in FINAL_STATUSES) or not status_hub.running:
+            return
+
+        deadline = time.monotonic() + settings.SSE_MAX_DURATION
+        while time.monotonic() < deadline:
+            if await request.is_disconnected():
+                return
+            update = await _next_update(subscription.queue, deadline)
+            if update is None:
+                yield b": keepalive\n\n"
+                continue
+            version = update.get("version") or 0
+            if version and version <= versions.get(update["payment_id"], 0):
+                continue  # snapshot dan eskiroq yoki dublikat
+            versions[update["payment_id"]] = version
+            yield sse_event(update)
+            if close_on_final and update["status"] in FINAL_STATUSES:
+                return
+    finally:
+        status_hub.unsubscribe(subscription)
+
+
+@router.get("/events")
+async def stream_user_payments(request: Request, user_id: str = Depends(get_user_id)):
+    """
+    ✅ Userning yakunlanmagan barcha to'lovlari statusi (SSE)
+
+    - Avval PENDING / PROCESSING to'lovlar holati, keyin har bir o'zgarish
+    - `event: status`, `data: {"payment_id", "status", "version"}`
+    """
+    if not settings.SSE_ENABLED:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    subscription = status_hub.subscribe_user(user_id)
+    try:
+        # Snapshot obunadan keyin - orada kelgan event yo'qolmaydi.
+        # Primary dan: replica lag tufayli eski status qaytmasin.
+        async with AsyncSessionLocal() as db:
+            initial = await PaymentService(db).list_open_payments(user_id, settings.MAX_PAGE_SIZE)
+    except Exception as e:
+        status_hub.unsubscribe(subscription)
+        logger.error(f"Error opening payment stream: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    versions = {str(row["id"]): row["version"] for row in initial}
+    return StreamingResponse(
+        _stream(request, subscription, versions, initial, close_on_final=False),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
+@router.get("/{payment_id}/events")
+async def stream_payment(request: Request, payment_id: UUID, user_id: str = Depends(get_user_id)):
+    """
+    ✅ Bitta to'lov statusi (SSE) - polling o'rniga
+
+    - Joriy holat darhol yuboriladi; final statusda stream yopiladi
+    - Har `SSE_HEARTBEAT_SECONDS` da keepalive comment
+    """
+    if not settings.SSE_ENABLED:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    key = str(payment_id)
+    cached = status_hub.final_state(key)
+    if cached is not None and cached["user_id"] == user_id:
+        return StreamingResponse(
+            iter([sse_retry(), sse_event(cached)]),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS
+        )
+
+    subscription = status_hub.subscribe_payment(key)
+    try:
+        async with AsyncSessionLocal() as db:
+            current = await PaymentService(db).get_payment(payment_id, user_id)
+    except NotFoundException as e:
+        status_hub.unsubscribe(subscription)
+        raise HTTPException(status_code=404, detail=str(e.message))
+    except Exception as e:
+        status_hub.unsubscribe(subscription)
+        logger.error(f"Error opening payment stream: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    return StreamingResponse(
+        _stream(request, subscription, {key: current["version"]}, [current], close_on_final=True),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
@@ -4,11 +4,13 @@
 # ============================================
 
 from pydantic import BaseModel, Field, validator
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Literal
 from datetime import datetime
 from uuid import UUID
 from enum import Enum
 
+from payment_service.app.utils.validators import luhn_valid, normalize_card_number
+
 
 class PaymentStatus(str, Enum):
     PENDING = "pending"
@@ -18,15 +20,19 @@ class PaymentStatus(str, Enum):
     CANCELLED = "cancelled"
     REFUNDED = "refunded"
 
+MAX_BATCH_SIZE = 500
+
 
 class PaymentCreate(BaseModel):
     """To'lov yaratish request"""
     order_id: str = Field(..., min_length=1, max_length=50)
     amount: float = Field(..., gt=0, le=999999.99)
     currency: str = Field(default="USD", min_length=3, max_length=3)
-    payment_method: str = Field(..., min_length=3, max_length=50)
+    payment_method: str = Field(..., min_length=3, max_length=50, pattern=r"^[A-Za-z0-9_\-]+$")
     description: Optional[str] = Field(None, max_length=500)
     metadata: Optional[Dict[str, Any]] = None
+    # Faqat tekshirish va BIN lookup uchun - saqlanmaydi (metadata da BIN + last4)
+    card_number: Optional[str] = Field(None, min_length=12, max_length=23, repr=False)
 
     @validator("amount")
     def validate_amount(cls, v):
@@ -43,6 +49,15 @@ class PaymentCreate(BaseModel):
             raise ValueError(f"Currency must be one of {valid_currencies}")
         return v
 
+    @validator("card_number")
+    def validate_card_number(cls, v):
+        if v is None:
+            return v
+        v = normalize_card_number(v)
+        if not luhn_valid(v):
+            raise ValueError("Invalid card number")
+        return v
+
 
 class PaymentUpdate(BaseModel):
     """To'lovni yangilash"""
@@ -66,6 +81,7 @@ class PaymentResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     completed_at: Optional[datetime] = None
+    version: int = 1
 
     class Config:
         from_attributes = True
@@ -75,6 +91,7 @@ class PaymentConfirmRequest(BaseModel):
     """To'lovni tasdiqlash"""
     provider_transaction_id: str
     status: PaymentStatus
+    expected_version: Optional[int] = Field(None, ge=1)
 
 
 class PaymentRefundRequest(BaseModel):
@@ -85,7 +102,29 @@ class PaymentRefundRequest(BaseModel):
 
 class PaymentListResponse(BaseModel):
     """To'lovlar ro'yxati"""
-    total: int
+    total: Optional[int] = None  # faqat include_total=true bo'lganda
     page: int
     page_size: int
-    items: list[PaymentResponse]
\ No newline at end of file
+    next_cursor: Optional[str] = None
+    items: list[PaymentResponse]
+    missing: Optional[list[UUID]] = None  # faqat ?ids= so'rovida
+
+
+class PaymentBatchCreate(BaseModel):
+    """Bir nechta to'lovni bitta requestda yaratish"""
+    items: list[PaymentCreate] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class PaymentBatchItemResult(BaseModel):
+    """Batch dagi bitta element natijasi (items tartibida)"""
+    index: int
+    status: Literal["created", "rejected"]
+    payment: Optional[PaymentResponse] = None
+    error: Optional[str] = None
+
+
+class PaymentBatchResponse(BaseModel):
+    """Batch yaratish natijasi"""
+    created: int
+    rejected: int
+    items: list[PaymentBatchItemResult]
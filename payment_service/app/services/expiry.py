@@ -0,0 +1,139 @@
+# payment-service/app/services/expiry.py
+# ============================================
+# PENDING PAYMENT EXPIRY SWEEPER
+# ============================================
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from uuid import UUID
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import func, select, tuple_, update
+
+from shared.config import get_settings
+from shared.logger import setup_logger
+from payment_service.app.models.payment import Payment, PaymentStatus
+from payment_service.app.services import rollups
+from payment_service.app.services.outbox import add_events
+
+settings = get_settings()
+logger = setup_logger(__name__)
+
+EXPIRED_MESSAGE = "Expired: not confirmed within the pending TTL"
+
+EXPIRY_CANCELLED = Counter(
+    "payment_expiry_cancelled_total",
+    "Pending payments cancelled by the expiry sweeper"
+)
+EXPIRY_LAG = Gauge(
+    "payment_expiry_sweep_lag_seconds",
+    "How far past its TTL the oldest still-pending payment is"
+)
+
+
+class ExpirySweeper:
+    """
+    TTL dan eski PENDING to'lovlarni CANCELLED qiladi.
+
+    Har bir batch - bitta UPDATE ... WHERE id IN (SELECT ... FOR UPDATE
+    SKIP LOCKED) RETURNING, ix_payments_pending_created_at partial index
+    bo'yicha (created_at, id) keyset tartibida. Rollup va payment.cancelled
+    eventlar o'sha transactionda bulk yoziladi.
+    """
+
+    def __init__(self, session_factory, batch_size: int = None, ttl: timedelta = None):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.EXPIRY_SWEEP_BATCH
+        self.ttl = ttl or timedelta(minutes=settings.PENDING_TTL_MINUTES)
+
+    async def sweep_batch(self, cutoff: datetime, after: Optional[Tuple[datetime, UUID]]) -> Tuple[int, Optional[Tuple[datetime, UUID]]]:
+        """Bitta batch - (bekor qilinganlar soni, keyingi keyset pozitsiya)"""
+        due = (
+            select(Payment.id)
+            .where(Payment.status == PaymentStatus.PENDING, Payment.created_at < cutoff)
+            .order_by(Payment.created_at, Payment.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        if after is not None:
+            due = due.where(tuple_(Payment.created_at, Payment.id) > tuple_(*after))
+
+        now = datetime.utcnow()
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(Payment)
+                .where(Payment.id.in_(due.scalar_subquery()), Payment.status == PaymentStatus.PENDING)
+                .values(
+                    status=PaymentStatus.CANCELLED,
+                    version=Payment.version + 1,
+                    updated_at=now,
+                    next_attempt_at=None,
+                    error_message=EXPIRED_MESSAGE
+                )
+                .returning(
+                    Payment.id, Payment.user_id, Payment.version, Payment.status,
+                    Payment.created_at, Payment.currency, Payment.payment_method, Payment.amount_minor
+                )
+                .execution_options(synchronize_session=False)
+            )
+            rows = result.all()
+            if not rows:
+                return 0, None
+
+            await rollups.apply_transitions(db, [(row, PaymentStatus.PENDING) for row in rows])
+            add_events(db, [
+                (
+                    "payment.cancelled",
+                    {
+                        "payment_id": str(row.id),
+                        "user_id": row.user_id,
+                        "status": PaymentStatus.CANCELLED.value,
+                        "version": row.version,
+                        "reason": "expired"
+                    }
+                )
+                for row in rows
+            ])
+            await db.commit()
+
+        EXPIRY_CANCELLED.inc(len(rows))
+        last = max((row.created_at, row.id) for row in rows)
+        return len(rows), last
+
+    async def sweep(self) -> int:
+        """Barcha muddati o'tganlarni batchlab bekor qilish"""
+        cutoff = datetime.utcnow() - self.ttl
+        total = 0
+        after = None
+        while True:
+            cancelled, after = await self.sweep_batch(cutoff, after)
+            total += cancelled
+            if cancelled < self.batch_size:
+                break
+        await self._report_lag()
+        return total
+
+    async def _report_lag(self) -> None:
+        async with self.session_factory() as db:
+            oldest = await db.scalar(
+                select(func.min(Payment.created_at)).where(Payment.status == PaymentStatus.PENDING)
+            )
+        lag = 0.0
+        if oldest is not None:
+            lag = max(0.0, (datetime.utcnow() - oldest - self.ttl).total_seconds())
+        EXPIRY_LAG.set(lag)
+
+    async def run(self) -> None:
+        """Background loop"""
+        logger.info(f"Expiry sweeper started (ttl={self.ttl}, batch_size={self.batch_size})")
+        while True:
+            try:
+                cancelled = await self.sweep()
+                if cancelled:
+                    logger.info(f"Expired {cancelled} pending payments")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Expiry sweep failed: {str(e)}")
+            await asyncio.sleep(settings.EXPIRY_SWEEP_INTERVAL)
@@ -0,0 +1,325 @@
+# payment-service/app/services/export.py
+# ============================================
+# COLUMNAR PAYMENTS EXPORT (PARQUET / ARROW, PARTITIONED BY DAY)
+# ============================================
+#
+#   python -m payment_service.app.services.export /data/payments
+#   python -m payment_service.app.services.export /data/payments --format arrow --full
+#
+# Natija: <output>/date=YYYY-MM-DD/part-<run>-<n>.parquet (created_at kuni
+# bo'yicha) + <output>/_watermark.json. Keyingi ishga tushirishda faqat
+# updated_at > watermark bo'lgan (o'zgargan) qatorlar yoziladi - bitta
+# to'lov bir necha part faylda bo'lishi mumkin, eng katta updated_at li
+# qator amaldagisi (analitikada id bo'yicha dedupe).
+#
+# updated_at ni app serverlar o'z soati bilan yozadi (datetime.utcnow) va
+# qator commit dan oldin yoziladi - soati orqada qolgan pod yoki lag dan
+# uzoq transaction watermark dan kichik updated_at bilan keyin ko'rinishi
+# mumkin. Shuning uchun har run watermark - overlap dan qayta o'qiydi;
+# overlap oynasida yozilgan (id, version, updated_at) kalitlari state
+# faylida saqlanadi va ikkinchi marta yozilmaydi. Kafolat: soat farqi +
+# commit kechikishi overlap dan kichik bo'lsa qator yo'qolmaydi.
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.logger import setup_logger
+from payment_service.app.models.payment import Payment
+
+logger = setup_logger(__name__)
+
+STATE_FILE = "_watermark.json"
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+EXPORT_COLUMNS = (
+    Payment.id,
+    Payment.user_id,
+    Payment.order_id,
+    Payment.amount_minor,
+    Payment.currency,
+    Payment.status,
+    Payment.payment_method,
+    Payment.provider_transaction_id,
+    Payment.retry_count,
+    Payment.version,
+    Payment.created_at,
+    Payment.updated_at,
+    Payment.completed_at,
+)
+
+TIMESTAMP = pa.timestamp("us", tz="UTC")
+SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("user_id", pa.string()),
+    ("order_id", pa.string()),
+    ("amount_minor", pa.int64()),
+    ("currency", pa.string()),
+    ("status", pa.string()),
+    ("payment_method", pa.string()),
+    ("provider_transaction_id", pa.string()),
+    ("retry_count", pa.int32()),
+    ("version", pa.int32()),
+    ("created_at", TIMESTAMP),
+    ("updated_at", TIMESTAMP),
+    ("completed_at", TIMESTAMP),
+])
+
+ID_INDEX = 0
+STATUS_INDEX = 5
+VERSION_INDEX = 9
+CREATED_AT_INDEX = 10
+UPDATED_AT_INDEX = 11
+
+# (id, version, updated_at) - version har yozuvda oshmaydi (retry
+# bookkeeping), shuning uchun updated_at ham kalitda
+RowKey = Tuple[str, int, str]
+
+
+def row_key(row: tuple) -> RowKey:
+    return str(row[ID_INDEX]), row[VERSION_INDEX], row[UPDATED_AT_INDEX].isoformat()
+
+
+@dataclass
+class ExportSummary:
+    mode: str = "incremental"
+    since: Optional[str] = None
+    until: Optional[str] = None
+    rows: int = 0
+    skipped: int = 0
+    batches: int = 0
+    files: int = 0
+    partitions: Dict[str, int] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "mode": self.mode,
+            "since": self.since,
+            "until": self.until,
+            "rows": self.rows,
+            "skipped": self.skipped,
+            "batches": self.batches,
+            "files": self.files,
+            "partitions": len(self.partitions),
+            "elapsed_seconds": round(self.elapsed, 2),
+        }
+
+
+def load_watermark(output_dir: str) -> Tuple[Optional[datetime], Set[RowKey]]:
+    """Watermark va overlap oynasida allaqachon yozilgan qatorlar kalitlari"""
+    path = os.path.join(output_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return None, set()
+    with open(path, encoding="utf-8") as handle:
+        state = json.load(handle)
+    return datetime.fromisoformat(state["updated_at"]), {tuple(key) for key in state.get("seen", [])}
+
+
+def save_watermark(output_dir: str, watermark: datetime, seen: Set[RowKey], summary: ExportSummary) -> None:
+    """Atomik yozish - faqat hamma fayllar joyiga qo'yilgandan keyin"""
+    path = os.path.join(output_dir, STATE_FILE)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as handle:
+        json.dump({
+            "updated_at": watermark.isoformat(),
+            "seen": sorted(seen),
+            "last_run": summary.as_dict()
+        }, handle, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+class PartitionWriters:
+    """
+    Kun bo'yicha ochiq writerlar. max_open dan oshsa eng eski yopiladi (o'sha
+    kun uchun keyingi qatorlar yangi part faylga) - xotira va file descriptor
+    chegaralangan. Fayllar avval ".tmp" nom bilan yoziladi, commit() da
+    joyiga qo'yiladi.
+    """
+
+    def __init__(self, output_dir: str, run_id: str, fmt: str, max_open: int):
+        self.output_dir = output_dir
+        self.run_id = run_id
+        self.fmt = fmt
+        self.max_open = max_open
+        self._open: "OrderedDict[date, Tuple[object, str]]" = OrderedDict()
+        self._parts: Dict[date, int] = {}
+        self.finished: List[str] = []
+
+    def _new_writer(self, day: date) -> Tuple[object, str]:
+        directory = os.path.join(self.output_dir, f"date={day.isoformat()}")
+        os.makedirs(directory, exist_ok=True)
+        part = self._parts.get(day, 0)
+        self._parts[day] = part + 1
+        path = os.path.join(directory, f"part-{self.run_id}-{part}{FORMATS[self.fmt]}")
+        tmp_path = f"{path}.tmp"
+        if self.fmt == "parquet":
+            writer = pq.ParquetWriter(tmp_path, SCHEMA, compression="zstd")
+        else:
+            writer = pa.ipc.new_file(tmp_path, SCHEMA)
+        return writer, path
+
+    def write(self, day: date, table: pa.Table) -> None:
+        if day in self._open:
+            self._open.move_to_end(day)
+        else:
+            if len(self._open) >= self.max_open:
+                self._close(*self._open.popitem(last=False))
+            self._open[day] = self._new_writer(day)
+        writer, _ = self._open[day]
+        writer.write_table(table)
+
+    def _close(self, day: date, entry: Tuple[object, str]) -> None:
+        writer, path = entry
+        writer.close()
+        self.finished.append(path)
+
+    def close(self) -> None:
+        while self._open:
+            self._close(*self._open.popitem(last=False))
+
+    def commit(self) -> List[str]:
+        self.close()
+        for path in self.finished:
+            os.replace(f"{path}.tmp", path)
+        return self.finished
+
+
+def _to_table(rows: List[tuple]) -> pa.Table:
+    columns = [list(column) for column in zip(*rows)]
+    columns[ID_INDEX] = [str(value) for value in columns[ID_INDEX]]
+    columns[STATUS_INDEX] = [value.value if value is not None else None for value in columns[STATUS_INDEX]]
+    return pa.Table.from_arrays(
+        [pa.array(column, type=schema_field.type) for column, schema_field in zip(columns, SCHEMA)],
+        schema=SCHEMA
+    )
+
+
+async def export_payments(
+        db: AsyncSession,
+        output_dir: str,
+        fmt: str = "parquet",
+        full: bool = False,
+        batch_size: int = 50000,
+        lag_seconds: float = 60.0,
+        overlap_seconds: float = 600.0,
+        max_open: int = 16
+) -> ExportSummary:
+    """
+    Server-side cursor orqali batchlab (yield_per) o'qib, kun bo'yicha
+    partition fayllarga yozish. Xotirada bir vaqtda bitta batch.
+
+    Yuqori chegara now - lag_seconds: hali commit bo'lmagan uzun
+    transactionlar keyingi ishga tushirishda olinadi. Pastki chegara
+    watermark - overlap_seconds; oldingi run yozgan qatorlar state dagi
+    kalitlar bo'yicha tashlab yuboriladi.
+    """
+    summary = ExportSummary(mode="full" if full else "incremental")
+    started = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(output_dir, "date=*", "*.tmp")):
+        os.remove(stale)
+
+    since, seen = (None, set()) if full else load_watermark(output_dir)
+    until = datetime.utcnow() - timedelta(seconds=lag_seconds)
+    overlap = timedelta(seconds=overlap_seconds)
+    summary.since = since.isoformat() if since else None
+    summary.until = until.isoformat()
+    # Keyingi run qayta o'qiydigan oyna - shu run yozganlari eslab qolinadi
+    next_seen: Set[RowKey] = set()
+
+    query = select(*EXPORT_COLUMNS).where(Payment.updated_at <= until)
+    if since is not None:
+        # (updated_at, id) index bo'yicha faqat o'zgargan qatorlar
+        query = query.where(Payment.updated_at > since - overlap).order_by(Payment.updated_at, Payment.id)
+    else:
+        # Kunlar ketma-ket keladi - bir vaqtda odatda bitta writer ochiq
+        query = query.order_by(Payment.created_at, Payment.id)
+
+    # Part nomi run bo'yicha unikal - bir sekundda ikki run bir-birini ezmasin
+    run_id = until.strftime("%Y%m%dT%H%M%S%f")
+    writers = PartitionWriters(output_dir, run_id, fmt, max_open)
+    try:
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            by_day: Dict[date, List[tuple]] = {}
+            for row in rows:
+                key = row_key(row)
+                if row[UPDATED_AT_INDEX] > until - overlap:
+                    next_seen.add(key)
+                if key in seen:
+                    summary.skipped += 1
+                    continue
+                by_day.setdefault(row[CREATED_AT_INDEX].date(), []).append(tuple(row))
+            for day, day_rows in by_day.items():
+                writers.write(day, _to_table(day_rows))
+                key = day.isoformat()
+                summary.partitions[key] = summary.partitions.get(key, 0) + len(day_rows)
+                summary.rows += len(day_rows)
+            summary.batches += 1
+            if summary.batches % 20 == 0:
+                logger.info(f"Exported {summary.rows} payments")
+    except BaseException:
+        writers.close()
+        for path in writers.finished:
+            os.remove(f"{path}.tmp")
+        raise
+
+    written = set(writers.commit())
+    summary.files = len(written)
+    if full:
+        # To'liq snapshot - oldingi part fayllar endi ortiqcha
+        for pattern in FORMATS.values():
+            for old in glob.glob(os.path.join(output_dir, "date=*", f"*{pattern}")):
+                if old not in written:
+                    os.remove(old)
+    save_watermark(output_dir, until, next_seen, summary)
+
+    summary.elapsed = time.perf_counter() - started
+    return summary
+
+
+async def _main(args: argparse.Namespace) -> None:
+    from payment_service.app.database.session import AsyncSessionLocal, replica_router
+
+    # Analitika OLTP bilan raqobatlashmasin - sog'lom replica bo'lsa o'shandan
+    await replica_router.check()
+    async with AsyncSessionLocal(bind=replica_router.read_engine()) as db:
+        summary = await export_payments(
+            db,
+            args.output,
+            fmt=args.format,
+            full=args.full,
+            batch_size=args.batch_size,
+            lag_seconds=args.lag,
+            overlap_seconds=args.overlap,
+            max_open=args.max_open
+        )
+    await replica_router.dispose()
+    print(json.dumps(summary.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Payments columnar export (partitioned by created_at day)")
+    parser.add_argument("output", help="export papkasi (date=YYYY-MM-DD/ partitionlar)")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="parquet")
+    parser.add_argument("--full", action="store_true", help="watermark ni e'tiborsiz qoldirib to'liq snapshot")
+    parser.add_argument("--batch-size", type=int, default=50000)
+    parser.add_argument("--lag", type=float, default=60.0, help="updated_at yuqori chegarasi: now - lag (sekund)")
+    parser.add_argument(
+        "--overlap", type=float, default=600.0,
+        help="watermark dan oldingi qayta o'qiladigan oyna (sekund) - app server soat farqi + commit kechikishi"
+    )
+    parser.add_argument("--max-open", type=int, default=16, help="bir vaqtda ochiq partition writerlar")
+    asyncio.run(_main(parser.parse_args()))
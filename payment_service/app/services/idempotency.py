@@ -0,0 +1,158 @@
+# payment-service/app/services/idempotency.py
+# ============================================
+# IDEMPOTENCY-KEY SUPPORT
+# ============================================
+
+import asyncio
+import hashlib
+import hmac
+import json
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pydantic import BaseModel
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.config import get_settings
+from shared.exceptions import ConflictException
+from shared.logger import setup_logger
+from payment_service.app.models.idempotency import IdempotencyKey
+
+settings = get_settings()
+logger = setup_logger(__name__)
+
+
+class IdempotencyConflict(ConflictException):
+    """Key boshqa body bilan ishlatilgan yoki birinchi request hali tugamagan"""
+
+    def __init__(self, message: str, in_progress: bool = False):
+        self.in_progress = in_progress
+        super().__init__(message, "idempotency_key")
+
+
+# Bazada ochiq saqlanadigan hash ga kirmaydigan maxfiy maydonlar
+SECRET_FIELDS = frozenset({"card_number"})
+
+
+def request_fingerprint(payload: BaseModel) -> str:
+    """
+    Request body hash - bir xil key boshqa body bilan kelganini aniqlash uchun.
+
+    Karta raqami (PAN) oddiy SHA-256 ga kirsa, BIN + last4 ma'lum bo'lganda
+    hash dan brute-force qilinadi - shuning uchun maxfiy maydonlar faqat
+    server SECRET_KEY bilan HMAC qilinib qo'shiladi.
+    """
+    data = payload.model_dump(mode="json")
+    for name in SECRET_FIELDS & data.keys():
+        if data[name] is not None:
+            data[name] = hmac.new(
+                settings.SECRET_KEY.encode(), str(data[name]).encode(), hashlib.sha256
+            ).hexdigest()
+    body = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+async def lookup(db: AsyncSession, user_id: str, key: str) -> Optional[IdempotencyKey]:
+    """Saqlangan keyni olish (PK bo'yicha bitta indexed lookup)"""
+    result = await db.execute(
+        select(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key
+        )
+    )
+    return result.scalars().first()
+
+
+def check_replayable(record: IdempotencyKey, fingerprint: str) -> None:
+    """Saqlangan javobni qaytarish mumkinligini tekshirish"""
+    if record.request_hash != fingerprint:
+        raise IdempotencyConflict(
+            "Idempotency-Key was already used with a different request body"
+        )
+    if record.response_body is None:
+        raise IdempotencyConflict(
+            "A request with this Idempotency-Key is still being processed",
+            in_progress=True
+        )
+
+
+async def reserve(db: AsyncSession, user_id: str, key: str, fingerprint: str) -> bool:
+    """
+    Keyni band qilish - INSERT ... ON CONFLICT DO NOTHING.
+
+    Parallel request shu key bilan bo'lsa, unique index birinchisi commit
+    qilguncha kutadi va False qaytadi.
+    """
+    now = datetime.utcnow()
+    result = await db.execute(
+        insert(IdempotencyKey)
+        .values(
+            user_id=user_id,
+            key=key,
+            request_hash=fingerprint,
+            created_at=now,
+            expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+        )
+        .on_conflict_do_nothing(index_elements=["user_id", "key"])
+        .returning(IdempotencyKey.key)
+    )
+    return result.first() is not None
+
+
+async def store_response(
+        db: AsyncSession,
+        user_id: str,
+        key: str,
+        status_code: int,
+        response: BaseModel,
+        payment_id=None
+) -> None:
+    """Javobni key bilan birga saqlash (commit chaqiruvchida)"""
+    await db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        .values(
+            status_code=status_code,
+            response_body=response.model_dump_json(),
+            payment_id=payment_id
+        )
+    )
+
+
+async def purge_expired(db: AsyncSession, batch_size: int = None) -> int:
+    """Muddati o'tgan keylarni batchlab o'chirish"""
+    batch_size = batch_size or settings.IDEMPOTENCY_CLEANUP_BATCH
+    deleted = 0
+    while True:
+        expired = (
+            select(IdempotencyKey.user_id, IdempotencyKey.key)
+            .where(IdempotencyKey.expires_at <= datetime.utcnow())
+            .limit(batch_size)
+        )
+        result = await db.execute(
+            delete(IdempotencyKey).where(
+                tuple_(IdempotencyKey.user_id, IdempotencyKey.key).in_(expired)
+            )
+        )
+        await db.commit()
+        deleted += result.rowcount or 0
+        if (result.rowcount or 0) < batch_size:
+            break
+    return deleted
+
+
+async def run_cleanup_loop(session_factory) -> None:
+    """Background task - eski keylarni davriy tozalash"""
+    while True:
+        try:
+            async with session_factory() as db:
+                deleted = await purge_expired(db)
+            if deleted:
+                logger.info(f"Purged {deleted} expired idempotency keys")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Idempotency cleanup failed: {str(e)}")
+        await asyncio.sleep(settings.IDEMPOTENCY_CLEANUP_INTERVAL)
@@ -0,0 +1,217 @@
+# payment-service/app/services/inbox.py
+# ============================================
+# PROVIDER WEBHOOK INBOX (FAST-ACK + BATCH WORKER)
+# ============================================
+
+import asyncio
+import hashlib
+import hmac
+import json
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.config import get_settings
+from shared.exceptions import (
+    ConflictException, NotFoundException, UnauthorizedException, ValidationException
+)
+from shared.logger import setup_logger
+from payment_service.app.models.inbox import ProviderWebhookEvent
+from payment_service.app.models.payment import Payment, PaymentStatus
+from payment_service.app.providers import PROVIDER_STATUS_MAP
+from payment_service.app.services.outbox import add_event
+from payment_service.app.services.state_machine import transition
+
+settings = get_settings()
+logger = setup_logger(__name__)
+
+SIGNATURE_HEADER = "X-Provider-Signature"
+MAX_ATTEMPTS = 5
+
+_secrets: Optional[Dict[str, str]] = None
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff: base * 2^(attempts - 1), INBOX_RETRY_MAX_DELAY bilan cheklangan"""
+    seconds = settings.INBOX_RETRY_BASE_DELAY * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, settings.INBOX_RETRY_MAX_DELAY))
+
+
+def provider_secrets() -> Dict[str, str]:
+    global _secrets
+    if _secrets is None:
+        _secrets = json.loads(settings.PROVIDER_WEBHOOK_SECRETS) if settings.PROVIDER_WEBHOOK_SECRETS else {}
+    return _secrets
+
+
+def verify_signature(provider: str, body: bytes, signature: Optional[str]) -> None:
+    """HMAC-SHA256(body) hex imzosini tekshirish"""
+    secret = provider_secrets().get(provider)
+    if secret is None:
+        raise NotFoundException(f"Unknown provider {provider}", "provider")
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    if not signature or not hmac.compare_digest(expected, signature.strip().lower()):
+        raise UnauthorizedException("Invalid provider signature")
+
+
+def parse_event(body: bytes) -> dict:
+    """Minimal tekshiruv - qolgani worker da"""
+    try:
+        event = json.loads(body)
+        transaction_id = str(event["provider_transaction_id"])
+        status = str(event["status"]).lower()
+        payment_id = UUID(str(event["payment_id"])) if event.get("payment_id") else None
+    except (ValueError, KeyError, TypeError):
+        raise ValidationException("Invalid provider event payload")
+    if status not in PROVIDER_STATUS_MAP:
+        raise ValidationException(f"Unsupported provider status {status}", "status")
+    if not transaction_id or len(transaction_id) > 100:
+        raise ValidationException("Invalid provider_transaction_id", "provider_transaction_id")
+    return {"provider_transaction_id": transaction_id, "status": status, "payment_id": payment_id}
+
+
+async def accept(db: AsyncSession, provider: str, body: bytes) -> bool:
+    """
+    Eventni inbox ga yozish - INSERT ... ON CONFLICT DO NOTHING.
+    False - bu event avval qabul qilingan (provider retry).
+    """
+    event = parse_event(body)
+    result = await db.execute(
+        insert(ProviderWebhookEvent)
+        .values(
+            provider=provider,
+            provider_transaction_id=event["provider_transaction_id"],
+            status=event["status"],
+            payment_id=event["payment_id"],
+            payload=body.decode(),
+            received_at=datetime.utcnow()
+        )
+        .on_conflict_do_nothing(constraint="uq_provider_webhook_inbox_event")
+        .returning(ProviderWebhookEvent.id)
+    )
+    await db.commit()
+    return result.first() is not None
+
+
+class InboxProcessor:
+    """
+    Inbox dagi eventlarni FOR UPDATE SKIP LOCKED bilan claim qilib, status
+    o'zgarishlarini bitta transactionda qo'llaydi (har bir event savepoint da).
+
+    Bir nechta worker parallel ishlaydi - SKIP LOCKED sababli bitta event
+    ikki marta olinmaydi; bitta payment ga parallel o'tishlarni state machine
+    hal qiladi.
+    """
+
+    def __init__(self, session_factory, batch_size: int = None, poll_interval: float = None):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.INBOX_BATCH_SIZE
+        self.poll_interval = poll_interval or settings.INBOX_POLL_INTERVAL
+
+    async def process_batch(self) -> int:
+        """Bitta batch ni qayta ishlash, olingan eventlar sonini qaytaradi"""
+        now = datetime.utcnow()
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(ProviderWebhookEvent)
+                .where(
+                    ProviderWebhookEvent.processed_at.is_(None),
+                    or_(
+                        ProviderWebhookEvent.next_attempt_at.is_(None),
+                        ProviderWebhookEvent.next_attempt_at <= now
+                    )
+                )
+                .order_by(ProviderWebhookEvent.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            events: List[ProviderWebhookEvent] = list(result.scalars().all())
+            if not events:
+                return 0
+
+            for event in events:
+                error = None
+                done = True
+                try:
+                    async with db.begin_nested():
+                        await self._apply(db, event)
+                except ConflictException as e:
+                    # Eskirgan yoki tartibsiz event - payment allaqachon boshqa holatda
+                    error = f"skipped: {e.message}"
+                except Exception as e:
+                    error = str(e.message if hasattr(e, "message") else e)
+                    done = event.attempts + 1 >= MAX_ATTEMPTS
+                    logger.warning(f"Inbox event {event.id} failed (attempt {event.attempts + 1}): {error}")
+
+                event.attempts += 1
+                event.last_error = error[:500] if error else None
+                if done:
+                    event.processed_at = now
+                else:
+                    # Keyingi poll da darhol emas - backoff dan keyin qayta olinadi
+                    event.next_attempt_at = now + retry_delay(event.attempts)
+
+            await db.commit()
+        return len(events)
+
+    async def _apply(self, db: AsyncSession, event: ProviderWebhookEvent) -> None:
+        payment_id = event.payment_id
+        if payment_id is None:
+            payment_id = await db.scalar(
+                select(Payment.id).where(
+                    Payment.provider_transaction_id == event.provider_transaction_id
+                )
+            )
+            if payment_id is None:
+                raise NotFoundException(
+                    f"No payment for provider transaction {event.provider_transaction_id}", "payment"
+                )
+
+        target = PROVIDER_STATUS_MAP[event.status]
+        values = {"provider_transaction_id": event.provider_transaction_id}
+        if target == PaymentStatus.FAILED:
+            error_message = json.loads(event.payload).get("error")
+            if error_message:
+                values["error_message"] = str(error_message)[:500]
+
+        payment = await transition(db, payment_id, target, values=values)
+        add_event(
+            db,
+            f"payment.{payment.status.value}",
+            {
+                "payment_id": str(payment.id),
+                "user_id": payment.user_id,
+                "status": payment.status.value,
+                "version": payment.version,
+                "provider": event.provider
+            }
+        )
+
+    async def run(self) -> None:
+        """Background loop (bitta worker)"""
+        backoff = self.poll_interval
+        while True:
+            try:
+                processed = await self.process_batch()
+                backoff = self.poll_interval
+                # To'liq batch - navbatda yana bor, kutmasdan davom etish
+                if processed < self.batch_size:
+                    await asyncio.sleep(self.poll_interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Inbox worker error: {str(e)}")
+                backoff = min(backoff * 2, 30)
+                await asyncio.sleep(backoff)
+
+
+def start_workers(session_factory, workers: int = None) -> List[asyncio.Task]:
+    """INBOX_WORKERS ta parallel worker"""
+    processor = InboxProcessor(session_factory)
+    count = workers or settings.INBOX_WORKERS
+    logger.info(f"Provider inbox workers started ({count}, batch_size={processor.batch_size})")
+    return [asyncio.create_task(processor.run()) for _ in range(count)]
@@ -0,0 +1,480 @@
+# payment-service/app/services/notification.py
+# ============================================
+# EVENT CONSUMER FRAMEWORK
+# ============================================
+#
+# Topologiya (queue nomi = "payment_webhooks" misolida):
+#   payment_events (topic) --[binding patterns]--> payment_webhooks
+#   xato bo'lsa  -> payment_webhooks.retry.N  (TTL = base * 2^N, DLX -> payment_webhooks)
+#   max_retries dan keyin -> payment_webhooks.dlq
+#
+# Replay: python -m payment_service.app.services.notification replay payment_webhooks
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+import aio_pika
+from prometheus_client import Counter, Histogram
+
+from shared.config import get_settings
+from shared.logger import setup_logger
+from payment_service.app.services.rabbitmq import PAYMENT_EVENTS_EXCHANGE
+
+settings = get_settings()
+logger = setup_logger(__name__)
+
+RETRY_HEADER = "x-retry-count"
+ROUTING_KEY_HEADER = "x-original-routing-key"
+ERROR_HEADER = "x-last-error"
+
+Handler = Callable[[dict, str], Awaitable[None]]
+
+HANDLER_LATENCY = Histogram(
+    "payment_consumer_handler_seconds",
+    "Per-message handler latency",
+    ["handler"]
+)
+HANDLER_FAILURES = Counter(
+    "payment_consumer_failures_total",
+    "Handler failures",
+    ["handler"]
+)
+HANDLER_RETRIES = Counter(
+    "payment_consumer_retries_total",
+    "Messages scheduled for a delayed retry",
+    ["handler"]
+)
+HANDLER_DEAD_LETTERED = Counter(
+    "payment_consumer_dead_lettered_total",
+    "Messages moved to the dead-letter queue",
+    ["handler"]
+)
+
+
+class AckBatcher:
+    """
+    Ack larni yig'ib, multiple=True bilan bitta frame da yuborish.
+
+    Xabarlar parallel tugaydi, shuning uchun faqat undan oldingi barcha
+    tag lar tugagan eng katta tag gacha ack qilinadi.
+    """
+
+    def __init__(self, batch_size: int, interval: float):
+        self.batch_size = batch_size
+        self.interval = interval
+        self._inflight: set = set()
+        self._done: Dict[int, aio_pika.abc.AbstractIncomingMessage] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def started(self, message) -> None:
+        self._inflight.add(message.delivery_tag)
+
+    async def done(self, message) -> None:
+        self._inflight.discard(message.delivery_tag)
+        self._done[message.delivery_tag] = message
+        if len(self._done) >= self.batch_size:
+            await self.flush()
+        elif self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(
+                self.interval, lambda: asyncio.ensure_future(self.flush())
+            )
+
+    async def failed(self, message) -> None:
+        """
+        Xabarni qayta queue ga (nack, requeue). Tag inflight dan chiqariladi -
+        aks holda undan keyingi barcha ack lar abadiy kutib qoladi.
+        """
+        try:
+            await message.nack(requeue=True)
+        finally:
+            self._inflight.discard(message.delivery_tag)
+        await self.flush()
+
+    async def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._done:
+            return
+
+        limit = min(self._inflight) if self._inflight else None
+        ackable = [tag for tag in self._done if limit is None or tag < limit]
+        if not ackable:
+            return
+
+        upto = max(ackable)
+        message = self._done[upto]
+        for tag in ackable:
+            del self._done[tag]
+        await message.ack(multiple=True)
+
+
+class EventConsumer:
+    """
+    Qayta ishlatiladigan async consumer runner.
+
+    - queue ni exchange ga routing-key patternlar bilan bog'laydi
+    - QoS prefetch va concurrency limit
+    - ack larni batch qiladi
+    - xato bo'lsa exponential backoff bilan kechiktirilgan retry queue lar,
+      oxirida dead-letter queue
+    - har bir handler uchun latency / failure metrics
+    """
+
+    def __init__(
+            self,
+            channel,
+            queue_name: str,
+            bindings: Sequence[str],
+            handler: Handler,
+            *,
+            exchange_name: str = PAYMENT_EVENTS_EXCHANGE,
+            prefetch: int = None,
+            concurrency: int = None,
+            max_retries: int = None,
+            retry_base_delay: float = None,
+            ack_batch_size: int = 50,
+            ack_interval: float = 0.2
+    ):
+        self.channel = channel
+        self.queue_name = queue_name
+        self.bindings = list(bindings)
+        self.handler = handler
+        self.handler_name = getattr(handler, "__qualname__", queue_name)
+        self.exchange_name = exchange_name
+        self.prefetch = prefetch or settings.CONSUMER_PREFETCH
+        self.semaphore = asyncio.Semaphore(concurrency or settings.CONSUMER_CONCURRENCY)
+        self.max_retries = max_retries if max_retries is not None else settings.CONSUMER_MAX_RETRIES
+        self.retry_base_delay = retry_base_delay or settings.CONSUMER_RETRY_BASE_DELAY
+        self.acks = AckBatcher(ack_batch_size, ack_interval)
+        self.queue = None
+        self._consumer_tag = None
+        self._tasks: set = set()
+
+    @property
+    def dlq_name(self) -> str:
+        return f"{self.queue_name}.dlq"
+
+    def retry_queue_name(self, attempt: int) -> str:
+        return f"{self.queue_name}.retry.{attempt}"
+
+    def retry_delay(self, attempt: int) -> float:
+        return self.retry_base_delay * (2 ** attempt)
+
+    async def declare(self) -> None:
+        """Queue, binding, retry va DLQ larni declare qilish"""
+        await self.channel.set_qos(prefetch_count=self.prefetch)
+        exchange = await self.channel.declare_exchange(
+            self.exchange_name, aio_pika.ExchangeType.TOPIC, durable=True
+        )
+        self.queue = await self.channel.declare_queue(self.queue_name, durable=True)
+        for pattern in self.bindings:
+            await self.queue.bind(exchange, routing_key=pattern)
+
+        for attempt in range(self.max_retries):
+            await self.channel.declare_queue(
+                self.retry_queue_name(attempt),
+                durable=True,
+                arguments={
+                    "x-message-ttl": int(self.retry_delay(attempt) * 1000),
+                    "x-dead-letter-exchange": "",
+                    "x-dead-letter-routing-key": self.queue_name,
+                }
+            )
+        await self.channel.declare_queue(self.dlq_name, durable=True)
+
+    async def start(self) -> None:
+        await self.declare()
+        self._consumer_tag = await self.queue.consume(self.on_message)
+        logger.info(
+            f"Consumer {self.queue_name} started "
+            f"(bindings={self.bindings}, prefetch={self.prefetch})"
+        )
+
+    async def stop(self) -> None:
+        if self.queue is not None and self._consumer_tag:
+            await self.queue.cancel(self._consumer_tag)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.acks.flush()
+
+    async def on_message(self, message) -> None:
+        """Har bir xabar alohida task da, semaphore ichida"""
+        self.acks.started(message)
+        task = asyncio.create_task(self._process(message))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, message) -> None:
+        headers = dict(message.headers or {})
+        routing_key = headers.get(ROUTING_KEY_HEADER) or message.routing_key
+
+        settled = False
+        try:
+            async with self.semaphore:
+                started = time.perf_counter()
+                try:
+                    payload = json.loads(message.body)
+                    await self.handler(payload, routing_key)
+                except Exception as e:
+                    HANDLER_FAILURES.labels(self.handler_name).inc()
+                    await self._schedule_retry(message, headers, routing_key, e)
+                finally:
+                    HANDLER_LATENCY.labels(self.handler_name).observe(time.perf_counter() - started)
+            settled = True
+        except Exception as e:
+            # Retry / DLQ publish ham yiqildi - xabar yo'qolmasin
+            logger.error(f"{self.queue_name}: could not schedule retry ({e}), requeueing message")
+        finally:
+            if settled:
+                await self.acks.done(message)
+            else:
+                await self.acks.failed(message)
+
+    async def _schedule_retry(self, message, headers: dict, routing_key: str, error: Exception) -> None:
+        attempt = int(headers.get(RETRY_HEADER, 0))
+        headers[ROUTING_KEY_HEADER] = routing_key
+        headers[ERROR_HEADER] = str(error)[:500]
+
+        if attempt < self.max_retries and not isinstance(error, json.JSONDecodeError):
+            headers[RETRY_HEADER] = attempt + 1
+            target = self.retry_queue_name(attempt)
+            HANDLER_RETRIES.labels(self.handler_name).inc()
+            logger.warning(
+                f"{self.queue_name}: attempt {attempt + 1} failed ({error}), "
+                f"retry in {self.retry_delay(attempt)}s"
+            )
+        else:
+            target = self.dlq_name
+            HANDLER_DEAD_LETTERED.labels(self.handler_name).inc()
+            logger.error(f"{self.queue_name}: message dead-lettered after {attempt} retries: {error}")
+
+        await self.channel.default_exchange.publish(
+            aio_pika.Message(
+                body=message.body,
+                headers=headers,
+                content_type="application/json",
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT
+            ),
+            routing_key=target
+        )
+
+
+async def replay_dead_letters(channel, queue_name: str, limit: int = None) -> int:
+    """
+    DLQ dagi xabarlarni asosiy queue ga qaytarish (retry hisobi nolga tushadi)
+    """
+    dlq = await channel.declare_queue(f"{queue_name}.dlq", durable=True)
+    replayed = 0
+    while limit is None or replayed < limit:
+        message = await dlq.get(no_ack=False, fail=False)
+        if message is None:
+            break
+        headers = dict(message.headers or {})
+        headers.pop(RETRY_HEADER, None)
+        headers.pop(ERROR_HEADER, None)
+        await channel.default_exchange.publish(
+            aio_pika.Message(
+                body=message.body,
+                headers=headers,
+                content_type="application/json",
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT
+            ),
+            routing_key=queue_name
+        )
+        await message.ack()
+        replayed += 1
+    return replayed
+
+
+# ============================================
+# IN-MEMORY BROKER (test va local ishlatish uchun)
+# ============================================
+
+def topic_matches(pattern: str, routing_key: str) -> bool:
+    """AMQP topic pattern: '*' - bitta so'z, '#' - nol yoki ko'p so'z"""
+    words = pattern.split(".")
+    keys = routing_key.split(".")
+
+    def match(i: int, j: int) -> bool:
+        if i == len(words):
+            return j == len(keys)
+        if words[i] == "#":
+            return any(match(i + 1, k) for k in range(j, len(keys) + 1))
+        if j == len(keys):
+            return False
+        return words[i] in ("*", keys[j]) and match(i + 1, j + 1)
+
+    return match(0, 0)
+
+
+class _MemoryMessage:
+    def __init__(self, queue: "_MemoryQueue", body: bytes, headers: dict, routing_key: str, tag: int):
+        self._queue = queue
+        self.body = body
+        self.headers = headers
+        self.routing_key = routing_key
+        self.delivery_tag = tag
+
+    async def ack(self, multiple: bool = False) -> None:
+        self._queue.channel.ack(self.delivery_tag, multiple)
+
+    async def nack(self, requeue: bool = True) -> None:
+        self._queue.channel.ack(self.delivery_tag, False)
+        if requeue:
+            self._queue.put(self.body, self.headers, self.routing_key)
+
+    async def reject(self, requeue: bool = False) -> None:
+        await self.nack(requeue)
+
+
+class _MemoryQueue:
+    def __init__(self, broker: "InMemoryBroker", channel: "_MemoryChannel", name: str, arguments: dict):
+        self.broker = broker
+        self.channel = channel
+        self.name = name
+        self.arguments = arguments or {}
+        self.messages: List[tuple] = []
+        self._consumers: Dict[str, Callable] = {}
+
+    def put(self, body: bytes, headers: dict, routing_key: str) -> None:
+        ttl = self.arguments.get("x-message-ttl")
+        if ttl is not None and "x-dead-letter-routing-key" in self.arguments:
+            # Retry queue - TTL tugagach dead-letter ga o'tkazish
+            target = self.arguments["x-dead-letter-routing-key"]
+            asyncio.get_running_loop().call_later(
+                ttl / 1000,
+                lambda: self.broker.route("", target, body, headers, routing_key)
+            )
+            return
+        self.messages.append((body, headers, routing_key))
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        if not self._consumers:
+            return
+        callback = next(iter(self._consumers.values()))
+        while self.messages and self.channel.has_capacity():
+            body, headers, routing_key = self.messages.pop(0)
+            message = _MemoryMessage(self, body, headers, routing_key, self.channel.next_tag(self))
+            asyncio.ensure_future(callback(message))
+
+    async def bind(self, exchange, routing_key: str) -> None:
+        self.broker.bindings.setdefault(exchange.name, []).append((routing_key, self.name))
+
+    async def consume(self, callback, no_ack: bool = False) -> str:
+        tag = f"ctag-{len(self._consumers) + 1}"
+        self._consumers[tag] = callback
+        self._dispatch()
+        return tag
+
+    async def cancel(self, consumer_tag: str) -> None:
+        self._consumers.pop(consumer_tag, None)
+
+    async def get(self, no_ack: bool = False, fail: bool = True):
+        if not self.messages:
+            if fail:
+                raise LookupError(f"Queue {self.name} is empty")
+            return None
+        body, headers, routing_key = self.messages.pop(0)
+        return _MemoryMessage(self, body, headers, routing_key, self.channel.next_tag(self))
+
+
+class _MemoryExchange:
+    def __init__(self, broker: "InMemoryBroker", name: str):
+        self.broker = broker
+        self.name = name
+
+    async def publish(self, message: aio_pika.Message, routing_key: str) -> None:
+        self.broker.route(self.name, routing_key, message.body, dict(message.headers or {}), routing_key)
+
+
+class _MemoryChannel:
+    def __init__(self, broker: "InMemoryBroker"):
+        self.broker = broker
+        self.prefetch = 0
+        self.default_exchange = _MemoryExchange(broker, "")
+        self._tag = 0
+        self.unacked: Dict[int, "_MemoryQueue"] = {}
+        self.acked: List[int] = []
+
+    def next_tag(self, queue: "_MemoryQueue") -> int:
+        self._tag += 1
+        self.unacked[self._tag] = queue
+        return self._tag
+
+    def has_capacity(self) -> bool:
+        return not self.prefetch or len(self.unacked) < self.prefetch
+
+    def ack(self, tag: int, multiple: bool) -> None:
+        tags = [t for t in self.unacked if t <= tag] if multiple else [tag]
+        queues = set()
+        for t in tags:
+            queue = self.unacked.pop(t, None)
+            if queue is not None:
+                self.acked.append(t)
+                queues.add(queue)
+        for queue in queues:
+            queue._dispatch()
+
+    async def set_qos(self, prefetch_count: int = 0) -> None:
+        self.prefetch = prefetch_count
+
+    async def declare_exchange(self, name: str, type=None, durable: bool = False) -> _MemoryExchange:
+        return self.broker.exchanges.setdefault(name, _MemoryExchange(self.broker, name))
+
+    async def declare_queue(self, name: str, durable: bool = False, arguments: dict = None) -> _MemoryQueue:
+        if name not in self.broker.queues:
+            self.broker.queues[name] = _MemoryQueue(self.broker, self, name, arguments)
+        return self.broker.queues[name]
+
+
+class InMemoryBroker:
+    """
+    RabbitMQ o'rniga process ichidagi stand-in: topic exchange, default
+    exchange, prefetch, multiple-ack, TTL + dead-letter bilan retry queue lar.
+    EventConsumer testlari va local benchmark uchun.
+    """
+
+    def __init__(self):
+        self.exchanges: Dict[str, _MemoryExchange] = {}
+        self.queues: Dict[str, _MemoryQueue] = {}
+        self.bindings: Dict[str, List[tuple]] = {}
+
+    async def channel(self) -> _MemoryChannel:
+        return _MemoryChannel(self)
+
+    def route(self, exchange: str, routing_key: str, body: bytes, headers: dict, original_key: str) -> None:
+        if exchange == "":
+            queue = self.queues.get(routing_key)
+            if queue is not None:
+                queue.put(body, headers, original_key)
+            return
+        for pattern, queue_name in self.bindings.get(exchange, ()):
+            if topic_matches(pattern, routing_key):
+                self.queues[queue_name].put(body, dict(headers), routing_key)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    connection = await aio_pika.connect_robust(settings.RABBITMQ_URL)
+    try:
+        channel = await connection.channel()
+        replayed = await replay_dead_letters(channel, args.queue, args.limit)
+        print(f"replayed {replayed} messages from {args.queue}.dlq")
+    finally:
+        await connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Event consumer utilities")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    replay_parser = sub.add_parser("replay", help="move dead-lettered messages back to the queue")
+    replay_parser.add_argument("queue")
+    replay_parser.add_argument("--limit", type=int, default=None)
+
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,177 @@
+# payment-service/app/services/outbox.py
+# ============================================
+# TRANSACTIONAL OUTBOX + BATCHING RELAY
+# ============================================
+
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, List, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.config import get_settings
+from shared.logger import setup_logger
+from payment_service.app.models.outbox import OutboxEvent
+from payment_service.app.services.rabbitmq import RabbitMQClient
+
+settings = get_settings()
+logger = setup_logger(__name__)
+
+OUTBOX_PUBLISHED = Counter(
+    "payment_outbox_published_total",
+    "Outbox events published to RabbitMQ"
+)
+OUTBOX_FAILURES = Counter(
+    "payment_outbox_publish_failures_total",
+    "Outbox batches that failed to publish"
+)
+OUTBOX_BATCH_SIZE = Histogram(
+    "payment_outbox_batch_size",
+    "Events claimed per relay batch",
+    buckets=(1, 5, 10, 25, 50, 100, 200, 500, 1000)
+)
+OUTBOX_LAG = Gauge(
+    "payment_outbox_lag_seconds",
+    "Age of the oldest event in the last claimed batch"
+)
+
+
+def build_event(event_type: str, data: dict) -> OutboxEvent:
+    """Outbox qatorini yaratish"""
+    return OutboxEvent(
+        event_type=event_type,
+        routing_key=event_type,
+        payload=json.dumps({
+            "event": event_type,
+            "timestamp": datetime.utcnow().isoformat(),
+            "data": data
+        }, default=str)
+    )
+
+
+def add_event(db: AsyncSession, event_type: str, data: dict) -> None:
+    """
+    Eventni joriy transactionga qo'shish - to'lov o'zgarishi bilan birga commit bo'ladi
+    """
+    db.add(build_event(event_type, data))
+
+
+def add_events(db: AsyncSession, events: Iterable[Tuple[str, dict]]) -> None:
+    """Bir nechta eventni bitta transactionga qo'shish"""
+    db.add_all([build_event(event_type, data) for event_type, data in events])
+
+
+class OutboxRelay:
+    """
+    Yuborilmagan eventlarni FOR UPDATE SKIP LOCKED bilan claim qilib,
+    batch holida publisher confirms bilan yuboradi va published deb belgilaydi.
+
+    Bir nechta replica parallel ishlashi mumkin - SKIP LOCKED sababli bitta
+    event ikki marta claim qilinmaydi.
+    """
+
+    def __init__(
+            self,
+            session_factory,
+            client: RabbitMQClient,
+            batch_size: int = None,
+            poll_interval: float = None
+    ):
+        self.session_factory = session_factory
+        self.client = client
+        self.batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+        self.poll_interval = poll_interval or settings.OUTBOX_POLL_INTERVAL
+        self._last_purge = 0.0
+
+    async def relay_batch(self) -> int:
+        """
+        Bitta batch ni yuborish, yuborilganlar sonini qaytaradi
+        """
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(OutboxEvent)
+                .where(OutboxEvent.published_at.is_(None))
+                .order_by(OutboxEvent.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            events: List[OutboxEvent] = list(result.scalars().all())
+            if not events:
+                OUTBOX_LAG.set(0)
+                return 0
+
+            OUTBOX_BATCH_SIZE.observe(len(events))
+            OUTBOX_LAG.set((datetime.utcnow() - events[0].created_at).total_seconds())
+
+            ids = [event.id for event in events]
+            try:
+                # Pipelined - barcha confirmlar parallel kutiladi
+                await self.client.publish_many(
+                    (event.routing_key, event.payload.encode(), {"message_id": str(event.id)})
+                    for event in events
+                )
+            except Exception as e:
+                OUTBOX_FAILURES.inc()
+                await db.rollback()
+                await self._record_failure(ids, str(e))
+                raise
+
+            await db.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_(ids))
+                .values(published_at=datetime.utcnow(), attempts=OutboxEvent.attempts + 1)
+            )
+            await db.commit()
+
+        OUTBOX_PUBLISHED.inc(len(events))
+        return len(events)
+
+    async def _record_failure(self, ids: List[int], error: str) -> None:
+        async with self.session_factory() as db:
+            await db.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_(ids))
+                .values(attempts=OutboxEvent.attempts + 1, last_error=error[:500])
+            )
+            await db.commit()
+
+    async def purge_published(self) -> int:
+        """Retention dan eski yuborilgan eventlarni o'chirish"""
+        cutoff = datetime.utcnow() - timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+        async with self.session_factory() as db:
+            result = await db.execute(
+                delete(OutboxEvent).where(OutboxEvent.published_at < cutoff)
+            )
+            await db.commit()
+        return result.rowcount or 0
+
+    async def run(self) -> None:
+        """Background loop"""
+        logger.info(f"Outbox relay started (batch_size={self.batch_size})")
+        backoff = self.poll_interval
+        while True:
+            try:
+                if not self.client.is_connected:
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+
+                sent = await self.relay_batch()
+                backoff = self.poll_interval
+
+                if time.monotonic() - self._last_purge > 600:
+                    self._last_purge = time.monotonic()
+                    await self.purge_published()
+
+                # To'liq batch - navbatda yana bor, kutmasdan davom etish
+                if sent < self.batch_size:
+                    await asyncio.sleep(self.poll_interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox relay error: {str(e)}")
+                backoff = min(backoff * 2, 30)
+                await asyncio.sleep(backoff)
@@ -4,27 +4,68 @@
 # ============================================
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, and_
+from sqlalchemy import select, desc, and_, func, insert, tuple_
 from datetime import datetime
-from uuid import UUID
+from uuid import UUID, uuid4
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import base64
 import json
-import aio_pika
+from shared.config import get_settings
 from shared.logger import setup_logger
-from shared.exceptions import NotFoundException, ValidationException
-from payment_service.app.models.payment import Payment, PaymentStatus
+from shared.exceptions import NotFoundException, ServiceUnavailableException, ValidationException
+from payment_service.app.models.payment import Payment, PaymentStatus, to_minor
+from payment_service.app.providers import ProviderError, get_provider, has_provider
+from payment_service.app.services.state_machine import transition
+from payment_service.app.services import idempotency, rollups
+from payment_service.app.services.outbox import add_event, add_events
+from payment_service.app.services.velocity import Reservation, VelocityLimitExceeded, velocity_limiter
+from payment_service.app.utils.validators import validate_card
 from payment_service.app.schemas.payment import (
-    PaymentCreate, PaymentResponse, PaymentConfirmRequest
+    PaymentCreate, PaymentResponse, PaymentConfirmRequest,
+    PaymentBatchItemResult, PaymentBatchResponse
 )
 
+settings = get_settings()
 logger = setup_logger(__name__)
 
 
+# PaymentResponse maydonlari - o'qish endpointlari faqat shu ustunlarni oladi
+RESPONSE_COLUMNS = tuple(getattr(Payment, name) for name in PaymentResponse.model_fields)
+
+
+def row_to_response(row) -> dict:
+    """
+    Row -> javob dict (PaymentResponse bilan bir xil shakl). Pydantic
+    validation va ORM hydration chetlab o'tiladi - ORJSONResponse bilan
+    to'g'ridan-to'g'ri serialize qilinadi.
+    """
+    data = row._asdict()
+    data["status"] = data["status"].value
+    return data
+
+
+def encode_cursor(payment: Payment) -> str:
+    """Oxirgi qatordan opaque cursor"""
+    raw = f"{payment.created_at.isoformat()}|{payment.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Cursor -> (created_at, id)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, payment_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), UUID(payment_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationException("Invalid cursor", "cursor")
+
+
 class PaymentService:
     """To'lov servisining business logikasi"""
 
-    def __init__(self, db: AsyncSession, rabbitmq_channel: aio_pika.abc.AbstractChannel = None):
+    def __init__(self, db: AsyncSession):
         self.db = db
-        self.rabbitmq_channel = rabbitmq_channel
 
     async def create_payment(self, user_id: str, payment_data: PaymentCreate) -> PaymentResponse:
         """
@@ -32,59 +73,225 @@ class PaymentService:
         """
         logger.info(f"Creating payment for user: {user_id}, amount: {payment_data.amount}")
 
+        # Limit atomik band qilinadi; dublikat / DB xatosida qaytariladi
+        async with velocity_limiter.reserved(user_id, payment_data.currency, payment_data.amount):
+            payment = await self._add_payment(user_id, payment_data)
+            await self.db.commit()
+        await self.db.refresh(payment)
+
+        logger.info(f"Payment created: {payment.id}")
+        return PaymentResponse.from_orm(payment)
+
+    async def create_payment_idempotent(
+            self,
+            user_id: str,
+            payment_data: PaymentCreate,
+            idempotency_key: str
+    ) -> Tuple[PaymentResponse, bool]:
+        """
+        Idempotency-Key bilan to'lov yaratish.
+        (javob, replayed) qaytaradi - retry da saqlangan javob qaytariladi
+        """
+        fingerprint = idempotency.request_fingerprint(payment_data)
+
+        # Retry - bitta PK lookup
+        record = await idempotency.lookup(self.db, user_id, idempotency_key)
+        if record is None and not await idempotency.reserve(
+                self.db, user_id, idempotency_key, fingerprint
+        ):
+            # Parallel request shu keyni band qilib bo'ldi
+            record = await idempotency.lookup(self.db, user_id, idempotency_key)
+
+        if record is not None:
+            idempotency.check_replayable(record, fingerprint)
+            logger.info(f"Idempotent replay for user {user_id}, key {idempotency_key}")
+            return PaymentResponse.model_validate_json(record.response_body), True
+
+        logger.info(f"Creating payment for user: {user_id}, amount: {payment_data.amount}")
+
+        # Replay limitga hisoblanmaydi - faqat yangi to'lov
+        async with velocity_limiter.reserved(user_id, payment_data.currency, payment_data.amount):
+            # To'lov va saqlangan javob bitta transactionda
+            payment = await self._add_payment(user_id, payment_data)
+            response = PaymentResponse.from_orm(payment)
+            await idempotency.store_response(
+                self.db, user_id, idempotency_key, 201, response, payment.id
+            )
+            await self.db.commit()
+
+        logger.info(f"Payment created: {payment.id}")
+        return response, False
+
+    async def _add_payment(self, user_id: str, payment_data: PaymentCreate) -> Payment:
+        """
+        Dublikatni tekshirib to'lovni sessionga qo'shish (commit qilinmaydi)
+        """
         # Xuddi shunga o'xshash to'lov mavjudligini tekshirish
         existing = await self.db.execute(
-            select(Payment).where(
+            select(Payment.id).where(
                 and_(
                     Payment.user_id == user_id,
                     Payment.order_id == payment_data.order_id,
                     Payment.status.in_([PaymentStatus.PENDING, PaymentStatus.PROCESSING])
                 )
-            )
+            ).limit(1)
         )
 
-        if existing.scalars().first():
+        if existing.first():
             raise ValidationException(
                 "Payment for this order already exists",
                 "order_id"
             )
 
         # Yangi to'lov yaratish
-        payment = Payment(
-            user_id=user_id,
-            order_id=payment_data.order_id,
-            amount=payment_data.amount,
-            currency=payment_data.currency,
-            payment_method=payment_data.payment_method,
-            description=payment_data.description,
-            metadata=json.dumps(payment_data.metadata) if payment_data.metadata else None,
-            status=PaymentStatus.PENDING
-        )
+        payment = Payment(**self._payment_values(user_id, payment_data))
 
         self.db.add(payment)
-        await self.db.commit()
-        await self.db.refresh(payment)
+        await self.db.flush()
+        await rollups.apply_transition(self.db, payment, None)
+
+        # Event - to'lov bilan bitta transactionda (outbox)
+        self._publish_event("payment.created", self._created_event(payment))
+        return payment
+
+    @staticmethod
+    def _payment_values(user_id: str, payment_data: PaymentCreate) -> dict:
+        metadata = payment_data.metadata
+        if payment_data.card_number:
+            # Karta raqami saqlanmaydi - faqat BIN lookup natijasi va last4
+            metadata = {**(metadata or {}), "card": validate_card(payment_data.card_number)}
+        return {
+            "user_id": user_id,
+            "order_id": payment_data.order_id,
+            "amount_minor": to_minor(payment_data.amount),
+            "currency": payment_data.currency,
+            "payment_method": payment_data.payment_method,
+            "description": payment_data.description,
+            "metadata_info": json.dumps(metadata) if metadata else None,
+            "status": PaymentStatus.PENDING,
+        }
 
-        # Event yuborish
-        await self._publish_event(
-            "payment.created",
-            {
-                "payment_id": str(payment.id),
-                "user_id": user_id,
-                "amount": payment.amount,
-                "order_id": payment.order_id
-            }
+    @staticmethod
+    def _created_event(payment: Payment) -> dict:
+        return {
+            "payment_id": str(payment.id),
+            "user_id": payment.user_id,
+            "amount": payment.amount,
+            "order_id": payment.order_id,
+            "version": 1
+        }
+
+    async def create_payments_batch(
+            self,
+            user_id: str,
+            items: List[PaymentCreate]
+    ) -> PaymentBatchResponse:
+        """
+        Ko'p to'lovni bitta transactionda yaratish.
+
+        Dublikatlar bitta query bilan tekshiriladi, qolganlari bitta
+        multi-row INSERT ... RETURNING bilan yoziladi. Natija har bir element
+        uchun (items tartibida) qaytariladi.
+        """
+        logger.info(f"Creating payment batch for user: {user_id}, items: {len(items)}")
+
+        results: Dict[int, PaymentBatchItemResult] = {}
+        order_ids = {item.order_id for item in items}
+        existing = await self.db.execute(
+            select(Payment.order_id).where(
+                Payment.user_id == user_id,
+                Payment.order_id.in_(order_ids),
+                Payment.status.in_([PaymentStatus.PENDING, PaymentStatus.PROCESSING])
+            )
         )
+        taken = set(existing.scalars().all())
+        in_batch = set()
+
+        accepted: List[Tuple[int, PaymentCreate]] = []
+        for index, item in enumerate(items):
+            error = None
+            if item.order_id in taken:
+                error = "Payment for this order already exists"
+            elif item.order_id in in_batch:
+                error = "Duplicate order_id in batch"
+            if error:
+                results[index] = PaymentBatchItemResult(index=index, status="rejected", error=error)
+                continue
+            in_batch.add(item.order_id)
+            accepted.append((index, item))
+
+        accepted, reservations = await self._reserve_batch_velocity(user_id, accepted, results)
+
+        if accepted:
+            now = datetime.utcnow()
+            rows = [
+                {**self._payment_values(user_id, item), "id": uuid4(), "created_at": now, "updated_at": now}
+                for _, item in accepted
+            ]
+            try:
+                result = await self.db.execute(insert(Payment).returning(Payment), rows)
+                payments = {payment.id: payment for payment in result.scalars().all()}
+                ordered = [payments[row["id"]] for row in rows]
+
+                await rollups.apply_transitions(self.db, [(payment, None) for payment in ordered])
+                add_events(self.db, [("payment.created", self._created_event(payment)) for payment in ordered])
+                await self.db.commit()
+            except (Exception, asyncio.CancelledError):
+                # Batch yozilmadi - band qilingan limit qaytariladi
+                for reservation in reservations:
+                    await velocity_limiter.release(reservation)
+                raise
+
+            for (index, _), payment in zip(accepted, ordered):
+                results[index] = PaymentBatchItemResult(
+                    index=index,
+                    status="created",
+                    payment=PaymentResponse.from_orm(payment)
+                )
 
-        logger.info(f"Payment created: {payment.id}")
-        return PaymentResponse.from_orm(payment)
+        logger.info(f"Payment batch created: {len(accepted)}/{len(items)}")
+        return PaymentBatchResponse(
+            created=len(accepted),
+            rejected=len(items) - len(accepted),
+            items=[results[index] for index in range(len(items))]
+        )
 
-    async def get_payment(self, payment_id: UUID, user_id: str) -> PaymentResponse:
+    @staticmethod
+    async def _reserve_batch_velocity(
+            user_id: str,
+            accepted: List[Tuple[int, PaymentCreate]],
+            results: Dict[int, PaymentBatchItemResult]
+    ) -> Tuple[List[Tuple[int, PaymentCreate]], List[Reservation]]:
         """
-        To'lovni ID bilan olish
+        Valyuta bo'yicha bitta velocity reservation (count = elementlar soni,
+        amount = summa). Limitdan oshgan valyuta elementlari rejected.
+        """
+        by_currency: Dict[str, List[Tuple[int, PaymentCreate]]] = {}
+        for index, item in accepted:
+            by_currency.setdefault(item.currency, []).append((index, item))
+
+        allowed = []
+        reservations = []
+        for currency, group in by_currency.items():
+            try:
+                reservation = await velocity_limiter.reserve(
+                    user_id, currency, sum(item.amount for _, item in group), count=len(group)
+                )
+            except VelocityLimitExceeded as e:
+                for index, _ in group:
+                    results[index] = PaymentBatchItemResult(index=index, status="rejected", error=e.message)
+                continue
+            if reservation is not None:
+                reservations.append(reservation)
+            allowed.extend(group)
+        return sorted(allowed, key=lambda entry: entry[0]), reservations
+
+    async def get_payment(self, payment_id: UUID, user_id: str) -> dict:
+        """
+        To'lovni ID bilan olish (projection - ORM object yaratilmaydi)
         """
         result = await self.db.execute(
-            select(Payment).where(
+            select(*RESPONSE_COLUMNS).where(
                 and_(
                     Payment.id == payment_id,
                     Payment.user_id == user_id
@@ -92,14 +299,14 @@ class PaymentService:
             )
         )
 
-        payment = result.scalars().first()
-        if not payment:
+        row = result.first()
+        if not row:
             raise NotFoundException(
                 f"Payment {payment_id} not found",
                 "payment"
             )
 
-        return PaymentResponse.from_orm(payment)
+        return row_to_response(row)
 
     async def confirm_payment(
             self,
@@ -112,110 +319,196 @@ class PaymentService:
         """
         logger.info(f"Confirming payment: {payment_id}")
 
-        result = await self.db.execute(
-            select(Payment).where(
-                and_(
-                    Payment.id == payment_id,
-                    Payment.user_id == user_id
-                )
-            )
-        )
-
-        payment = result.scalars().first()
-        if not payment:
-            raise NotFoundException(
-                f"Payment {payment_id} not found",
-                "payment"
-            )
+        target = PaymentStatus(confirm_data.status.value)
+        await self._verify_with_provider(payment_id, user_id, target, confirm_data.provider_transaction_id)
 
-        if payment.status != PaymentStatus.PENDING:
-            raise ValidationException(
-                f"Payment cannot be confirmed. Current status: {payment.status}"
-            )
-
-        # Statusni yangilash
-        payment.status = confirm_data.status
-        payment.provider_transaction_id = confirm_data.provider_transaction_id
-        payment.updated_at = datetime.utcnow()
-
-        if confirm_data.status == PaymentStatus.COMPLETED:
-            payment.completed_at = datetime.utcnow()
-
-        await self.db.commit()
-        await self.db.refresh(payment)
+        # Bitta shartli UPDATE - parallel tasdiqlashlardan faqat bittasi o'tadi
+        payment = await transition(
+            self.db,
+            payment_id,
+            target,
+            user_id=user_id,
+            expected_version=confirm_data.expected_version,
+            from_statuses=(PaymentStatus.PENDING, PaymentStatus.PROCESSING),
+            values={"provider_transaction_id": confirm_data.provider_transaction_id}
+        )
 
-        # Event yuborish
-        await self._publish_event(
-            f"payment.{payment.status}",
+        # Event - status bilan bitta transactionda (outbox)
+        self._publish_event(
+            f"payment.{payment.status.value}",
             {
                 "payment_id": str(payment.id),
                 "user_id": user_id,
-                "status": payment.status
+                "status": payment.status.value,
+                "version": payment.version
             }
         )
+        await self.db.commit()
 
         logger.info(f"Payment confirmed: {payment.id}, status: {payment.status}")
         return PaymentResponse.from_orm(payment)
 
-    async def list_payments(
+    async def _verify_with_provider(
             self,
+            payment_id: UUID,
             user_id: str,
-            page: int = 1,
-            page_size: int = 20
-    ) -> dict:
+            target: PaymentStatus,
+            provider_transaction_id: str
+    ) -> None:
         """
-        Foydalanuvchining barcha to'lovlarini ro'yxati
+        Client yuborgan statusni provider dagi holat bilan solishtirish.
+        Transaction aynan shu to'lovga tegishli bo'lishi shart: reference,
+        summa va valyuta mos kelmasa - boshqa (arzon) to'lovning transaction
+        id si bilan tasdiqlash rad etiladi
+        (payment_method uchun adapter bo'lmasa - status tekshiruvsiz, avvalgidek)
         """
-        offset = (page - 1) * page_size
+        row = (await self.db.execute(
+            select(Payment.payment_method, Payment.provider_transaction_id, Payment.amount_minor, Payment.currency)
+            .where(Payment.id == payment_id, Payment.user_id == user_id)
+        )).first()
+        if row is None:
+            return
+        # Provider ga yuborilgan transaction boshqasiga almashtirilmaydi
+        if row.provider_transaction_id is not None and row.provider_transaction_id != provider_transaction_id:
+            raise ValidationException(
+                "provider_transaction_id does not match payment",
+                "provider_transaction_id"
+            )
+        if not settings.PROVIDER_VERIFY_CONFIRM or not has_provider(row.payment_method):
+            return
 
-        # Total count
-        count_result = await self.db.execute(
-            select(Payment).where(Payment.user_id == user_id)
-        )
-        total = len(count_result.scalars().all())
+        try:
+            results = await get_provider(row.payment_method).get_statuses([provider_transaction_id])
+        except ProviderError as e:
+            raise ServiceUnavailableException(f"Provider unavailable: {str(e)}", row.payment_method)
+
+        result = results.get(provider_transaction_id)
+        if result is None:
+            raise ValidationException("Unknown provider transaction", "provider_transaction_id")
+        if (
+            result.reference != str(payment_id)
+            or result.amount_minor != row.amount_minor
+            or (result.currency or "").upper() != row.currency.upper()
+        ):
+            logger.warning(
+                f"Provider transaction {provider_transaction_id} does not belong to payment {payment_id} "
+                f"(reference={result.reference}, amount_minor={result.amount_minor}, currency={result.currency})"
+            )
+            raise ValidationException(
+                "Provider transaction does not match payment",
+                "provider_transaction_id"
+            )
+        reported = result.status or PaymentStatus.PROCESSING
+        if reported != target:
+            raise ValidationException(
+                f"Provider reports status {reported.value}, not {target.value}",
+                "status"
+            )
 
-        # Paginated results
+    async def list_open_payments(self, user_id: str, limit: int) -> List[dict]:
+        """
+        Userning yakunlanmagan (PENDING / PROCESSING) to'lovlari - status
+        stream boshlang'ich holati uchun
+        """
         result = await self.db.execute(
-            select(Payment)
-            .where(Payment.user_id == user_id)
-            .order_by(desc(Payment.created_at))
-            .offset(offset)
-            .limit(page_size)
+            select(*RESPONSE_COLUMNS)
+            .where(
+                Payment.user_id == user_id,
+                Payment.status.in_([PaymentStatus.PENDING, PaymentStatus.PROCESSING])
+            )
+            .order_by(desc(Payment.created_at), desc(Payment.id))
+            .limit(limit)
         )
+        return [row_to_response(row) for row in result.all()]
 
-        payments = result.scalars().all()
+    async def get_payments_by_ids(self, user_id: str, payment_ids: List[UUID]) -> dict:
+        """
+        Bir nechta to'lovni bitta PK query bilan olish (so'ralgan tartibda).
+        Topilmagan yoki boshqa userniki bo'lganlar `missing` da.
+        """
+        result = await self.db.execute(
+            select(*RESPONSE_COLUMNS).where(Payment.user_id == user_id, Payment.id.in_(payment_ids))
+        )
+        found = {row.id: row for row in result.all()}
+        unique_ids = list(dict.fromkeys(payment_ids))
 
         return {
-            "total": total,
-            "page": page,
-            "page_size": page_size,
-            "items": [PaymentResponse.from_orm(p) for p in payments]
+            "total": len(found),
+            "page": 1,
+            "page_size": len(unique_ids),
+            "items": [row_to_response(found[pid]) for pid in unique_ids if pid in found],
+            "missing": [pid for pid in unique_ids if pid not in found]
         }
 
-    async def _publish_event(self, event_type: str, data: dict) -> None:
-        """
-        RabbitMQ orqali event yuborish
+    async def list_payments(
+            self,
+            user_id: str,
+            page: int = 1,
+            page_size: int = 20,
+            cursor: Optional[str] = None,
+            status: Optional[PaymentStatus] = None,
+            currency: Optional[str] = None,
+            created_from: Optional[datetime] = None,
+            created_to: Optional[datetime] = None,
+            include_total: bool = False
+    ) -> dict:
         """
-        if not self.rabbitmq_channel:
-            logger.warning("RabbitMQ channel not available")
-            return
+        Foydalanuvchining to'lovlari ro'yxati (keyset pagination).
 
-        try:
-            exchange = await self.rabbitmq_channel.declare_exchange(
-                'payment_events',
-                aio_pika.ExchangeType.TOPIC,
-                durable=True
+        (created_at, id) bo'yicha kamayish tartibida - cursor oxirgi qatorni
+        ko'rsatadi, shuning uchun har qanday sahifa ix_payments_user_id_created_at_id
+        bo'yicha bir xil tezlikda o'qiladi. `page` faqat cursor berilmaganda
+        (eski clientlar uchun) OFFSET sifatida ishlatiladi.
+        """
+        filters = [Payment.user_id == user_id]
+        if status:
+            filters.append(Payment.status == status)
+        if currency:
+            filters.append(Payment.currency == currency.upper())
+        if created_from:
+            filters.append(Payment.created_at >= created_from)
+        if created_to:
+            filters.append(Payment.created_at < created_to)
+
+        query = select(*RESPONSE_COLUMNS).where(*filters)
+        if cursor:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+            query = query.where(
+                tuple_(Payment.created_at, Payment.id) < tuple_(cursor_created_at, cursor_id)
             )
+        elif page > 1:
+            query = query.offset((page - 1) * page_size)
 
-            message = aio_pika.Message(
-                body=json.dumps({
-                    "event": event_type,
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "data": data
-                }).encode()
+        # Bitta ortiqcha qator - keyingi sahifa borligini bilish uchun
+        result = await self.db.execute(
+            query
+            .order_by(desc(Payment.created_at), desc(Payment.id))
+            .limit(page_size + 1)
+        )
+        payments = result.all()
+
+        next_cursor = None
+        if len(payments) > page_size:
+            payments = payments[:page_size]
+            next_cursor = encode_cursor(payments[-1])
+
+        # COUNT(*) faqat so'ralganda - katta merchantlar uchun qimmat
+        total = None
+        if include_total:
+            total = await self.db.scalar(
+                select(func.count()).select_from(Payment).where(*filters)
             )
 
-            await exchange.publish(message, routing_key=f"payment.{event_type}")
-            logger.info(f"Event published: {event_type}")
-        except Exception as e:
-            logger.error(f"Failed to publish event: {str(e)}")
+        return {
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "next_cursor": next_cursor,
+            "items": [row_to_response(row) for row in payments]
+        }
+
+    def _publish_event(self, event_type: str, data: dict) -> None:
+        """
+        Eventni outbox ga yozish - relay RabbitMQ ga yuboradi
+        """
+        add_event(self.db, event_type, data)
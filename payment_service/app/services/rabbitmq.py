@@ -0,0 +1,133 @@
+# payment-service/app/services/rabbitmq.py
+# ============================================
+# RABBITMQ CLIENT (CHANNEL POOL + EXCHANGE CACHE)
+# ============================================
+
+import asyncio
+from typing import Dict, Iterable, Optional, Tuple
+
+import aio_pika
+from aio_pika.pool import Pool
+
+from shared.config import get_settings
+from shared.exceptions import ServiceUnavailableException
+from shared.logger import setup_logger
+
+settings = get_settings()
+logger = setup_logger(__name__)
+
+PAYMENT_EVENTS_EXCHANGE = "payment_events"
+
+
+class RabbitMQClient:
+    """
+    Bitta robust connection, cheklangan channel pool va cache qilingan exchangelar.
+
+    Har bir channel publisher confirms rejimida - publish() broker tasdiqlaguncha
+    kutadi. Parallel publishlar turli channellarga tushadi, bitta channelda
+    navbatga turmaydi.
+    """
+
+    def __init__(self, url: str = None, pool_size: int = None):
+        self.url = url or settings.RABBITMQ_URL
+        self.pool_size = pool_size or settings.RABBITMQ_CHANNEL_POOL_SIZE
+        self.connection: Optional[aio_pika.abc.AbstractRobustConnection] = None
+        self.channel_pool: Optional[Pool] = None
+        self._exchanges: Dict[Tuple[int, str], aio_pika.abc.AbstractExchange] = {}
+
+    @property
+    def is_connected(self) -> bool:
+        return self.connection is not None and not self.connection.is_closed
+
+    async def connect(self) -> None:
+        self.connection = await aio_pika.connect_robust(self.url)
+        self.channel_pool = Pool(self._create_channel, max_size=self.pool_size)
+        logger.info(f"RabbitMQ client connected (channel pool size={self.pool_size})")
+
+    async def _create_channel(self) -> aio_pika.abc.AbstractChannel:
+        return await self.connection.channel(publisher_confirms=True)
+
+    async def close(self) -> None:
+        if self.channel_pool:
+            await self.channel_pool.close()
+        if self.connection:
+            await self.connection.close()
+        self._exchanges.clear()
+
+    async def get_exchange(
+            self,
+            channel: aio_pika.abc.AbstractChannel,
+            name: str = PAYMENT_EVENTS_EXCHANGE,
+            exchange_type: aio_pika.ExchangeType = aio_pika.ExchangeType.TOPIC
+    ) -> aio_pika.abc.AbstractExchange:
+        """
+        Exchange har bir channel uchun bir marta declare qilinadi
+        """
+        cache_key = (id(channel), name)
+        exchange = self._exchanges.get(cache_key)
+        if exchange is None:
+            exchange = await channel.declare_exchange(name, exchange_type, durable=True)
+            self._exchanges[cache_key] = exchange
+        return exchange
+
+    def _ensure_connected(self) -> None:
+        if not self.channel_pool:
+            raise ServiceUnavailableException("RabbitMQ is not connected", "rabbitmq")
+
+    async def publish(
+            self,
+            routing_key: str,
+            body: bytes,
+            exchange: str = PAYMENT_EVENTS_EXCHANGE,
+            **message_kwargs
+    ) -> None:
+        """Bitta xabarni yuborish (confirm kutiladi)"""
+        self._ensure_connected()
+        message_kwargs.setdefault("content_type", "application/json")
+        message_kwargs.setdefault("delivery_mode", aio_pika.DeliveryMode.PERSISTENT)
+
+        async with self.channel_pool.acquire() as channel:
+            target = await self.get_exchange(channel, exchange)
+            await target.publish(aio_pika.Message(body=body, **message_kwargs), routing_key=routing_key)
+
+    async def publish_many(
+            self,
+            messages: Iterable[Tuple[str, bytes, dict]],
+            exchange: str = PAYMENT_EVENTS_EXCHANGE
+    ) -> int:
+        """
+        Bir nechta xabarni bitta channelda pipelined yuborish.
+
+        messages: (routing_key, body, message_kwargs). Barcha confirmlar
+        parallel kutiladi; bittasi nack bo'lsa exception ko'tariladi.
+        """
+        self._ensure_connected()
+        messages = list(messages)
+        if not messages:
+            return 0
+
+        async with self.channel_pool.acquire() as channel:
+            target = await self.get_exchange(channel, exchange)
+            await asyncio.gather(*[
+                target.publish(
+                    aio_pika.Message(
+                        body=body,
+                        **{
+                            "content_type": "application/json",
+                            "delivery_mode": aio_pika.DeliveryMode.PERSISTENT,
+                            **kwargs
+                        }
+                    ),
+                    routing_key=routing_key
+                )
+                for routing_key, body, kwargs in messages
+            ])
+        return len(messages)
+
+
+rabbitmq_client = RabbitMQClient()
+
+
+def get_rabbitmq() -> RabbitMQClient:
+    """Dependency - RabbitMQ client"""
+    return rabbitmq_client
@@ -0,0 +1,57 @@
+# payment-service/app/services/retry_policy.py
+# ============================================
+# RETRY SCHEDULE (SQL EXPRESSIONS)
+# ============================================
+
+from sqlalchemy import case, func, literal, null
+
+from shared.config import get_settings
+from payment_service.app.models.payment import Payment, PaymentStatus
+
+settings = get_settings()
+
+
+def utc_now():
+    """DB vaqti, naive UTC (DateTime ustunlari bilan bir xil)"""
+    return func.timezone("UTC", func.now())
+
+
+def after_seconds(seconds):
+    return utc_now() + func.make_interval(0, 0, 0, 0, 0, 0, seconds)
+
+
+def backoff_at(retry_count=Payment.retry_count):
+    """
+    Exponential backoff: base * 2^retry_count (RETRY_MAX_DELAY bilan cheklangan),
+    urinishlar tugagan bo'lsa NULL - navbatdan chiqadi
+    """
+    delay = func.least(
+        literal(settings.RETRY_BASE_DELAY) * func.power(2, retry_count),
+        settings.RETRY_MAX_DELAY
+    )
+    return case(
+        (retry_count < settings.RETRY_MAX_ATTEMPTS, after_seconds(delay)),
+        else_=null()
+    )
+
+
+def poll_at():
+    """
+    PROCESSING to'lovni provider dan qayta so'rash vaqti. Retry budjetini
+    (retry_count) sarflamaydi va hech qachon NULL emas - to'lov provider
+    yakuniy javob bermaguncha navbatda qoladi
+    """
+    return after_seconds(settings.PROCESSING_POLL_DELAY)
+
+
+def next_attempt_for(target: PaymentStatus):
+    """
+    Status o'tishida next_attempt_at qiymati:
+    PROCESSING - provider dan so'rash, FAILED - backoff bilan qayta urinish,
+    qolganlar - navbatdan chiqarish
+    """
+    if target == PaymentStatus.PROCESSING:
+        return poll_at()
+    if target == PaymentStatus.FAILED:
+        return backoff_at()
+    return null()
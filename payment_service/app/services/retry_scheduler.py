@@ -0,0 +1,249 @@
+# payment-service/app/services/retry_scheduler.py
+# ============================================
+# DELAYED RETRY SCHEDULER (FAILED / PROCESSING)
+# ============================================
+
+import asyncio
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.config import get_settings
+from shared.exceptions import ConflictException
+from shared.logger import setup_logger
+from payment_service.app.models.payment import Payment, PaymentStatus
+from payment_service.app.providers import ProviderResult, get_provider
+from payment_service.app.services.outbox import add_event
+from payment_service.app.services.retry_policy import after_seconds, poll_at, utc_now
+from payment_service.app.services.state_machine import transition
+
+settings = get_settings()
+logger = setup_logger(__name__)
+
+RETRY_ATTEMPTS = Counter(
+    "payment_retry_attempts_total",
+    "Scheduled provider retries / status polls",
+    ["kind", "result"]
+)
+RETRY_CLAIMED = Gauge(
+    "payment_retry_claimed",
+    "Payments claimed in the last scheduler batch"
+)
+
+
+class RetryScheduler:
+    """
+    next_attempt_at vaqti kelgan to'lovlarni bitta UPDATE ... WHERE id IN
+    (SELECT ... FOR UPDATE SKIP LOCKED) RETURNING bilan claim qiladi va
+    lease beradi (next_attempt_at = now + lease). Provider chaqiruvi row lock
+    ushlamasdan bajariladi; worker yiqilsa lease tugagach boshqa replica oladi.
+
+    FAILED - avval PROCESSING ga o'tkaziladi (commit), keyin providerga
+    qayta yuboriladi; har bir yuborish retry_count ni oshiradi (backoff).
+    PROCESSING - provider dan status so'raladi; poll lar retry budjetini
+    sarflamaydi (PROCESSING_POLL_DELAY bilan qayta so'raladi).
+    """
+
+    def __init__(self, session_factory, batch_size: int = None, poll_interval: float = None):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.RETRY_BATCH_SIZE
+        self.poll_interval = poll_interval or settings.RETRY_POLL_INTERVAL
+
+    async def claim(self) -> List[Payment]:
+        async with self.session_factory() as db:
+            due = (
+                select(Payment.id)
+                .where(
+                    Payment.next_attempt_at <= utc_now(),
+                    Payment.status.in_((PaymentStatus.FAILED, PaymentStatus.PROCESSING))
+                )
+                .order_by(Payment.next_attempt_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            result = await db.execute(
+                update(Payment)
+                .where(Payment.id.in_(due.scalar_subquery()))
+                .values(next_attempt_at=after_seconds(settings.RETRY_LEASE_SECONDS))
+                .returning(Payment)
+                .execution_options(synchronize_session=False)
+            )
+            payments = list(result.scalars().all())
+            await db.commit()
+        RETRY_CLAIMED.set(len(payments))
+        return payments
+
+    async def process_batch(self) -> int:
+        payments = await self.claim()
+        if payments:
+            # provider_transaction_id si bor PROCESSING lar - batch status API orqali
+            polled = [
+                payment for payment in payments
+                if payment.status == PaymentStatus.PROCESSING and payment.provider_transaction_id
+            ]
+            polled_ids = {payment.id for payment in polled}
+            by_method: Dict[str, List[Payment]] = {}
+            for payment in polled:
+                by_method.setdefault(payment.payment_method, []).append(payment)
+
+            await asyncio.gather(
+                *[self._poll_group(method, group) for method, group in by_method.items()],
+                *[self._process(payment) for payment in payments if payment.id not in polled_ids]
+            )
+        return len(payments)
+
+    async def _poll_group(self, payment_method: str, payments: List[Payment]) -> None:
+        """Bitta provider dagi N ta to'lov statusi - bitta (yoki bir necha) so'rovda"""
+        try:
+            provider = get_provider(payment_method)
+            results = await provider.get_statuses(payment.provider_transaction_id for payment in payments)
+        except Exception as e:
+            RETRY_ATTEMPTS.labels("poll", "error").inc(len(payments))
+            logger.warning(f"Batch status poll failed for {payment_method} ({len(payments)} payments): {str(e)}")
+            await asyncio.gather(*[self._reschedule(payment, str(e)) for payment in payments])
+            return
+
+        await asyncio.gather(*[
+            self._finish(payment, "poll", results.get(payment.provider_transaction_id, ProviderResult(None)))
+            for payment in payments
+        ])
+
+    async def _process(self, payment: Payment) -> None:
+        if payment.status == PaymentStatus.FAILED:
+            await self._retry(payment)
+            return
+
+        try:
+            result = await get_provider(payment.payment_method).get_status(payment)
+        except Exception as e:
+            RETRY_ATTEMPTS.labels("poll", "error").inc()
+            logger.warning(f"Provider poll failed for payment {payment.id}: {str(e)}")
+            await self._reschedule(payment, str(e))
+            return
+
+        await self._finish(payment, "poll", result)
+
+    async def _retry(self, payment: Payment) -> None:
+        """
+        Avval FAILED -> PROCESSING commit qilinadi, keyin provider ga
+        yuboriladi: o'tishni yutqazgan worker (yoki user / webhook o'zgartirgan
+        to'lov) provider ga ikkinchi marta yubormaydi
+        """
+        try:
+            async with self.session_factory() as db:
+                moved = await transition(
+                    db, payment.id, PaymentStatus.PROCESSING,
+                    expected_version=payment.version,
+                    values={
+                        "retry_count": Payment.retry_count + 1,
+                        # submit davomida lease saqlanadi
+                        "next_attempt_at": after_seconds(settings.RETRY_LEASE_SECONDS),
+                    }
+                )
+                self._add_status_event(db, moved)
+                await db.commit()
+        except ConflictException:
+            RETRY_ATTEMPTS.labels("retry", "superseded").inc()
+            return
+
+        try:
+            result = await get_provider(moved.payment_method).submit(moved)
+        except Exception as e:
+            RETRY_ATTEMPTS.labels("retry", "error").inc()
+            logger.warning(f"Provider retry failed for payment {moved.id}: {str(e)}")
+            # Yuborilmadi - yana FAILED, keyingi urinish backoff bilan (retry_count oshgan)
+            result = ProviderResult(PaymentStatus.FAILED, error_message=str(e))
+
+        await self._finish(moved, "retry", result)
+
+    async def _finish(self, payment: Payment, kind: str, result: ProviderResult) -> None:
+        try:
+            async with self.session_factory() as db:
+                await self._apply(db, payment, result)
+                await db.commit()
+            RETRY_ATTEMPTS.labels(kind, result.status.value if result.status else "pending").inc()
+        except ConflictException:
+            # User / provider webhook bizdan oldin o'zgartirgan - navbatdan u hal qiladi
+            RETRY_ATTEMPTS.labels(kind, "superseded").inc()
+
+    async def _apply(self, db: AsyncSession, payment: Payment, result: ProviderResult) -> None:
+        if result.status in (None, PaymentStatus.PROCESSING):
+            await self._reschedule_in(db, payment, None, result.provider_transaction_id)
+            return
+
+        values = {}
+        if result.provider_transaction_id:
+            values["provider_transaction_id"] = result.provider_transaction_id
+        if result.error_message:
+            values["error_message"] = result.error_message[:500]
+
+        updated = await transition(db, payment.id, result.status, expected_version=payment.version, values=values)
+        self._add_status_event(db, updated)
+
+    @staticmethod
+    def _add_status_event(db: AsyncSession, payment: Payment) -> None:
+        add_event(
+            db,
+            f"payment.{payment.status.value}",
+            {
+                "payment_id": str(payment.id),
+                "user_id": payment.user_id,
+                "status": payment.status.value,
+                "version": payment.version,
+                "retry_count": payment.retry_count
+            }
+        )
+
+    async def _reschedule_in(
+            self,
+            db: AsyncSession,
+            payment: Payment,
+            error: Optional[str],
+            provider_transaction_id: Optional[str] = None
+    ) -> None:
+        """
+        PROCESSING hali yakunlanmagan (yoki poll xato) - keyingi poll.
+        retry_count oshirilmaydi: poll lar retry budjetini sarflamaydi
+        """
+        values = {"next_attempt_at": poll_at()}
+        if error:
+            values["error_message"] = error[:500]
+        if provider_transaction_id:
+            values["provider_transaction_id"] = func.coalesce(Payment.provider_transaction_id, provider_transaction_id)
+        await db.execute(
+            update(Payment)
+            .where(Payment.id == payment.id, Payment.version == payment.version)
+            .values(**values)
+        )
+
+    async def _reschedule(self, payment: Payment, error: str) -> None:
+        async with self.session_factory() as db:
+            await self._reschedule_in(db, payment, error)
+            await db.commit()
+
+    async def run(self) -> None:
+        """Background loop (bitta worker)"""
+        backoff = self.poll_interval
+        while True:
+            try:
+                claimed = await self.process_batch()
+                backoff = self.poll_interval
+                if claimed < self.batch_size:
+                    await asyncio.sleep(self.poll_interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Retry scheduler error: {str(e)}")
+                backoff = min(backoff * 2, 30)
+                await asyncio.sleep(backoff)
+
+
+def start_workers(session_factory, workers: int = None) -> List[asyncio.Task]:
+    """RETRY_WORKERS ta parallel worker (har bir replica da)"""
+    scheduler = RetryScheduler(session_factory)
+    count = workers or settings.RETRY_WORKERS
+    logger.info(f"Retry scheduler started ({count} workers, batch_size={scheduler.batch_size})")
+    return [asyncio.create_task(scheduler.run()) for _ in range(count)]
@@ -0,0 +1,332 @@
+# payment-service/app/services/rollups.py
+# ============================================
+# PAYMENT ROLLUPS (INCREMENTAL + RECONCILIATION)
+# ============================================
+
+import argparse
+import asyncio
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Date, Numeric, and_, cast, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.config import get_settings
+from shared.logger import setup_logger
+from payment_service.app.models.payment import Payment, PaymentStatus
+from payment_service.app.models.rollup import PaymentRollup
+
+settings = get_settings()
+logger = setup_logger(__name__)
+
+UNKNOWN_METHOD = "unknown"
+
+RollupKey = Tuple[date, str, PaymentStatus, str]
+
+# pg_advisory_xact_lock(RECONCILE_LOCK, kun) - reconcile_day ni replicalar orasida ketma-ket qilish
+RECONCILE_LOCK = 0x526f6c6c
+
+
+def _slot(payment: Payment) -> int:
+    return payment.id.int % settings.ROLLUP_SLOTS
+
+
+def _key(payment: Payment, status: PaymentStatus) -> Dict:
+    return {
+        "day": payment.created_at.date(),
+        "currency": payment.currency or "USD",
+        "status": status,
+        "payment_method": payment.payment_method or UNKNOWN_METHOD,
+        "slot": _slot(payment),
+    }
+
+
+async def apply_transition(
+        db: AsyncSession,
+        payment: Payment,
+        previous: Optional[PaymentStatus]
+) -> None:
+    """
+    To'lovni eski status qatoridan yangisiga o'tkazish - bitta
+    INSERT ... ON CONFLICT DO UPDATE (commit chaqiruvchida).
+
+    previous=None - yangi to'lov.
+    """
+    await apply_transitions(db, [(payment, previous)])
+
+
+async def apply_transitions(
+        db: AsyncSession,
+        transitions: Iterable[Tuple[Payment, Optional[PaymentStatus]]]
+) -> None:
+    """
+    Bir nechta o'tishni bitta upsert bilan qo'llash (bulk operatsiyalar uchun).
+
+    payment - Payment yoki shu ustunlarga ega RETURNING qatori. Bir xil kalit
+    bitta statementda ikki marta bo'lolmaydi, shuning uchun deltalar oldin
+    yig'iladi; kalitlar tartiblangan - parallel batchlar deadlock bermaydi.
+    """
+    deltas: Dict[Tuple, Dict] = {}
+
+    def add(payment, status: PaymentStatus, count: int, amount: Decimal) -> None:
+        key = _key(payment, status)
+        identity = tuple(key.values())
+        row = deltas.get(identity)
+        if row is None:
+            row = deltas[identity] = {
+                **key, "payment_count": 0, "amount_sum": Decimal("0"),
+                "amount_min": None, "amount_max": None,
+            }
+        row["payment_count"] += count
+        row["amount_sum"] += count * amount
+        if count > 0:
+            row["amount_min"] = amount if row["amount_min"] is None else min(row["amount_min"], amount)
+            row["amount_max"] = amount if row["amount_max"] is None else max(row["amount_max"], amount)
+
+    for payment, previous in transitions:
+        amount = Decimal(payment.amount_minor) / 100
+        add(payment, payment.status, 1, amount)
+        if previous is not None and previous != payment.status:
+            add(payment, previous, -1, amount)
+
+    if not deltas:
+        return
+
+    rows = [deltas[identity] for identity in sorted(deltas, key=lambda k: (k[0], k[1], k[2].value, k[3], k[4]))]
+    await _upsert_deltas(db, rows)
+
+
+async def _upsert_deltas(db: AsyncSession, rows: List[Dict]) -> None:
+    """count / sum qo'shiladi, min / max kengayadi - parallel o'tishlar bilan kommutativ"""
+    stmt = insert(PaymentRollup).values(rows)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["day", "currency", "status", "payment_method", "slot"],
+            set_={
+                "payment_count": PaymentRollup.payment_count + stmt.excluded.payment_count,
+                "amount_sum": PaymentRollup.amount_sum + stmt.excluded.amount_sum,
+                # LEAST/GREATEST NULL ni e'tiborsiz qoldiradi
+                "amount_min": func.least(PaymentRollup.amount_min, stmt.excluded.amount_min),
+                "amount_max": func.greatest(PaymentRollup.amount_max, stmt.excluded.amount_max),
+            }
+        )
+    )
+
+
+def _group_columns():
+    return (
+        PaymentRollup.day,
+        PaymentRollup.currency,
+        PaymentRollup.status,
+        PaymentRollup.payment_method,
+    )
+
+
+async def get_daily_report(
+        db: AsyncSession,
+        date_from: date,
+        date_to: date,
+        currency: Optional[str] = None
+) -> List[Dict]:
+    """
+    Kunlik hisobot - slotlar yig'iladi, payments jadvaliga tegmaydi
+    """
+    query = (
+        select(
+            *_group_columns(),
+            func.sum(PaymentRollup.payment_count).label("count"),
+            func.sum(PaymentRollup.amount_sum).label("amount_sum"),
+            func.min(PaymentRollup.amount_min).label("amount_min"),
+            func.max(PaymentRollup.amount_max).label("amount_max"),
+        )
+        .where(PaymentRollup.day >= date_from, PaymentRollup.day <= date_to)
+        .group_by(*_group_columns())
+        .having(func.sum(PaymentRollup.payment_count) != 0)
+        .order_by(PaymentRollup.day, PaymentRollup.currency)
+    )
+    if currency:
+        query = query.where(PaymentRollup.currency == currency.upper())
+
+    return [
+        {
+            "day": row.day,
+            "currency": row.currency,
+            "status": row.status.value,
+            "payment_method": row.payment_method,
+            "count": int(row.count),
+            "amount_sum": float(row.amount_sum),
+            "amount_min": float(row.amount_min) if row.amount_min is not None else None,
+            "amount_max": float(row.amount_max) if row.amount_max is not None else None,
+        }
+        for row in (await db.execute(query)).all()
+    ]
+
+
+def success_rates(rows: List[Dict]) -> List[Dict]:
+    """(kun, valyuta) bo'yicha completed / yakunlangan to'lovlar ulushi"""
+    totals: Dict[Tuple[date, str], Dict[str, int]] = {}
+    for row in rows:
+        bucket = totals.setdefault((row["day"], row["currency"]), {"completed": 0, "finished": 0})
+        if row["status"] in (PaymentStatus.COMPLETED.value, PaymentStatus.REFUNDED.value):
+            bucket["completed"] += row["count"]
+        if row["status"] not in (PaymentStatus.PENDING.value, PaymentStatus.PROCESSING.value):
+            bucket["finished"] += row["count"]
+    return [
+        {
+            "day": day,
+            "currency": currency,
+            "success_rate": round(bucket["completed"] / bucket["finished"], 4) if bucket["finished"] else None,
+        }
+        for (day, currency), bucket in sorted(totals.items())
+    ]
+
+
+def _expected(day: date):
+    """payments dan shu kun uchun haqiqiy agregat (created_at index bo'yicha)"""
+    start = datetime.combine(day, time.min)
+    day_column = cast(Payment.created_at, Date)
+    currency = func.coalesce(Payment.currency, "USD")
+    method = func.coalesce(Payment.payment_method, UNKNOWN_METHOD)
+    amount = cast(Payment.amount_minor, Numeric(20, 2)) / 100
+    return (
+        select(
+            day_column.label("day"),
+            currency.label("currency"),
+            Payment.status.label("status"),
+            method.label("payment_method"),
+            func.count().label("count"),
+            func.sum(amount).label("amount_sum"),
+            func.min(amount).label("amount_min"),
+            func.max(amount).label("amount_max"),
+        )
+        .where(Payment.created_at >= start, Payment.created_at < start + timedelta(days=1))
+        .group_by(day_column, currency, Payment.status, method)
+        .subquery("expected")
+    )
+
+
+def _actual(day: date):
+    return (
+        select(
+            *_group_columns(),
+            func.sum(PaymentRollup.payment_count).label("count"),
+            func.sum(PaymentRollup.amount_sum).label("amount_sum"),
+        )
+        .where(PaymentRollup.day == day)
+        .group_by(*_group_columns())
+        .subquery("actual")
+    )
+
+
+async def _drift(db: AsyncSession, day: date) -> Dict[RollupKey, Tuple[Tuple, Tuple]]:
+    """
+    Farq qilgan kalitlar: key -> ((count, sum, min, max), (count, sum)).
+
+    Ikkala agregat bitta statementda (FULL JOIN) - bitta snapshot. Rollup
+    payments bilan bir transactionda yangilanadi, shuning uchun izchil
+    snapshotda topilgan farq parallel o'tishlardan qat'i nazar haqiqiy drift.
+    """
+    expected, actual = _expected(day), _actual(day)
+    key_columns = ("day", "currency", "status", "payment_method")
+    result = await db.execute(
+        select(
+            *[func.coalesce(expected.c[name], actual.c[name]).label(name) for name in key_columns],
+            expected.c.count, expected.c.amount_sum, expected.c.amount_min, expected.c.amount_max,
+            actual.c.count.label("actual_count"), actual.c.amount_sum.label("actual_sum"),
+        )
+        .select_from(
+            expected.join(
+                actual,
+                and_(*[expected.c[name] == actual.c[name] for name in key_columns]),
+                full=True
+            )
+        )
+    )
+    drifted = {}
+    for row in result.all():
+        wanted = (row.count or 0, row.amount_sum or 0, row.amount_min, row.amount_max)
+        have = (row.actual_count or 0, row.actual_sum or 0)
+        if wanted[:2] != have:
+            drifted[(row.day, row.currency, row.status, row.payment_method)] = (wanted, have)
+    return drifted
+
+
+async def reconcile_day(db: AsyncSession, day: date, repair: bool = True) -> int:
+    """
+    Rollupni payments bilan solishtirish va faqat farq qilgan kalitlarni
+    tuzatish. Jadval lock qilinmaydi: farq (expected - actual) slot 0 ga
+    oddiy delta upsert sifatida qo'shiladi - parallel status o'tishlari
+    o'z deltalarini qo'shaveradi, hech narsa yo'qolmaydi.
+
+    Bir kunni bir vaqtda faqat bitta replica tuzatadi (advisory lock) -
+    aks holda bir drift ikki marta qo'shilardi. Farq qilgan kalitlar sonini
+    qaytaradi.
+    """
+    if repair:
+        # Snapshot lock olingandan keyin - oldingi reconciler tuzatishi ko'rinadi
+        await db.execute(select(func.pg_advisory_xact_lock(RECONCILE_LOCK, day.toordinal())))
+
+    drifted = await _drift(db, day)
+    for key, (wanted, have) in drifted.items():
+        logger.warning(f"Rollup drift {key}: expected={wanted[:2]} actual={have}")
+
+    if repair and drifted:
+        rows = []
+        # Kalitlar tartiblangan - parallel upsertlar bilan deadlock yo'q
+        for key in sorted(drifted, key=lambda k: (k[0], k[1], k[2].value, k[3])):
+            wanted, have = drifted[key]
+            rows.append({
+                "day": key[0],
+                "currency": key[1],
+                "status": key[2],
+                "payment_method": key[3],
+                "slot": 0,
+                "payment_count": wanted[0] - have[0],
+                "amount_sum": wanted[1] - have[1],
+                "amount_min": wanted[2],
+                "amount_max": wanted[3],
+            })
+        await _upsert_deltas(db, rows)
+    if repair:
+        await db.commit()
+
+    return len(drifted)
+
+
+async def run_reconcile_loop(session_factory) -> None:
+    """Background task - oxirgi ROLLUP_RECONCILE_DAYS kunni davriy tekshirish"""
+    while True:
+        await asyncio.sleep(settings.ROLLUP_RECONCILE_INTERVAL)
+        try:
+            today = datetime.utcnow().date()
+            for offset in range(settings.ROLLUP_RECONCILE_DAYS):
+                async with session_factory() as db:
+                    drifted = await reconcile_day(db, today - timedelta(days=offset))
+                if drifted:
+                    logger.warning(f"Rollup reconciliation repaired {drifted} keys")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Rollup reconciliation failed: {str(e)}")
+
+
+async def _main(args: argparse.Namespace) -> None:
+    from payment_service.app.database.session import AsyncSessionLocal
+
+    day = date.fromisoformat(args.date_from)
+    last = date.fromisoformat(args.date_to) if args.date_to else day
+    while day <= last:
+        async with AsyncSessionLocal() as db:
+            drifted = await reconcile_day(db, day, repair=not args.dry_run)
+        print(f"{day}: {drifted} drifted keys")
+        day += timedelta(days=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Payment rollup reconciliation / backfill")
+    parser.add_argument("date_from", help="YYYY-MM-DD")
+    parser.add_argument("date_to", nargs="?", help="YYYY-MM-DD (default: date_from)")
+    parser.add_argument("--dry-run", action="store_true", help="faqat tekshirish, yozmaslik")
+    asyncio.run(_main(parser.parse_args()))
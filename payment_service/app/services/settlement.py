@@ -0,0 +1,272 @@
+# payment-service/app/services/settlement.py
+# ============================================
+# PROVIDER SETTLEMENT RECONCILIATION (STREAMING MERGE-JOIN)
+# ============================================
+
+import argparse
+import asyncio
+import csv
+import gzip
+import io
+import json
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.logger import setup_logger
+from payment_service.app.models.payment import Payment, PaymentStatus, to_minor
+
+logger = setup_logger(__name__)
+
+# Settlement fayldagi status -> bizdagi kutilgan status
+SETTLEMENT_STATUS_MAP: Dict[str, PaymentStatus] = {
+    "settled": PaymentStatus.COMPLETED,
+    "completed": PaymentStatus.COMPLETED,
+    "captured": PaymentStatus.COMPLETED,
+    "refunded": PaymentStatus.REFUNDED,
+    "failed": PaymentStatus.FAILED,
+    "declined": PaymentStatus.FAILED,
+    "cancelled": PaymentStatus.CANCELLED,
+    "voided": PaymentStatus.CANCELLED,
+}
+
+# Settlement faylida bo'lishi kerak bo'lgan statuslar
+SETTLED_STATUSES = frozenset({PaymentStatus.COMPLETED, PaymentStatus.REFUNDED})
+
+# Bitta tranzaksiyaning bir nechta qatori (masalan sale + refund) - yakuniy
+# status shu tartibda ustun
+STATUS_PRECEDENCE = (
+    PaymentStatus.REFUNDED, PaymentStatus.COMPLETED, PaymentStatus.CANCELLED, PaymentStatus.FAILED
+)
+
+MISSING_IN_DB = "missing_in_db"
+MISSING_IN_SETTLEMENT = "missing_in_settlement"
+AMOUNT_DRIFT = "amount_drift"
+STATUS_DRIFT = "status_drift"
+
+# (provider_transaction_id, amount_minor, status)
+SettlementRow = Tuple[str, int, Optional[str]]
+# (provider_transaction_id, payment_id, amount_minor, status)
+PaymentRow = Tuple[str, str, int, PaymentStatus]
+
+
+class SettlementOrderError(ValueError):
+    """Fayl provider_transaction_id bo'yicha (byte tartibida) saralanmagan"""
+
+
+def open_text(path: str) -> TextIO:
+    if path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def read_settlements(handle: TextIO, delimiter: str = ",") -> Iterator[SettlementRow]:
+    """
+    Settlement CSV ni qatorma-qator o'qish (xotirada faqat joriy qator).
+
+    Header: provider_transaction_id, amount, [status]. Fayl `LC_ALL=C sort`
+    bilan saralangan bo'lishi kerak - tartib buzilsa SettlementOrderError.
+    """
+    reader = csv.reader(handle, delimiter=delimiter)
+    header = [column.strip().lower() for column in next(reader)]
+    id_index = header.index("provider_transaction_id")
+    amount_index = header.index("amount")
+    status_index = header.index("status") if "status" in header else None
+
+    previous = ""
+    for line_number, row in enumerate(reader, start=2):
+        if not row:
+            continue
+        transaction_id = row[id_index]
+        if transaction_id < previous:
+            raise SettlementOrderError(
+                f"Line {line_number}: {transaction_id!r} < {previous!r} - file is not sorted"
+            )
+        previous = transaction_id
+        status = row[status_index].strip().lower() if status_index is not None else None
+        yield transaction_id, to_minor(row[amount_index]), status
+
+
+def _merge_rows(rows: List[SettlementRow]) -> SettlementRow:
+    """
+    Bir xil provider_transaction_id li qatorlar -> bitta qator: status -
+    STATUS_PRECEDENCE bo'yicha eng ustuni, summa - birinchi refund bo'lmagan
+    (sale / capture) qator summasi
+    """
+    if len(rows) == 1:
+        return rows[0]
+
+    def rank(row: SettlementRow) -> int:
+        expected = SETTLEMENT_STATUS_MAP.get(row[2]) if row[2] else None
+        return STATUS_PRECEDENCE.index(expected) if expected in STATUS_PRECEDENCE else len(STATUS_PRECEDENCE)
+
+    charges = [row for row in rows if SETTLEMENT_STATUS_MAP.get(row[2]) != PaymentStatus.REFUNDED]
+    amount = charges[0][1] if charges else abs(rows[0][1])
+    return rows[0][0], amount, min(rows, key=rank)[2]
+
+
+def group_settlements(rows: Iterator[SettlementRow]) -> Iterator[SettlementRow]:
+    """
+    Saralangan oqimda ketma-ket kelgan bir xil id li qatorlarni birlashtirish -
+    merge_join har bir tranzaksiyani bitta payment qatori bilan solishtiradi
+    (aks holda ikkinchi qator cursor o'tib ketgach missing_in_db bo'lardi)
+    """
+    group: List[SettlementRow] = []
+    for row in rows:
+        if group and row[0] != group[0][0]:
+            yield _merge_rows(group)
+            group = []
+        group.append(row)
+    if group:
+        yield _merge_rows(group)
+
+
+async def stream_payments(db: AsyncSession, batch_size: int = 10000) -> AsyncIterator[PaymentRow]:
+    """
+    provider_transaction_id bo'yicha saralangan server-side cursor.
+
+    COLLATE "C" - Python string tartibi bilan bir xil va
+    ix_payments_provider_transaction_id_c index bo'yicha o'qiladi.
+    """
+    transaction_id = Payment.provider_transaction_id.collate("C")
+    result = await db.stream(
+        select(Payment.provider_transaction_id, Payment.id, Payment.amount_minor, Payment.status)
+        .where(Payment.provider_transaction_id.isnot(None))
+        .order_by(transaction_id)
+        .execution_options(yield_per=batch_size)
+    )
+    async for provider_transaction_id, payment_id, amount_minor, status in result:
+        yield provider_transaction_id, str(payment_id), amount_minor, status
+
+
+@dataclass
+class ReconciliationSummary:
+    settlement_rows: int = 0
+    payment_rows: int = 0
+    matched: int = 0
+    mismatches: Dict[str, int] = field(default_factory=lambda: {
+        MISSING_IN_DB: 0,
+        MISSING_IN_SETTLEMENT: 0,
+        AMOUNT_DRIFT: 0,
+        STATUS_DRIFT: 0,
+    })
+    elapsed: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "settlement_rows": self.settlement_rows,
+            "payment_rows": self.payment_rows,
+            "matched": self.matched,
+            "mismatches": self.mismatches,
+            "elapsed_seconds": round(self.elapsed, 2),
+        }
+
+
+async def merge_join(
+        settlements: Iterator[SettlementRow],
+        payments: AsyncIterator[PaymentRow],
+        summary: ReconciliationSummary
+) -> AsyncIterator[Tuple[str, str, Optional[str], Optional[int], Optional[int], Optional[str], Optional[str]]]:
+    """
+    Ikkala saralangan oqimni bitta o'tishda solishtirish - xotira O(1).
+    settlements da id lar takrorlanmasligi kerak (group_settlements).
+
+    Yield: (kind, provider_transaction_id, payment_id, settlement_amount,
+    payment_amount, settlement_status, payment_status)
+    """
+    settlement = next(settlements, None)
+    payment = await anext(payments, None)
+
+    while settlement is not None or payment is not None:
+        if payment is None or (settlement is not None and settlement[0] < payment[0]):
+            yield MISSING_IN_DB, settlement[0], None, settlement[1], None, settlement[2], None
+            settlement = next(settlements, None)
+            continue
+
+        if settlement is None or payment[0] < settlement[0]:
+            if payment[3] in SETTLED_STATUSES:
+                yield MISSING_IN_SETTLEMENT, payment[0], payment[1], None, payment[2], None, payment[3].value
+            payment = await anext(payments, None)
+            continue
+
+        transaction_id, settlement_amount, settlement_status = settlement
+        _, payment_id, payment_amount, payment_status = payment
+        expected_status = SETTLEMENT_STATUS_MAP.get(settlement_status) if settlement_status else None
+
+        if settlement_amount != payment_amount:
+            yield (AMOUNT_DRIFT, transaction_id, payment_id, settlement_amount, payment_amount,
+                   settlement_status, payment_status.value)
+        elif expected_status is not None and expected_status != payment_status:
+            yield (STATUS_DRIFT, transaction_id, payment_id, settlement_amount, payment_amount,
+                   settlement_status, payment_status.value)
+        else:
+            summary.matched += 1
+
+        settlement = next(settlements, None)
+        payment = await anext(payments, None)
+
+
+def _count_settlements(rows: Iterator[SettlementRow], summary: ReconciliationSummary) -> Iterator[SettlementRow]:
+    for row in rows:
+        summary.settlement_rows += 1
+        if summary.settlement_rows % 1_000_000 == 0:
+            logger.info(f"Reconciled {summary.settlement_rows} settlement rows")
+        yield row
+
+
+async def _count_payments(rows: AsyncIterator[PaymentRow], summary: ReconciliationSummary) -> AsyncIterator[PaymentRow]:
+    async for row in rows:
+        summary.payment_rows += 1
+        yield row
+
+
+async def reconcile(
+        db: AsyncSession,
+        settlement_path: str,
+        report_path: str,
+        delimiter: str = ","
+) -> ReconciliationSummary:
+    """
+    Settlement faylni payments bilan solishtirib, mismatchlarni CSV
+    (.gz bo'lsa siqilgan) reportga yozish
+    """
+    summary = ReconciliationSummary()
+    started = time.perf_counter()
+    opener = gzip.open if report_path.endswith(".gz") else open
+
+    with open_text(settlement_path) as handle, opener(report_path, "wt", newline="") as report:
+        writer = csv.writer(report)
+        writer.writerow([
+            "kind", "provider_transaction_id", "payment_id",
+            "settlement_amount_minor", "payment_amount_minor",
+            "settlement_status", "payment_status"
+        ])
+        async for mismatch in merge_join(
+                group_settlements(_count_settlements(read_settlements(handle, delimiter), summary)),
+                _count_payments(stream_payments(db), summary),
+                summary
+        ):
+            summary.mismatches[mismatch[0]] += 1
+            writer.writerow(mismatch)
+
+    summary.elapsed = time.perf_counter() - started
+    return summary
+
+
+async def _main(args: argparse.Namespace) -> None:
+    from payment_service.app.database.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        summary = await reconcile(db, args.settlement_file, args.report, args.delimiter)
+    print(json.dumps(summary.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Provider settlement reconciliation")
+    parser.add_argument("settlement_file", help="CSV (yoki .csv.gz), LC_ALL=C sort bilan saralangan")
+    parser.add_argument("--report", default="settlement_report.csv.gz", help="mismatch report (.gz siqiladi)")
+    parser.add_argument("--delimiter", default=",")
+    asyncio.run(_main(parser.parse_args()))
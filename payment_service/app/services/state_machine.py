@@ -0,0 +1,138 @@
+# payment-service/app/services/state_machine.py
+# ============================================
+# PAYMENT STATE MACHINE
+# ============================================
+
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.exceptions import ConflictException, NotFoundException
+from payment_service.app.models.payment import Payment, PaymentStatus
+from payment_service.app.services import rollups
+from payment_service.app.services.retry_policy import next_attempt_for
+
+
+# Qaysi holatdan qaysi holatlarga o'tish mumkin
+ALLOWED_TRANSITIONS: Dict[PaymentStatus, FrozenSet[PaymentStatus]] = {
+    PaymentStatus.PENDING: frozenset({
+        PaymentStatus.PROCESSING,
+        PaymentStatus.COMPLETED,
+        PaymentStatus.FAILED,
+        PaymentStatus.CANCELLED,
+    }),
+    PaymentStatus.PROCESSING: frozenset({
+        PaymentStatus.COMPLETED,
+        PaymentStatus.FAILED,
+        PaymentStatus.CANCELLED,
+    }),
+    PaymentStatus.FAILED: frozenset({PaymentStatus.PROCESSING}),
+    PaymentStatus.COMPLETED: frozenset({PaymentStatus.REFUNDED}),
+    PaymentStatus.CANCELLED: frozenset(),
+    PaymentStatus.REFUNDED: frozenset(),
+}
+
+FINAL_STATUSES: FrozenSet[PaymentStatus] = frozenset(
+    status for status, targets in ALLOWED_TRANSITIONS.items() if not targets
+)
+
+
+def allowed_sources(target: PaymentStatus) -> FrozenSet[PaymentStatus]:
+    """target holatiga qaysi holatlardan o'tish mumkin"""
+    return frozenset(
+        source for source, targets in ALLOWED_TRANSITIONS.items() if target in targets
+    )
+
+
+class PaymentStateConflict(ConflictException):
+    """Status o'tishi precondition dan o'tmadi (boshqa request o'zgartirib bo'lgan)"""
+
+    def __init__(
+            self,
+            payment_id: UUID,
+            target: PaymentStatus,
+            current: Optional[PaymentStatus] = None,
+            version: Optional[int] = None
+    ):
+        self.payment_id = payment_id
+        self.target = target
+        self.current = current
+        self.version = version
+        current_text = current.value if current else "unknown"
+        super().__init__(
+            f"Payment {payment_id} cannot move from {current_text} to {target.value}",
+            "payment"
+        )
+
+
+async def transition(
+        db: AsyncSession,
+        payment_id: UUID,
+        target: PaymentStatus,
+        *,
+        user_id: Optional[str] = None,
+        expected_version: Optional[int] = None,
+        from_statuses: Optional[Iterable[PaymentStatus]] = None,
+        values: Optional[Dict[str, Any]] = None
+) -> Payment:
+    """
+    Statusni bitta shartli UPDATE ... RETURNING bilan o'zgartirish.
+
+    Commit qilinmaydi - chaqiruvchi boshqa o'zgarishlar bilan birga commit qiladi
+    (payment_rollups ham shu transactionda yangilanadi).
+    Precondition bajarilmasa PaymentStateConflict, to'lov yo'q bo'lsa
+    NotFoundException (faqat xato holatida qo'shimcha SELECT qilinadi).
+    """
+    sources = allowed_sources(target)
+    if from_statuses is not None:
+        sources = sources & frozenset(from_statuses)
+
+    now = datetime.utcnow()
+    changes: Dict[str, Any] = {
+        "status": target,
+        "version": Payment.version + 1,
+        "updated_at": now,
+        "next_attempt_at": next_attempt_for(target),
+    }
+    if target == PaymentStatus.COMPLETED:
+        changes["completed_at"] = now
+    if values:
+        changes.update(values)
+
+    conditions = [Payment.id == payment_id, Payment.status.in_(sources)]
+    if user_id is not None:
+        conditions.append(Payment.user_id == user_id)
+    if expected_version is not None:
+        conditions.append(Payment.version == expected_version)
+
+    # Eski status - rollup uchun (RETURNING faqat yangi qiymatni beradi)
+    previous = (
+        select(Payment.id, Payment.status.label("previous_status"))
+        .where(Payment.id == payment_id)
+        .with_for_update()
+        .cte("previous")
+    )
+    result = await db.execute(
+        update(Payment)
+        .where(Payment.id == previous.c.id, *conditions)
+        .values(**changes)
+        .returning(Payment, previous.c.previous_status)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    row = result.first()
+    if row is not None:
+        payment, previous_status = row
+        await rollups.apply_transition(db, payment, previous_status)
+        return payment
+
+    # Nima uchun o'tmadi - faqat xato yo'lida
+    query = select(Payment.status, Payment.version).where(Payment.id == payment_id)
+    if user_id is not None:
+        query = query.where(Payment.user_id == user_id)
+    current = (await db.execute(query)).first()
+    if current is None:
+        raise NotFoundException(f"Payment {payment_id} not found", "payment")
+    raise PaymentStateConflict(payment_id, target, current.status, current.version)
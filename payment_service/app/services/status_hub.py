@@ -0,0 +1,164 @@
+# payment-service/app/services/status_hub.py
+# ============================================
+# PAYMENT STATUS HUB (PER-PROCESS SUBSCRIPTIONS FOR SSE)
+# ============================================
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Set
+
+import aio_pika
+from prometheus_client import Gauge
+
+from shared.config import get_settings
+from shared.logger import setup_logger
+from payment_service.app.models.payment import PaymentStatus
+from payment_service.app.services import state_machine
+from payment_service.app.services.rabbitmq import PAYMENT_EVENTS_EXCHANGE
+
+settings = get_settings()
+logger = setup_logger(__name__)
+
+# Chiqish o'tishi yo'q statuslar (state machine dan) - FAILED qayta urinilishi
+# (FAILED -> PROCESSING), COMPLETED esa REFUNDED bo'lishi mumkin, ular final emas
+FINAL_STATUSES = frozenset(status.value for status in state_machine.FINAL_STATUSES)
+
+SSE_SUBSCRIBERS = Gauge(
+    "payment_sse_subscribers",
+    "Open payment status streams in this process"
+)
+
+
+@dataclass
+class Subscription:
+    index: Dict[str, Set[asyncio.Queue]]
+    key: str
+    queue: asyncio.Queue
+
+
+def status_update(event: dict, routing_key: str) -> Optional[dict]:
+    """payment.* event -> {payment_id, user_id, status, version}"""
+    if not event.get("payment_id"):
+        return None
+    status = event.get("status")
+    if status is None:
+        action = routing_key.rsplit(".", 1)[-1]
+        status = PaymentStatus.PENDING.value if action == "created" else action
+    return {
+        "payment_id": str(event["payment_id"]),
+        "user_id": event.get("user_id"),
+        "status": status,
+        "version": event.get("version"),
+    }
+
+
+class StatusHub:
+    """
+    Process dagi barcha SSE ulanishlari uchun bitta RabbitMQ subscription.
+
+    Har bir process o'zining exclusive (auto-delete) queue sini payment.*
+    ga bog'laydi; kelgan event faqat shu payment / user ga obuna bo'lgan
+    lokal queue larga tarqatiladi. Final statuslar qisqa muddat cache da -
+    kech ulangan client javobni darhol oladi.
+    """
+
+    def __init__(self, queue_size: int = None, cache_seconds: float = None, cache_size: int = None):
+        self.queue_size = queue_size or settings.SSE_QUEUE_SIZE
+        self.cache_seconds = cache_seconds or settings.SSE_FINAL_CACHE_SECONDS
+        self.cache_size = cache_size or settings.SSE_FINAL_CACHE_SIZE
+        self._by_payment: Dict[str, Set[asyncio.Queue]] = {}
+        self._by_user: Dict[str, Set[asyncio.Queue]] = {}
+        self._final: "OrderedDict[str, tuple]" = OrderedDict()
+        self._channel = None
+        self._queue = None
+        self._consumer_tag = None
+
+    @property
+    def running(self) -> bool:
+        return self._consumer_tag is not None
+
+    async def start(self, channel) -> None:
+        self._channel = channel
+        exchange = await channel.declare_exchange(
+            PAYMENT_EVENTS_EXCHANGE, aio_pika.ExchangeType.TOPIC, durable=True
+        )
+        # Nomsiz exclusive queue - process to'xtasa RabbitMQ o'zi o'chiradi
+        self._queue = await channel.declare_queue(exclusive=True, auto_delete=True)
+        await self._queue.bind(exchange, routing_key="payment.*")
+        self._consumer_tag = await self._queue.consume(self._on_message, no_ack=True)
+        logger.info("Payment status hub subscribed to payment.*")
+
+    async def stop(self) -> None:
+        if self._queue is not None and self._consumer_tag:
+            await self._queue.cancel(self._consumer_tag)
+        self._consumer_tag = None
+        if self._channel is not None:
+            await self._channel.close()
+            self._channel = None
+
+    async def _on_message(self, message) -> None:
+        try:
+            event = json.loads(message.body)
+        except ValueError:
+            return
+        self.publish(event, message.routing_key)
+
+    def publish(self, event: dict, routing_key: str) -> None:
+        update = status_update(event, routing_key)
+        if update is None:
+            return
+        if update["status"] in FINAL_STATUSES:
+            self._remember(update)
+
+        targets = set(self._by_payment.get(update["payment_id"], ()))
+        if update["user_id"]:
+            targets |= self._by_user.get(update["user_id"], set())
+        for queue in targets:
+            if queue.full():
+                # Sekin client - eng eskisini tashlash (oxirgi status muhim)
+                queue.get_nowait()
+            queue.put_nowait(update)
+
+    def _remember(self, update: dict) -> None:
+        self._final[update["payment_id"]] = (time.monotonic() + self.cache_seconds, update)
+        self._final.move_to_end(update["payment_id"])
+        while len(self._final) > self.cache_size:
+            self._final.popitem(last=False)
+
+    def final_state(self, payment_id: str) -> Optional[dict]:
+        entry = self._final.get(payment_id)
+        if entry is None:
+            return None
+        expires_at, update = entry
+        if expires_at < time.monotonic():
+            del self._final[payment_id]
+            return None
+        return update
+
+    def _subscribe(self, index: Dict[str, Set[asyncio.Queue]], key: str) -> Subscription:
+        subscription = Subscription(index, key, asyncio.Queue(maxsize=self.queue_size))
+        index.setdefault(key, set()).add(subscription.queue)
+        SSE_SUBSCRIBERS.inc()
+        return subscription
+
+    def subscribe_payment(self, payment_id: str) -> Subscription:
+        return self._subscribe(self._by_payment, payment_id)
+
+    def subscribe_user(self, user_id: str) -> Subscription:
+        return self._subscribe(self._by_user, user_id)
+
+    @staticmethod
+    def unsubscribe(subscription: Subscription) -> None:
+        subscribers = subscription.index.get(subscription.key)
+        if subscribers is None or subscription.queue not in subscribers:
+            return
+        SSE_SUBSCRIBERS.dec()
+        subscribers.discard(subscription.queue)
+        if not subscribers:
+            del subscription.index[subscription.key]
+
+
+status_hub = StatusHub()
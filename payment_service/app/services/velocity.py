@@ -0,0 +1,337 @@
+# payment-service/app/services/velocity.py
+# ============================================
+# PER-USER VELOCITY LIMITS (SLIDING WINDOW)
+# ============================================
+
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import redis.asyncio as redis
+from prometheus_client import Counter
+
+from shared.config import get_settings
+from shared.exceptions import BaseException
+from shared.logger import setup_logger
+
+settings = get_settings()
+logger = setup_logger(__name__)
+
+VELOCITY_REJECTED = Counter(
+    "payment_velocity_rejected_total",
+    "Payments rejected by velocity limits",
+    ["window", "kind"]
+)
+VELOCITY_FALLBACK = Counter(
+    "payment_velocity_fallback_total",
+    "Velocity checks served by the in-process fallback"
+)
+
+
+@dataclass(frozen=True)
+class Window:
+    name: str
+    bucket_seconds: int
+    buckets: int
+
+    @property
+    def seconds(self) -> int:
+        return self.bucket_seconds * self.buckets
+
+
+# Sliding window bucketlar bilan: har bir check O(buckets) = O(1)
+WINDOWS = (
+    Window("minute", bucket_seconds=10, buckets=6),
+    Window("hour", bucket_seconds=60, buckets=60),
+)
+
+# Valyuta bo'yicha limitlar (amount - valyuta birligida). VELOCITY_LIMITS
+# env (JSON) shu strukturani qisman yoki to'liq almashtiradi.
+DEFAULT_LIMITS: Dict[str, Dict[str, float]] = {
+    "default": {
+        "count_per_minute": 10,
+        "count_per_hour": 100,
+        "amount_per_minute": 10000,
+        "amount_per_hour": 50000,
+    },
+    "UZS": {
+        "count_per_minute": 10,
+        "count_per_hour": 100,
+        "amount_per_minute": 100000000,
+        "amount_per_hour": 500000000,
+    },
+    "JPY": {
+        "count_per_minute": 10,
+        "count_per_hour": 100,
+        "amount_per_minute": 1500000,
+        "amount_per_hour": 7500000,
+    },
+}
+
+UNLIMITED = 2 ** 62
+
+
+class VelocityLimitExceeded(BaseException):
+    """Foydalanuvchi oyna ichida ruxsat etilgan son / summadan oshdi"""
+
+    def __init__(self, window: Window, kind: str, limit: int, current: int, currency: str):
+        self.window = window.name
+        self.kind = kind
+        self.limit = limit
+        self.current = current
+        self.currency = currency
+        self.retry_after = window.bucket_seconds
+        super().__init__(
+            f"Payment {kind} limit per {window.name} exceeded for {currency}",
+            "VELOCITY_LIMIT_EXCEEDED"
+        )
+
+    def to_dict(self) -> dict:
+        to_units = (lambda v: v / 100) if self.kind == "amount" else (lambda v: v)
+        return {
+            "error": self.code,
+            "message": self.message,
+            "window": self.window,
+            "kind": self.kind,
+            "currency": self.currency,
+            "limit": to_units(self.limit),
+            "current": to_units(self.current),
+            "retry_after": self.retry_after,
+        }
+
+
+# Bitta round-trip, atomik: eski bucketlarni tozalash, yig'ish, tekshirish
+# va faqat hamma oynalar o'tsa increment (reservation). Field: "<bucket>:c" / "<bucket>:a".
+# Return: {0, bucket_1, ..., bucket_n} - ruxsat (release uchun bucketlar),
+#         {oyna_index, kind(1=count,2=amount), current} - limitdan oshdi
+VELOCITY_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1])
+local add_count = tonumber(ARGV[1])
+local add_amount = tonumber(ARGV[2])
+local current_buckets = {}
+
+for i, key in ipairs(KEYS) do
+    local base = 2 + (i - 1) * 4
+    local bucket_seconds = tonumber(ARGV[base + 1])
+    local buckets = tonumber(ARGV[base + 2])
+    local count_limit = tonumber(ARGV[base + 3])
+    local amount_limit = tonumber(ARGV[base + 4])
+    local current = math.floor(now / bucket_seconds)
+    local oldest = current - buckets + 1
+
+    local fields = redis.call('HGETALL', key)
+    local count, amount = 0, 0
+    for j = 1, #fields, 2 do
+        local field = fields[j]
+        local sep = string.find(field, ':', 1, true)
+        local bucket = tonumber(string.sub(field, 1, sep - 1))
+        if bucket < oldest then
+            redis.call('HDEL', key, field)
+        elseif string.sub(field, sep + 1) == 'c' then
+            count = count + tonumber(fields[j + 1])
+        else
+            amount = amount + tonumber(fields[j + 1])
+        end
+    end
+
+    if count + add_count > count_limit then
+        return {i, 1, count}
+    end
+    if amount + add_amount > amount_limit then
+        return {i, 2, amount}
+    end
+    current_buckets[i] = current
+end
+
+for i, key in ipairs(KEYS) do
+    local base = 2 + (i - 1) * 4
+    redis.call('HINCRBY', key, current_buckets[i] .. ':c', add_count)
+    redis.call('HINCRBY', key, current_buckets[i] .. ':a', add_amount)
+    redis.call('EXPIRE', key, tonumber(ARGV[base + 1]) * tonumber(ARGV[base + 2]))
+end
+return {0, unpack(current_buckets)}
+"""
+
+
+@dataclass(frozen=True)
+class Reservation:
+    """Oynalarga qo'shilgan ulush - to'lov yozilmasa release() qaytaradi"""
+    keys: Tuple[str, ...]
+    buckets: Tuple[int, ...]
+    count: int
+    amount_minor: int
+    local: bool = False
+
+
+class LocalVelocityStore:
+    """
+    Redis yo'q / ishlamayotganda - shu process ichida xuddi shu bucket algoritmi
+    (replicalar orasida umumiy emas, lekin limitsiz qolishdan yaxshi)
+    """
+
+    def __init__(self):
+        # key -> {bucket: [count, amount]}
+        self._windows: Dict[str, Dict[int, List[int]]] = {}
+
+    def check_and_add(
+            self,
+            keys: List[str],
+            limits: List[Tuple[Window, int, int]],
+            add_count: int,
+            add_amount: int
+    ) -> List[int]:
+        now = int(time.time())
+        current_buckets = []
+        for index, (key, (window, count_limit, amount_limit)) in enumerate(zip(keys, limits), start=1):
+            current = now // window.bucket_seconds
+            oldest = current - window.buckets + 1
+            buckets = self._windows.setdefault(key, {})
+            for bucket in [b for b in buckets if b < oldest]:
+                del buckets[bucket]
+            count = sum(values[0] for values in buckets.values())
+            amount = sum(values[1] for values in buckets.values())
+            if count + add_count > count_limit:
+                return [index, 1, count]
+            if amount + add_amount > amount_limit:
+                return [index, 2, amount]
+            current_buckets.append(current)
+
+        for key, current in zip(keys, current_buckets):
+            values = self._windows[key].setdefault(current, [0, 0])
+            values[0] += add_count
+            values[1] += add_amount
+        return [0, *current_buckets]
+
+    def release(self, reservation: Reservation) -> None:
+        for key, bucket in zip(reservation.keys, reservation.buckets):
+            values = self._windows.get(key, {}).get(bucket)
+            if values is not None:
+                values[0] -= reservation.count
+                values[1] -= reservation.amount_minor
+
+
+class VelocityLimiter:
+    """
+    Foydalanuvchi + valyuta bo'yicha daqiqa / soat oynalarida to'lovlar soni
+    va summasini cheklash. Redis da Lua script (bitta EVALSHA, tekshirish va
+    reservation atomik), xato bo'lsa in-process fallback.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, float]] = None):
+        self.limits = limits or self._load_limits()
+        self.redis: Optional[redis.Redis] = None
+        self._script = None
+        self.local = LocalVelocityStore()
+
+    @staticmethod
+    def _load_limits() -> Dict[str, Dict[str, float]]:
+        limits = {currency: dict(values) for currency, values in DEFAULT_LIMITS.items()}
+        if settings.VELOCITY_LIMITS:
+            for currency, values in json.loads(settings.VELOCITY_LIMITS).items():
+                limits.setdefault(currency, dict(limits["default"])).update(values)
+        return limits
+
+    async def connect(self) -> None:
+        try:
+            client = redis.from_url(settings.REDIS_URL, max_connections=settings.REDIS_MAX_CONNECTIONS)
+            await client.ping()
+            self.redis = client
+            self._script = client.register_script(VELOCITY_LUA)
+            logger.info("Velocity limiter using Redis")
+        except Exception as e:
+            logger.warning(f"Velocity limiter Redis unavailable, using in-process counters: {str(e)}")
+            self.redis = None
+
+    async def close(self) -> None:
+        if self.redis:
+            await self.redis.close()
+
+    def _window_limits(self, currency: str) -> List[Tuple[Window, int, int]]:
+        values = self.limits.get(currency, self.limits["default"])
+        result = []
+        for window in WINDOWS:
+            count_limit = values.get(f"count_per_{window.name}")
+            amount_limit = values.get(f"amount_per_{window.name}")
+            result.append((
+                window,
+                int(count_limit) if count_limit else UNLIMITED,
+                int(round(amount_limit * 100)) if amount_limit else UNLIMITED,
+            ))
+        return result
+
+    async def reserve(self, user_id: str, currency: str, amount: float, count: int = 1) -> Optional[Reservation]:
+        """
+        Limitni tekshirib, atomik ravishda hisobga qo'shish; oshsa
+        VelocityLimitExceeded. amount - shu so'rovdagi umumiy summa (valyuta
+        birligida). To'lov yozilmasa reservation release() bilan qaytariladi.
+        """
+        if not settings.VELOCITY_ENABLED:
+            return None
+
+        limits = self._window_limits(currency)
+        keys = [f"velocity:{user_id}:{currency}:{window.name}" for window, _, _ in limits]
+        amount_minor = int(round(amount * 100))
+
+        result = None
+        local = False
+        if self.redis is not None:
+            args = [count, amount_minor]
+            for window, count_limit, amount_limit in limits:
+                args += [window.bucket_seconds, window.buckets, count_limit, amount_limit]
+            try:
+                result = await self._script(keys=keys, args=args)
+            except Exception as e:
+                logger.warning(f"Velocity Redis check failed, falling back: {str(e)}")
+        if result is None:
+            VELOCITY_FALLBACK.inc()
+            local = True
+            result = self.local.check_and_add(keys, limits, count, amount_minor)
+
+        if int(result[0]) == 0:
+            return Reservation(tuple(keys), tuple(int(bucket) for bucket in result[1:]), count, amount_minor, local)
+
+        window, count_limit, amount_limit = limits[int(result[0]) - 1]
+        kind = "count" if int(result[1]) == 1 else "amount"
+        VELOCITY_REJECTED.labels(window.name, kind).inc()
+        raise VelocityLimitExceeded(
+            window,
+            kind,
+            count_limit if kind == "count" else amount_limit,
+            int(result[2]),
+            currency
+        )
+
+    async def release(self, reservation: Optional[Reservation]) -> None:
+        """Yozilmagan to'lov ulushini qaytarish (manfiy HINCRBY o'sha bucketlarga)"""
+        if reservation is None:
+            return
+        if reservation.local:
+            self.local.release(reservation)
+            return
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                for key, bucket in zip(reservation.keys, reservation.buckets):
+                    pipe.hincrby(key, f"{bucket}:c", -reservation.count)
+                    pipe.hincrby(key, f"{bucket}:a", -reservation.amount_minor)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Velocity reservation release failed: {str(e)}")
+
+    @asynccontextmanager
+    async def reserved(
+            self, user_id: str, currency: str, amount: float, count: int = 1
+    ) -> AsyncIterator[Optional[Reservation]]:
+        """reserve(); blok xato bilan tugasa (dublikat, DB xatosi) - release()"""
+        reservation = await self.reserve(user_id, currency, amount, count)
+        try:
+            yield reservation
+        except (Exception, asyncio.CancelledError):
+            await self.release(reservation)
+            raise
+
+
+velocity_limiter = VelocityLimiter()
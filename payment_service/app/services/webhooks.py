@@ -0,0 +1,348 @@
+# payment-service/app/services/webhooks.py
+# ============================================
+# MERCHANT WEBHOOK DISPATCHER
+# ============================================
+
+import asyncio
+import hashlib
+import hmac
+import json
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from prometheus_client import Counter, Histogram
+from sqlalchemy import select
+
+from shared.config import get_settings
+from shared.exceptions import ServiceUnavailableException
+from shared.logger import setup_logger
+from payment_service.app.models.webhook import WebhookEndpoint
+from payment_service.app.services.notification import EventConsumer
+
+settings = get_settings()
+logger = setup_logger(__name__)
+
+WEBHOOK_QUEUE = "payment_webhooks"
+SIGNATURE_HEADER = "X-Webhook-Signature"
+# Har bir endpoint uchun eslab qolinadigan oxirgi yetkazilgan to'lovlar soni
+DELIVERED_CACHE_SIZE = 10000
+
+WEBHOOK_DELIVERIES = Counter(
+    "payment_webhook_deliveries_total",
+    "Webhook delivery attempts",
+    ["result"]
+)
+WEBHOOK_LATENCY = Histogram(
+    "payment_webhook_latency_seconds",
+    "Webhook HTTP request latency"
+)
+
+
+def sign_payload(secret: str, timestamp: int, body: bytes) -> str:
+    """HMAC-SHA256 imzo: t=<timestamp>,v1=<hex>"""
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+class TokenBucket:
+    """Endpoint uchun rate limit"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """
+    Ketma-ket xatolar threshold ga yetsa cooldown davomida endpoint ga so'rov yuborilmaydi,
+    keyin bitta sinov so'rovi (half-open) o'tkaziladi
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at < self.cooldown or self._trial_running:
+            return False
+        self._trial_running = True
+        return True
+
+    @property
+    def half_open(self) -> bool:
+        return self._trial_running
+
+    def release_trial(self) -> None:
+        """Sinov so'rovi natijasiz tugadi (kutilmagan xato / cancel) - keyingisiga yo'l ochiladi"""
+        self._trial_running = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_running = False
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+@dataclass
+class _Pending:
+    """Endpoint + payment uchun yuborilishi kutilayotgan eng yangi event"""
+    event: dict
+    waiters: List[asyncio.Future] = field(default_factory=list)
+
+
+class _EndpointState:
+    def __init__(self, endpoint_id: str, url: str, secret: str):
+        self.endpoint_id = endpoint_id
+        self.url = url
+        self.secret = secret
+        self.semaphore = asyncio.Semaphore(settings.WEBHOOK_ENDPOINT_CONCURRENCY)
+        self.bucket = TokenBucket(settings.WEBHOOK_ENDPOINT_RATE)
+        self.circuit = CircuitBreaker(settings.WEBHOOK_CIRCUIT_THRESHOLD, settings.WEBHOOK_CIRCUIT_COOLDOWN)
+        self.pending: Dict[str, _Pending] = {}
+        self.active: Set[str] = set()
+        # payment_id -> oxirgi yetkazilgan (version, timestamp), LRU
+        self.delivered: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+
+    def is_stale(self, payment_id: str, event: dict) -> bool:
+        """Yetkazilganidan yangi bo'lmagan event (retry queue dan qaytgan eskisi yoki dublikat)"""
+        last = self.delivered.get(payment_id)
+        return last is not None and _event_order(event) <= last
+
+    def mark_delivered(self, payment_id: str, event: dict) -> None:
+        order = _event_order(event)
+        last = self.delivered.pop(payment_id, None)
+        self.delivered[payment_id] = max(order, last) if last is not None else order
+        while len(self.delivered) > DELIVERED_CACHE_SIZE:
+            self.delivered.popitem(last=False)
+
+
+def _event_order(event: dict) -> Tuple[int, str]:
+    data = event.get("data", {})
+    return int(data.get("version") or 0), event.get("timestamp") or ""
+
+
+class WebhookDispatcher:
+    """
+    payment.* eventlarini merchant URL larga yuboradi.
+
+    - har bir host uchun alohida pooled httpx client (keep-alive)
+    - endpoint bo'yicha concurrency va rate limit
+    - HMAC imzo, jitter bilan exponential backoff, circuit breaker
+    - bitta payment uchun yuborilmagan eski status yangisi bilan almashtiriladi
+      (coalescing) - merchant faqat oxirgi holatni oladi; yangisi yetkazilgandan
+      keyin retry queue dan qaytgan eski status tashlab yuboriladi
+    """
+
+    def __init__(self, session_factory, endpoint_cache_ttl: float = 30.0):
+        self.session_factory = session_factory
+        self.endpoint_cache_ttl = endpoint_cache_ttl
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._endpoints: Dict[str, _EndpointState] = {}
+        self._user_endpoints: Dict[str, Tuple[float, List[str]]] = {}
+
+    def _client_for(self, url: str) -> httpx.AsyncClient:
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        client = self._clients.get(host)
+        if client is None:
+            client = self._clients[host] = httpx.AsyncClient(
+                timeout=settings.WEBHOOK_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=settings.WEBHOOK_ENDPOINT_CONCURRENCY * 4,
+                    max_keepalive_connections=settings.WEBHOOK_ENDPOINT_CONCURRENCY * 2
+                )
+            )
+        return client
+
+    async def close(self) -> None:
+        await asyncio.gather(*[client.aclose() for client in self._clients.values()])
+        self._clients.clear()
+
+    async def _endpoints_for(self, user_id: str) -> List[_EndpointState]:
+        cached = self._user_endpoints.get(user_id)
+        if cached is None or time.monotonic() - cached[0] > self.endpoint_cache_ttl:
+            async with self.session_factory() as db:
+                rows = (await db.execute(
+                    select(WebhookEndpoint.id, WebhookEndpoint.url, WebhookEndpoint.secret).where(
+                        WebhookEndpoint.user_id == user_id,
+                        WebhookEndpoint.is_active.is_(True)
+                    )
+                )).all()
+            ids = []
+            for endpoint_id, url, secret in rows:
+                key = str(endpoint_id)
+                state = self._endpoints.get(key)
+                if state is None or state.url != url or state.secret != secret:
+                    state = self._endpoints[key] = _EndpointState(key, url, secret)
+                ids.append(key)
+            cached = self._user_endpoints[user_id] = (time.monotonic(), ids)
+        return [self._endpoints[key] for key in cached[1] if key in self._endpoints]
+
+    async def handle_event(self, event: dict, routing_key: str) -> None:
+        """
+        EventConsumer handler - barcha endpointlarga yetkazilguncha (yoki
+        yangiroq status bilan almashtirilguncha) kutadi. Xato bo'lsa consumer
+        retry queue ga o'tkazadi.
+        """
+        data = event.get("data", {})
+        user_id = data.get("user_id")
+        payment_id = data.get("payment_id")
+        if not user_id or not payment_id:
+            return
+
+        endpoints = await self._endpoints_for(user_id)
+        if not endpoints:
+            return
+
+        await asyncio.gather(*[
+            self.enqueue(state, payment_id, event) for state in endpoints
+        ])
+
+    def enqueue(self, state: _EndpointState, payment_id: str, event: dict) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        if state.is_stale(payment_id, event):
+            WEBHOOK_DELIVERIES.labels("stale").inc()
+            future.set_result(False)
+            return future
+        pending = state.pending.get(payment_id)
+        if pending is None:
+            state.pending[payment_id] = _Pending(event, [future])
+        elif _event_order(event) >= _event_order(pending.event):
+            # Eski status hali yuborilmagan - yangisi bilan almashtirish
+            pending.event = event
+            pending.waiters.append(future)
+        else:
+            # Kelgan event allaqachon eskirgan
+            future.set_result(False)
+            return future
+
+        if payment_id not in state.active:
+            state.active.add(payment_id)
+            asyncio.create_task(self._drain(state, payment_id))
+        return future
+
+    async def _drain(self, state: _EndpointState, payment_id: str) -> None:
+        try:
+            while True:
+                pending = state.pending.pop(payment_id, None)
+                if pending is None:
+                    return
+                if state.is_stale(payment_id, pending.event):
+                    for waiter in pending.waiters:
+                        if not waiter.done():
+                            waiter.set_result(False)
+                    continue
+                try:
+                    delivered = await self._deliver(state, payment_id, pending.event)
+                    if delivered:
+                        state.mark_delivered(payment_id, pending.event)
+                except Exception as e:
+                    for waiter in pending.waiters:
+                        if not waiter.done():
+                            waiter.set_exception(e)
+                    continue
+                for waiter in pending.waiters:
+                    if not waiter.done():
+                        waiter.set_result(delivered)
+        finally:
+            state.active.discard(payment_id)
+
+    async def _deliver(self, state: _EndpointState, payment_id: str, event: dict) -> bool:
+        """
+        Jitter bilan retry. Yangiroq status kelib qolsa retry to'xtatiladi.
+        """
+        body = json.dumps(event, separators=(",", ":")).encode()
+        last_error: Optional[Exception] = None
+
+        for attempt in range(settings.WEBHOOK_MAX_ATTEMPTS):
+            if attempt:
+                # full jitter: 0 .. base * 2^attempt
+                await asyncio.sleep(random.uniform(0, 0.5 * (2 ** attempt)))
+                if payment_id in state.pending:
+                    WEBHOOK_DELIVERIES.labels("superseded").inc()
+                    return False
+
+            if not state.circuit.allow():
+                WEBHOOK_DELIVERIES.labels("circuit_open").inc()
+                raise ServiceUnavailableException(
+                    f"Webhook endpoint {state.endpoint_id} circuit is open", "webhook"
+                )
+            trial = state.circuit.half_open
+
+            try:
+                async with state.semaphore:
+                    await state.bucket.acquire()
+                    timestamp = int(time.time())
+                    started = time.perf_counter()
+                    try:
+                        response = await self._client_for(state.url).post(
+                            state.url,
+                            content=body,
+                            headers={
+                                "Content-Type": "application/json",
+                                SIGNATURE_HEADER: sign_payload(state.secret, timestamp, body),
+                                "X-Webhook-Event": event.get("event", ""),
+                            }
+                        )
+                        WEBHOOK_LATENCY.observe(time.perf_counter() - started)
+                        if response.status_code < 300:
+                            state.circuit.record_success()
+                            WEBHOOK_DELIVERIES.labels("success").inc()
+                            return True
+                        last_error = RuntimeError(f"HTTP {response.status_code}")
+                        if 400 <= response.status_code < 500 and response.status_code != 429:
+                            # Merchant xatosi - qayta yuborish foyda bermaydi
+                            state.circuit.record_success()
+                            WEBHOOK_DELIVERIES.labels("rejected").inc()
+                            return False
+                    except httpx.HTTPError as e:
+                        last_error = e
+            finally:
+                # httpx.HTTPError dan boshqa xato / cancel - half-open abadiy qolmasin
+                if trial:
+                    state.circuit.release_trial()
+
+            state.circuit.record_failure()
+            WEBHOOK_DELIVERIES.labels("failure").inc()
+            logger.warning(
+                f"Webhook {state.endpoint_id} attempt {attempt + 1} failed: {last_error}"
+            )
+
+        raise ServiceUnavailableException(
+            f"Webhook delivery to {state.endpoint_id} failed: {last_error}", "webhook"
+        )
+
+
+async def start_webhook_consumer(channel, session_factory) -> Tuple[EventConsumer, WebhookDispatcher]:
+    """payment.* eventlarini webhook dispatcher ga ulash"""
+    dispatcher = WebhookDispatcher(session_factory)
+    consumer = EventConsumer(channel, WEBHOOK_QUEUE, ["payment.*"], dispatcher.handle_event)
+    await consumer.start()
+    return consumer, dispatcher
@@ -21,7 +21,7 @@ from .security import (
     create_access_token,
     verify_token
 )
-from .dependencies import get_current_user, get_user_id
+from .dependencies import get_current_user, get_user_id, get_admin_user_id
 
 __all__ = [
     "Settings",
@@ -41,5 +41,6 @@ __all__ = [
     "create_access_token",
     "verify_token",
     "get_current_user",
-    "get_user_id"
+    "get_user_id",
+    "get_admin_user_id"
 ]
\ No newline at end of file
@@ -30,6 +30,19 @@ class Settings(BaseSettings):
     DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "3600"))
     DB_POOL_PRE_PING: bool = True
     DB_ECHO: bool = DEBUG
+    # JSON: ["postgresql://replica1/...", "postgresql://replica2/..."] - bo'sh bo'lsa hammasi primary da
+    DATABASE_REPLICA_URLS: str = os.getenv("DATABASE_REPLICA_URLS", "")
+    REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+    REPLICA_HEALTH_INTERVAL: float = float(os.getenv("REPLICA_HEALTH_INTERVAL", "5"))
+    READ_YOUR_WRITES_SECONDS: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+
+    # ===== CHAT SHARDING =====
+    # JSON: {"shard0": "postgresql://...", "shard1": "postgresql://..."}
+    # Bo'sh bo'lsa barcha roomlar DATABASE_URL da turadi
+    CHAT_SHARDS: str = os.getenv("CHAT_SHARDS", "")
+    # JSON: {"room_id": "shard1"} - reshard paytida roomni qo'lda joylash
+    CHAT_SHARD_OVERRIDES: str = os.getenv("CHAT_SHARD_OVERRIDES", "")
+    CHAT_SHARD_VNODES: int = int(os.getenv("CHAT_SHARD_VNODES", "128"))
 
     # ===== REDIS SETTINGS =====
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://redis:6379/0")
@@ -42,6 +55,7 @@ class Settings(BaseSettings):
     RABBITMQ_USER: str = os.getenv("RABBITMQ_USER", "guest")
     RABBITMQ_PASSWORD: str = os.getenv("RABBITMQ_PASSWORD", "guest")
     RABBITMQ_VHOST: str = os.getenv("RABBITMQ_VHOST", "/")
+    RABBITMQ_CHANNEL_POOL_SIZE: int = int(os.getenv("RABBITMQ_CHANNEL_POOL_SIZE", "10"))
 
     @property
     def RABBITMQ_URL(self) -> str:
@@ -50,12 +64,31 @@ class Settings(BaseSettings):
             f"@{self.RABBITMQ_HOST}:{self.RABBITMQ_PORT}/{self.RABBITMQ_VHOST}"
         )
 
+    # ===== CHAT NOTIFICATIONS =====
+    CHAT_NOTIFICATION_EXCHANGE: str = os.getenv(
+        "CHAT_NOTIFICATION_EXCHANGE", "chat_notifications"
+    )
+    CHAT_NOTIFICATION_QUEUE: str = os.getenv(
+        "CHAT_NOTIFICATION_QUEUE", "chat_offline_notifications"
+    )
+    CHAT_DIGEST_EXCHANGE: str = os.getenv("CHAT_DIGEST_EXCHANGE", "chat_digests")
+    CHAT_DIGEST_CONSUMER_ENABLED: bool = os.getenv(
+        "CHAT_DIGEST_CONSUMER_ENABLED", "True"
+    ) == "True"
+    CHAT_DIGEST_WINDOW: int = int(os.getenv("CHAT_DIGEST_WINDOW", "300"))  # sekund
+    CHAT_DIGEST_CONCURRENCY: int = int(os.getenv("CHAT_DIGEST_CONCURRENCY", "20"))
+    # user lar shu sondagi queue ga bo'linadi, har queue da bitta aktiv consumer
+    CHAT_DIGEST_SHARDS: int = int(os.getenv("CHAT_DIGEST_SHARDS", "16"))
+    CHAT_ROOM_MEMBERS_CACHE_TTL: int = int(os.getenv("CHAT_ROOM_MEMBERS_CACHE_TTL", "30"))  # sekund
+
     # ===== SECURITY SETTINGS =====
     SECRET_KEY: str = os.getenv(
         "SECRET_KEY",
         "your-secret-key-change-in-production"
     )
     ALGORITHM: str = "HS256"
+    # JWT "roles" claim da shu rol bo'lsa - admin / ops endpointlar
+    ADMIN_ROLE: str = os.getenv("ADMIN_ROLE", "admin")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(
         os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
     )
@@ -88,6 +121,101 @@ class Settings(BaseSettings):
     RATE_LIMIT_REQUESTS: int = int(os.getenv("RATE_LIMIT_REQUESTS", "100"))
     RATE_LIMIT_PERIOD: int = int(os.getenv("RATE_LIMIT_PERIOD", "60"))
 
+    # ===== IDEMPOTENCY =====
+    IDEMPOTENCY_KEY_TTL_HOURS: int = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+    IDEMPOTENCY_CLEANUP_INTERVAL: int = int(os.getenv("IDEMPOTENCY_CLEANUP_INTERVAL", "3600"))
+    IDEMPOTENCY_CLEANUP_BATCH: int = int(os.getenv("IDEMPOTENCY_CLEANUP_BATCH", "1000"))
+
+    # ===== OUTBOX RELAY =====
+    OUTBOX_RELAY_ENABLED: bool = os.getenv("OUTBOX_RELAY_ENABLED", "True") == "True"
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "200"))
+    OUTBOX_POLL_INTERVAL: float = float(os.getenv("OUTBOX_POLL_INTERVAL", "0.5"))
+    OUTBOX_RETENTION_HOURS: int = int(os.getenv("OUTBOX_RETENTION_HOURS", "72"))
+
+    # ===== EVENT CONSUMERS =====
+    CONSUMER_PREFETCH: int = int(os.getenv("CONSUMER_PREFETCH", "100"))
+    CONSUMER_CONCURRENCY: int = int(os.getenv("CONSUMER_CONCURRENCY", "20"))
+    CONSUMER_MAX_RETRIES: int = int(os.getenv("CONSUMER_MAX_RETRIES", "5"))
+    CONSUMER_RETRY_BASE_DELAY: float = float(os.getenv("CONSUMER_RETRY_BASE_DELAY", "1.0"))
+
+    # ===== MERCHANT WEBHOOKS =====
+    WEBHOOKS_ENABLED: bool = os.getenv("WEBHOOKS_ENABLED", "True") == "True"
+    WEBHOOK_TIMEOUT: float = float(os.getenv("WEBHOOK_TIMEOUT", "5.0"))
+    WEBHOOK_ENDPOINT_CONCURRENCY: int = int(os.getenv("WEBHOOK_ENDPOINT_CONCURRENCY", "4"))
+    WEBHOOK_ENDPOINT_RATE: float = float(os.getenv("WEBHOOK_ENDPOINT_RATE", "20"))  # request/sekund
+    WEBHOOK_MAX_ATTEMPTS: int = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "3"))
+    WEBHOOK_CIRCUIT_THRESHOLD: int = int(os.getenv("WEBHOOK_CIRCUIT_THRESHOLD", "5"))
+    WEBHOOK_CIRCUIT_COOLDOWN: float = float(os.getenv("WEBHOOK_CIRCUIT_COOLDOWN", "30"))
+
+    # ===== PAYMENT ROLLUPS =====
+    ROLLUP_SLOTS: int = int(os.getenv("ROLLUP_SLOTS", "8"))  # hot row lock ni bo'lish uchun
+    ROLLUP_RECONCILE_ENABLED: bool = os.getenv("ROLLUP_RECONCILE_ENABLED", "True") == "True"
+    ROLLUP_RECONCILE_INTERVAL: int = int(os.getenv("ROLLUP_RECONCILE_INTERVAL", "3600"))  # sekund
+    ROLLUP_RECONCILE_DAYS: int = int(os.getenv("ROLLUP_RECONCILE_DAYS", "2"))
+
+    # ===== PROVIDER WEBHOOK INBOX =====
+    # JSON: {"stripe": "whsec_...", "payme": "..."} - provider imzo kalitlari
+    PROVIDER_WEBHOOK_SECRETS: str = os.getenv("PROVIDER_WEBHOOK_SECRETS", "")
+    INBOX_ENABLED: bool = os.getenv("INBOX_ENABLED", "True") == "True"
+    INBOX_WORKERS: int = int(os.getenv("INBOX_WORKERS", "2"))
+    INBOX_BATCH_SIZE: int = int(os.getenv("INBOX_BATCH_SIZE", "100"))
+    INBOX_POLL_INTERVAL: float = float(os.getenv("INBOX_POLL_INTERVAL", "0.2"))
+    INBOX_RETRY_BASE_DELAY: float = float(os.getenv("INBOX_RETRY_BASE_DELAY", "2.0"))  # sekund
+    INBOX_RETRY_MAX_DELAY: float = float(os.getenv("INBOX_RETRY_MAX_DELAY", "300.0"))  # sekund
+
+    # ===== PAYMENT PROVIDERS =====
+    # JSON: {"card": {"type": "http", "base_url": "...", "api_key": "..."}, "test": {"type": "mock"}}
+    PROVIDERS: str = os.getenv("PROVIDERS", "")
+    PROVIDER_HTTP_TIMEOUT: float = float(os.getenv("PROVIDER_HTTP_TIMEOUT", "10.0"))
+    PROVIDER_MAX_CONNECTIONS: int = int(os.getenv("PROVIDER_MAX_CONNECTIONS", "20"))
+    PROVIDER_STATUS_BATCH_SIZE: int = int(os.getenv("PROVIDER_STATUS_BATCH_SIZE", "200"))
+    PROVIDER_VERIFY_CONFIRM: bool = os.getenv("PROVIDER_VERIFY_CONFIRM", "True") == "True"
+
+    # ===== PAYMENT RETRY SCHEDULER =====
+    RETRY_SCHEDULER_ENABLED: bool = os.getenv("RETRY_SCHEDULER_ENABLED", "True") == "True"
+    RETRY_WORKERS: int = int(os.getenv("RETRY_WORKERS", "2"))
+    RETRY_BATCH_SIZE: int = int(os.getenv("RETRY_BATCH_SIZE", "50"))
+    RETRY_POLL_INTERVAL: float = float(os.getenv("RETRY_POLL_INTERVAL", "1.0"))
+    RETRY_MAX_ATTEMPTS: int = int(os.getenv("RETRY_MAX_ATTEMPTS", "5"))
+    RETRY_BASE_DELAY: int = int(os.getenv("RETRY_BASE_DELAY", "30"))  # sekund
+    RETRY_MAX_DELAY: int = int(os.getenv("RETRY_MAX_DELAY", "3600"))  # sekund
+    RETRY_LEASE_SECONDS: int = int(os.getenv("RETRY_LEASE_SECONDS", "120"))
+    PROCESSING_POLL_DELAY: int = int(os.getenv("PROCESSING_POLL_DELAY", "60"))  # sekund
+
+    # ===== PENDING EXPIRY SWEEPER =====
+    EXPIRY_SWEEP_ENABLED: bool = os.getenv("EXPIRY_SWEEP_ENABLED", "True") == "True"
+    PENDING_TTL_MINUTES: int = int(os.getenv("PENDING_TTL_MINUTES", "60"))
+    EXPIRY_SWEEP_INTERVAL: float = float(os.getenv("EXPIRY_SWEEP_INTERVAL", "30"))  # sekund
+    EXPIRY_SWEEP_BATCH: int = int(os.getenv("EXPIRY_SWEEP_BATCH", "500"))
+
+    # ===== PAYMENT STATUS STREAM (SSE) =====
+    SSE_ENABLED: bool = os.getenv("SSE_ENABLED", "True") == "True"
+    SSE_HEARTBEAT_SECONDS: float = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+    SSE_MAX_DURATION: float = float(os.getenv("SSE_MAX_DURATION", "300"))  # sekund, keyin client qayta ulanadi
+    SSE_RETRY_MS: int = int(os.getenv("SSE_RETRY_MS", "2000"))
+    SSE_QUEUE_SIZE: int = int(os.getenv("SSE_QUEUE_SIZE", "32"))
+    SSE_FINAL_CACHE_SECONDS: float = float(os.getenv("SSE_FINAL_CACHE_SECONDS", "120"))
+    SSE_FINAL_CACHE_SIZE: int = int(os.getenv("SSE_FINAL_CACHE_SIZE", "10000"))
+
+    # ===== VELOCITY LIMITS =====
+    VELOCITY_ENABLED: bool = os.getenv("VELOCITY_ENABLED", "True") == "True"
+    # JSON: {"USD": {"count_per_minute": 5, "amount_per_hour": 20000}, "default": {...}}
+    VELOCITY_LIMITS: str = os.getenv("VELOCITY_LIMITS", "")
+
+    # ===== CARD VALIDATION =====
+    # validators.py build ... bilan tayyorlangan BIN range jadvali (mmap)
+    BIN_TABLE_PATH: str = os.getenv("BIN_TABLE_PATH", "")
+
+    # ===== API GATEWAY =====
+    GATEWAY_CONNECT_TIMEOUT: float = float(os.getenv("GATEWAY_CONNECT_TIMEOUT", "2"))
+    GATEWAY_READ_TIMEOUT: float = float(os.getenv("GATEWAY_READ_TIMEOUT", "30"))
+    GATEWAY_WRITE_TIMEOUT: float = float(os.getenv("GATEWAY_WRITE_TIMEOUT", "30"))
+    GATEWAY_POOL_TIMEOUT: float = float(os.getenv("GATEWAY_POOL_TIMEOUT", "2"))  # bo'sh connection kutish
+    GATEWAY_MAX_CONNECTIONS: int = int(os.getenv("GATEWAY_MAX_CONNECTIONS", "200"))  # har bir upstream ga
+    GATEWAY_MAX_KEEPALIVE: int = int(os.getenv("GATEWAY_MAX_KEEPALIVE", "100"))
+    GATEWAY_KEEPALIVE_EXPIRY: float = float(os.getenv("GATEWAY_KEEPALIVE_EXPIRY", "30"))
+    GATEWAY_HTTP2: bool = os.getenv("GATEWAY_HTTP2", "False") == "True"  # h2 paketi kerak
+
     # ===== CORS SETTINGS =====
     CORS_ORIGINS: list = [
         "http://localhost",
@@ -4,8 +4,9 @@
 # ============================================
 
 from fastapi import Depends, Header, HTTPException
+from shared.config import get_settings
 from shared.security import verify_token
-from shared.exceptions import UnauthorizedException
+from shared.exceptions import ForbiddenException, UnauthorizedException
 from typing import Optional, Dict, Any
 
 
@@ -41,6 +42,19 @@ async def get_user_id(
     return user_id
 
 
+async def get_admin_user_id(
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    user_id: str = Depends(get_user_id)
+) -> str:
+    """Admin / ops endpointlar - token "roles" claim ida ADMIN_ROLE bo'lishi kerak"""
+    roles = current_user.get("roles") or []
+    if isinstance(roles, str):
+        roles = roles.split()
+    if get_settings().ADMIN_ROLE not in roles:
+        raise ForbiddenException("Admin role required")
+    return user_id
+
+
 
 
 
@@ -0,0 +1,164 @@
+# shared/migrations.py
+# ============================================
+# ONLINE MIGRATION HELPERS (ALEMBIC)
+# ============================================
+#
+# Katta jadvallarda ustun turini almashtirish (expand / contract):
+#   1. expand  - shadow ustun + sync trigger, batchlab backfill, NOT NULL
+#                (CHECK NOT VALID -> VALIDATE, jadval bloklanmaydi)
+#                  alembic upgrade <expand_revision>
+#   2. deploy  - yangi kod shadow ustun bilan ishlaydi (hamma replicalarda)
+#   3. contract - trigger va eski ustunni o'chirish, CONCURRENTLY indexlar
+#                  alembic -x contract=true upgrade head
+#
+# Eski kod ishlatadigan ustunni o'chiradigan contract revisionlar
+# require_contract() bilan himoyalangan: oddiy "upgrade head" contract ga
+# yetganda xato bilan to'xtaydi - eski kod hali ishlayotganda ustun o'chmasin.
+
+import logging
+import time
+from typing import Dict, Optional
+
+import sqlalchemy as sa
+from alembic import context, op
+
+logger = logging.getLogger("alembic.online")
+
+
+def backfill(table: str, assignments: str, pending: str, batch_size: int = 5000, pause: float = 0.0) -> int:
+    """
+    UPDATE ni PK bo'yicha keyset batchlarda, har biri alohida commit bilan
+    (autocommit) bajarish - uzun transaction va katta lock yo'q.
+
+    assignments: "new_col = <expr>", pending: hali to'ldirilmagan qatorlar sharti
+    """
+    if op.get_context().as_sql:
+        # Offline (--sql) - bitta UPDATE, DBA o'zi bo'lib ishlatadi
+        op.execute(f"UPDATE {table} SET {assignments} WHERE {pending}")
+        return 0
+
+    bind = op.get_bind()
+    last_id = None
+    total = 0
+    started = time.perf_counter()
+    with op.get_context().autocommit_block():
+        while True:
+            ids = bind.execute(
+                sa.text(
+                    f"SELECT id FROM {table} WHERE (:last_id IS NULL OR id > :last_id) "
+                    f"ORDER BY id LIMIT :batch_size"
+                ),
+                {"last_id": last_id, "batch_size": batch_size}
+            ).scalars().all()
+            if not ids:
+                break
+            result = bind.execute(
+                sa.text(f"UPDATE {table} SET {assignments} WHERE id = ANY(:ids) AND ({pending})"),
+                {"ids": list(ids)}
+            )
+            total += result.rowcount
+            last_id = ids[-1]
+            if pause:
+                time.sleep(pause)
+    logger.info(f"{table}: backfilled {total} rows in {time.perf_counter() - started:.1f}s")
+    return total
+
+
+def set_not_null(table: str, column: str) -> None:
+    """
+    SET NOT NULL ni to'liq jadval scan qilib ACCESS EXCLUSIVE ushlamasdan.
+    Har bir qadam alohida transactionda (autocommit):
+      1. CHECK ... NOT VALID - qisqa ACCESS EXCLUSIVE, scan yo'q
+      2. VALIDATE - scan, lekin SHARE UPDATE EXCLUSIVE (yozishlar davom etadi)
+      3. SET NOT NULL (PG 12+ tekshirilgan CHECK dan foydalanadi, scan yo'q)
+         va CHECK ni o'chirish
+    """
+    constraint = f"ck_{table}_{column}_not_null"
+    context = op.get_context()
+    with context.autocommit_block():
+        # Oldingi yarim qolgan urinishdan qolgan bo'lsa
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {constraint}")
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {constraint} CHECK ({column} IS NOT NULL) NOT VALID")
+    with context.autocommit_block():
+        op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {constraint}")
+    with context.autocommit_block():
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL")
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT {constraint}")
+
+
+def require_contract(expand_revision: str) -> None:
+    """
+    Contract migratsiyasini faqat aniq ruxsat bilan ishlatish. Eski kod hali
+    ishlayotganda eski ustun o'chsa u yiqiladi, shuning uchun "upgrade head"
+    expand va contract ni birga qo'llamasin: -x contract=true kerak.
+    """
+    flag = context.get_x_argument(as_dictionary=True).get("contract", "")
+    if flag.lower() in ("1", "true", "yes"):
+        return
+    raise RuntimeError(
+        f"Contract migration refused: run 'alembic upgrade {expand_revision}', deploy the new code "
+        f"to every replica, then 'alembic -x contract=true upgrade head'"
+    )
+
+
+def create_sync_trigger(table: str, name: str, body: str) -> None:
+    """Expand davomida eski va yangi ustunni sinxron ushlaydigan BEFORE trigger"""
+    op.execute(
+        f"CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$\n"
+        f"BEGIN\n{body}\n    RETURN NEW;\nEND;\n$$ LANGUAGE plpgsql"
+    )
+    op.execute(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+    op.execute(f"CREATE TRIGGER {name} BEFORE INSERT OR UPDATE ON {table} FOR EACH ROW EXECUTE FUNCTION {name}()")
+
+
+def drop_sync_trigger(table: str, name: str) -> None:
+    op.execute(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+    op.execute(f"DROP FUNCTION IF EXISTS {name}()")
+
+
+def create_index_concurrently(name: str, table: str, columns, where: Optional[str] = None) -> None:
+    """CREATE INDEX CONCURRENTLY - transaction tashqarisida, yozishlar to'xtamaydi"""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            name,
+            table,
+            columns,
+            postgresql_where=sa.text(where) if where else None,
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def drop_index_concurrently(name: str, table: str) -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def table_sizes(table: str) -> Optional[Dict[str, int]]:
+    """Jadval (heap + toast) va indexlar hajmi, baytda (offline da None)"""
+    if op.get_context().as_sql:
+        return None
+    row = op.get_bind().execute(
+        sa.text(
+            "SELECT pg_table_size(CAST(:table AS regclass)) AS table_bytes, "
+            "pg_indexes_size(CAST(:table AS regclass)) AS index_bytes"
+        ),
+        {"table": table}
+    ).one()
+    return {"table": row.table_bytes, "indexes": row.index_bytes}
+
+
+def report_sizes(table: str, before: Optional[Dict[str, int]], label: str = "") -> None:
+    """Oldin / keyin hajmlarni log qilish"""
+    if before is None:
+        return
+    after = table_sizes(table)
+
+    def mb(value: int) -> str:
+        return f"{value / 1024 / 1024:.1f} MB"
+
+    logger.info(
+        f"{table}{' ' + label if label else ''}: "
+        f"table {mb(before['table'])} -> {mb(after['table'])}, "
+        f"indexes {mb(before['indexes'])} -> {mb(after['indexes'])}"
+    )
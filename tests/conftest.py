@@ -0,0 +1,84 @@
+import os
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import BigInteger, MetaData, event
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+
+
+# Testlar SQLite (aiosqlite) da ishlaydi - postgres UUID ustunlari CHAR(32) bo'lib yaratiladi
+@compiles(UUID, "sqlite")
+def _uuid_on_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+# SQLite faqat INTEGER PRIMARY KEY ni autoincrement qiladi (BIGINT id - outbox, inbox)
+@compiles(BigInteger, "sqlite")
+def _bigint_on_sqlite(type_, compiler, **kw):
+    return "INTEGER"
+
+
+def payment_schema() -> MetaData:
+    """Payment service jadvallari, indexlarsiz (COLLATE "C" / partial indexlar SQLite da yo'q)"""
+    from payment_service.app.database.base import Base
+    from payment_service.app.models import idempotency, inbox, outbox, payment, rollup, webhook  # noqa: F401
+
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        table.to_metadata(metadata).indexes.clear()
+    return metadata
+
+
+@pytest_asyncio.fixture
+async def payment_db(tmp_path):
+    """Payment service uchun SQLite baza - session factory"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'payments.db'}")
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _postgres_functions(connection, record):
+        # rollup upsert LEAST / GREATEST ishlatadi
+        connection.create_function("least", -1, lambda *values: min(v for v in values if v is not None))
+        connection.create_function("greatest", -1, lambda *values: max(v for v in values if v is not None))
+
+    async with engine.begin() as conn:
+        await conn.run_sync(payment_schema().create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+def fresh_velocity(monkeypatch):
+    """Har test uchun bo'sh in-process velocity store (Redis ulanmagan)"""
+    from payment_service.app.services import payment
+    from payment_service.app.services.velocity import VelocityLimiter
+
+    limiter = VelocityLimiter()
+    monkeypatch.setattr(payment, "velocity_limiter", limiter)
+    return limiter
+
+
+# PostgreSQL ga xos SQL (make_interval, SKIP LOCKED, UPDATE ... RETURNING) - faqat
+# haqiqiy bazada (tashlab yuboriladigan baza!):
+#   TEST_DATABASE_URL=postgresql://postgres@localhost/payments_test pytest tests
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest_asyncio.fixture
+async def postgres_db():
+    """Payment service jadvallari PostgreSQL da - session factory"""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL (throwaway PostgreSQL database) is not set")
+    from payment_service.app.database.base import Base
+    from payment_service.app.models import outbox, payment, rollup  # noqa: F401
+
+    tables = [Base.metadata.tables[name] for name in ("payments", "payment_rollups", "outbox_events")]
+    engine = create_async_engine(TEST_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1))
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all, tables=tables)
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all, tables=tables)
+    await engine.dispose()
@@ -0,0 +1,59 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from shared.dependencies import get_admin_user_id
+from shared.exceptions import ForbiddenException, UnauthorizedException
+from shared.security import create_access_token
+from chat_service.app.routers.admin import router
+from chat_service.app.websocket.room_stats import HOT_ROOM_SORT_KEYS
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(router)
+
+    @app.exception_handler(UnauthorizedException)
+    async def unauthorized(request: Request, exc: UnauthorizedException):
+        return JSONResponse(status_code=401, content={"error": exc.code})
+
+    @app.exception_handler(ForbiddenException)
+    async def forbidden(request: Request, exc: ForbiddenException):
+        return JSONResponse(status_code=403, content={"error": exc.code})
+
+    return app
+
+
+@pytest.fixture
+def client():
+    app = build_app()
+    app.dependency_overrides[get_admin_user_id] = lambda: "admin"
+    return TestClient(app)
+
+
+def bearer(**claims) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'u1', **claims})}"}
+
+
+@pytest.mark.parametrize("sort_by", HOT_ROOM_SORT_KEYS)
+def test_hot_rooms_accepts_known_sort_keys(client, sort_by):
+    response = client.get("/admin/rooms/hot", params={"sort_by": sort_by})
+    assert response.status_code == 200
+    assert response.json()["sort_by"] == sort_by
+
+
+@pytest.mark.parametrize("sort_by", ["xmessages_per_secondx", "subscribers|x", "room_id", ""])
+def test_hot_rooms_rejects_unknown_sort_keys(client, sort_by):
+    response = client.get("/admin/rooms/hot", params={"sort_by": sort_by})
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("path", ["/admin/rooms/hot", "/admin/rooms/r1/stats"])
+def test_admin_endpoints_require_admin_role(path):
+    client = TestClient(build_app())
+
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers=bearer()).status_code == 403
+    assert client.get(path, headers=bearer(roles=["member"])).status_code == 403
+    assert client.get(path, headers=bearer(roles=["admin"])).status_code == 200
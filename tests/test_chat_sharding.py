@@ -0,0 +1,144 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import MetaData, func, select
+
+from shared.config import get_settings
+from shared.exceptions import NotFoundException
+from chat_service.app.database.base import Base
+from chat_service.app.database.reshard import cleanup_room, copy_until_caught_up
+from chat_service.app.database.sharding import ShardRouter
+from chat_service.app.models.message import ChatMessage, ChatRoom
+from chat_service.app.schemas.message import MessageCreate, MessageUpdate
+from chat_service.app.services.message import MessageService
+
+SHARDS = ("shard0", "shard1", "shard2")
+
+
+def shard_schema() -> MetaData:
+    """
+    Chat jadvallari (sxema migratsiyalarda). user_id ustunidagi index=True va
+    aniq Index bir xil nomni beradi - create_all uchun bittasi qoldiriladi
+    """
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        copy = table.to_metadata(metadata)
+        seen = set()
+        for index in sorted(copy.indexes, key=lambda index: index.name):
+            if index.name in seen:
+                copy.indexes.discard(index)
+            seen.add(index.name)
+    return metadata
+
+
+@pytest_asyncio.fixture
+async def router(tmp_path):
+    urls = {name: f"sqlite+aiosqlite:///{tmp_path / name}.db" for name in SHARDS}
+    router = ShardRouter.from_urls(urls, get_settings())
+    for engine in router.engines.values():
+        async with engine.begin() as conn:
+            await conn.run_sync(shard_schema().create_all)
+    yield router
+    await router.dispose()
+
+
+def rerouted(router: ShardRouter, room_id: str, shard: str) -> ShardRouter:
+    """Xuddi shu bazalar, CHAT_SHARD_OVERRIDES bilan (deploy dan keyingi holat)"""
+    return ShardRouter(router.engines, {**router.overrides, room_id: shard})
+
+
+async def create_room(router: ShardRouter, room_id: str) -> None:
+    async with router.session(room_id) as db:
+        db.add(ChatRoom(room_id=room_id, name=room_id, created_by="u1"))
+        await db.commit()
+
+
+async def count_messages(router: ShardRouter, shard: str, room_id: str) -> int:
+    async with router.shard_session(shard) as db:
+        return await db.scalar(
+            select(func.count()).select_from(ChatMessage).where(ChatMessage.room_id == room_id)
+        )
+
+
+@pytest.mark.asyncio
+async def test_rooms_are_stored_on_their_shard(router):
+    service = MessageService(shards=router)
+    rooms = [f"room-{i}" for i in range(12)]
+    created = {}
+    for room_id in rooms:
+        await create_room(router, room_id)
+        message = await service.create_message(room_id, "u1", MessageCreate(message=f"hi {room_id}"))
+        created[room_id] = message.id
+
+    assert len({router.shard_for(room_id) for room_id in rooms}) > 1
+    for room_id in rooms:
+        home = router.shard_for(room_id)
+        for shard in SHARDS:
+            assert await count_messages(router, shard, room_id) == (1 if shard == home else 0)
+        found = await service.get_message(created[room_id])
+        assert found.room_id == room_id
+        page = await service.get_room_message(room_id)
+        assert page["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_overrides_take_precedence_over_ring(router):
+    room_id = "room-pinned"
+    target = next(shard for shard in SHARDS if shard != router.shard_for(room_id))
+    pinned = rerouted(router, room_id, target)
+    assert pinned.shard_for(room_id) == target
+
+    with pytest.raises(ValueError):
+        ShardRouter(router.engines, {room_id: "missing"})
+
+
+@pytest.mark.asyncio
+async def test_reshard_moves_room_and_lookups_follow_routing(router):
+    room_id = "room-moving"
+    source = router.shard_for(room_id)
+    target = next(shard for shard in SHARDS if shard != source)
+
+    await create_room(router, room_id)
+    service = MessageService(shards=router)
+    ids = [
+        (await service.create_message(room_id, "u1", MessageCreate(message=f"m{i}"))).id
+        for i in range(5)
+    ]
+
+    copied = await copy_until_caught_up(router, room_id, source, target, batch_size=2)
+    assert copied == 5 + 1  # xabarlar + room
+    assert await count_messages(router, target, room_id) == 5
+
+    # Routing o'zgardi, cleanup hali yo'q - ikkala shardda ham nusxa bor
+    moved = rerouted(router, room_id, target)
+    moved_service = MessageService(shards=moved)
+    updated = await moved_service.update_message(ids[0], "u1", MessageUpdate(message="edited"))
+    assert updated.message == "edited"
+
+    async with router.shard_session(target) as db:
+        assert (await db.get(ChatMessage, ids[0])).message == "edited"
+    async with router.shard_session(source) as db:
+        assert (await db.get(ChatMessage, ids[0])).message == "m0"
+
+    with pytest.raises(ValueError):
+        await cleanup_room(router, room_id, source)
+    deleted = await cleanup_room(moved, room_id, source)
+    assert deleted == 5 + 1
+    assert await count_messages(router, source, room_id) == 0
+
+    assert (await moved_service.get_message(ids[0])).message == "edited"
+    page = await moved_service.get_room_message(room_id)
+    assert page["total"] == 5
+
+
+@pytest.mark.asyncio
+async def test_lookup_ignores_copy_on_shard_room_is_not_routed_to(router):
+    room_id = "room-stale"
+    source = router.shard_for(room_id)
+    target = next(shard for shard in SHARDS if shard != source)
+    await create_room(router, room_id)
+    message = await MessageService(shards=router).create_message(room_id, "u1", MessageCreate(message="only on source"))
+
+    # Room target ga route qilingan, lekin hali nusxalanmagan - eski nusxa qaytmaydi
+    moved_service = MessageService(shards=rerouted(router, room_id, target))
+    with pytest.raises(NotFoundException):
+        await moved_service.get_message(message.id)
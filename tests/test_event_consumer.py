@@ -0,0 +1,119 @@
+import asyncio
+import json
+
+import aio_pika
+import pytest
+
+from payment_service.app.services.notification import (
+    ERROR_HEADER,
+    RETRY_HEADER,
+    EventConsumer,
+    InMemoryBroker,
+)
+from payment_service.app.services.rabbitmq import PAYMENT_EVENTS_EXCHANGE
+
+QUEUE = "test_consumer"
+
+
+async def wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.005)
+
+
+async def make_consumer(handler, **kwargs):
+    broker = InMemoryBroker()
+    channel = await broker.channel()
+    options = dict(prefetch=10, concurrency=4, max_retries=2, retry_base_delay=0.01, ack_batch_size=10, ack_interval=0.01)
+    options.update(kwargs)
+    consumer = EventConsumer(channel, QUEUE, ["payment.*"], handler, **options)
+    await consumer.start()
+    exchange = await channel.declare_exchange(PAYMENT_EVENTS_EXCHANGE)
+
+    async def publish(payload: dict, routing_key: str = "payment.created") -> None:
+        await exchange.publish(aio_pika.Message(body=json.dumps(payload).encode()), routing_key=routing_key)
+
+    return broker, channel, consumer, publish
+
+
+@pytest.mark.asyncio
+async def test_failed_message_is_retried_and_acked():
+    calls = []
+
+    async def handler(payload, routing_key):
+        calls.append((payload["n"], routing_key))
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+
+    broker, channel, consumer, publish = await make_consumer(handler)
+    await publish({"n": 1})
+
+    await wait_for(lambda: len(calls) == 2 and not channel.unacked)
+    await consumer.stop()
+
+    assert calls == [(1, "payment.created"), (1, "payment.created")]
+    assert not consumer.acks._inflight
+    assert broker.queues[consumer.dlq_name].messages == []
+
+
+@pytest.mark.asyncio
+async def test_message_dead_lettered_after_max_retries():
+    calls = []
+
+    async def handler(payload, routing_key):
+        calls.append(payload["n"])
+        raise RuntimeError("always")
+
+    broker, channel, consumer, publish = await make_consumer(handler, max_retries=2)
+    await publish({"n": 7})
+
+    dlq = broker.queues[consumer.dlq_name]
+    await wait_for(lambda: dlq.messages and not channel.unacked)
+    await consumer.stop()
+
+    assert calls == [7, 7, 7]
+    body, headers, routing_key = dlq.messages[0]
+    assert json.loads(body) == {"n": 7}
+    assert headers[RETRY_HEADER] == 2
+    assert headers[ERROR_HEADER] == "always"
+    assert routing_key == consumer.dlq_name
+
+
+@pytest.mark.asyncio
+async def test_retry_publish_failure_requeues_without_stalling_acks():
+    calls = []
+
+    async def handler(payload, routing_key):
+        calls.append(payload["n"])
+        if payload["n"] == 1 and calls.count(1) == 1:
+            raise RuntimeError("handler failed")
+
+    broker, channel, consumer, publish = await make_consumer(handler)
+
+    exchange = channel.default_exchange
+    original_publish = exchange.publish
+    failures = []
+
+    async def failing_publish(message, routing_key):
+        if not failures:
+            failures.append(routing_key)
+            raise ConnectionError("broker unavailable")
+        await original_publish(message, routing_key)
+
+    exchange.publish = failing_publish
+
+    await publish({"n": 1})
+    await wait_for(lambda: calls.count(1) == 2 and not channel.unacked)
+
+    # Keyingi xabarlar ham ack qilinadi - tag inflight da osilib qolmagan
+    for n in (2, 3, 4):
+        await publish({"n": n})
+    await wait_for(lambda: len(calls) == 5 and not channel.unacked)
+    await consumer.stop()
+
+    assert failures == [consumer.retry_queue_name(0)]
+    assert sorted(calls) == [1, 1, 2, 3, 4]
+    assert not consumer.acks._inflight
+    assert not consumer.acks._done
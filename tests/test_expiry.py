@@ -0,0 +1,110 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from payment_service.app.models.outbox import OutboxEvent
+from payment_service.app.models.payment import Payment, PaymentStatus
+from payment_service.app.models.rollup import PaymentRollup
+from payment_service.app.services import rollups
+from payment_service.app.services.expiry import EXPIRED_MESSAGE, ExpirySweeper
+
+TTL = timedelta(minutes=30)
+
+
+async def add_payments(session_factory, ages_minutes, status=PaymentStatus.PENDING, created_at=None) -> list:
+    now = datetime.utcnow()
+    payments = [
+        Payment(
+            id=uuid.uuid4(), user_id="u1", order_id=f"o{n}", amount_minor=500, currency="USD",
+            status=status, payment_method="card", version=1,
+            created_at=created_at or now - timedelta(minutes=age)
+        )
+        for n, age in enumerate(ages_minutes)
+    ]
+    async with session_factory() as db:
+        db.add_all(payments)
+        await db.flush()
+        await rollups.apply_transitions(db, [(payment, None) for payment in payments])
+        await db.commit()
+    return payments
+
+
+async def statuses(session_factory) -> dict:
+    async with session_factory() as db:
+        rows = await db.execute(select(Payment.id, Payment.status))
+        return dict(rows.all())
+
+
+async def rollup_counts(session_factory) -> dict:
+    async with session_factory() as db:
+        rows = await db.execute(
+            select(PaymentRollup.status, func.sum(PaymentRollup.payment_count)).group_by(PaymentRollup.status)
+        )
+        return {status: count for status, count in rows.all() if count}
+
+
+@pytest.mark.asyncio
+async def test_sweep_batch_cancels_oldest_expired_first(payment_db):
+    expired = await add_payments(payment_db, [90, 60, 45])
+    fresh = await add_payments(payment_db, [5])
+    sweeper = ExpirySweeper(payment_db, batch_size=2, ttl=TTL)
+    cutoff = datetime.utcnow() - TTL
+
+    cancelled, after = await sweeper.sweep_batch(cutoff, None)
+    assert cancelled == 2
+    assert after == (expired[1].created_at, expired[1].id)
+
+    cancelled, after = await sweeper.sweep_batch(cutoff, after)
+    assert (cancelled, after) == (1, (expired[2].created_at, expired[2].id))
+    assert await sweeper.sweep_batch(cutoff, after) == (0, None)
+
+    current = await statuses(payment_db)
+    assert [current[payment.id] for payment in expired] == [PaymentStatus.CANCELLED] * 3
+    assert current[fresh[0].id] == PaymentStatus.PENDING
+
+
+@pytest.mark.asyncio
+async def test_keyset_breaks_created_at_ties_by_id(payment_db):
+    created_at = datetime.utcnow() - timedelta(hours=2)
+    payments = sorted(await add_payments(payment_db, [0] * 5, created_at=created_at), key=lambda p: p.id.hex)
+    sweeper = ExpirySweeper(payment_db, batch_size=2, ttl=TTL)
+
+    positions, after = [], None
+    while True:
+        cancelled, after = await sweeper.sweep_batch(datetime.utcnow() - TTL, after)
+        if not cancelled:
+            break
+        positions.append(after)
+
+    assert positions == [(created_at, payments[1].id), (created_at, payments[3].id), (created_at, payments[4].id)]
+
+
+@pytest.mark.asyncio
+async def test_sweep_updates_payment_rollups_and_events(payment_db):
+    expired = await add_payments(payment_db, [120, 90, 60, 50, 40])
+    await add_payments(payment_db, [10])
+    await add_payments(payment_db, [120], status=PaymentStatus.PROCESSING)
+
+    assert await ExpirySweeper(payment_db, batch_size=2, ttl=TTL).sweep() == 5
+
+    async with payment_db() as db:
+        payment = await db.get(Payment, expired[0].id)
+        events = list(await db.scalars(select(OutboxEvent.event_type)))
+    assert (payment.version, payment.error_message, payment.next_attempt_at) == (2, EXPIRED_MESSAGE, None)
+    assert events == ["payment.cancelled"] * 5
+    assert await rollup_counts(payment_db) == {
+        PaymentStatus.PENDING: 1,
+        PaymentStatus.PROCESSING: 1,
+        PaymentStatus.CANCELLED: 5,
+    }
+
+
+@pytest.mark.asyncio
+async def test_sweep_without_expired_payments_is_a_no_op(payment_db):
+    await add_payments(payment_db, [1, 2])
+    await add_payments(payment_db, [120], status=PaymentStatus.COMPLETED)
+
+    assert await ExpirySweeper(payment_db, ttl=TTL).sweep() == 0
+    assert set((await statuses(payment_db)).values()) == {PaymentStatus.PENDING, PaymentStatus.COMPLETED}
@@ -0,0 +1,193 @@
+import glob
+import os
+import uuid
+from datetime import date, datetime, timedelta
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+import pytest_asyncio
+from sqlalchemy import MetaData, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from payment_service.app.models.payment import Payment, PaymentStatus
+from payment_service.app.services.export import (
+    SCHEMA, STATE_FILE, PartitionWriters, _to_table, export_payments, load_watermark
+)
+
+DAY_1 = datetime(2024, 3, 1, 10, 0, 0, 123456)
+DAY_2 = datetime(2024, 3, 2, 23, 59, 59)
+
+
+def export_row(created_at: datetime, status=PaymentStatus.COMPLETED, **overrides) -> tuple:
+    row = {
+        "id": uuid.uuid4(),
+        "user_id": "u1",
+        "order_id": "o1",
+        "amount_minor": 1234,
+        "currency": "USD",
+        "status": status,
+        "payment_method": "card",
+        "provider_transaction_id": None,
+        "retry_count": 0,
+        "version": 1,
+        "created_at": created_at,
+        "updated_at": created_at,
+        "completed_at": None,
+        **overrides,
+    }
+    return tuple(row.values())
+
+
+def read_rows(path: str) -> list:
+    if path.endswith(".parquet"):
+        table = pq.read_table(path)
+    else:
+        with pa.ipc.open_file(path) as reader:
+            table = reader.read_all()
+    assert table.schema == SCHEMA
+    return table.to_pylist()
+
+
+def test_to_table_round_trip():
+    rows = [
+        export_row(DAY_1, provider_transaction_id="txn-1", completed_at=DAY_1 + timedelta(seconds=5)),
+        export_row(DAY_1, status=None, retry_count=3, version=7),
+    ]
+
+    table = _to_table(rows)
+
+    assert table.schema == SCHEMA
+    first, second = table.to_pylist()
+    assert first["id"] == str(rows[0][0])
+    assert first["status"] == "completed"
+    assert first["provider_transaction_id"] == "txn-1"
+    assert first["created_at"].replace(tzinfo=None) == DAY_1
+    assert first["completed_at"].replace(tzinfo=None) == DAY_1 + timedelta(seconds=5)
+    assert second["status"] is None
+    assert (second["retry_count"], second["version"], second["completed_at"]) == (3, 7, None)
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_partition_writers_round_trip(tmp_path, fmt):
+    writers = PartitionWriters(str(tmp_path), "run1", fmt, max_open=1)
+    day_1 = [export_row(DAY_1), export_row(DAY_1)]
+    day_2 = [export_row(DAY_2)]
+
+    writers.write(DAY_1.date(), _to_table(day_1[:1]))
+    writers.write(DAY_2.date(), _to_table(day_2))
+    # max_open=1 - day 1 writeri yopilgan, keyingi qator yangi part ga
+    writers.write(DAY_1.date(), _to_table(day_1[1:]))
+
+    # commit dan oldin faqat .tmp fayllar
+    assert not glob.glob(str(tmp_path / "date=*" / f"*.{fmt}"))
+    paths = writers.commit()
+
+    assert sorted(os.path.relpath(path, tmp_path) for path in paths) == [
+        os.path.join("date=2024-03-01", f"part-run1-0.{fmt}"),
+        os.path.join("date=2024-03-01", f"part-run1-1.{fmt}"),
+        os.path.join("date=2024-03-02", f"part-run1-0.{fmt}"),
+    ]
+    assert not glob.glob(str(tmp_path / "date=*" / "*.tmp"))
+    exported = [row["id"] for path in paths if "2024-03-01" in path for row in read_rows(path)]
+    assert sorted(exported) == sorted(str(row[0]) for row in day_1)
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    metadata = MetaData()
+    Payment.__table__.to_metadata(metadata).indexes.clear()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'export.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def add_payment(session_factory, updated_at: datetime) -> uuid.UUID:
+    async with session_factory() as db:
+        payment = Payment(
+            user_id="u1", order_id="o1", amount_minor=100, currency="USD",
+            status=PaymentStatus.PENDING, payment_method="card",
+            created_at=updated_at, updated_at=updated_at
+        )
+        db.add(payment)
+        await db.commit()
+        return payment.id
+
+
+def exported_ids(output_dir) -> list:
+    return sorted(
+        row["id"]
+        for path in glob.glob(os.path.join(output_dir, "date=*", "*.parquet"))
+        for row in read_rows(path)
+    )
+
+
+@pytest.mark.asyncio
+async def test_incremental_export_rereads_overlap_without_duplicates(tmp_path, session_factory):
+    output = str(tmp_path / "export")
+    now = datetime.utcnow()
+    first = await add_payment(session_factory, now - timedelta(minutes=2))
+
+    async with session_factory() as db:
+        summary = await export_payments(db, output, lag_seconds=0, overlap_seconds=300)
+    watermark, seen = load_watermark(output)
+    assert summary.rows == 1
+    assert watermark >= now
+    assert [key[0] for key in seen] == [str(first)]
+
+    # Soati orqada qolgan pod - watermark dan oldingi updated_at bilan keyin commit
+    late = await add_payment(session_factory, watermark - timedelta(minutes=1))
+    # Eski qator yangilandi - yangi version bilan qayta yozilishi kerak
+    async with session_factory() as db:
+        await db.execute(
+            update(Payment).where(Payment.id == first).values(
+                status=PaymentStatus.COMPLETED, version=2, updated_at=datetime.utcnow()
+            )
+        )
+        await db.commit()
+
+    async with session_factory() as db:
+        summary = await export_payments(db, output, lag_seconds=0, overlap_seconds=300)
+
+    assert summary.rows == 2
+    assert summary.skipped == 0
+    assert exported_ids(output) == sorted([str(first), str(first), str(late)])
+
+    # Hech narsa o'zgarmagan - overlap qayta o'qiladi, lekin hech narsa yozilmaydi
+    async with session_factory() as db:
+        summary = await export_payments(db, output, lag_seconds=0, overlap_seconds=300)
+    assert summary.rows == 0
+    assert summary.skipped == 2
+    assert len(exported_ids(output)) == 3
+
+
+@pytest.mark.asyncio
+async def test_late_row_older_than_overlap_is_missed(tmp_path, session_factory):
+    """Kafolat chegarasi: overlap dan katta soat farqi qoplanmaydi"""
+    output = str(tmp_path / "export")
+    await add_payment(session_factory, datetime.utcnow() - timedelta(minutes=1))
+    async with session_factory() as db:
+        await export_payments(db, output, lag_seconds=0, overlap_seconds=60)
+    watermark, _ = load_watermark(output)
+
+    await add_payment(session_factory, watermark - timedelta(minutes=5))
+    async with session_factory() as db:
+        summary = await export_payments(db, output, lag_seconds=0, overlap_seconds=60)
+
+    assert summary.rows == 0
+
+
+@pytest.mark.asyncio
+async def test_full_export_replaces_parts_and_resets_state(tmp_path, session_factory):
+    output = str(tmp_path / "export")
+    ids = [await add_payment(session_factory, datetime.utcnow() - timedelta(minutes=m)) for m in (1, 2)]
+    async with session_factory() as db:
+        await export_payments(db, output, lag_seconds=0)
+    async with session_factory() as db:
+        summary = await export_payments(db, output, full=True, lag_seconds=0)
+
+    assert summary.rows == 2
+    assert exported_ids(output) == sorted(str(payment_id) for payment_id in ids)
+    assert os.path.exists(os.path.join(output, STATE_FILE))
@@ -0,0 +1,128 @@
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from api_gateway.app.routers import chat_routes, payment_routes
+from api_gateway.app.services.chat_service_client import chat_service_client
+from api_gateway.app.services.payment_service_client import payment_service_client
+from api_gateway.app.services.upstream import UpstreamException, _strip_hop_by_hop
+
+
+def upstream_response(status_code: int, headers=(), body: bytes = b'{"ok": true}') -> httpx.Response:
+    # content= bilan yaratilgan Response allaqachon o'qilgan - proxy aiter_raw() qiladi
+    headers = [*headers, ("Content-Length", str(len(body)))]
+    return httpx.Response(status_code, headers=headers, stream=httpx.ByteStream(body))
+
+
+class Upstream:
+    """httpx MockTransport - kelgan requestlarni yozib boradi"""
+
+    def __init__(self, respond=None):
+        self.requests = []
+        self.respond = respond or (lambda request: upstream_response(200))
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return self.respond(request)
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    upstreams = {}
+    for client in (chat_service_client, payment_service_client):
+        upstream = Upstream()
+        upstreams[client.name] = upstream
+        monkeypatch.setattr(client, "client", httpx.AsyncClient(
+            base_url=client.base_url, transport=httpx.MockTransport(lambda r, u=upstream: u(r))
+        ))
+
+    app = FastAPI()
+    app.include_router(chat_routes.router)
+    app.include_router(payment_routes.router)
+
+    @app.exception_handler(UpstreamException)
+    async def upstream_error(request: Request, exc: UpstreamException):
+        return JSONResponse(status_code=exc.status_code, content={"error": exc.code, "service": exc.service})
+
+    return TestClient(app), upstreams
+
+
+def test_strip_hop_by_hop_drops_connection_tokens():
+    raw = [
+        (b"Connection", b"keep-alive, X-Internal-Hop , Upgrade"),
+        (b"Keep-Alive", b"timeout=5"),
+        (b"Transfer-Encoding", b"chunked"),
+        (b"X-Internal-Hop", b"1"),
+        (b"Set-Cookie", b"a=1"),
+        (b"Set-Cookie", b"b=2"),
+        (b"Content-Type", b"application/json"),
+    ]
+
+    assert _strip_hop_by_hop(raw) == [
+        (b"Set-Cookie", b"a=1"),
+        (b"Set-Cookie", b"b=2"),
+        (b"Content-Type", b"application/json"),
+    ]
+    assert _strip_hop_by_hop(raw, frozenset({b"content-type"})) == [
+        (b"Set-Cookie", b"a=1"),
+        (b"Set-Cookie", b"b=2"),
+    ]
+
+
+def test_forward_strips_hop_by_hop_headers_both_ways(gateway):
+    client, upstreams = gateway
+    upstream = upstreams["payment-service"]
+    upstream.respond = lambda request: upstream_response(
+        200, [("Connection", "X-Upstream-Hop"), ("X-Upstream-Hop", "1"), ("X-Kept", "yes")]
+    )
+
+    response = client.get(
+        "/api/v1/payments/p1",
+        headers={"Connection": "X-Client-Hop", "X-Client-Hop": "1", "TE": "trailers", "X-Request-Id": "rid-1"}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"ok": True}
+    assert response.headers["x-kept"] == "yes"
+    assert "x-upstream-hop" not in response.headers
+    assert response.headers["x-request-id"] == "rid-1"
+
+    sent = upstream.requests[0]
+    assert sent.url.raw_path == b"/api/v1/payments/p1"
+    assert "x-client-hop" not in sent.headers
+    assert "te" not in sent.headers
+    assert sent.headers["x-request-id"] == "rid-1"
+    assert sent.headers["x-forwarded-proto"] == "http"
+    assert sent.headers["x-forwarded-host"] == "testserver"
+
+
+@pytest.mark.parametrize("error, status_code, code", [
+    (httpx.ConnectError("refused"), 502, "BAD_GATEWAY"),
+    (httpx.ReadTimeout("slow"), 504, "GATEWAY_TIMEOUT"),
+    (httpx.PoolTimeout("busy"), 504, "GATEWAY_TIMEOUT"),
+])
+def test_forward_maps_transport_errors(gateway, error, status_code, code):
+    client, upstreams = gateway
+
+    def fail(request):
+        raise error
+
+    upstreams["chat-service"].respond = fail
+    response = client.get("/api/v1/messages/room/r1")
+
+    assert response.status_code == status_code
+    assert response.json() == {"error": code, "service": "chat-service"}
+
+
+@pytest.mark.parametrize("path", [
+    "/api/v1/admin/rooms/hot",
+    "/api/v1/admin/rooms/r1/stats",
+    "/api/v1/reports/payments/daily",
+])
+def test_internal_prefixes_are_not_proxied(gateway, path):
+    client, upstreams = gateway
+
+    assert client.get(path).status_code == 404
+    assert all(not upstream.requests for upstream in upstreams.values())
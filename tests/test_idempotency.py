@@ -0,0 +1,124 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from shared.exceptions import ValidationException
+from payment_service.app.models.idempotency import IdempotencyKey
+from payment_service.app.models.outbox import OutboxEvent
+from payment_service.app.models.payment import Payment
+from payment_service.app.schemas.payment import PaymentCreate
+from payment_service.app.services import idempotency
+from payment_service.app.services.idempotency import IdempotencyConflict, request_fingerprint
+from payment_service.app.services.payment import PaymentService
+
+pytestmark = pytest.mark.usefixtures("fresh_velocity")
+
+
+def payment_data(**overrides) -> PaymentCreate:
+    return PaymentCreate(**{"order_id": "order-1", "amount": 12.5, "currency": "USD", "payment_method": "card", **overrides})
+
+
+async def create(session_factory, user_id="u1", key="key-1", data=None):
+    async with session_factory() as db:
+        return await PaymentService(db).create_payment_idempotent(user_id, data or payment_data(), key)
+
+
+async def count(session_factory, model) -> int:
+    async with session_factory() as db:
+        return await db.scalar(select(func.count()).select_from(model))
+
+
+def test_fingerprint_is_stable_and_body_sensitive():
+    assert request_fingerprint(payment_data()) == request_fingerprint(payment_data())
+    assert request_fingerprint(payment_data()) != request_fingerprint(payment_data(amount=12.51))
+    assert request_fingerprint(payment_data()) != request_fingerprint(payment_data(metadata={"a": 1}))
+
+
+def test_fingerprint_does_not_hash_raw_card_number():
+    card = "4111111111111111"
+    data = payment_data(card_number=card)
+    plain = json.dumps(data.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+
+    assert request_fingerprint(data) != hashlib.sha256(plain.encode()).hexdigest()
+    assert request_fingerprint(data) == request_fingerprint(payment_data(card_number=card))
+    assert request_fingerprint(data) != request_fingerprint(payment_data(card_number="5555555555554444"))
+
+
+@pytest.mark.asyncio
+async def test_retry_replays_stored_response(payment_db):
+    first, replayed = await create(payment_db)
+    assert replayed is False
+
+    second, replayed = await create(payment_db)
+    assert replayed is True
+    assert second == first
+    assert await count(payment_db, Payment) == 1
+    assert await count(payment_db, OutboxEvent) == 1
+
+
+@pytest.mark.asyncio
+async def test_same_key_with_different_body_conflicts(payment_db):
+    await create(payment_db)
+
+    with pytest.raises(IdempotencyConflict) as error:
+        await create(payment_db, data=payment_data(amount=99))
+    assert error.value.in_progress is False
+    assert await count(payment_db, Payment) == 1
+
+
+@pytest.mark.asyncio
+async def test_key_still_processing_conflicts(payment_db):
+    fingerprint = request_fingerprint(payment_data())
+    async with payment_db() as db:
+        assert await idempotency.reserve(db, "u1", "key-1", fingerprint) is True
+        # Ikkinchi reserve - birinchisi band qilgan
+        assert await idempotency.reserve(db, "u1", "key-1", fingerprint) is False
+        await db.commit()
+
+    with pytest.raises(IdempotencyConflict) as error:
+        await create(payment_db)
+    assert error.value.in_progress is True
+    assert await count(payment_db, Payment) == 0
+
+
+@pytest.mark.asyncio
+async def test_keys_are_scoped_per_user(payment_db):
+    first, _ = await create(payment_db, user_id="u1")
+    second, replayed = await create(payment_db, user_id="u2")
+
+    assert replayed is False
+    assert second.id != first.id
+    assert await count(payment_db, Payment) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_request_releases_key(payment_db):
+    async with payment_db() as db:
+        await PaymentService(db).create_payment("u1", payment_data())
+
+    # Dublikat order - reserve bilan birga rollback, key band qolmaydi
+    with pytest.raises(ValidationException):
+        await create(payment_db, key="key-2")
+    assert await count(payment_db, IdempotencyKey) == 0
+
+    _, replayed = await create(payment_db, key="key-2", data=payment_data(order_id="order-2"))
+    assert replayed is False
+
+
+@pytest.mark.asyncio
+async def test_purge_expired_deletes_in_batches(payment_db):
+    now = datetime.utcnow()
+    async with payment_db() as db:
+        for n in range(5):
+            db.add(IdempotencyKey(user_id="u1", key=f"old-{n}", request_hash="h", expires_at=now - timedelta(minutes=1)))
+        db.add(IdempotencyKey(user_id="u1", key="live", request_hash="h", expires_at=now + timedelta(hours=1)))
+        await db.commit()
+
+    async with payment_db() as db:
+        assert await idempotency.purge_expired(db, batch_size=2) == 5
+
+    async with payment_db() as db:
+        assert await db.scalar(select(IdempotencyKey.key)) == "live"
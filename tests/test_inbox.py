@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import MetaData
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from payment_service.app.models.inbox import ProviderWebhookEvent
+from payment_service.app.models.payment import Payment
+from payment_service.app.services.inbox import MAX_ATTEMPTS, InboxProcessor, retry_delay
+
+
+def inbox_schema() -> MetaData:
+    """payments va inbox jadvallari, indexlarsiz (COLLATE "C" SQLite da yo'q)"""
+    metadata = MetaData()
+    for table in (Payment.__table__, ProviderWebhookEvent.__table__):
+        table.to_metadata(metadata).indexes.clear()
+    return metadata
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'inbox.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(inbox_schema().create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def add_unknown_event(session_factory) -> int:
+    """Payment topilmaydigan event - har urinish xato bilan tugaydi"""
+    async with session_factory() as db:
+        event = ProviderWebhookEvent(
+            id=1,
+            provider="mock",
+            provider_transaction_id="txn-unknown",
+            status="completed",
+            payload="{}",
+            received_at=datetime.utcnow()
+        )
+        db.add(event)
+        await db.commit()
+        return event.id
+
+
+async def load(session_factory, event_id) -> ProviderWebhookEvent:
+    async with session_factory() as db:
+        return await db.get(ProviderWebhookEvent, event_id)
+
+
+async def make_due(session_factory, event_id) -> None:
+    async with session_factory() as db:
+        event = await db.get(ProviderWebhookEvent, event_id)
+        event.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_failed_event_waits_for_backoff(session_factory):
+    event_id = await add_unknown_event(session_factory)
+    processor = InboxProcessor(session_factory, batch_size=10)
+
+    started = datetime.utcnow()
+    assert await processor.process_batch() == 1
+    event = await load(session_factory, event_id)
+    assert event.attempts == 1
+    assert event.processed_at is None
+    assert event.next_attempt_at >= started + retry_delay(1)
+
+    # Backoff tugamaguncha qayta olinmaydi
+    assert await processor.process_batch() == 0
+    assert (await load(session_factory, event_id)).attempts == 1
+
+    await make_due(session_factory, event_id)
+    assert await processor.process_batch() == 1
+    event = await load(session_factory, event_id)
+    assert event.attempts == 2
+    assert event.next_attempt_at - datetime.utcnow() > retry_delay(1)
+
+
+@pytest.mark.asyncio
+async def test_event_is_closed_after_max_attempts(session_factory):
+    event_id = await add_unknown_event(session_factory)
+    processor = InboxProcessor(session_factory, batch_size=10)
+
+    for _ in range(MAX_ATTEMPTS):
+        await make_due(session_factory, event_id)
+        assert await processor.process_batch() == 1
+
+    event = await load(session_factory, event_id)
+    assert event.attempts == MAX_ATTEMPTS
+    assert event.processed_at is not None
+    assert "txn-unknown" in event.last_error
+    await make_due(session_factory, event_id)
+    assert await processor.process_batch() == 0
+
+
+def test_retry_delay_is_exponential_and_capped():
+    assert retry_delay(2) == 2 * retry_delay(1)
+    assert retry_delay(100) == retry_delay(200)
@@ -0,0 +1,163 @@
+import argparse
+import inspect
+import io
+import re
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+from alembic.config import Config
+from alembic.operations import Operations
+from alembic.runtime.environment import EnvironmentContext
+from alembic.script import ScriptDirectory
+
+from shared.migrations import backfill, require_contract, set_not_null
+
+ROOT = Path(__file__).resolve().parents[1]
+PAYMENT_MIGRATIONS = ROOT / "payment_service" / "app" / "migrations"
+CHAT_MIGRATIONS = ROOT / "chat_service" / "app" / "migrations"
+SERVICES = [PAYMENT_MIGRATIONS, CHAT_MIGRATIONS]
+
+
+def payment_scripts() -> ScriptDirectory:
+    return ScriptDirectory(str(PAYMENT_MIGRATIONS))
+
+
+def contract_revisions(scripts: ScriptDirectory) -> set:
+    return {
+        revision.revision for revision in scripts.walk_revisions()
+        if "require_contract(" in inspect.getsource(revision.module)
+    }
+
+
+@contextmanager
+def offline(scripts: ScriptDirectory, *x_arguments):
+    """alembic --sql rejimi (PostgreSQL dialect) - chiqarilgan SQL buffer da"""
+    buffer = io.StringIO()
+    config = Config()
+    config.cmd_opts = argparse.Namespace(x=list(x_arguments))
+    with EnvironmentContext(config, scripts) as env:
+        env.configure(dialect_name="postgresql", as_sql=True, output_buffer=buffer, transactional_ddl=True)
+        with Operations.context(env.get_context()):
+            yield buffer
+
+
+def statements(buffer: io.StringIO) -> list:
+    return [
+        " ".join(statement.split())
+        for statement in re.split(r";\s*\n", buffer.getvalue())
+        if statement.strip()
+    ]
+
+
+def transactions(buffer: io.StringIO) -> list:
+    """COMMIT / BEGIN bilan ajratilgan statement guruhlari"""
+    groups = [[]]
+    for statement in statements(buffer):
+        if statement in ("COMMIT", "BEGIN"):
+            groups.append([])
+        else:
+            groups[-1].append(statement)
+    return [group for group in groups if group]
+
+
+def test_nothing_follows_contract_revisions():
+    """
+    require_contract() li revisionlardan keyin faqat contract revisionlar -
+    yangi kod kerak qiladigan sxema expand / contract gate dan oldin qo'llanadi
+    """
+    scripts = payment_scripts()
+    contracts = contract_revisions(scripts)
+    assert contracts
+    for revision_id in contracts:
+        following = set(scripts.get_revision(revision_id).nextrev)
+        assert following <= contracts, f"{revision_id} is followed by {following - contracts}"
+
+
+@pytest.mark.parametrize("path", SERVICES, ids=["payment", "chat"])
+def test_single_head(path):
+    assert len(ScriptDirectory(str(path)).get_heads()) == 1
+
+
+@pytest.mark.parametrize("path", SERVICES, ids=["payment", "chat"])
+def test_contract_revisions_are_gated(path):
+    """*_contract revisionlar flag siz hech qanday SQL chiqarmasdan to'xtaydi"""
+    scripts = ScriptDirectory(str(path))
+    named = {
+        revision.revision for revision in scripts.walk_revisions()
+        if Path(revision.path).stem.endswith("_contract")
+    }
+    assert named and named == contract_revisions(scripts)
+
+    for revision_id in named:
+        revision = scripts.get_revision(revision_id)
+        with pytest.raises(RuntimeError) as error:
+            with offline(scripts) as buffer:
+                revision.module.upgrade()
+        assert statements(buffer) == []
+        # Xabar oxirgi expand revisionni ko'rsatadi - ajdod, o'zi contract emas
+        target = re.search(r"alembic upgrade (\w+)'", str(error.value)).group(1)
+        assert target not in named
+        assert target in {ancestor.revision for ancestor in scripts.iterate_revisions(revision_id, "base")}
+
+        with offline(scripts, "contract=true") as buffer:
+            revision.module.upgrade()
+        assert any(statement.startswith("DROP TRIGGER") for statement in statements(buffer))
+
+
+@pytest.mark.parametrize("value, allowed", [
+    ("true", True), ("1", True), ("YES", True), ("false", False), ("", False), (None, False),
+])
+def test_require_contract_flag(value, allowed):
+    x_arguments = [] if value is None else [f"contract={value}"]
+    with offline(payment_scripts(), *x_arguments):
+        if allowed:
+            require_contract("abc123")
+        else:
+            with pytest.raises(RuntimeError, match="alembic upgrade abc123"):
+                require_contract("abc123")
+
+
+def test_set_not_null_runs_each_step_in_its_own_transaction():
+    with offline(payment_scripts()) as buffer:
+        set_not_null("payments", "amount_minor")
+
+    constraint = "ck_payments_amount_minor_not_null"
+    assert transactions(buffer) == [
+        [
+            f"ALTER TABLE payments DROP CONSTRAINT IF EXISTS {constraint}",
+            f"ALTER TABLE payments ADD CONSTRAINT {constraint} CHECK (amount_minor IS NOT NULL) NOT VALID",
+        ],
+        [f"ALTER TABLE payments VALIDATE CONSTRAINT {constraint}"],
+        [
+            "ALTER TABLE payments ALTER COLUMN amount_minor SET NOT NULL",
+            f"ALTER TABLE payments DROP CONSTRAINT {constraint}",
+        ],
+    ]
+
+
+def test_offline_backfill_is_one_update():
+    with offline(payment_scripts()) as buffer:
+        backfill("payments", "amount_minor = 1", "amount_minor IS NULL")
+    assert statements(buffer) == ["UPDATE payments SET amount_minor = 1 WHERE amount_minor IS NULL"]
+
+
+@pytest.mark.parametrize("path, revision_id, table, column", [
+    (PAYMENT_MIGRATIONS, "4a6c8e0b2d59", "payments", "amount_minor"),
+    (PAYMENT_MIGRATIONS, "0c3e5a7b9d16", "payments", "retry_attempts"),
+    (CHAT_MIGRATIONS, "8e2a4c6f1d35", "chat_messages", "is_read_bool"),
+])
+def test_expand_backfills_under_trigger_before_not_null(path, revision_id, table, column):
+    """trigger -> backfill -> NOT NULL: backfilldan keyingi yozuvlar ham to'ldiriladi"""
+    scripts = ScriptDirectory(str(path))
+    with offline(scripts) as buffer:
+        scripts.get_revision(revision_id).module.upgrade()
+    sql = statements(buffer)
+
+    def position(matches) -> int:
+        return next(index for index, statement in enumerate(sql) if matches(statement))
+
+    trigger = position(lambda statement: statement.startswith("CREATE TRIGGER") and f" ON {table} " in statement)
+    update = position(lambda statement: statement.startswith(f"UPDATE {table} SET {column} ="))
+    not_null = position(lambda statement: statement == f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL")
+    assert trigger < update < not_null
@@ -0,0 +1,247 @@
+import json
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import MetaData, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from shared.config import get_settings
+from chat_service.app.models.message import ChatRoom, ChatRoomMember
+from chat_service.app.services.message import MessageService, RoomMembersCache
+from chat_service.app.services.notification import (
+    NotificationDigestConsumer, OfflineNotificationPublisher, digest_shard, shard_routing_key
+)
+
+settings = get_settings()
+SHARDS = 4
+
+
+class FakeExchange:
+    def __init__(self, name):
+        self.name = name
+        self.published = []
+
+    async def publish(self, message, routing_key):
+        self.published.append((routing_key, json.loads(message.body)))
+
+
+class FakeQueue:
+    def __init__(self, name, arguments):
+        self.name = name
+        self.arguments = arguments
+        self.bindings = []
+        self.callback = None
+
+    async def bind(self, exchange, routing_key):
+        self.bindings.append((exchange.name, routing_key))
+
+    async def consume(self, callback):
+        self.callback = callback
+
+
+class FakeChannel:
+    def __init__(self):
+        self.exchanges = {}
+        self.queues = []
+
+    async def set_qos(self, prefetch_count):
+        self.prefetch_count = prefetch_count
+
+    async def declare_exchange(self, name, exchange_type, durable):
+        return self.exchanges.setdefault(name, FakeExchange(name))
+
+    async def declare_queue(self, name, durable, arguments=None):
+        queue = FakeQueue(name, arguments)
+        self.queues.append(queue)
+        return queue
+
+
+class FakeIncoming:
+    def __init__(self, body: bytes):
+        self.body = body
+        self.processed = False
+
+    def process(self):
+        incoming = self
+
+        class _Context:
+            async def __aenter__(self):
+                return incoming
+
+            async def __aexit__(self, *exc):
+                incoming.processed = True
+                return False
+
+        return _Context()
+
+
+def users_on_distinct_shards(count: int):
+    """Har biri boshqa shardga tushadigan userlar"""
+    users = {}
+    i = 0
+    while len(users) < count:
+        user_id = f"user-{i}"
+        users.setdefault(digest_shard(user_id, SHARDS), user_id)
+        i += 1
+    return list(users.values())
+
+
+def test_digest_shard_is_stable_and_in_range():
+    for i in range(100):
+        shard = digest_shard(f"user-{i}", SHARDS)
+        assert 0 <= shard < SHARDS
+        assert digest_shard(f"user-{i}", SHARDS) == shard
+
+
+@pytest.mark.asyncio
+async def test_publisher_routes_each_recipient_to_its_shard():
+    channel = FakeChannel()
+    publisher = OfflineNotificationPublisher(channel, shards=SHARDS)
+    await publisher.setup()
+
+    a, b = users_on_distinct_shards(2)
+    await publisher.publish("room-1", {"id": "m1", "user_id": "u0", "message": "hi"}, [a, b, a])
+
+    published = channel.exchanges[settings.CHAT_NOTIFICATION_EXCHANGE].published
+    assert sorted(published) == sorted([
+        (shard_routing_key(digest_shard(a, SHARDS)), {
+            "room_id": "room-1", "recipients": [a], "message_id": "m1",
+            "sender_id": "u0", "preview": "hi", "created_at": None,
+        }),
+        (shard_routing_key(digest_shard(b, SHARDS)), {
+            "room_id": "room-1", "recipients": [b], "message_id": "m1",
+            "sender_id": "u0", "preview": "hi", "created_at": None,
+        }),
+    ])
+
+
+@pytest.mark.asyncio
+async def test_publisher_skips_empty_recipients():
+    channel = FakeChannel()
+    publisher = OfflineNotificationPublisher(channel, shards=SHARDS)
+    await publisher.setup()
+
+    await publisher.publish("room-1", {"id": "m1"}, [])
+
+    assert channel.exchanges[settings.CHAT_NOTIFICATION_EXCHANGE].published == []
+
+
+@pytest.mark.asyncio
+async def test_consumer_declares_single_active_queue_per_shard():
+    channel = FakeChannel()
+    consumer = NotificationDigestConsumer(channel, window=60, shards=SHARDS)
+    await consumer.start()
+    try:
+        assert [queue.name for queue in channel.queues] == [
+            f"{settings.CHAT_NOTIFICATION_QUEUE}.{shard}" for shard in range(SHARDS)
+        ]
+        for shard, queue in enumerate(channel.queues):
+            assert queue.arguments == {"x-single-active-consumer": True}
+            assert queue.bindings == [
+                (settings.CHAT_NOTIFICATION_EXCHANGE, shard_routing_key(shard))
+            ]
+            assert queue.callback == consumer.on_message
+    finally:
+        await consumer.stop()
+
+
+@pytest.mark.asyncio
+async def test_consumer_collapses_events_into_one_digest_per_user():
+    sent = []
+
+    async def sender(user_id, payload):
+        sent.append((user_id, payload))
+
+    consumer = NotificationDigestConsumer(FakeChannel(), sender=sender, window=60, shards=SHARDS)
+    for i in range(3):
+        consumer.add({"room_id": "room-1", "recipients": ["u1", "u2"], "preview": f"m{i}"})
+    consumer.add({"room_id": "room-2", "recipients": ["u1"], "preview": "last"})
+
+    # oyna hali tugamagan
+    assert consumer.flush() == 0
+    assert consumer.flush(force=True) == 2
+    await consumer.stop()
+
+    digests = dict(sent)
+    assert digests["u1"]["messages_count"] == 4
+    assert digests["u1"]["rooms"] == ["room-1", "room-2"]
+    assert digests["u1"]["last_preview"] == "last"
+    assert digests["u1"]["text"] == "4 new messages in 2 rooms"
+    assert digests["u2"]["messages_count"] == 3
+    assert consumer.pending == {}
+
+
+@pytest.mark.asyncio
+async def test_consumer_acks_and_drops_invalid_payload():
+    consumer = NotificationDigestConsumer(FakeChannel(), window=60, shards=SHARDS)
+    invalid = FakeIncoming(b"not json")
+    valid = FakeIncoming(json.dumps({"room_id": "r", "recipients": ["u1"]}).encode())
+
+    await consumer.on_message(invalid)
+    await consumer.on_message(valid)
+
+    assert invalid.processed and valid.processed
+    assert list(consumer.pending) == ["u1"]
+
+
+@pytest_asyncio.fixture
+async def chat_db(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'chat.db'}")
+    metadata = MetaData()
+    for model in (ChatRoom, ChatRoomMember):
+        table = model.__table__.to_metadata(metadata)
+        for index in list(table.indexes):
+            table.indexes.discard(index)
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+
+    queries = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count(conn, cursor, statement, *args):
+        if "chat_room_members" in statement and statement.lstrip().upper().startswith("SELECT"):
+            queries.append(statement)
+
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        session.add(ChatRoom(room_id="room-1", name="room-1", created_by="u1"))
+        await session.commit()
+        yield session, queries
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_room_members_are_cached_between_messages(chat_db):
+    session, queries = chat_db
+    service = MessageService(db=session, members_cache=RoomMembersCache(ttl=30))
+    await service.add_member("room-1", "u1")
+    await service.add_member("room-1", "u2")
+
+    for _ in range(5):
+        assert sorted(await service.get_room_member_ids("room-1")) == ["u1", "u2"]
+    assert len(queries) == 1
+
+    # yangi a'zo cache ni yangilaydi
+    await service.add_member("room-1", "u3")
+    assert sorted(await service.get_room_member_ids("room-1")) == ["u1", "u2", "u3"]
+    assert len(queries) == 2
+
+
+@pytest.mark.asyncio
+async def test_room_members_cache_expires(chat_db, monkeypatch):
+    session, queries = chat_db
+    service = MessageService(db=session, members_cache=RoomMembersCache(ttl=30))
+    await service.add_member("room-1", "u1")
+
+    clock = [1000.0]
+    monkeypatch.setattr(
+        "chat_service.app.services.message.time.monotonic", lambda: clock[0]
+    )
+    await service.get_room_member_ids("room-1")
+    clock[0] += 29
+    await service.get_room_member_ids("room-1")
+    assert len(queries) == 1
+
+    clock[0] += 2
+    await service.get_room_member_ids("room-1")
+    assert len(queries) == 2
@@ -0,0 +1,100 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from payment_service.app.models.outbox import OutboxEvent
+from payment_service.app.services.outbox import OutboxRelay, add_event, add_events
+
+
+class FakeRabbitMQ:
+    """publish_many ni yozib boradi; fail=True - nack / ulanish xatosi"""
+
+    def __init__(self):
+        self.is_connected = True
+        self.fail = False
+        self.batches = []
+
+    async def publish_many(self, messages):
+        messages = list(messages)
+        if self.fail:
+            raise ConnectionError("channel closed")
+        self.batches.append(messages)
+        return len(messages)
+
+
+async def add_payment_events(session_factory, count: int) -> None:
+    async with session_factory() as db:
+        add_events(db, [("payment.created", {"payment_id": f"p{n}"}) for n in range(count)])
+        await db.commit()
+
+
+async def load_events(session_factory) -> list:
+    async with session_factory() as db:
+        return list((await db.execute(select(OutboxEvent).order_by(OutboxEvent.id))).scalars())
+
+
+@pytest.mark.asyncio
+async def test_event_is_written_only_with_its_transaction(payment_db):
+    async with payment_db() as db:
+        add_event(db, "payment.created", {"payment_id": "rolled-back"})
+        await db.rollback()
+    async with payment_db() as db:
+        add_event(db, "payment.completed", {"payment_id": "p1"})
+        await db.commit()
+
+    (event,) = await load_events(payment_db)
+    assert event.routing_key == "payment.completed"
+    assert json.loads(event.payload)["data"] == {"payment_id": "p1"}
+    assert event.published_at is None
+
+
+@pytest.mark.asyncio
+async def test_relay_claims_in_order_and_marks_published(payment_db):
+    await add_payment_events(payment_db, 5)
+    client = FakeRabbitMQ()
+    relay = OutboxRelay(payment_db, client, batch_size=2)
+
+    assert [await relay.relay_batch() for _ in range(4)] == [2, 2, 1, 0]
+
+    sent = [message for batch in client.batches for message in batch]
+    events = await load_events(payment_db)
+    assert [message[2]["message_id"] for message in sent] == [str(event.id) for event in events]
+    assert [json.loads(message[1])["data"]["payment_id"] for message in sent] == [f"p{n}" for n in range(5)]
+    assert all(event.published_at is not None and event.attempts == 1 for event in events)
+
+
+@pytest.mark.asyncio
+async def test_failed_publish_keeps_events_for_retry(payment_db):
+    await add_payment_events(payment_db, 3)
+    client = FakeRabbitMQ()
+    client.fail = True
+    relay = OutboxRelay(payment_db, client, batch_size=10)
+
+    with pytest.raises(ConnectionError):
+        await relay.relay_batch()
+
+    events = await load_events(payment_db)
+    assert all(event.published_at is None for event in events)
+    assert all(event.attempts == 1 and event.last_error == "channel closed" for event in events)
+
+    client.fail = False
+    assert await relay.relay_batch() == 3
+    events = await load_events(payment_db)
+    assert all(event.published_at is not None and event.attempts == 2 for event in events)
+
+
+@pytest.mark.asyncio
+async def test_purge_removes_only_old_published_events(payment_db):
+    now = datetime.utcnow()
+    async with payment_db() as db:
+        db.add_all([
+            OutboxEvent(event_type="old", routing_key="old", payload="{}", published_at=now - timedelta(days=30)),
+            OutboxEvent(event_type="recent", routing_key="recent", payload="{}", published_at=now),
+            OutboxEvent(event_type="pending", routing_key="pending", payload="{}", created_at=now - timedelta(days=30)),
+        ])
+        await db.commit()
+
+    assert await OutboxRelay(payment_db, FakeRabbitMQ()).purge_published() == 1
+    assert [event.event_type for event in await load_events(payment_db)] == ["recent", "pending"]
@@ -0,0 +1,120 @@
+import base64
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from shared.exceptions import ValidationException
+from payment_service.app.models.payment import Payment, PaymentStatus
+from payment_service.app.services.payment import PaymentService, decode_cursor, encode_cursor
+
+BASE = datetime(2024, 5, 1, 12, 0, 0)
+
+
+def test_cursor_round_trip():
+    payment = Payment(id=uuid.uuid4(), created_at=BASE + timedelta(microseconds=123))
+    cursor = encode_cursor(payment)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (payment.created_at, payment.id)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-base64!",
+    base64.urlsafe_b64encode(b"no-separator").decode(),
+    base64.urlsafe_b64encode(b"2024-05-01T12:00:00|not-a-uuid").decode(),
+    base64.urlsafe_b64encode(f"yesterday|{uuid.uuid4()}".encode()).decode(),
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+])
+def test_invalid_cursor_is_a_validation_error(cursor):
+    with pytest.raises(ValidationException):
+        decode_cursor(cursor)
+
+
+async def seed(session_factory, count: int, user_id="u1", same_time_every=3, **values) -> list:
+    """count ta to'lov; har same_time_every tasi bir xil created_at (tie - id hal qiladi)"""
+    payments = [
+        Payment(
+            id=uuid.uuid4(), user_id=user_id, order_id=f"o{n}", amount_minor=100 + n,
+            currency=values.get("currency", "USD"), status=values.get("status", PaymentStatus.PENDING),
+            payment_method="card", created_at=BASE + timedelta(seconds=n // same_time_every)
+        )
+        for n in range(count)
+    ]
+    async with session_factory() as db:
+        db.add_all(payments)
+        await db.commit()
+    return sorted(payments, key=lambda payment: (payment.created_at, payment.id.hex), reverse=True)
+
+
+async def walk(session_factory, page_size: int, **filters) -> list:
+    pages, cursor = [], None
+    while True:
+        async with session_factory() as db:
+            page = await PaymentService(db).list_payments("u1", page_size=page_size, cursor=cursor, **filters)
+        pages.append([item["id"] for item in page["items"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("count, page_size, sizes", [
+    (7, 3, [3, 3, 1]),
+    # Aniq karrali - oxirgi to'liq sahifada next_cursor yo'q, bo'sh sahifa so'ralmaydi
+    (6, 3, [3, 3]),
+    (3, 5, [3]),
+    (0, 5, [0]),
+])
+async def test_cursor_walk_covers_every_row_once(payment_db, count, page_size, sizes):
+    expected = await seed(payment_db, count)
+    await seed(payment_db, 4, user_id="u2")
+
+    pages = await walk(payment_db, page_size)
+
+    assert [len(page) for page in pages] == sizes
+    assert [payment_id for page in pages for payment_id in page] == [payment.id for payment in expected]
+
+
+@pytest.mark.asyncio
+async def test_cursor_ignores_rows_inserted_above_it(payment_db):
+    expected = await seed(payment_db, 6)
+    async with payment_db() as db:
+        first = await PaymentService(db).list_payments("u1", page_size=3)
+    # Yangi to'lov - keyingi sahifani siljitmaydi (OFFSET dan farqli)
+    async with payment_db() as db:
+        db.add(Payment(
+            id=uuid.uuid4(), user_id="u1", order_id="new", amount_minor=100, currency="USD",
+            status=PaymentStatus.PENDING, payment_method="card", created_at=BASE + timedelta(days=1)
+        ))
+        await db.commit()
+
+    async with payment_db() as db:
+        second = await PaymentService(db).list_payments("u1", page_size=3, cursor=first["next_cursor"])
+    assert [item["id"] for item in second["items"]] == [payment.id for payment in expected[3:]]
+
+
+@pytest.mark.asyncio
+async def test_filters_and_total_apply_with_cursor(payment_db):
+    await seed(payment_db, 5, currency="USD")
+    eur = await seed(payment_db, 4, currency="EUR")
+
+    pages = await walk(payment_db, 3, currency="eur")
+    assert [payment_id for page in pages for payment_id in page] == [payment.id for payment in eur]
+
+    async with payment_db() as db:
+        page = await PaymentService(db).list_payments("u1", page_size=3, currency="EUR", include_total=True)
+    assert page["total"] == 4
+    async with payment_db() as db:
+        page = await PaymentService(db).list_payments("u1", page_size=3)
+    assert page["total"] is None
+
+
+@pytest.mark.asyncio
+async def test_legacy_page_offset(payment_db):
+    expected = await seed(payment_db, 7)
+    async with payment_db() as db:
+        page = await PaymentService(db).list_payments("u1", page=3, page_size=3)
+
+    assert [item["id"] for item in page["items"]] == [expected[6].id]
+    assert page["next_cursor"] is None
@@ -0,0 +1,137 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from shared.security import create_access_token
+from payment_service.app.database.session import get_read_db, get_write_db
+from payment_service.app.main import app
+from payment_service.app.models.outbox import OutboxEvent
+from payment_service.app.models.payment import Payment
+from payment_service.app.schemas.payment import PaymentCreate
+from payment_service.app.services import payment as payment_module
+from payment_service.app.services.payment import PaymentService
+
+pytestmark = pytest.mark.usefixtures("fresh_velocity")
+
+
+def item(order_id: str, amount: float = 10, currency: str = "USD") -> PaymentCreate:
+    return PaymentCreate(order_id=order_id, amount=amount, currency=currency, payment_method="card")
+
+
+async def create_batch(session_factory, items, user_id="u1"):
+    async with session_factory() as db:
+        return await PaymentService(db).create_payments_batch(user_id, items)
+
+
+async def count(session_factory, model) -> int:
+    async with session_factory() as db:
+        return await db.scalar(select(func.count()).select_from(model))
+
+
+@pytest.mark.asyncio
+async def test_batch_reports_per_item_results_in_order(payment_db):
+    async with payment_db() as db:
+        await PaymentService(db).create_payment("u1", item("taken"))
+
+    result = await create_batch(payment_db, [
+        item("o1"), item("taken"), item("o1"), item("o2", currency="EUR"),
+    ])
+
+    assert (result.created, result.rejected) == (2, 2)
+    assert [entry.index for entry in result.items] == [0, 1, 2, 3]
+    assert [entry.status for entry in result.items] == ["created", "rejected", "rejected", "created"]
+    assert result.items[1].error == "Payment for this order already exists"
+    assert result.items[2].error == "Duplicate order_id in batch"
+    assert [result.items[0].payment.order_id, result.items[3].payment.currency] == ["o1", "EUR"]
+    assert result.items[1].payment is None
+    assert await count(payment_db, Payment) == 3
+    assert await count(payment_db, OutboxEvent) == 3
+
+
+@pytest.mark.asyncio
+async def test_batch_velocity_rejects_only_the_exceeding_currency(payment_db):
+    # default limit - 10 ta / daqiqa har valyuta uchun
+    result = await create_batch(payment_db, [item(f"usd-{n}") for n in range(11)] + [item("eur", currency="EUR")])
+
+    assert (result.created, result.rejected) == (1, 11)
+    assert result.items[-1].status == "created"
+    assert all(entry.status == "rejected" and entry.error for entry in result.items[:-1])
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_writes_nothing_and_releases_velocity(payment_db, monkeypatch):
+    async def fail(db, transitions):
+        raise RuntimeError("rollup write failed")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(payment_module.rollups, "apply_transitions", fail)
+        with pytest.raises(RuntimeError):
+            await create_batch(payment_db, [item(f"o{n}") for n in range(10)])
+
+    assert await count(payment_db, Payment) == 0
+    # Limit qaytarilgan - to'liq 10 talik batch yana o'tadi
+    result = await create_batch(payment_db, [item(f"o{n}") for n in range(10)])
+    assert result.created == 10
+
+
+@pytest.mark.asyncio
+async def test_get_by_ids_keeps_request_order_and_reports_missing(payment_db):
+    mine = (await create_batch(payment_db, [item("a"), item("b"), item("c")])).items
+    other = (await create_batch(payment_db, [item("x")], user_id="u2")).items[0].payment
+    unknown = uuid.uuid4()
+    a, b, c = (entry.payment.id for entry in mine)
+
+    async with payment_db() as db:
+        result = await PaymentService(db).get_payments_by_ids("u1", [c, unknown, a, c, other.id])
+
+    assert [entry["id"] for entry in result["items"]] == [c, a]
+    assert result["missing"] == [unknown, other.id]
+    assert (result["total"], result["page_size"]) == (2, 4)
+
+
+@pytest.fixture
+def client(payment_db):
+    async def session():
+        async with payment_db() as db:
+            yield db
+
+    app.dependency_overrides[get_read_db] = session
+    app.dependency_overrides[get_write_db] = session
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_read_db, None)
+    app.dependency_overrides.pop(get_write_db, None)
+
+
+HEADERS = {"Authorization": f"Bearer {create_access_token({'sub': 'u1'})}"}
+
+
+def test_http_batch_and_multi_get(client):
+    response = client.post("/api/v1/payments/batch", headers=HEADERS, json={"items": [
+        {"order_id": "o1", "amount": 5, "payment_method": "card"},
+        {"order_id": "o1", "amount": 5, "payment_method": "card"},
+    ]})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["created"], body["rejected"]) == (1, 1)
+    payment_id = body["items"][0]["payment"]["id"]
+    unknown = str(uuid.uuid4())
+
+    response = client.get("/api/v1/payments", headers=HEADERS, params=[("ids", f"{unknown}, {payment_id}"), ("ids", payment_id)])
+    assert response.status_code == 200
+    body = response.json()
+    assert [entry["id"] for entry in body["items"]] == [payment_id]
+    assert body["missing"] == [unknown]
+
+
+@pytest.mark.parametrize("ids", [["not-a-uuid"], [",".join(str(uuid.uuid4()) for _ in range(101))]])
+def test_http_multi_get_rejects_bad_ids(client, ids):
+    response = client.get("/api/v1/payments", headers=HEADERS, params=[("ids", value) for value in ids])
+    assert response.status_code == 400
+
+
+def test_http_batch_size_is_bounded(client):
+    items = [{"order_id": f"o{n}", "amount": 1, "payment_method": "card"} for n in range(501)]
+    assert client.post("/api/v1/payments/batch", headers=HEADERS, json={"items": items}).status_code == 422
+    assert client.post("/api/v1/payments/batch", headers=HEADERS, json={"items": []}).status_code == 422
@@ -0,0 +1,194 @@
+import uuid
+
+import pytest
+
+from shared.exceptions import ServiceUnavailableException, ValidationException
+from payment_service.app import providers
+from payment_service.app.models.payment import Payment, PaymentStatus
+from payment_service.app.providers import MockProvider, PaymentProvider, ProviderError, ProviderResult
+from payment_service.app.services import payment as payment_module
+from payment_service.app.services.payment import PaymentService
+
+
+def payment(amount_minor=1000, currency="USD", **values) -> Payment:
+    return Payment(id=uuid.uuid4(), user_id="u1", order_id="o1", amount_minor=amount_minor,
+                   currency=currency, status=PaymentStatus.PENDING, payment_method="mock", **values)
+
+
+# ===== MOCK PROVIDER =====
+
+@pytest.mark.asyncio
+async def test_mock_outcomes_are_deterministic_per_seed():
+    payments = [payment() for _ in range(200)]
+    first = MockProvider(seed="s1", decline_rate=0.3, processing_rate=0.2)
+    second = MockProvider(seed="s1", decline_rate=0.3, processing_rate=0.2)
+    other = MockProvider(seed="s2", decline_rate=0.3, processing_rate=0.2)
+
+    outcomes = [(await first.submit(p)).status for p in payments]
+    assert outcomes == [(await second.get_status(p)).status for p in payments]
+    assert outcomes != [(await other.submit(p)).status for p in payments]
+    assert 0.2 < outcomes.count(PaymentStatus.FAILED) / len(outcomes) < 0.4
+    assert 0.1 < outcomes.count(None) / len(outcomes) < 0.3
+
+
+@pytest.mark.asyncio
+async def test_mock_binds_transaction_to_payment():
+    provider = MockProvider()
+    submitted = payment(amount_minor=4200, currency="EUR")
+
+    result = await provider.submit(submitted)
+    assert result.provider_transaction_id == f"mock_{submitted.id.hex}"
+    assert (result.reference, result.amount_minor, result.currency) == (str(submitted.id), 4200, "EUR")
+
+    statuses = await provider.get_statuses([result.provider_transaction_id, "mock_unknown"])
+    assert statuses[result.provider_transaction_id] == result
+    assert statuses["mock_unknown"].reference is None
+    assert provider.requests == 2
+
+
+@pytest.mark.asyncio
+async def test_mock_simulated_errors():
+    with pytest.raises(ProviderError):
+        await MockProvider(error_rate=1.0).submit(payment())
+    provider = MockProvider.from_config("test", {"decline_rate": 1, "seed": "x"})
+    assert (provider.name, provider.seed) == ("test", "x")
+    assert (await provider.submit(payment())).error_message == "card_declined"
+
+
+# ===== CONFIRM VERIFICATION =====
+
+class StaticProvider(PaymentProvider):
+    """get_statuses har doim berilgan natijani qaytaradi"""
+
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+
+    async def submit(self, payment):
+        raise NotImplementedError
+
+    async def get_status(self, payment):
+        raise NotImplementedError
+
+    async def get_statuses(self, transaction_ids):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return {transaction_id: self.result for transaction_id in transaction_ids if self.result}
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = {}
+    monkeypatch.setattr(providers, "_registry", registry)
+    monkeypatch.setattr(payment_module.settings, "PROVIDER_VERIFY_CONFIRM", True)
+    return registry
+
+
+async def stored(session_factory, **values) -> Payment:
+    record = payment(**values)
+    async with session_factory() as db:
+        db.add(record)
+        await db.commit()
+    return record
+
+
+async def verify(session_factory, record, target=PaymentStatus.COMPLETED, transaction_id="txn-1", user_id="u1"):
+    async with session_factory() as db:
+        await PaymentService(db)._verify_with_provider(record.id, user_id, target, transaction_id)
+
+
+def matching(record, status=PaymentStatus.COMPLETED, **overrides) -> ProviderResult:
+    values = dict(provider_transaction_id="txn-1", reference=str(record.id),
+                  amount_minor=record.amount_minor, currency=record.currency.lower())
+    values.update(overrides)
+    return ProviderResult(status, **values)
+
+
+@pytest.mark.asyncio
+async def test_matching_provider_transaction_is_accepted(payment_db, registry):
+    record = await stored(payment_db)
+    registry["mock"] = StaticProvider(matching(record))
+
+    await verify(payment_db, record)
+    assert registry["mock"].calls == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("overrides", [
+    {"reference": str(uuid.uuid4())},
+    {"reference": None},
+    {"amount_minor": 1},
+    {"currency": "EUR"},
+])
+async def test_transaction_of_another_payment_is_rejected(payment_db, registry, overrides):
+    record = await stored(payment_db)
+    registry["mock"] = StaticProvider(matching(record, **overrides))
+
+    with pytest.raises(ValidationException) as error:
+        await verify(payment_db, record)
+    assert error.value.message == "Provider transaction does not match payment"
+
+
+@pytest.mark.asyncio
+async def test_transaction_from_cheaper_mock_payment_is_rejected(payment_db, registry):
+    provider = MockProvider()
+    registry["mock"] = provider
+    cheap = await stored(payment_db, amount_minor=100)
+    expensive = await stored(payment_db, amount_minor=100000)
+    cheap_transaction = (await provider.submit(cheap)).provider_transaction_id
+
+    await verify(payment_db, cheap, transaction_id=cheap_transaction)
+    with pytest.raises(ValidationException):
+        await verify(payment_db, expensive, transaction_id=cheap_transaction)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("reported, target", [
+    (PaymentStatus.FAILED, PaymentStatus.COMPLETED),
+    (None, PaymentStatus.COMPLETED),
+    (PaymentStatus.COMPLETED, PaymentStatus.FAILED),
+])
+async def test_status_must_match_provider(payment_db, registry, reported, target):
+    record = await stored(payment_db)
+    registry["mock"] = StaticProvider(matching(record, status=reported))
+
+    with pytest.raises(ValidationException) as error:
+        await verify(payment_db, record, target=target)
+    assert error.value.field == "status"
+
+
+@pytest.mark.asyncio
+async def test_unknown_transaction_and_provider_errors(payment_db, registry):
+    record = await stored(payment_db)
+    registry["mock"] = StaticProvider(None)
+    with pytest.raises(ValidationException, match="Unknown provider transaction"):
+        await verify(payment_db, record)
+
+    registry["mock"] = StaticProvider(error=ProviderError("timeout"))
+    with pytest.raises(ServiceUnavailableException):
+        await verify(payment_db, record)
+
+
+@pytest.mark.asyncio
+async def test_stored_transaction_id_cannot_be_swapped(payment_db, registry):
+    record = await stored(payment_db, provider_transaction_id="txn-original")
+    registry["mock"] = StaticProvider(matching(record))
+
+    with pytest.raises(ValidationException):
+        await verify(payment_db, record, transaction_id="txn-1")
+    assert registry["mock"].calls == 0
+
+
+@pytest.mark.asyncio
+async def test_verification_skipped_without_adapter_or_when_disabled(payment_db, registry, monkeypatch):
+    record = await stored(payment_db)
+    await verify(payment_db, record)
+
+    registry["mock"] = StaticProvider(error=AssertionError("must not be called"))
+    monkeypatch.setattr(payment_module.settings, "PROVIDER_VERIFY_CONFIRM", False)
+    await verify(payment_db, record)
+    # Boshqa userning to'lovi - tekshiruv yo'q, transition NotFound beradi
+    monkeypatch.setattr(payment_module.settings, "PROVIDER_VERIFY_CONFIRM", True)
+    await verify(payment_db, record, user_id="u2")
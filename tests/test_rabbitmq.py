@@ -0,0 +1,132 @@
+import asyncio
+
+import aio_pika
+import pytest
+import pytest_asyncio
+from aio_pika.pool import Pool
+
+from shared.exceptions import ServiceUnavailableException
+from payment_service.app.services.rabbitmq import PAYMENT_EVENTS_EXCHANGE, RabbitMQClient
+
+
+class FakeExchange:
+    def __init__(self, channel, name):
+        self.channel = channel
+        self.name = name
+
+    async def publish(self, message, routing_key):
+        await asyncio.sleep(0)
+        if self.channel.connection.fail:
+            raise aio_pika.exceptions.DeliveryError(None, None)
+        self.channel.connection.published.append((self.channel, routing_key, message))
+
+
+class FakeChannel:
+    def __init__(self, connection, publisher_confirms):
+        self.connection = connection
+        self.publisher_confirms = publisher_confirms
+        self.declared = []
+        self.is_closed = False
+
+    async def close(self):
+        self.is_closed = True
+
+    async def declare_exchange(self, name, exchange_type, durable):
+        self.declared.append((name, exchange_type, durable))
+        return FakeExchange(self, name)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.is_closed = False
+        self.fail = False
+        self.channels = []
+        self.published = []
+
+    async def channel(self, publisher_confirms=False):
+        channel = FakeChannel(self, publisher_confirms)
+        self.channels.append(channel)
+        return channel
+
+    async def close(self):
+        self.is_closed = True
+
+
+@pytest_asyncio.fixture
+async def client():
+    # Pool event loop ichida yaratiladi
+    client = RabbitMQClient(url="amqp://test", pool_size=2)
+    client.connection = FakeConnection()
+    client.channel_pool = Pool(client._create_channel, max_size=client.pool_size)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_publish_before_connect_is_unavailable():
+    client = RabbitMQClient(url="amqp://test")
+    assert client.is_connected is False
+    with pytest.raises(ServiceUnavailableException):
+        await client.publish("payment.created", b"{}")
+    with pytest.raises(ServiceUnavailableException):
+        await client.publish_many([("payment.created", b"{}", {})])
+
+
+@pytest.mark.asyncio
+async def test_exchange_is_declared_once_per_channel(client):
+    for n in range(10):
+        await client.publish("payment.created", f'{{"n": {n}}}'.encode())
+
+    connection = client.connection
+    assert len(connection.published) == 10
+    assert all(channel.publisher_confirms for channel in connection.channels)
+    assert all(
+        channel.declared == [(PAYMENT_EVENTS_EXCHANGE, aio_pika.ExchangeType.TOPIC, True)]
+        for channel in connection.channels
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_publishes_are_bounded_by_pool_size(client):
+    await asyncio.gather(*[client.publish("payment.created", b"{}") for _ in range(20)])
+
+    assert len(client.connection.published) == 20
+    assert 1 <= len(client.connection.channels) <= client.pool_size
+
+
+@pytest.mark.asyncio
+async def test_publish_many_sends_persistent_messages_with_kwargs(client):
+    sent = await client.publish_many(
+        ("payment.created", f"body-{n}".encode(), {"message_id": str(n)}) for n in range(3)
+    )
+
+    assert sent == 3
+    assert await client.publish_many([]) == 0
+    published = client.connection.published
+    assert len({channel for channel, _, _ in published}) == 1
+    assert [(key, message.body, message.message_id) for _, key, message in published] == [
+        ("payment.created", f"body-{n}".encode(), str(n)) for n in range(3)
+    ]
+    assert all(message.delivery_mode == aio_pika.DeliveryMode.PERSISTENT for _, _, message in published)
+    assert all(message.content_type == "application/json" for _, _, message in published)
+
+
+@pytest.mark.asyncio
+async def test_publish_many_raises_when_a_confirm_fails(client):
+    client.connection.fail = True
+    with pytest.raises(aio_pika.exceptions.DeliveryError):
+        await client.publish_many([("payment.created", b"{}", {})] * 3)
+
+    # Channel pool ga qaytadi - keyingi publish ishlaydi
+    client.connection.fail = False
+    await client.publish("payment.created", b"{}")
+    assert len(client.connection.published) == 1
+
+
+@pytest.mark.asyncio
+async def test_close_clears_exchange_cache(client):
+    await client.publish("payment.created", b"{}")
+    assert client._exchanges
+
+    await client.close()
+    assert client._exchanges == {}
+    assert client.is_connected is False
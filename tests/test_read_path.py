@@ -0,0 +1,105 @@
+import json
+import uuid
+from datetime import datetime
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from shared.exceptions import NotFoundException
+from shared.security import create_access_token
+from payment_service.app.database.session import get_read_db
+from payment_service.app.main import app
+from payment_service.app.models.payment import Payment, PaymentStatus
+from payment_service.app.schemas.payment import PaymentResponse
+from payment_service.app.services.payment import RESPONSE_COLUMNS, PaymentService, row_to_response
+
+PAYMENTS = [
+    dict(amount_minor=1, status=PaymentStatus.PENDING),
+    dict(amount_minor=1234, status=PaymentStatus.COMPLETED, provider_transaction_id="txn-1",
+         completed_at=datetime(2024, 5, 1, 12, 0, 1, 500), description="order #1"),
+    dict(amount_minor=99999999, status=PaymentStatus.FAILED, error_message="card_declined", version=4),
+    dict(amount_minor=10, status=PaymentStatus.REFUNDED, currency="UZS"),
+]
+
+
+async def seed(session_factory) -> list:
+    payments = [
+        Payment(
+            id=uuid.uuid4(), user_id="u1", order_id=f"o{n}", payment_method="card",
+            created_at=datetime(2024, 5, 1, 12, 0, n, 123456), updated_at=datetime(2024, 5, 2, 8, 30),
+            **{"currency": "USD", "version": 1, **values}
+        )
+        for n, values in enumerate(PAYMENTS)
+    ]
+    async with session_factory() as db:
+        db.add_all(payments)
+        await db.commit()
+    return payments
+
+
+async def orm_and_rows(session_factory):
+    async with session_factory() as db:
+        orm = {payment.id: payment for payment in await db.scalars(select(Payment))}
+        rows = (await db.execute(select(*RESPONSE_COLUMNS))).all()
+    return orm, rows
+
+
+def test_projection_columns_follow_response_model():
+    assert [column.key for column in RESPONSE_COLUMNS] == list(PaymentResponse.model_fields)
+
+
+@pytest.mark.asyncio
+async def test_row_to_response_matches_payment_response(payment_db):
+    await seed(payment_db)
+    orm, rows = await orm_and_rows(payment_db)
+
+    assert len(rows) == len(PAYMENTS)
+    for row in rows:
+        data = row_to_response(row)
+        expected = PaymentResponse.from_orm(orm[row.id])
+
+        assert list(data) == list(PaymentResponse.model_fields)
+        assert PaymentResponse.model_validate(data) == expected
+        # orjson chiqishi response_model orqali serialize qilingani bilan bir xil
+        assert json.loads(orjson.dumps(data)) == json.loads(expected.model_dump_json())
+
+
+@pytest.fixture
+def client(payment_db):
+    async def session():
+        async with payment_db() as db:
+            yield db
+
+    app.dependency_overrides[get_read_db] = session
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_read_db, None)
+
+
+def bearer(user_id: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': user_id})}"}
+
+
+@pytest.mark.asyncio
+async def test_http_reads_serialize_like_the_response_model(payment_db, client):
+    payments = await seed(payment_db)
+    orm, _ = await orm_and_rows(payment_db)
+    expected = {str(payment_id): json.loads(PaymentResponse.from_orm(payment).model_dump_json()) for payment_id, payment in orm.items()}
+
+    for payment in payments:
+        response = client.get(f"/api/v1/payments/{payment.id}", headers=bearer("u1"))
+        assert response.status_code == 200
+        assert response.json() == expected[str(payment.id)]
+
+    listed = client.get("/api/v1/payments", headers=bearer("u1")).json()["items"]
+    assert {item["id"]: item for item in listed} == expected
+
+    assert client.get(f"/api/v1/payments/{payments[0].id}", headers=bearer("u2")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_get_payment_missing_raises_not_found(payment_db):
+    async with payment_db() as db:
+        with pytest.raises(NotFoundException):
+            await PaymentService(db).get_payment(uuid.uuid4(), "u1")
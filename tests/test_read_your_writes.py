@@ -0,0 +1,69 @@
+import time
+
+import pytest
+from fastapi import Response
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from payment_service.app.database.replicas import STICKY_COOKIE, STICKY_HEADER, ReplicaRouter
+from payment_service.app.database.session import async_engine, get_write_db, replica_router
+
+SECRET = "test-secret"
+
+
+def pod() -> ReplicaRouter:
+    """Alohida process (pod) dagi router - umumiy holat faqat SECRET"""
+    router = ReplicaRouter(
+        create_async_engine("sqlite+aiosqlite://"),
+        {"replica0": create_async_engine("sqlite+aiosqlite://")},
+        sticky_seconds=10,
+        secret=SECRET
+    )
+    router.replicas[0].healthy = True
+    return router
+
+
+def test_token_from_one_pod_is_honoured_by_another():
+    pod_a, pod_b = pod(), pod()
+    token = pod_a.sticky_token("u1")
+
+    assert pod_b.read_engine("u1") is pod_b.replicas[0].engine
+    assert pod_b.read_engine("u1", token) is pod_b.primary
+
+
+def test_token_is_bound_to_user_and_signature():
+    pod_a, pod_b = pod(), pod()
+    token = pod_a.sticky_token("u1")
+    until, _, signature = token.partition(".")
+
+    assert pod_b.read_engine("u2", token) is pod_b.replicas[0].engine
+    assert pod_b.read_engine("u1", f"{int(until) + 60000}.{signature}") is pod_b.replicas[0].engine
+    assert pod_b.read_engine("u1", "garbage") is pod_b.replicas[0].engine
+
+    other_secret = ReplicaRouter(pod_b.primary, sticky_seconds=10, secret="other")
+    assert not other_secret.is_sticky("u1", token)
+
+
+def test_token_expires(monkeypatch):
+    router = pod()
+    token = router.sticky_token("u1")
+    monkeypatch.setattr(time, "time", lambda: 10 ** 12)
+    assert router.read_engine("u1", token) is router.replicas[0].engine
+
+
+@pytest.mark.asyncio
+async def test_write_session_issues_token_on_commit():
+    user_id = "ryw-user"
+    response = Response()
+    dependency = get_write_db(response, user_id)
+    db = await dependency.__anext__()
+    assert STICKY_HEADER not in response.headers
+
+    # Commit response yuborilishidan oldin - dependency hali yopilmagan
+    await db.commit()
+    await db.commit()
+    token = response.headers[STICKY_HEADER]
+    assert replica_router.read_engine(user_id, token) is async_engine
+    cookies = response.headers.getlist("set-cookie")
+    assert len(cookies) == 1 and cookies[0].startswith(f"{STICKY_COOKIE}={token}")
+
+    await dependency.aclose()
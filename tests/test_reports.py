@@ -0,0 +1,43 @@
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from shared.security import create_access_token
+from payment_service.app.database.session import get_read_db
+from payment_service.app.main import app
+from payment_service.app.services import rollups
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def report(db, date_from, date_to, currency):
+        return []
+
+    async def no_db():
+        yield None
+
+    monkeypatch.setattr(rollups, "get_daily_report", report)
+    app.dependency_overrides[get_read_db] = no_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_read_db, None)
+
+
+def headers(**claims) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'u1', **claims})}"}
+
+
+def test_daily_report_requires_admin_role(client):
+    params = {"date_from": date.today().isoformat()}
+
+    assert client.get("/api/v1/reports/payments/daily", params=params).status_code == 401
+    response = client.get("/api/v1/reports/payments/daily", params=params, headers=headers())
+    assert response.status_code == 403
+    assert response.json()["error"] == "FORBIDDEN"
+    assert client.get(
+        "/api/v1/reports/payments/daily", params=params, headers=headers(roles=["support"])
+    ).status_code == 403
+
+    response = client.get("/api/v1/reports/payments/daily", params=params, headers=headers(roles=["admin"]))
+    assert response.status_code == 200
+    assert response.json()["items"] == []
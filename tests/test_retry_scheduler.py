@@ -0,0 +1,196 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from payment_service.app import providers
+from payment_service.app.models.outbox import OutboxEvent
+from payment_service.app.models.payment import Payment, PaymentStatus
+from payment_service.app.providers import MockProvider, ProviderError, ProviderResult
+from payment_service.app.services import retry_policy
+from payment_service.app.services.retry_policy import utc_now
+from payment_service.app.services.retry_scheduler import RetryScheduler
+
+settings = retry_policy.settings
+
+
+class BrokenProvider(MockProvider):
+    async def get_statuses(self, transaction_ids):
+        raise ProviderError("provider timeout")
+
+
+@pytest.fixture(autouse=True)
+def mock_providers(monkeypatch):
+    monkeypatch.setattr(providers, "_registry", {
+        "declines": MockProvider("declines", decline_rate=1.0),
+        "approves": MockProvider("approves"),
+        "undecided": MockProvider("undecided", processing_rate=1.0),
+        "broken": BrokenProvider("broken"),
+    })
+
+
+async def add_payment(session_factory, status, payment_method="approves", due=True, **values) -> Payment:
+    payment = Payment(
+        id=uuid.uuid4(), user_id="u1", order_id="o1", amount_minor=1000, currency="USD",
+        status=status, payment_method=payment_method, version=1,
+        next_attempt_at=datetime.utcnow() + (timedelta(seconds=-5) if due else timedelta(hours=1)),
+        **values
+    )
+    async with session_factory() as db:
+        db.add(payment)
+        await db.commit()
+    return payment
+
+
+async def load(session_factory, payment_id) -> Payment:
+    async with session_factory() as db:
+        return await db.get(Payment, payment_id)
+
+
+async def delay_of(session_factory, payment: Payment) -> float:
+    """next_attempt_at - DB now (sekund)"""
+    async with session_factory() as db:
+        now = await db.scalar(select(utc_now()))
+    return (payment.next_attempt_at - now).total_seconds()
+
+
+async def events(session_factory) -> list:
+    async with session_factory() as db:
+        return list(await db.scalars(select(OutboxEvent.event_type).order_by(OutboxEvent.id)))
+
+
+@pytest.mark.asyncio
+async def test_claim_takes_due_failed_and_processing_under_lease(postgres_db):
+    failed = await add_payment(postgres_db, PaymentStatus.FAILED)
+    processing = await add_payment(postgres_db, PaymentStatus.PROCESSING)
+    await add_payment(postgres_db, PaymentStatus.FAILED, due=False)
+    await add_payment(postgres_db, PaymentStatus.PENDING)
+    await add_payment(postgres_db, PaymentStatus.COMPLETED)
+
+    scheduler = RetryScheduler(postgres_db, batch_size=10)
+    claimed = await scheduler.claim()
+
+    assert {payment.id for payment in claimed} == {failed.id, processing.id}
+    for payment in claimed:
+        assert await delay_of(postgres_db, payment) == pytest.approx(settings.RETRY_LEASE_SECONDS, abs=5)
+    # Lease davomida boshqa worker olmaydi
+    assert await scheduler.claim() == []
+
+
+@pytest.mark.asyncio
+async def test_claim_respects_batch_size_oldest_first(postgres_db):
+    payments = [await add_payment(postgres_db, PaymentStatus.FAILED) for _ in range(3)]
+
+    claimed = await RetryScheduler(postgres_db, batch_size=2).claim()
+    # RETURNING tartibi kafolatlanmagan - to'plam sifatida
+    assert {payment.id for payment in claimed} == {payment.id for payment in payments[:2]}
+
+
+@pytest.mark.asyncio
+async def test_failed_retry_backs_off_exponentially(postgres_db):
+    payment = await add_payment(postgres_db, PaymentStatus.FAILED, payment_method="declines", retry_count=2)
+
+    assert await RetryScheduler(postgres_db).process_batch() == 1
+
+    payment = await load(postgres_db, payment.id)
+    assert payment.status == PaymentStatus.FAILED
+    assert payment.retry_count == 3
+    assert payment.version == 3
+    assert payment.error_message == "card_declined"
+    assert await delay_of(postgres_db, payment) == pytest.approx(settings.RETRY_BASE_DELAY * 2 ** 3, abs=5)
+    assert await events(postgres_db) == ["payment.processing", "payment.failed"]
+
+
+@pytest.mark.asyncio
+async def test_backoff_is_capped(postgres_db, monkeypatch):
+    monkeypatch.setattr(settings, "RETRY_MAX_DELAY", 45)
+    payment = await add_payment(postgres_db, PaymentStatus.FAILED, payment_method="declines", retry_count=2)
+
+    await RetryScheduler(postgres_db).process_batch()
+
+    assert await delay_of(postgres_db, await load(postgres_db, payment.id)) == pytest.approx(45, abs=5)
+
+
+@pytest.mark.asyncio
+async def test_exhausted_retries_leave_the_queue(postgres_db):
+    payment = await add_payment(
+        postgres_db, PaymentStatus.FAILED, payment_method="declines", retry_count=settings.RETRY_MAX_ATTEMPTS - 1
+    )
+
+    await RetryScheduler(postgres_db).process_batch()
+
+    payment = await load(postgres_db, payment.id)
+    assert (payment.status, payment.retry_count) == (PaymentStatus.FAILED, settings.RETRY_MAX_ATTEMPTS)
+    assert payment.next_attempt_at is None
+
+
+@pytest.mark.asyncio
+async def test_successful_retry_completes(postgres_db):
+    payment = await add_payment(postgres_db, PaymentStatus.FAILED, retry_count=1)
+
+    await RetryScheduler(postgres_db).process_batch()
+
+    payment = await load(postgres_db, payment.id)
+    assert payment.status == PaymentStatus.COMPLETED
+    assert payment.provider_transaction_id == f"mock_{payment.id.hex}"
+    assert payment.completed_at is not None
+    assert payment.next_attempt_at is None
+    assert await events(postgres_db) == ["payment.processing", "payment.completed"]
+
+
+@pytest.mark.asyncio
+async def test_undecided_poll_does_not_spend_retry_budget(postgres_db):
+    payment = await add_payment(
+        postgres_db, PaymentStatus.PROCESSING, payment_method="undecided",
+        provider_transaction_id="txn-1", retry_count=1
+    )
+
+    await RetryScheduler(postgres_db).process_batch()
+
+    polled = await load(postgres_db, payment.id)
+    assert (polled.status, polled.retry_count, polled.version) == (PaymentStatus.PROCESSING, 1, 1)
+    assert await delay_of(postgres_db, polled) == pytest.approx(settings.PROCESSING_POLL_DELAY, abs=5)
+    assert await events(postgres_db) == []
+
+
+@pytest.mark.asyncio
+async def test_poll_completes_processing_payment(postgres_db):
+    payment = await add_payment(postgres_db, PaymentStatus.PROCESSING, provider_transaction_id="txn-1")
+
+    await RetryScheduler(postgres_db).process_batch()
+
+    payment = await load(postgres_db, payment.id)
+    assert (payment.status, payment.version, payment.next_attempt_at) == (PaymentStatus.COMPLETED, 2, None)
+    assert await events(postgres_db) == ["payment.completed"]
+
+
+@pytest.mark.asyncio
+async def test_poll_error_reschedules_with_error(postgres_db):
+    payment = await add_payment(postgres_db, PaymentStatus.PROCESSING, payment_method="broken", provider_transaction_id="txn-1")
+
+    await RetryScheduler(postgres_db).process_batch()
+
+    payment = await load(postgres_db, payment.id)
+    assert (payment.status, payment.retry_count) == (PaymentStatus.PROCESSING, 0)
+    assert payment.error_message == "provider timeout"
+    assert await delay_of(postgres_db, payment) == pytest.approx(settings.PROCESSING_POLL_DELAY, abs=5)
+
+
+@pytest.mark.asyncio
+async def test_result_for_superseded_payment_is_dropped(postgres_db):
+    payment = await add_payment(postgres_db, PaymentStatus.PROCESSING, provider_transaction_id="txn-1")
+    scheduler = RetryScheduler(postgres_db)
+    (claimed,) = await scheduler.claim()
+
+    # Webhook bizdan oldin yakunladi
+    async with postgres_db() as db:
+        await db.execute(
+            update(Payment).where(Payment.id == payment.id).values(status=PaymentStatus.CANCELLED, version=2)
+        )
+        await db.commit()
+    await scheduler._finish(claimed, "poll", ProviderResult(PaymentStatus.COMPLETED, "txn-1"))
+
+    payment = await load(postgres_db, payment.id)
+    assert (payment.status, payment.version) == (PaymentStatus.CANCELLED, 2)
+    assert await events(postgres_db) == []
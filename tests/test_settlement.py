@@ -0,0 +1,77 @@
+import io
+
+import pytest
+
+from payment_service.app.models.payment import PaymentStatus
+from payment_service.app.services.settlement import (
+    AMOUNT_DRIFT, MISSING_IN_DB, MISSING_IN_SETTLEMENT, STATUS_DRIFT,
+    ReconciliationSummary, SettlementOrderError, group_settlements, merge_join, read_settlements
+)
+
+
+def settlements(text: str):
+    return group_settlements(read_settlements(io.StringIO(text)))
+
+
+async def payments(rows):
+    for row in rows:
+        yield row
+
+
+async def reconcile(text: str, rows) -> tuple:
+    summary = ReconciliationSummary()
+    mismatches = [mismatch async for mismatch in merge_join(settlements(text), payments(rows), summary)]
+    return [(kind, transaction_id) for kind, transaction_id, *_ in mismatches], summary
+
+
+@pytest.mark.asyncio
+async def test_matches_and_reports_both_sides():
+    text = (
+        "provider_transaction_id,amount,status\n"
+        "a,10.00,settled\n"
+        "b,5.00,settled\n"
+        "d,1.00,settled\n"
+    )
+    rows = [
+        ("a", "p-a", 1000, PaymentStatus.COMPLETED),
+        ("b", "p-b", 700, PaymentStatus.COMPLETED),
+        ("c", "p-c", 300, PaymentStatus.COMPLETED),
+        ("e", "p-e", 300, PaymentStatus.PENDING),
+    ]
+    mismatches, summary = await reconcile(text, rows)
+    assert mismatches == [(AMOUNT_DRIFT, "b"), (MISSING_IN_SETTLEMENT, "c"), (MISSING_IN_DB, "d")]
+    assert summary.matched == 1
+
+
+@pytest.mark.asyncio
+async def test_sale_and_refund_rows_match_one_payment():
+    text = (
+        "provider_transaction_id,amount,status\n"
+        "a,-10.00,refunded\n"
+        "a,10.00,settled\n"
+        "b,10.00,settled\n"
+    )
+    rows = [
+        ("a", "p-a", 1000, PaymentStatus.REFUNDED),
+        ("b", "p-b", 1000, PaymentStatus.COMPLETED),
+    ]
+    mismatches, summary = await reconcile(text, rows)
+    assert mismatches == []
+    assert summary.matched == 2
+
+
+@pytest.mark.asyncio
+async def test_refund_row_for_completed_payment_is_status_drift():
+    text = (
+        "provider_transaction_id,amount,status\n"
+        "a,10.00,settled\n"
+        "a,10.00,refunded\n"
+    )
+    mismatches, _ = await reconcile(text, [("a", "p-a", 1000, PaymentStatus.COMPLETED)])
+    assert mismatches == [(STATUS_DRIFT, "a")]
+
+
+def test_unsorted_file_is_rejected():
+    text = "provider_transaction_id,amount\nb,1.00\na,1.00\n"
+    with pytest.raises(SettlementOrderError):
+        list(settlements(text))
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from payment_service.app.database.base import Base
+from payment_service.app.models.payment import Payment, PaymentStatus
+from payment_service.app.models.rollup import PaymentRollup
+from payment_service.app.services import rollups
+from payment_service.app.services.state_machine import PaymentStateConflict, transition
+
+# Row lock semantikasi kerak - faqat haqiqiy PostgreSQL da (tashlab yuboriladigan baza!):
+#   TEST_DATABASE_URL=postgresql://postgres@localhost/payments_test pytest tests/test_state_machine.py
+DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+TABLES = [Payment.__table__, PaymentRollup.__table__]
+WORKERS = 40
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL (throwaway PostgreSQL database) is not set")
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine(
+        DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1),
+        pool_size=WORKERS,
+        max_overflow=0
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all, tables=TABLES)
+        await conn.run_sync(Base.metadata.create_all, tables=TABLES)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all, tables=TABLES)
+    await engine.dispose()
+
+
+async def create_payment(session_factory) -> Payment:
+    async with session_factory() as db:
+        payment = Payment(
+            id=uuid.uuid4(),
+            user_id="u1",
+            order_id="order-1",
+            amount_minor=1250,
+            currency="USD",
+            status=PaymentStatus.PENDING,
+            payment_method="card",
+            version=1
+        )
+        db.add(payment)
+        await db.flush()
+        await rollups.apply_transition(db, payment, None)
+        await db.commit()
+        return payment
+
+
+async def hammer(session_factory, payment_id, targets, **kwargs) -> list:
+    """Hamma task bir vaqtda boshlaydi, har biri o'z transactionida"""
+    start = asyncio.Event()
+
+    async def attempt(target):
+        async with session_factory() as db:
+            await start.wait()
+            moved = await transition(db, payment_id, target, **kwargs)
+            await db.commit()
+            return moved
+
+    tasks = [asyncio.create_task(attempt(target)) for target in targets]
+    await asyncio.sleep(0.1)
+    start.set()
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def rollup_counts(session_factory) -> dict:
+    async with session_factory() as db:
+        rows = await db.execute(
+            select(PaymentRollup.status, func.sum(PaymentRollup.payment_count)).group_by(PaymentRollup.status)
+        )
+        return {status: int(count) for status, count in rows.all() if count}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_transitions_with_expected_version_have_one_winner(session_factory):
+    payment = await create_payment(session_factory)
+    targets = [
+        (PaymentStatus.COMPLETED, PaymentStatus.FAILED, PaymentStatus.CANCELLED, PaymentStatus.PROCESSING)[i % 4]
+        for i in range(WORKERS)
+    ]
+
+    results = await hammer(session_factory, payment.id, targets, expected_version=payment.version)
+
+    winners = [result for result in results if isinstance(result, Payment)]
+    conflicts = [result for result in results if isinstance(result, PaymentStateConflict)]
+    assert len(winners) == 1, results
+    assert len(conflicts) == WORKERS - 1, [r for r in results if not isinstance(r, (Payment, PaymentStateConflict))]
+
+    async with session_factory() as db:
+        stored = await db.get(Payment, payment.id)
+    assert stored.version == 2
+    assert stored.status == winners[0].status
+    assert await rollup_counts(session_factory) == {winners[0].status: 1}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_transitions_from_status_have_one_winner(session_factory):
+    payment = await create_payment(session_factory)
+
+    results = await hammer(
+        session_factory, payment.id, [PaymentStatus.COMPLETED] * WORKERS,
+        from_statuses=[PaymentStatus.PENDING]
+    )
+
+    winners = [result for result in results if isinstance(result, Payment)]
+    conflicts = [result for result in results if isinstance(result, PaymentStateConflict)]
+    assert len(winners) == 1
+    assert len(conflicts) == WORKERS - 1
+    assert all(conflict.current == PaymentStatus.COMPLETED for conflict in conflicts)
+
+    async with session_factory() as db:
+        stored = await db.get(Payment, payment.id)
+    assert stored.status == PaymentStatus.COMPLETED
+    assert stored.version == 2
+    assert await rollup_counts(session_factory) == {PaymentStatus.COMPLETED: 1}
@@ -0,0 +1,87 @@
+import pytest
+
+from payment_service.app.services import status_hub as status_hub_module
+from payment_service.app.services.status_hub import FINAL_STATUSES, StatusHub, status_update
+
+
+def event(payment_id="p1", user_id="u1", status="processing", version=2) -> dict:
+    return {"payment_id": payment_id, "user_id": user_id, "status": status, "version": version}
+
+
+@pytest.fixture
+def hub():
+    return StatusHub(queue_size=2, cache_seconds=30, cache_size=2)
+
+
+def drain(queue) -> list:
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+    return items
+
+
+def test_status_update_from_routing_key():
+    assert status_update({"payment_id": "p1", "user_id": "u1"}, "payment.created")["status"] == "pending"
+    assert status_update({"payment_id": "p1"}, "payment.completed")["status"] == "completed"
+    assert status_update({"payment_id": "p1", "status": "failed"}, "payment.updated")["status"] == "failed"
+    assert status_update({"user_id": "u1"}, "payment.created") is None
+
+
+def test_only_statuses_without_outgoing_transitions_are_final():
+    # FAILED qayta urinadi, COMPLETED refund bo'lishi mumkin
+    assert FINAL_STATUSES == {"cancelled", "refunded"}
+
+
+def test_publish_reaches_payment_and_user_subscribers(hub):
+    by_payment = hub.subscribe_payment("p1")
+    by_user = hub.subscribe_user("u1")
+    other = hub.subscribe_payment("p2")
+
+    hub.publish(event(), "payment.processing")
+
+    assert [update["status"] for update in drain(by_payment.queue)] == ["processing"]
+    assert [update["payment_id"] for update in drain(by_user.queue)] == ["p1"]
+    assert drain(other.queue) == []
+
+
+def test_slow_subscriber_keeps_latest_updates(hub):
+    subscription = hub.subscribe_payment("p1")
+    for version in range(1, 5):
+        hub.publish(event(version=version), "payment.processing")
+    assert [update["version"] for update in drain(subscription.queue)] == [3, 4]
+
+
+def test_unsubscribe_removes_queue_and_empty_key(hub):
+    first = hub.subscribe_payment("p1")
+    second = hub.subscribe_payment("p1")
+
+    hub.unsubscribe(first)
+    hub.unsubscribe(first)  # ikkinchi marta - hech narsa
+    hub.publish(event(), "payment.processing")
+    assert drain(first.queue) == []
+    assert len(drain(second.queue)) == 1
+
+    hub.unsubscribe(second)
+    assert "p1" not in hub._by_payment
+
+
+def test_only_final_statuses_are_cached(hub):
+    hub.publish(event(status="failed"), "payment.failed")
+    hub.publish(event(payment_id="p2", status="completed"), "payment.completed")
+    assert hub.final_state("p1") is None
+    assert hub.final_state("p2") is None
+
+    hub.publish(event(payment_id="p2", status="refunded", version=3), "payment.refunded")
+    assert hub.final_state("p2")["version"] == 3
+
+
+def test_final_cache_expires_and_evicts_oldest(hub, monkeypatch):
+    for payment_id in ("p1", "p2", "p3"):
+        hub.publish(event(payment_id=payment_id, status="cancelled"), "payment.cancelled")
+    assert hub.final_state("p1") is None  # cache_size=2
+    assert hub.final_state("p3") is not None
+
+    now = status_hub_module.time.monotonic()
+    monkeypatch.setattr(status_hub_module.time, "monotonic", lambda: now + 31)
+    assert hub.final_state("p3") is None
+    assert "p3" not in hub._final
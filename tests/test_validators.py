@@ -0,0 +1,135 @@
+import pytest
+from pydantic import ValidationError
+
+from payment_service.app.schemas.payment import PaymentCreate
+from payment_service.app.utils.validators import (
+    PREFIX_SPAN, BinInfo, BinTable, bin_key, build_bin_table, luhn_valid
+)
+
+ROWS = [
+    # (start, end, network, country, card_type)
+    ("400000", "400099", "visa", "US", "credit"),
+    ("400500", "400599", "visa", "GB", "debit"),
+    ("51", "51", "mastercard", "", "credit"),
+    ("860000123", "860000456", "uzcard", "UZ", "debit"),
+    ("9860", "9860", "humo", "UZ", ""),
+]
+
+
+@pytest.fixture
+def bin_table(tmp_path):
+    path = str(tmp_path / "bin_table.bin")
+    assert build_bin_table(ROWS, path) == len(ROWS)
+    table = BinTable(path)
+    yield table
+    table.close()
+
+
+@pytest.mark.parametrize("number, valid", [
+    ("4111111111111111", True),
+    ("5555555555554444", True),
+    ("378282246310005", True),
+    ("8600123456789012", True),
+    ("4111111111111112", False),
+    ("411111111111", False),            # 12 xona, checksum noto'g'ri
+    ("41111111111", False),             # 11 xona - juda qisqa
+    ("41111111111111111111", False),    # 20 xona - juda uzun
+    ("4111 1111 1111 1111", False),     # normalize qilinmagan
+    ("", False),
+])
+def test_luhn_valid(number, valid):
+    assert luhn_valid(number) is valid
+
+
+def test_build_bin_table_writes_prefix_index(tmp_path, bin_table):
+    starts = list(bin_table._starts)
+    ends = list(bin_table._ends)
+    assert starts == sorted(starts)
+    assert (starts[0], ends[0]) == (400000000, 400099999)
+    assert (starts[2], ends[2]) == (510000000, 519999999)
+
+    # prefix[p] - p * PREFIX_SPAN dan oldin boshlangan oxirgi range
+    for p in (0, 400000, 400050, 400100, 400499, 400500, 510000, 860000, 999999, 1000000):
+        expected = max([i for i, start in enumerate(starts) if start <= p * PREFIX_SPAN], default=0)
+        assert bin_table._prefix[p] == expected
+
+
+def test_build_bin_table_rejects_overlaps(tmp_path):
+    path = tmp_path / "bin_table.bin"
+    with pytest.raises(ValueError, match="Overlapping"):
+        build_bin_table([("400000", "400099", "visa", "", ""), ("400099", "400100", "visa", "", "")], str(path))
+    with pytest.raises(ValueError, match="Overlapping"):
+        build_bin_table([("4", "4", "visa", "", ""), ("411111", "411111", "visa", "", "")], str(path))
+    assert not path.exists()
+
+
+@pytest.mark.parametrize("number, expected", [
+    # birinchi range chegaralari
+    ("4000000000000002", BinInfo("visa", "credit", "US")),
+    ("4000999999999999", BinInfo("visa", "credit", "US")),
+    # oraliqdagi bo'shliq
+    ("4001000000000000", None),
+    ("4004999999999999", None),
+    ("4005000000000000", BinInfo("visa", "debit", "GB")),
+    # bo'sh country -> None
+    ("5100000000000000", BinInfo("mastercard", "credit", None)),
+    ("5199999999999999", BinInfo("mastercard", "credit", None)),
+    ("5200000000000000", None),
+    # 9 xonali range, bitta 6 xonali prefix ichida
+    ("8600001220000000", None),
+    ("8600001230000000", BinInfo("uzcard", "debit", "UZ")),
+    ("8600004569999999", BinInfo("uzcard", "debit", "UZ")),
+    ("8600004570000000", None),
+    # oxirgi range chegaralari va undan keyin
+    ("9860000000000000", BinInfo("humo", "unknown", "UZ")),
+    ("9860999999999999", BinInfo("humo", "unknown", "UZ")),
+    ("9861000000000000", None),
+    ("9999999999999999", None),
+    # birinchi range dan oldin
+    ("0000000000000000", None),
+    ("3999999999999999", None),
+])
+def test_lookup_boundaries(bin_table, number, expected):
+    assert bin_table.lookup(number) == expected
+
+
+def test_lookup_short_number_is_zero_padded(bin_table):
+    assert bin_key("4005") == 400500000
+    assert bin_table.lookup("4005") == BinInfo("visa", "debit", "GB")
+
+
+def test_empty_table(tmp_path):
+    path = str(tmp_path / "empty.bin")
+    assert build_bin_table([], path) == 0
+    table = BinTable(path)
+    try:
+        assert table.count == 0
+        assert table.lookup("4111111111111111") is None
+        assert table.lookup("0000000000000000") is None
+        assert table.lookup("9999999999999999") is None
+    finally:
+        table.close()
+
+
+def test_bin_table_rejects_foreign_file(tmp_path):
+    path = tmp_path / "not_a_table.bin"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        BinTable(str(path))
+
+
+@pytest.mark.parametrize("payment_method, valid", [
+    ("card", True),
+    ("credit_card", True),
+    ("apple-pay", True),
+    ("credit card", False),
+    ("card/visa", False),
+    ("карта", False),
+])
+def test_payment_method_pattern(payment_method, valid):
+    data = {"order_id": "o1", "amount": 10, "currency": "USD", "payment_method": payment_method}
+    if valid:
+        assert PaymentCreate(**data).payment_method == payment_method
+    else:
+        with pytest.raises(ValidationError):
+            PaymentCreate(**data)
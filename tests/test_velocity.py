@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from shared.exceptions import ValidationException
+from payment_service.app.schemas.payment import PaymentCreate
+from payment_service.app.services import payment as payment_module
+from payment_service.app.services.payment import PaymentService
+from payment_service.app.services.velocity import VelocityLimiter, VelocityLimitExceeded
+
+LIMITS = {
+    "default": {
+        "count_per_minute": 2,
+        "count_per_hour": 100,
+        "amount_per_minute": 1000,
+        "amount_per_hour": 5000,
+    }
+}
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    # Redis ulanmagan - in-process store
+    limiter = VelocityLimiter(dict(LIMITS))
+    monkeypatch.setattr(payment_module, "velocity_limiter", limiter)
+    return limiter
+
+
+class FakeSession:
+    """create_payment uchun yetarli: commit / refresh (yozish kechikishi bilan)"""
+
+    def __init__(self, fail_commit: bool = False):
+        self.fail_commit = fail_commit
+
+    async def commit(self):
+        await asyncio.sleep(0.01)
+        if self.fail_commit:
+            raise RuntimeError("commit failed")
+
+    async def refresh(self, payment):
+        pass
+
+
+def payment_request(order_id: str = "order-1") -> PaymentCreate:
+    return PaymentCreate(order_id=order_id, amount=10, currency="USD", payment_method="card")
+
+
+@pytest.fixture
+def created(monkeypatch):
+    """_add_payment DB siz - yaratilgan order_id lar ro'yxati"""
+    orders = []
+
+    async def add_payment(self, user_id, payment_data):
+        await asyncio.sleep(0)
+        orders.append(payment_data.order_id)
+        return payment_data
+
+    monkeypatch.setattr(PaymentService, "_add_payment", add_payment)
+    monkeypatch.setattr(payment_module.PaymentResponse, "from_orm", staticmethod(lambda payment: payment))
+    return orders
+
+
+@pytest.mark.asyncio
+async def test_reserve_counts_and_release_returns_quota(limiter):
+    first = await limiter.reserve("u1", "USD", 10)
+    await limiter.reserve("u1", "USD", 10)
+    with pytest.raises(VelocityLimitExceeded) as exc:
+        await limiter.reserve("u1", "USD", 10)
+    assert exc.value.kind == "count"
+    assert exc.value.current == 2
+
+    await limiter.release(first)
+    await limiter.reserve("u1", "USD", 10)
+
+    # Boshqa user / valyuta alohida hisoblanadi
+    await limiter.reserve("u2", "USD", 10)
+    await limiter.reserve("u1", "EUR", 10)
+
+
+@pytest.mark.asyncio
+async def test_amount_limit_counts_batch_reservation(limiter):
+    await limiter.reserve("u1", "USD", 900, count=1)
+    with pytest.raises(VelocityLimitExceeded) as exc:
+        await limiter.reserve("u1", "USD", 200)
+    assert exc.value.kind == "amount"
+    await limiter.reserve("u1", "USD", 100)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_burst_cannot_exceed_limit(limiter, created):
+    service = PaymentService(db=FakeSession())
+
+    results = await asyncio.gather(
+        *(service.create_payment("u1", payment_request(f"order-{i}")) for i in range(20)),
+        return_exceptions=True
+    )
+
+    rejected = [result for result in results if isinstance(result, VelocityLimitExceeded)]
+    assert len(created) == LIMITS["default"]["count_per_minute"]
+    assert len(rejected) == 20 - len(created)
+
+
+@pytest.mark.asyncio
+async def test_duplicate_payment_releases_reservation(limiter, monkeypatch):
+    async def duplicate(self, user_id, payment_data):
+        raise ValidationException("Payment for this order already exists", "order_id")
+
+    monkeypatch.setattr(PaymentService, "_add_payment", duplicate)
+    service = PaymentService(db=FakeSession())
+
+    for _ in range(5):
+        with pytest.raises(ValidationException):
+            await service.create_payment("u1", payment_request())
+
+    await limiter.reserve("u1", "USD", 10, count=2)
+
+
+@pytest.mark.asyncio
+async def test_failed_commit_releases_reservation(limiter, created):
+    service = PaymentService(db=FakeSession(fail_commit=True))
+
+    for _ in range(5):
+        with pytest.raises(RuntimeError):
+            await service.create_payment("u1", payment_request())
+
+    await limiter.reserve("u1", "USD", 10, count=2)
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from payment_service.app.services import webhooks
+from payment_service.app.services.webhooks import (
+    SIGNATURE_HEADER,
+    WebhookDispatcher,
+    _EndpointState,
+    sign_payload,
+)
+
+SECRET = "whsec_test"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.received.append((dict(self.headers), body))
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.received = []
+    server.statuses = []
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/hooks"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(webhooks.random, "uniform", lambda low, high: 0)
+
+
+def make_event(payment_id: str, status: str, version: int) -> dict:
+    return {
+        "event": f"payment.{status}",
+        "timestamp": f"2025-03-01T00:00:0{version}",
+        "data": {"payment_id": payment_id, "user_id": "u1", "status": status, "version": version},
+    }
+
+
+def delivered_versions(server) -> list:
+    return [json.loads(body)["data"]["version"] for _, body in server.received]
+
+
+@pytest.mark.asyncio
+async def test_delivery_is_signed_and_retried_on_server_error(stub_server):
+    dispatcher = WebhookDispatcher(session_factory=None)
+    state = _EndpointState("ep1", stub_server.url, SECRET)
+    stub_server.statuses = [500]
+
+    delivered = await dispatcher.enqueue(state, "p1", make_event("p1", "completed", 2))
+    await dispatcher.close()
+
+    assert delivered is True
+    assert delivered_versions(stub_server) == [2, 2]
+    headers, body = stub_server.received[-1]
+    timestamp = int(headers[SIGNATURE_HEADER].split(",")[0][2:])
+    assert headers[SIGNATURE_HEADER] == sign_payload(SECRET, timestamp, body)
+
+
+@pytest.mark.asyncio
+async def test_older_event_after_newer_delivery_is_dropped(stub_server):
+    dispatcher = WebhookDispatcher(session_factory=None)
+    state = _EndpointState("ep1", stub_server.url, SECRET)
+
+    assert await dispatcher.enqueue(state, "p1", make_event("p1", "completed", 3)) is True
+    # Retry queue dan qaytgan eski status va dublikat yuborilmaydi
+    assert await dispatcher.enqueue(state, "p1", make_event("p1", "processing", 2)) is False
+    assert await dispatcher.enqueue(state, "p1", make_event("p1", "completed", 3)) is False
+    # Boshqa to'lov ta'sirlanmaydi
+    assert await dispatcher.enqueue(state, "p2", make_event("p2", "processing", 1)) is True
+    await dispatcher.close()
+
+    assert delivered_versions(stub_server) == [3, 1]
+
+
+@pytest.mark.asyncio
+async def test_pending_events_coalesce_to_latest(stub_server):
+    dispatcher = WebhookDispatcher(session_factory=None)
+    state = _EndpointState("ep1", stub_server.url, SECRET)
+
+    # Yuborilmagan eski statuslar yangisi bilan almashtiriladi
+    first = dispatcher.enqueue(state, "p1", make_event("p1", "processing", 1))
+    second = dispatcher.enqueue(state, "p1", make_event("p1", "failed", 2))
+    third = dispatcher.enqueue(state, "p1", make_event("p1", "completed", 3))
+    results = await asyncio.gather(first, second, third)
+    await dispatcher.close()
+
+    assert delivered_versions(stub_server) == [3]
+    assert results == [True, True, True]
+
+
+@pytest.mark.asyncio
+async def test_half_open_trial_is_released_on_unexpected_error(stub_server, monkeypatch):
+    dispatcher = WebhookDispatcher(session_factory=None)
+    state = _EndpointState("ep1", stub_server.url, SECRET)
+    circuit = state.circuit
+    circuit.failures = circuit.threshold
+    circuit.opened_at = time.monotonic() - circuit.cooldown - 1
+
+    async def broken_acquire():
+        raise RuntimeError("rate limiter failed")
+
+    monkeypatch.setattr(state.bucket, "acquire", broken_acquire)
+    with pytest.raises(RuntimeError):
+        await dispatcher._deliver(state, "p1", make_event("p1", "completed", 1))
+    assert not circuit.half_open
+
+    # Keyingi sinov so'rovi o'tadi va circuit yopiladi
+    monkeypatch.undo()
+    monkeypatch.setattr(webhooks.random, "uniform", lambda low, high: 0)
+    assert await dispatcher._deliver(state, "p1", make_event("p1", "completed", 1)) is True
+    assert circuit.opened_at is None
+    await dispatcher.close()